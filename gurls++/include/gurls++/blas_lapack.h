@@ -188,6 +188,17 @@ float sdot_(int *n, float *x, int *incx, float *y, int *incy);
   */
 void sgemm_(char *transa, char *transb, int *m, int *n, int *k, float *alpha, float *a, int *lda, float *b, int *ldb, float *beta, float *c, int *ldc);
 
+/**
+  * \brief Prototype for Blas SSYRK
+  *
+  * Performs one of the symmetric rank k operations
+  * \f[ C = \alpha A A^T + \beta C\f] or \f[ C = \alpha A^T A + \beta C\f]
+  * where \f$\alpha\f$ and \f$\beta\f$ are scalars, \f$C\f$ is an n by n symmetric matrix
+  * of which only the upper or lower triangular part is referenced,
+  * and \f$A\f$ is an n by k matrix in the first case and a k by n matrix in the second case
+  */
+void ssyrk_(char *uplo, char *trans, int *n, int *k, float *alpha, float *a, int *lda, float *beta, float *c, int *ldc);
+
 /**
   * \brief Prototype for Blas SGEMV
   *
@@ -265,6 +276,17 @@ double ddot_(int *n, double *x, int *incx, double *y, int *incy);
   */
 void dgemm_(char *transa, char *transb, int *m, int *n, int *k, double *alpha, double *a, int *lda, double *b, int *ldb, double *beta, double *c, int *ldc);
 
+/**
+  * \brief Prototype for Blas DSYRK
+  *
+  * Performs one of the symmetric rank k operations
+  * \f[ C = \alpha A A^T + \beta C\f] or \f[ C = \alpha A^T A + \beta C\f]
+  * where \f$\alpha\f$ and \f$\beta\f$ are scalars, \f$C\f$ is an n by n symmetric matrix
+  * of which only the upper or lower triangular part is referenced,
+  * and \f$A\f$ is an n by k matrix in the first case and a k by n matrix in the second case
+  */
+void dsyrk_(char *uplo, char *trans, int *n, int *k, double *alpha, double *a, int *lda, double *beta, double *c, int *ldc);
+
 /**
   * \brief Prototype for Blas DGEMV
   *
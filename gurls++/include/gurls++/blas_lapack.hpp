@@ -144,6 +144,14 @@ void gemm(const CBLAS_TRANSPOSE TransA, const CBLAS_TRANSPOSE TransB,
           const T *B, const int ldb,
           const T beta, T *C, const int ldc);
 
+/**
+  * Template function to call BLAS *SYRK routines
+  */
+template<typename T>
+void syrk(const CBLAS_UPLO Uplo, const CBLAS_TRANSPOSE Trans,
+          const int N, const int K, const T alpha, const T *A, const int lda,
+          const T beta, T *C, const int ldc);
+
 /**
   * Template function to call LAPACK *GEQP3 routines
   */
@@ -40,9 +40,11 @@
  */
 
 // Content: Utility functions used by the primalrecupdatecholesky class,
-// performing the rank-k update of the Cholesky factor R
+// performing the rank-k update and downdate of the Cholesky factor R
 
 #include "gurls++/gmat2d.h"
+#include "gurls++/gmath.h"
+#include "gurls++/exceptions.h"
 
 namespace gurls {
 
@@ -170,4 +172,128 @@ void cholupdate(gMat2D<T>& R, T& x, bool rtrans) {
     delete[] c;
     delete[] s;
 }
-}
\ No newline at end of file
+
+template<typename T>
+void chdd(T* r, int p, const T* x, T* c, T* s) {
+
+    // Performs the rank-1 downdate of the upper Cholesky factor r (stored column-major)
+    // with the input vector x, following LINPACK's dchdd: on exit r'*r equals the
+    // input r'*r - x*x'.
+    //
+    // Arguments:
+    //
+    // r:           Upper Cholesky factor buffer, p x p
+    // p:           Dimension of vector x and order of matrix r
+    // x:           Downdate sample buffer (contiguous, not modified)
+    // c:           Cosines of the transforming rotations
+    // s:           Sines of the transforming rotations
+
+    // Solve r'*a = x, a is stored in s
+    copy(s, x, p);
+    mldivide_squared(r, s, p, p, p, 1, CblasTrans);
+
+    T norm = nrm2(p, s, 1);
+    if(norm >= (T)1.0)
+        throw gException("Cholesky downdate failed: the downdated matrix is not positive definite");
+
+    // Determine the transformations
+    T alpha = sqrt((T)1.0 - norm*norm);
+    for(int i = p-1; i >= 0; --i)
+    {
+        T scale = alpha + std::abs(s[i]);
+        T a = alpha/scale;
+        T b = s[i]/scale;
+        T rnorm = sqrt(a*a + b*b);
+        c[i] = a/rnorm;
+        s[i] = b/rnorm;
+        alpha = scale*rnorm;
+    }
+
+    // Apply the transformations to r, one column at a time
+    for(int j = 0; j < p; ++j)
+    {
+        T* rj = r + j*p;
+        T xx = 0;
+        for(int i = j; i >= 0; --i)
+        {
+            T tmp = c[i]*xx + s[i]*rj[i];
+            rj[i] = c[i]*rj[i] - s[i]*xx;
+            xx = tmp;
+        }
+    }
+}
+
+template<typename T>
+void choldowndate(gMat2D<T>& R, const T& x) {
+
+    const int d = (int) R.cols();
+
+    T* c = new T[d];
+    T* s = new T[d];
+
+    chdd<T>(R.getData(), d, &x, c, s);
+
+    delete[] c;
+    delete[] s;
+}
+
+template<typename T>
+void cholupdaterows(gMat2D<T>& R, const T* X, unsigned long n, const T* weights = NULL) {
+
+    // Rank-n update of R with the rows of the n x d column-major matrix X,
+    // optionally scaling row i by weights[i]
+
+    const int d = (int) R.cols();
+    const int one = 1;
+
+    T* row = new T[d];
+    T* c = new T[d];
+    T* s = new T[d];
+
+    for(unsigned long i = 0; i < n; ++i)
+    {
+        copy(row, X+i, d, one, (int)n);
+        if(weights != NULL)
+            scal(d, weights[i], row, one);
+
+        chud<T>(R.getData(), 0, d, row, 0, 0, 0, 0, 0, c, s, 1, 0);
+    }
+
+    delete[] row;
+    delete[] c;
+    delete[] s;
+}
+
+template<typename T>
+void choldowndaterows(gMat2D<T>& R, const T* X, unsigned long n) {
+
+    // Rank-n downdate of R with the rows of the n x d column-major matrix X
+
+    const int d = (int) R.cols();
+    const int one = 1;
+
+    T* row = new T[d];
+    T* c = new T[d];
+    T* s = new T[d];
+
+    try
+    {
+        for(unsigned long i = 0; i < n; ++i)
+        {
+            copy(row, X+i, d, one, (int)n);
+            chdd<T>(R.getData(), d, row, c, s);
+        }
+    }
+    catch(gException&)
+    {
+        delete[] row;
+        delete[] c;
+        delete[] s;
+        throw;
+    }
+
+    delete[] row;
+    delete[] c;
+    delete[] s;
+}
+}
@@ -0,0 +1,178 @@
+/*
+ * The GURLS Package in C++
+ *
+ * Copyright (C) 2011-1013, IIT@MIT Lab
+ * All rights reserved.
+ *
+ * authors:  M. Santoro
+ * email:   msantoro@mit.edu
+ * website: http://cbcl.mit.edu/IIT@MIT/IIT@MIT.html
+ *
+ * Redistribution and use in source and binary forms, with or without
+ * modification, are permitted provided that the following conditions
+ * are met:
+ *
+ *     * Redistributions of source code must retain the above
+ *       copyright notice, this list of conditions and the following
+ *       disclaimer.
+ *     * Redistributions in binary form must reproduce the above
+ *       copyright notice, this list of conditions and the following
+ *       disclaimer in the documentation and/or other materials
+ *       provided with the distribution.
+ *     * Neither the name(s) of the copyright holders nor the names
+ *       of its contributors or of the Massacusetts Institute of
+ *       Technology or of the Italian Institute of Technology may be
+ *       used to endorse or promote products derived from this software
+ *       without specific prior written permission.
+ *
+ * THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+ * "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+ * LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+ * FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+ * COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+ * INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+ * BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+ * LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+ * CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+ * LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+ * ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+ * POSSIBILITY OF SUCH DAMAGE.
+ */
+
+
+#ifndef _GURLS_GRIDREFINE_H_
+#define _GURLS_GRIDREFINE_H_
+
+#include <vector>
+#include <cmath>
+
+#include "gurls++/optlist.h"
+
+namespace gurls {
+
+/**
+ * \ingroup ParameterSelection
+ * \brief GridRefine keeps the candidate values of a coarse-to-fine search of a positive parameter (lambda or sigma)
+ *
+ * The search starts from a coarse grid. Once all the candidates have been evaluated, refine() adds, for each
+ * performance measure (e.g. one per class), the geometric midpoints between the best candidate and its closest
+ * evaluated neighbours, so that the bracket around the optimum is halved at each round, until the budget
+ * of refinement evaluations runs out.
+ */
+template <typename T>
+class GridRefine
+{
+public:
+    /**
+     * Constructor
+     *
+     * \param grid coarse grid of positive values
+     * \param ngrid number of values in the grid
+     * \param nperf number of performance measures of each candidate
+     * \param budget maximum number of candidates added by refine()
+     */
+    GridRefine(const T* grid, unsigned long ngrid, unsigned long nperf, unsigned long budget)
+        : values(grid, grid+ngrid), perfs(ngrid*nperf), nperf(nperf), budget(budget) {}
+
+    /**
+     * Returns the number of candidates
+     */
+    unsigned long size() const { return values.size(); }
+
+    /**
+     * Returns the i-th candidate
+     */
+    T candidate(unsigned long i) const { return values[i]; }
+
+    /**
+     * Returns the buffer of the nperf performance measures of the i-th candidate, to be set by the caller
+     */
+    T* perf(unsigned long i) { return &perfs[i*nperf]; }
+
+    /**
+     * Returns the index of the candidate with the largest j-th performance measure, the first one on ties
+     */
+    unsigned long best(unsigned long j) const
+    {
+        unsigned long b = 0;
+        for(unsigned long i = 1; i < values.size(); ++i)
+            if(perfs[i*nperf+j] > perfs[b*nperf+j])
+                b = i;
+
+        return b;
+    }
+
+    /**
+     * Adds the candidates of the next round, to be evaluated by the caller, and returns false
+     * if there are none (budget exhausted or brackets already too narrow).
+     */
+    bool refine()
+    {
+        const unsigned long first = values.size();
+
+        for(unsigned long j = 0; j < nperf; ++j)
+        {
+            const T b = values[best(j)];
+
+            // closest evaluated candidates below and above the best one
+            T lo = 0, hi = 0;
+            for(typename std::vector<T>::const_iterator it = values.begin(); it != values.end(); ++it)
+            {
+                if(*it < b && (lo == 0 || *it > lo))
+                    lo = *it;
+                if(*it > b && (hi == 0 || *it < hi))
+                    hi = *it;
+            }
+
+            if(lo > 0)
+                add(std::sqrt(lo*b));
+            if(hi > 0)
+                add(std::sqrt(b*hi));
+        }
+
+        perfs.resize(values.size()*nperf);
+        return values.size() > first;
+    }
+
+    /**
+     * Returns the number of refinement evaluations of a task, read from the option \a field of \a opt (default 0)
+     */
+    static unsigned long budgetOf(const GurlsOptionsList& opt, const std::string& field)
+    {
+        if(!opt.hasOpt(field) || opt.getOptAsNumber(field) <= 0)
+            return 0;
+
+        return static_cast<unsigned long>(opt.getOptAsNumber(field));
+    }
+
+protected:
+    /**
+     * Adds \a value unless the budget is exhausted or it is too close (relative tolerance) to an existing candidate
+     */
+    void add(T value)
+    {
+        if(budget == 0)
+            return;
+
+        for(unsigned long i = 0; i < values.size(); ++i)
+            if(std::abs(values[i] - value) <= tolerance*value)
+                return;
+
+        values.push_back(value);
+        --budget;
+    }
+
+    std::vector<T> values;  ///< Candidates, the coarse grid first
+    std::vector<T> perfs;   ///< Performance measures of the candidates, nperf for each candidate
+    unsigned long nperf;    ///< Number of performance measures of each candidate
+    unsigned long budget;   ///< Candidates that can still be added
+
+    static const double tolerance; ///< Relative distance below which two candidates are considered the same
+};
+
+template <typename T>
+const double GridRefine<T>::tolerance = 1e-3;
+
+}
+
+#endif // _GURLS_GRIDREFINE_H_
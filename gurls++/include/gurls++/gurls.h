@@ -61,7 +61,9 @@
 #include "gurls++/optmatrix.h"
 #include "gurls++/opttask.h"
 #include "gurls++/opttasksequence.h"
+#include "gurls++/taskprofile.h"
 
+#include "gurls++/kernelcache.h"
 #include "gurls++/linearkernel.h"
 #include "gurls++/rbfkernel.h"
 #include "gurls++/chisquaredkernel.h"
@@ -95,6 +97,7 @@
 #include "gurls++/siglamho.h"
 #include "gurls++/hoprimal.h"
 #include "gurls++/hodual.h"
+#include "gurls++/subsample.h"
 
 #include "gurls++/hogpregr.h"
 #include "gurls++/loogpregr.h"
@@ -147,8 +150,11 @@ namespace gurls {
         static const Action load = OptProcess::load;
         static const Action remove = OptProcess::remove;
 
+        GURLS(): observer(NULL) {}
+
         /**
          * Implements a GURLS process and stores results of each GULRS task in opt.
+         * The measurements of each task are kept until the next call, see lastRunProfile().
          *
          * \param X input data matrix
          * \param y labels matrix
@@ -160,6 +166,27 @@ namespace gurls {
         void run(const gMat2D<T>& X, const gMat2D<T>& y,
                  GurlsOptionsList& opt, std::string processid);
 
+        /**
+         * Returns the profile of each task of the last run, in sequence order
+         * (up to the failing task if the run threw)
+         */
+        const std::vector<TaskProfile>& lastRunProfile() const
+        {
+            return profile;
+        }
+
+        /**
+         * Sets the observer notified when each task starts and ends (NULL for none).
+         * The observer is not owned.
+         */
+        void setObserver(TaskObserver* obs)
+        {
+            observer = obs;
+        }
+
+    protected:
+        std::vector<TaskProfile> profile;   ///< measurements of the tasks of the last run
+        TaskObserver* observer;             ///< observer of the tasks, or NULL
 };
 
 
@@ -233,6 +260,8 @@ void GURLS::run(const gMat2D<T>& X, const gMat2D<T>& y,
                   <<"####### New task sequence... "
                   << std::endl;
 		
+        profile.clear();
+
 	unsigned int i=0;
 	for(gurls::OptTaskSequence::iterator it = seq->begin(), end = seq->end(); it != end; ++it, ++i)
         {
@@ -244,6 +273,20 @@ void GURLS::run(const gMat2D<T>& X, const gMat2D<T>& y,
               	<< fieldName << "]: " << taskName << "... ";
     	std::cout.flush();
 
+            TaskProfile taskProfile;
+            taskProfile.index = i;
+            taskProfile.field = fieldName;
+            taskProfile.task = taskName;
+            taskProfile.action = actionName((*process)[i]);
+            taskProfile.wall = taskProfile.cpu = 0.0;
+            taskProfile.rssDelta = 0;
+            if(observer != NULL)
+                observer->taskStarted(taskProfile);
+
+            const boost::posix_time::ptime taskbegin = boost::posix_time::microsec_clock::local_time();
+            const double cpubegin = processCpuSeconds();
+            const long rssbegin = processPeakRss();
+
 
 
 //            switch ( static_cast<int>(process[i]) )
@@ -296,6 +339,16 @@ void GURLS::run(const gMat2D<T>& X, const gMat2D<T>& y,
             }
 			
 			delete task;
+
+            taskProfile.wall = (boost::posix_time::microsec_clock::local_time()-taskbegin).total_microseconds()*1e-6;
+            taskProfile.cpu = processCpuSeconds()-cpubegin;
+            taskProfile.rssDelta = processPeakRss()-rssbegin;
+            if(opt.hasOpt(fieldName))
+                listMatrices(opt.getOpt(fieldName), fieldName, taskProfile.matrices);
+
+            profile.push_back(taskProfile);
+            if(observer != NULL)
+                observer->taskEnded(profile.back());
         }
 
         timelist->removeOpt(processid);
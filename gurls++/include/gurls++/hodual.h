@@ -61,6 +61,8 @@
 #include "gurls++/paramsel.h"
 #include "gurls++/perf.h"
 #include "gurls++/dual.h"
+#include "gurls++/gridrefine.h"
+#include "gurls++/kernelcache.h"
 
 namespace gurls {
 
@@ -96,6 +98,7 @@ public:
      *  - nlambda (default)
      *  - hoperf (default)
      *  - smallnumber (default)
+     *  - nlambdarefine (default) number of evaluations added, in each holdout, around the best lambda of the grid, see \ref GridRefine
      *  - split (settable with the class Split and its subclasses)
      *  - kernel (settable with the class Kernel and its subclasses)
      *
@@ -152,9 +155,9 @@ protected:
 
 
 template<typename T>
-void ParamSelHoDual<T>::eig_function(T* A, T* L, int A_rows_cols, unsigned long , const GurlsOptionsList &)
+void ParamSelHoDual<T>::eig_function(T* A, T* L, int A_rows_cols, unsigned long , const GurlsOptionsList &opt)
 {
-    eig_sm(A, L, A_rows_cols);
+    cachedEig(opt, A, L, A_rows_cols);
 }
 
 template<typename T>
@@ -328,10 +331,13 @@ GurlsOptionsList *ParamSelHoDual<T>::execute(const gMat2D<T>& X, const gMat2D<T>
 
         T* work = new T[last*(last+1)];
 
-        for(int i=0; i<tot; ++i)
+        // the grid of guesses, refined around the best lambda of each class
+        GridRefine<T> search(guesses, tot, t, GridRefine<T>::budgetOf(opt, "nlambdarefine"));
+
+        for(unsigned long i=0; i<search.size(); ++i)
         {
             // 	opt.rls.C = rls_eigen(Q,L,QtY,guesses(i),ntr);
-            rls_eigen(Q, L, Qty, C->getData(), guesses[i], last, last, last, last, last, t, work);
+            rls_eigen(Q, L, Qty, C->getData(), search.candidate(i), last, last, last, last, last, t, work);
 
             if(linearKernel)
             {
@@ -354,14 +360,20 @@ GurlsOptionsList *ParamSelHoDual<T>::execute(const gMat2D<T>& X, const gMat2D<T>
 
             //       for t = 1:T
             //          ap(i,t) = opt.perf.forho(t);
-            copy(ap+i, forho_vec.getData(), t, tot, 1);
+            copy(search.perf(i), forho_vec.getData(), t);
 
             nestedOpt->removeOpt("pred");
 
             delete ret_perf;
 
+            if(i+1 == search.size())
+                search.refine();
+
         }//for tot
 
+        for(int i=0; i<tot; ++i)
+            copy(ap+i, search.perf(i), t, tot, 1);
+
         delete [] Q;
         delete [] Qty;
         delete [] L;
@@ -371,19 +383,14 @@ GurlsOptionsList *ParamSelHoDual<T>::execute(const gMat2D<T>& X, const gMat2D<T>
         delete yy;
 
         //[dummy,idx] = max(ap,[],1);
-        work = NULL;
-        unsigned long* idx = new unsigned long[t];
-        indicesOfMax(ap, tot, t, idx, work, 1);
-
-
         //vout.lambdas_round{nh} = guesses(idx);
         T* lambdas_nh = new T[t];
-        copyLocations(idx, guesses, t, tot, lambdas_nh);
+        for(unsigned long j=0; j<t; ++j)
+            lambdas_nh[j] = search.candidate(search.best(j));
 
         copy(lambdas_round +nh, lambdas_nh, t, nholdouts, 1);
 
         delete [] lambdas_nh;
-        delete [] idx;
 
         //  vout.perf{nh} = ap;
         copy(perf + nh, ap, tot*t, nholdouts, 1);
@@ -60,6 +60,8 @@
 #include "gurls++/perf.h"
 #include "gurls++/dual.h"
 #include "gurls++/utils.h"
+#include "gurls++/gridrefine.h"
+#include "gurls++/kernelcache.h"
 
 namespace gurls {
 
@@ -95,6 +97,7 @@ public:
      *  - nlambda (default)
      *  - hoperf (default)
      *  - smallnumber (default)
+     *  - nlambdarefine (default) number of evaluations added, in each holdout, around the best lambda of the grid, see \ref GridRefine
      *  - split (settable with the class Split and its subclasses)
      *
      * \return paramsel, a GurlsOptionList with the following fields:
@@ -146,9 +149,9 @@ protected:
 
 
 template<typename T>
-unsigned long ParamSelHoPrimal<T>::eig_function(T* A, T* L, int A_rows_cols,unsigned long d, const GurlsOptionsList &, unsigned long last)
+unsigned long ParamSelHoPrimal<T>::eig_function(T* A, T* L, int A_rows_cols,unsigned long d, const GurlsOptionsList &opt, unsigned long last)
 {
-    eig_sm(A, L, A_rows_cols);
+    cachedEig(opt, A, L, A_rows_cols);
 
     return std::min(d,last);
 }
@@ -307,9 +310,12 @@ GurlsOptionsList *ParamSelHoPrimal<T>::execute(const gMat2D<T>& X, const gMat2D<
 
         T* work = new T[d*(d+1)];
 
-        for(int i=0; i<tot; ++i)
+        // the grid of guesses, refined around the best lambda of each class
+        GridRefine<T> search(guesses, tot, t, GridRefine<T>::budgetOf(opt, "nlambdarefine"));
+
+        for(unsigned long i=0; i<search.size(); ++i)
         {
-            rls_eigen(Q, L, QtXty, W->getData(), guesses[i], last, d, d, d, d, t, work);
+            rls_eigen(Q, L, QtXty, W->getData(), search.candidate(i), last, d, d, d, d, t, work);
 
             OptMatrix<gMat2D<T> > *ret_pred = primal.execute(Xva, yva, *nestedOpt);
 
@@ -320,23 +326,26 @@ GurlsOptionsList *ParamSelHoPrimal<T>::execute(const gMat2D<T>& X, const gMat2D<
 
             gMat2D<T> &forho_vec = ret_perf->getOptValue<OptMatrix<gMat2D<T> > >("forho");
 
-            copy(ap+i, forho_vec.getData(), t, tot, 1);
+            copy(search.perf(i), forho_vec.getData(), t);
 
             delete ret_perf;
+
+            if(i+1 == search.size())
+                search.refine();
         }
 
+        for(int i=0; i<tot; ++i)
+            copy(ap+i, search.perf(i), t, tot, 1);
+
         delete [] va;
         delete [] tr;
         delete [] work;
 
         //[dummy,idx] = max(ap,[],1);
-        work = NULL;
-        unsigned long* idx = new unsigned long[t];
-        indicesOfMax(ap, tot, t, idx, work, 1);
-
         //vout.lambdas_round{nh} = guesses(idx);
         T* lambdas_nh = new T[t];
-        copyLocations(idx, guesses, t, tot, lambdas_nh);
+        for(unsigned long j=0; j<t; ++j)
+            lambdas_nh[j] = search.candidate(search.best(j));
 
         copy(lambdas_round+nh, lambdas_nh, t, nholdouts, 1);
 
@@ -344,7 +353,6 @@ GurlsOptionsList *ParamSelHoPrimal<T>::execute(const gMat2D<T>& X, const gMat2D<
         axpy(t, (T)1, lambdas_nh, 1, lambdas, 1);
 
         delete [] lambdas_nh;
-        delete [] idx;
 
         //  vout.perf{nh} = ap;
         copy(perf + nh, ap, tot*t, nholdouts, 1);
@@ -0,0 +1,248 @@
+/*
+ * The GURLS Package in C++
+ *
+ * Copyright (C) 2011-1013, IIT@MIT Lab
+ * All rights reserved.
+ *
+ * authors:  M. Santoro
+ * email:   msantoro@mit.edu
+ * website: http://cbcl.mit.edu/IIT@MIT/IIT@MIT.html
+ *
+ * Redistribution and use in source and binary forms, with or without
+ * modification, are permitted provided that the following conditions
+ * are met:
+ *
+ *     * Redistributions of source code must retain the above
+ *       copyright notice, this list of conditions and the following
+ *       disclaimer.
+ *     * Redistributions in binary form must reproduce the above
+ *       copyright notice, this list of conditions and the following
+ *       disclaimer in the documentation and/or other materials
+ *       provided with the distribution.
+ *     * Neither the name(s) of the copyright holders nor the names
+ *       of its contributors or of the Massacusetts Institute of
+ *       Technology or of the Italian Institute of Technology may be
+ *       used to endorse or promote products derived from this software
+ *       without specific prior written permission.
+ *
+ * THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+ * "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+ * LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+ * FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+ * COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+ * INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+ * BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+ * LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+ * CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+ * LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+ * ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+ * POSSIBILITY OF SUCH DAMAGE.
+ */
+
+
+#ifndef _GURLS_KERNELCACHE_H_
+#define _GURLS_KERNELCACHE_H_
+
+#include <cstdio>
+#include <limits>
+#include <string>
+
+#include <boost/cstdint.hpp>
+
+#include "gurls++/exports.h"
+#include "gurls++/optlist.h"
+#include "gurls++/gmath.h"
+#include "gurls++/utils.h"
+
+namespace gurls
+{
+
+/**
+ * Counters of the kernel cache, summed over all the caches of the process
+ */
+struct KernelCacheStats
+{
+    unsigned long hits;      ///< entries found and loaded
+    unsigned long misses;    ///< lookups of an enabled cache with no usable entry
+    unsigned long stores;    ///< entries written
+    unsigned long evictions; ///< entries removed to fit the size budget
+};
+
+/**
+ * \brief KernelCache is an on-disk cache of the kernel, distance and eigendecomposition matrices
+ *
+ * It is enabled by the following fields of the options:
+ *  - kernelcache: directory of the cache, created if needed. The cache is disabled if the field is missing or empty
+ *  - kernelcachesize (default unlimited): budget in bytes of the files in the directory. When it is exceeded,
+ *    the least recently used entries are removed. Recency is kept in the index file lru.idx of the directory, which
+ *    maps each entry to the sequence number of its last store or hit
+ *
+ * The entries are named by a key made of the kind of matrix, the fingerprint of the matrix it is computed from and
+ * its parameters. Each entry is a file holding a 32 bytes header (the magic "GURLSKC1", then rows, cols and element
+ * size as 64-bit integers) followed by the matrix in column-major order, so it can be memory mapped.
+ * Entries are written to a temporary file and renamed, so concurrent processes can share the directory.
+ */
+class GURLS_EXPORT KernelCache
+{
+public:
+    /**
+     * Builds the cache configured by \a opt
+     */
+    KernelCache(const GurlsOptionsList& opt);
+
+    /**
+     * Returns true if the options enable the cache
+     */
+    bool enabled() const;
+
+    /**
+     * Returns the key of the \a kind matrix computed from the rows x cols matrix \a data, with parameter \a param
+     * (none if NaN)
+     */
+    template <typename T>
+    static std::string key(const std::string& kind, const T* data, unsigned long rows, unsigned long cols,
+                           double param = std::numeric_limits<double>::quiet_NaN());
+
+    /**
+     * Reads the entry \a key into the rows x cols buffer \a data. Returns false, leaving \a data untouched,
+     * if the cache is disabled or the entry is missing or does not match the size and type of the buffer.
+     * Throws gException if a matching entry cannot be read
+     */
+    template <typename T>
+    bool load(const std::string& key, T* data, unsigned long rows, unsigned long cols) const
+    {
+        return read(key, data, NULL, rows, cols, sizeof(T));
+    }
+
+    /**
+     * Reads the rows x (cols+1) entry \a key stored by the matching store(): its first cols columns into the
+     * rows x cols buffer \a data and its last column into the buffer \a column. Returns false as load()
+     */
+    template <typename T>
+    bool load(const std::string& key, T* data, T* column, unsigned long rows, unsigned long cols) const
+    {
+        return read(key, data, column, rows, cols, sizeof(T));
+    }
+
+    /**
+     * Writes the rows x cols matrix \a data as the entry \a key, then evicts entries to fit the size budget.
+     * Does nothing if the cache is disabled or the matrix alone exceeds the budget
+     */
+    template <typename T>
+    void store(const std::string& key, const T* data, unsigned long rows, unsigned long cols) const
+    {
+        write(key, data, NULL, rows, cols, sizeof(T));
+    }
+
+    /**
+     * Writes the rows x cols matrix \a data followed by the rows x 1 \a column as the single rows x (cols+1)
+     * entry \a key, so that both are found, and evicted, together
+     */
+    template <typename T>
+    void store(const std::string& key, const T* data, const T* column, unsigned long rows, unsigned long cols) const
+    {
+        write(key, data, column, rows, cols, sizeof(T));
+    }
+
+    /**
+     * Copies the fields configuring the cache from \a from to \a to, if present
+     */
+    static void copyOptions(GurlsOptionsList& to, const GurlsOptionsList& from);
+
+    /**
+     * Returns the counters of all the caches of the process
+     */
+    static KernelCacheStats stats();
+
+    /**
+     * Resets the counters of all the caches of the process
+     */
+    static void resetStats();
+
+    /**
+     * Returns a 64-bit fingerprint of \a bytes bytes of \a data
+     */
+    static boost::uint64_t fingerprint(const void* data, unsigned long bytes);
+
+protected:
+    /// Untyped implementation of load(), \a column is NULL for entries without an extra column
+    bool read(const std::string& key, void* data, void* column, unsigned long rows, unsigned long cols, unsigned long elemSize) const;
+    /// Untyped implementation of store(), \a column is NULL for entries without an extra column
+    void write(const std::string& key, const void* data, const void* column, unsigned long rows, unsigned long cols, unsigned long elemSize) const;
+    /// Removes the least recently used entries, except the file \a keep, until the directory fits the budget
+    void evict(const std::string& keep) const;
+    /// Path of the file of the entry \a key
+    std::string path(const std::string& key) const;
+
+    std::string dir;  ///< directory of the cache, empty if disabled
+    double maxSize;   ///< budget in bytes, <= 0 if unlimited
+};
+
+template <typename T>
+std::string KernelCache::key(const std::string& kind, const T* data, unsigned long rows, unsigned long cols, double param)
+{
+    char buf[128];
+    sprintf(buf, "-%c%lux%lu-%016llx", (sizeof(T) == sizeof(float))? 'f' : 'd', rows, cols,
+            static_cast<unsigned long long>(fingerprint(data, rows*cols*sizeof(T))));
+
+    std::string ret = kind + buf;
+    if(param == param)
+    {
+        sprintf(buf, "-%.17g", param);
+        ret += buf;
+    }
+
+    return ret;
+}
+
+/**
+ * Computes the eigendecomposition of the symmetric n x n matrix \a K as eig_sm, but reads it from the kernel cache
+ * configured by \a opt when it has been computed before: on exit K holds the eigenvectors and L the eigenvalues
+ */
+template <typename T>
+void cachedEig(const GurlsOptionsList& opt, T* K, T* L, unsigned long n)
+{
+    const KernelCache cache(opt);
+    if(!cache.enabled())
+    {
+        eig_sm(K, L, n);
+        return;
+    }
+
+    // the eigenvectors and the eigenvalues are a single n x (n+1) entry
+    const std::string key = KernelCache::key("eig", K, n, n);
+    if(cache.load(key, K, L, n, n))
+        return;
+
+    eig_sm(K, L, n);
+
+    cache.store(key, K, L, n, n);
+}
+
+/**
+ * Computes the squared distances \a dist between the rows of \a X as distance_transposed_blocked, but reads them from
+ * the kernel cache configured by \a opt when they have been computed before
+ */
+template <typename T>
+void cachedDistance(const GurlsOptionsList& opt, const gMat2D<T>& X, gMat2D<T>& dist)
+{
+    const KernelCache cache(opt);
+    const unsigned long n = X.rows();
+
+    std::string key;
+    if(cache.enabled())
+    {
+        key = KernelCache::key("distance", X.getData(), n, X.cols());
+        if(cache.load(key, dist.getData(), n, n))
+            return;
+    }
+
+    distance_transposed_blocked(X.getData(), X.getData(), X.cols(), n, n, dist.getData());
+
+    if(cache.enabled())
+        cache.store(key, dist.getData(), n, n);
+}
+
+}
+
+#endif // _GURLS_KERNELCACHE_H_
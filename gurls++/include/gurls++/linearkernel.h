@@ -47,6 +47,7 @@
 #include "gurls++/kernel.h"
 #include "gurls++/gmath.h"
 #include "gurls++/optmatrix.h"
+#include "gurls++/kernelcache.h"
 
 namespace gurls {
 
@@ -77,7 +78,7 @@ public:
      *
      * \param X input data matrix
      * \param Y labels matrix
-     * \param opt not udes
+     * \param opt options with the optional fields kernelcache and kernelcachesize of KernelCache
      *
      * \return kernel, a GurslOptionList with the following fields:
      *  - type = "linear"
@@ -87,7 +88,7 @@ public:
 };
 
 template<typename T>
-GurlsOptionsList* KernelLinear<T>::execute(const gMat2D<T>& X, const gMat2D<T>& /*Y*/, const GurlsOptionsList &/*opt*/) throw(gException)
+GurlsOptionsList* KernelLinear<T>::execute(const gMat2D<T>& X, const gMat2D<T>& /*Y*/, const GurlsOptionsList &opt) throw(gException)
 {
 
     GurlsOptionsList* kernel = new GurlsOptionsList("kernel");
@@ -95,7 +96,17 @@ GurlsOptionsList* KernelLinear<T>::execute(const gMat2D<T>& X, const gMat2D<T>&
 
     gMat2D<T>* K = new gMat2D<T>(X.rows(), X.rows());
 
-    dot(X.getData(), X.getData(), K->getData(), X.rows(), X.cols(), X.rows(), X.cols(), K->rows(), K->cols(), CblasNoTrans, CblasTrans, CblasColMajor);
+    const KernelCache cache(opt);
+    std::string key;
+    if(cache.enabled())
+        key = KernelCache::key("linear", X.getData(), X.rows(), X.cols());
+
+    if(!cache.load(key, K->getData(), K->rows(), K->cols()))
+    {
+        dot(X.getData(), X.getData(), K->getData(), X.rows(), X.cols(), X.rows(), X.cols(), K->rows(), K->cols(), CblasNoTrans, CblasTrans, CblasColMajor);
+
+        cache.store(key, K->getData(), K->rows(), K->cols());
+    }
 
     kernel->addOpt("K", new OptMatrix<gMat2D<T> >(*K));
 
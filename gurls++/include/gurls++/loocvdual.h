@@ -56,9 +56,11 @@
 #include "gurls++/gvec.h"
 #include "gurls++/gmath.h"
 #include "gurls++/utils.h"
+#include "gurls++/kernelcache.h"
 
 #include "gurls++/paramsel.h"
 #include "gurls++/perf.h"
+#include "gurls++/gridrefine.h"
 
 namespace gurls {
 
@@ -93,7 +95,10 @@ public:
      *  - nlambda (default)
      *  - hoperf (default)
      *  - smallnumber (default)
-     *  - kernel (settable with the class Kernel and its subclasses)
+     *  - nlambdarefine (default) number of evaluations added around the best lambda of the grid, see \ref GridRefine
+     *  - kernel (settable with the class Kernel and its subclasses). The eigendecomposition
+     *    of kernel.K is reused if it has been stored with \ref addKernelEig
+     *  - kernelcache, kernelcachesize (optional) on-disk cache of the eigendecomposition, see KernelCache
      *
      * \return paramsel, a GurlsOptionList with the following fields:
      *  - lambdas = array of values of the regularization parameter lambda minimizing the validation error for each class
@@ -124,17 +129,26 @@ GurlsOptionsList* ParamSelLoocvDual<T>::execute(const gMat2D<T>& X, const gMat2D
 
     const gMat2D<T> &K_mat = kernel->getOptValue<OptMatrix<gMat2D<T> > >("K");
 
-    gMat2D<T> K(K_mat.rows(), K_mat.cols());
-    copy(K.getData(), K_mat.getData(), K_mat.getSize());
-
-    const unsigned long qrows = K.rows();
-    const unsigned long qcols = K.cols();
+    const unsigned long qrows = K_mat.rows();
+    const unsigned long qcols = K_mat.cols();
     const unsigned long l_length = qrows;
 
-    T *Q = K.getData();
     T *L = new T[l_length];
+    T *K = NULL;
+    const T *Q = NULL;
+    const T *cached_L = NULL;
 
-    eig_sm(Q, L, qrows); // qrows == qcols
+    // reuse the decomposition stored by addKernelEig, if any
+    if(kernelEig(opt, qrows, false, Q, cached_L))
+        copy(L, cached_L, l_length);
+    else
+    {
+        K = new T[K_mat.getSize()];
+        copy(K, K_mat.getData(), K_mat.getSize());
+
+        cachedEig(opt, K, L, qrows); // qrows == qcols
+        Q = K;
+    }
 
     int r = n;
     if(kernel->getOptAsString("type") == "linear")
@@ -170,10 +184,14 @@ GurlsOptionsList* ParamSelLoocvDual<T>::execute(const gMat2D<T>& X, const gMat2D
     T* Z = new T[qrows];
     T* work = new T[std::max((qrows+1)*l_length, (qrows*qcols)+l_length)];
 
-    for(int i = 0; i < tot; ++i)
+    // the grid of guesses, refined around the best lambda of each class
+    GridRefine<T> search(guesses, tot, t, GridRefine<T>::budgetOf(opt, "nlambdarefine"));
+
+    for(unsigned long i = 0; i < search.size(); ++i)
     {
-        rls_eigen(Q, L, Qty, C, guesses[i], n, qrows, qcols, l_length, qcols, t, work);
-        GInverseDiagonal(Q, L, guesses+i, Z, qrows, qcols, l_length, 1, work);
+        T guess = search.candidate(i);
+        rls_eigen(Q, L, Qty, C, guess, n, qrows, qcols, l_length, qcols, t, work);
+        GInverseDiagonal(Q, L, &guess, Z, qrows, qcols, l_length, 1, work);
 
         for(unsigned long j = 0; j< t; ++j)
         {
@@ -190,11 +208,17 @@ GurlsOptionsList* ParamSelLoocvDual<T>::execute(const gMat2D<T>& X, const gMat2D
 
         gMat2D<T> &forho_vec = perf_opt->getOptValue<OptMatrix<gMat2D<T> > >("forho");
 
-        copy(ap+i, forho_vec.getData(), t, tot, 1);
+        copy(search.perf(i), forho_vec.getData(), t);
 
         delete perf_opt;
+
+        if(i+1 == search.size())
+            search.refine();
     }
 
+    for(int i = 0; i < tot; ++i)
+        copy(ap+i, search.perf(i), t, tot, 1);
+
     delete nestedOpt;
     delete[] work;
     delete [] C;
@@ -204,17 +228,11 @@ GurlsOptionsList* ParamSelLoocvDual<T>::execute(const gMat2D<T>& X, const gMat2D
     delete [] Qty;
 
     delete[] L;
-    //delete[] Q;
-
-    unsigned long* idx = new unsigned long[t];
-    work = NULL;
-    indicesOfMax(ap, tot, t, idx, work, 1);
-
+    delete[] K;
 
     gMat2D<T> *LAMBDA = new gMat2D<T>(1, t);
-    copyLocations(idx, guesses, t, tot, LAMBDA->getData());
-
-    delete[] idx;
+    for(unsigned long j = 0; j < t; ++j)
+        LAMBDA->getData()[j] = search.candidate(search.best(j));
 
 
     GurlsOptionsList* paramsel;
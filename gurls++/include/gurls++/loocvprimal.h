@@ -58,8 +58,11 @@
 #include "gurls++/gmat2d.h"
 #include "gurls++/gvec.h"
 #include "gurls++/gmath.h"
+#include "gurls++/utils.h"
 
 #include "gurls++/paramsel.h"
+#include "gurls++/gridrefine.h"
+#include "gurls++/kernelcache.h"
 
 #include "gurls++/precisionrecall.h"
 #include "gurls++/macroavg.h"
@@ -98,6 +101,8 @@ public:
      * \param opt options with the following default fields:
      *  - nlambda (default)
      *  - smallnumber
+     *  - nlambdarefine (default) number of evaluations added around the best lambda of the grid, see \ref GridRefine
+     *  - kernel.Q, kernel.L (optional) eigendecomposition of X'*X stored with \ref addKernelEig, reused instead of a new one
      * \return paramsel, a GurlsOptionList with the following fields:
      *  - lambdas = array of values of the regularization parameter lambda minimizing the validation error for each class
      *  - guesses = array of guesses for the regularization parameter lambda
@@ -125,9 +130,18 @@ GurlsOptionsList *ParamSelLoocvPrimal<T>::execute(const gMat2D<T>& X, const gMat
         if(xr != n)
             throw gException(Exception_Inconsistent_Size);
 
-        T* K = new T[xc*xc];
-        garbage.insert(K);
-        dot(X.getData(), X.getData(), K, xr, xc, xr, xc, xc, xc, CblasTrans, CblasNoTrans, CblasColMajor);
+        // reuse the decomposition of X'*X stored by addKernelEig, if any
+        const T* cached_Q = NULL;
+        const T* cached_L = NULL;
+        const bool cached = kernelEig(opt, xc, true, cached_Q, cached_L);
+
+        T* K = NULL;
+        if(!cached)
+        {
+            K = new T[xc*xc];
+            garbage.insert(K);
+            dot(X.getData(), X.getData(), K, xr, xc, xr, xc, xc, xc, CblasTrans, CblasNoTrans, CblasColMajor);
+        }
 
 
         // tot = opt.nlambda;
@@ -142,11 +156,17 @@ GurlsOptionsList *ParamSelLoocvPrimal<T>::execute(const gMat2D<T>& X, const gMat
 //        garbage.insert(Q);
 //        garbage.insert(L);
 
-        T* Q = K;
+        const T* Q = K;
         T* L = new T[xc];
         garbage.insert(L);
 
-        eig_sm(Q, L, xc);
+        if(cached)
+        {
+            Q = cached_Q;
+            copy(L, cached_L, xc);
+        }
+        else
+            cachedEig(opt, K, L, xc);
 
 
         T* filtered = L;
@@ -180,8 +200,8 @@ GurlsOptionsList *ParamSelLoocvPrimal<T>::execute(const gMat2D<T>& X, const gMat
         garbage.insert(right);
         dot(Q, X.getData(), right, xc, xc, xr, xc, xc, xr, CblasTrans, CblasTrans, CblasColMajor);
 
-        delete[] Q;
-        garbage.erase(Q);
+        delete[] K;
+        garbage.erase(K);
 
         T* den = new T[n];
 //        T* Le = new T[n*t];
@@ -217,12 +237,15 @@ GurlsOptionsList *ParamSelLoocvPrimal<T>::execute(const gMat2D<T>& X, const gMat
         T* ap = perf->getData();
 
 
+        // the grid of guesses, refined around the best lambda of each class
+        GridRefine<T> search(guesses, tot, t, GridRefine<T>::budgetOf(opt, "nlambdarefine"));
+
         //	for i = 1:tot
-        for(int s = 0; s < tot; ++s)
+        for(unsigned long s = 0; s < search.size(); ++s)
         {
 
             //		LL = L + (n*guesses(i));
-            set(tmpvec, n*guesses[s] , xc);
+            set(tmpvec, n*search.candidate(s) , xc);
             axpy(xc, (T)1.0, L, 1, tmpvec, 1);
 
             //		LL = LL.^(-1)
@@ -282,11 +305,17 @@ GurlsOptionsList *ParamSelLoocvPrimal<T>::execute(const gMat2D<T>& X, const gMat
             gMat2D<T> &forho_vec = perf->getOptValue<OptMatrix<gMat2D<T> > >("forho");
 
     //        for t = 1:T
-            copy(ap+s, forho_vec.getData(), forho_vec.getSize(), tot, 1);
+            copy(search.perf(s), forho_vec.getData(), t);
 
             delete perf;
+
+            if(s+1 == search.size())
+                search.refine();
         }
 
+        for(int s = 0; s < tot; ++s)
+            copy(ap+s, search.perf(s), t, tot, 1);
+
 
         delete perfClass;
 
@@ -322,15 +351,10 @@ GurlsOptionsList *ParamSelLoocvPrimal<T>::execute(const gMat2D<T>& X, const gMat
 //        garbage.erase(Le);
 
         //[dummy,idx] = max(ap,[],1);
-        unsigned long* idx = new unsigned long[t];
-        T* work = NULL;
-        indicesOfMax(ap, tot, t, idx, work, 1);
-
         //vout.lambdas = 	guesses(idx);
         gMat2D<T> *LAMBDA = new gMat2D<T>(1, t);
-        copyLocations(idx, guesses, t, tot, LAMBDA->getData());
-
-        delete[] idx;
+        for(unsigned long j = 0; j < t; ++j)
+            LAMBDA->getData()[j] = search.candidate(search.best(j));
 
         GurlsOptionsList* paramsel;
 
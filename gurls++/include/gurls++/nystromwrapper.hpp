@@ -19,7 +19,12 @@ namespace gurls
 {
 
 template <typename T>
-NystromWrapper<T>::NystromWrapper(const std::string& name):KernelWrapper<T>(name) {}
+NystromWrapper<T>::NystromWrapper(const std::string& name):KernelWrapper<T>(name)
+{
+    GurlsOptionsList *kernel = new GurlsOptionsList("kernel");
+    this->opt->addOpt("kernel", kernel);
+    kernel->addOpt("type", "rbf");
+}
 
 template <typename T>
 void NystromWrapper<T>::train(const gMat2D<T> &X, const gMat2D<T> &y)
@@ -43,7 +48,7 @@ void NystromWrapper<T>::train(const gMat2D<T> &X, const gMat2D<T> &y)
     const gMat2D<T> empty;
 
     const double sigma = opt->getOptAsNumber("paramsel.sigma");
-	Task<T>* perfTask = OptTask::getValue<T, Performance<T> >(opt, "hoperf");
+	Task<T>* perfTask = OptTask::getValue<T, Performance<T> >(*opt, "hoperf");
 
 
     const double n_nystrom = opt->getOptAsNumber("n_nystrom");
@@ -103,12 +108,16 @@ void NystromWrapper<T>::train(const gMat2D<T> &X, const gMat2D<T> &y)
 
 
 
-    unsigned long guesses_end = static_cast<unsigned long>(n_nystrom);
+    // landmarks are drawn from the training rows
+    unsigned long guesses_end = std::min(static_cast<unsigned long>(n_nystrom), ntr);
 
+//    guesses = step:step:n_nystrom, in increasing order since each guess
+//    extends the landmarks of the previous one
     std::vector<unsigned long> guesses;
-    unsigned long step = static_cast<unsigned long>(floor(n_nystrom/nparams));
-    for(unsigned long i = guesses_end-1, count = 0; count < nparams; i-=step, ++count)
-        guesses.push_back(i);
+    const unsigned long step = std::max(1ul, guesses_end/nparams);
+    for(unsigned long count = 1; count < nparams && count*step < guesses_end; ++count)
+        guesses.push_back(count*step-1);
+    guesses.push_back(guesses_end-1);
 
 
 //    indices = randperm(ntr);
@@ -373,6 +382,13 @@ void NystromWrapper<T>::train(const gMat2D<T> &X, const gMat2D<T> &y)
 
         delete Xsub_mat;
         Xsub_mat = Xsub_mat_sub;
+
+        // alpha holds the nsub x t coefficients of the last guess tried
+        gMat2D<T> *alpha_mat_sub = new gMat2D<T>(nsub, t);
+        copy(alpha_mat_sub->getData(), alpha, nsub*t);
+
+        delete alpha_mat;
+        alpha_mat = alpha_mat_sub;
     }
     else
         nsub = guesses_end;
@@ -425,12 +441,14 @@ void NystromWrapper<T>::train_largescale(const gMat2D<T> &X, const gMat2D<T> &y)
     unsigned long ntr = n;
 
 
-    unsigned long guesses_end = static_cast<unsigned long>(n_nystrom);
+    unsigned long guesses_end = std::min(static_cast<unsigned long>(n_nystrom), ntr);
 
 //    guesses = B:B:opt.rank_max;
     std::vector<unsigned long> guesses;
     for(unsigned long i = B-1; i < guesses_end; i+=B)
         guesses.push_back(i);
+    if(guesses.empty())
+        guesses.push_back(guesses_end-1);
 
     guesses_end = *(guesses.rbegin())+1;
 
@@ -560,7 +578,7 @@ void NystromWrapper<T>::train_largescale(const gMat2D<T> &X, const gMat2D<T> &y)
                 exp(kernel_old, i_init);
 
 //                KtKcol = KtKcol + kernel_old.K'*kernel_col.K(l,:);
-                gemv(CblasNoTrans, i_init, 1, one, kernel_old, i_init, K_it, ntr, one, KtKcol, 1); // 1 i_init   1 nindices  i_init nindices
+                gemm(CblasNoTrans, CblasNoTrans, i_init, nindices, 1, one, kernel_old, i_init, K_it, ntr, one, KtKcol, i_init);
             }
 
             delete [] kernel_old;
@@ -694,7 +712,7 @@ template <typename T>
 gMat2D<T>* NystromWrapper<T>::eval_largescale(const gMat2D<T> &X)
 {
     GurlsOptionsList *opt = this->opt;
-    const gMat2D<T> &alpha_mat = opt->getOptValue<OptMatrix<gMat2D<T> > >("paramsel.alpha");
+    const gMat2D<T> &alpha_mat = opt->getOptValue<OptMatrix<gMat2D<T> > >("paramsel.C");
     const gMat2D<T> &X_mat = opt->getOptValue<OptMatrix<gMat2D<T> > >("paramsel.X");
     const T *const alpha = alpha_mat.getData();
 
@@ -720,7 +738,7 @@ gMat2D<T>* NystromWrapper<T>::eval_largescale(const gMat2D<T> &X)
     opt_tmp->addOpt("optimizer", tmp_optimizer);
 
     tmp_kernel->addOpt("type", opt->getOptAsString("kernel.type"));
-    tmp_paramsel->addOpt("sigma", new OptNumber(opt->getOptAsNumber("sigma")));
+    tmp_paramsel->addOpt("sigma", new OptNumber(opt->getOptAsNumber("paramsel.sigma")));
     tmp_optimizer->addOpt("X", opt->getOpt("paramsel.X"));
 
 
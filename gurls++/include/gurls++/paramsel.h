@@ -103,6 +103,9 @@ class ParamSelSiglamLooGPRegr;
 template <typename T>
 class ParamSelSiglamHoGPRegr;
 
+template <typename T>
+class ParamSelSubsample;
+
 /**
  * \ingroup Exceptions
  *
@@ -186,6 +189,8 @@ public:
             return new ParamSelSiglamLooGPRegr<T>;
         if(id == "siglamhogpregr")
             return new ParamSelSiglamHoGPRegr<T>;
+        if(id == "subsample")
+            return new ParamSelSubsample<T>;
 
         throw BadParamSelectionCreation(id);
     }
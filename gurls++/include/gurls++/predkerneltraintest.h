@@ -122,7 +122,7 @@ GurlsOptionsList *PredKernelTrainTest<T>::execute(const gMat2D<T>& X, const gMat
 //                opt.predkernel.distance = distance(X',opt.rls.X');
         gMat2D<T> *dist = new gMat2D<T>(xr, rls_xr);
 
-        distance_transposed(X.getData(), rls_X.getData(), xc, xr, rls_xr, dist->getData());
+        distance_transposed_blocked(X.getData(), rls_X.getData(), xc, xr, rls_xr, dist->getData());
 
 
 //                fk.distance = opt.predkernel.distance;
@@ -93,6 +93,13 @@ public:
       */
     void setNRandFeats(unsigned long value);
 
+    /**
+      * Sets the width sigma of the approximated Gaussian kernel exp(-||x-x'||^2/sigma^2) (default 1)
+      *
+      * \param value
+      */
+    void setSigma(double value);
+
 protected:
     gMat2D<T> *W;
 };
@@ -38,6 +38,10 @@ void RandomFeaturesWrapper<T>::train(const gMat2D<T> &X, const gMat2D<T> &y)
 
     W = rp_projections<T>(d, D);
 
+//    W = W/sigma;
+    if(this->opt->hasOpt("randfeats.sigma"))
+        scal(d*D, (T)(1.0/this->opt->getOptAsNumber("randfeats.sigma")), W->getData(), 1);
+
 
 //    V = X*W;
 //    Xtr = [cos(V) sin(V)];
@@ -72,4 +76,15 @@ void RandomFeaturesWrapper<T>::setNRandFeats(unsigned long value)
     this->opt->template getOptValue<OptNumber>("randfeats.D") = value;
 }
 
+template<typename T>
+void RandomFeaturesWrapper<T>::setSigma(double value)
+{
+    if(value <= 0.0)
+        throw gException("The kernel width must be positive");
+
+    GurlsOptionsList* randfeats = this->opt->template getOptAs<GurlsOptionsList>("randfeats");
+    randfeats->removeOpt("sigma");
+    randfeats->addOpt("sigma", new OptNumber(value));
+}
+
 }
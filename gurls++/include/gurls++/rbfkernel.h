@@ -47,9 +47,29 @@
 #include "gurls++/kernel.h"
 #include "gurls++/gmath.h"
 #include "gurls++/utils.h"
+#include "gurls++/kernelcache.h"
 
 namespace gurls {
 
+/**
+ * Returns a kernel options list with type "rbf" and K = exp(-dist/sigma^2), computed from the matrix of the
+ * squared distances \a dist. Unlike KernelRBF, the distances are not copied into the list.
+ */
+template <typename T>
+GurlsOptionsList* rbfKernelFromDistance(const gMat2D<T>& dist, T sigma)
+{
+    gMat2D<T> *K = new gMat2D<T>(dist);
+
+    scal(K->getSize(), (T)(-1.0/(sigma*sigma)), K->getData(), 1);
+    exp(K->getData(), K->getSize());
+
+    GurlsOptionsList* kernel = new GurlsOptionsList("kernel");
+    kernel->addOpt("type", "rbf");
+    kernel->addOpt("K", new OptMatrix<gMat2D<T> >(*K));
+
+    return kernel;
+}
+
 /**
  * \ingroup Kernels
  * \brief KernelRBF is the sub-class of Kernel that builds the Gaussian kernel matrix
@@ -79,6 +99,7 @@ public:
      * \param Y labels matrix
      * \param opt options with the following fields:
      *  - paramsel (list with the required field sigma, settable with the class ParamSelection and its subclasses Siglam and SiglamHo)
+     *  - kernelcache, kernelcachesize (optional) on-disk cache of the distances, see KernelCache
      *
      * \return kernel, a GurslOptionList with the following fields:
      *  - type = "rbf"
@@ -122,7 +143,7 @@ GurlsOptionsList *KernelRBF<T>::execute(const gMat2D<T>& X, const gMat2D<T>& /*Y
     {
         dist = new gMat2D<T>(xr, xr);
 
-        distance_transposed(X.getData(), X.getData(), xc, xr, xr, dist->getData());
+        cachedDistance(opt, X, *dist);
     }
 
 
@@ -86,6 +86,14 @@ public:
       */
     void update(const gVec<T> &X, const gVec<T> &y);
 
+    /**
+      * Estimator update with a block of samples
+      *
+      * \param[in] X Input data matrix, one sample per row
+      * \param[in] Y Labels matrix, one sample per row
+      */
+    void update(const gMat2D<T> &X, const gMat2D<T> &y);
+
     /**
       * Estimates label for an input matrix
       *
@@ -73,11 +73,6 @@ void RecursiveRLSWrapper<T>::train(const gMat2D<T> &X, const gMat2D<T> &y)
 template <typename T>
 void RecursiveRLSWrapper<T>::update(const gVec<T> &X, const gVec<T> &y)
 {
-    if(!this->trainedModel())
-        throw gException("Error, Train Model First");
-
-    RLSPrimalRecUpdate<T> optimizer;
-
     const unsigned long d = X.getSize();
     const unsigned long t = y.getSize();
 
@@ -86,69 +81,77 @@ void RecursiveRLSWrapper<T>::update(const gVec<T> &X, const gVec<T> &y)
     gMat2D<T>y_mat(1, t);
     copy(y_mat.getData(), y.getData(), t);
 
-    GurlsOptionsList* ret = optimizer.execute(X_mat, y_mat, *(this->opt));
-    this->opt->removeOpt("optimizer");
-    this->opt->addOpt("optimizer", ret);
+    update(X_mat, y_mat);
+}
 
-    ++nTot;
+template <typename T>
+void RecursiveRLSWrapper<T>::update(const gMat2D<T> &X, const gMat2D<T> &y)
+{
+    if(!this->trainedModel())
+        throw gException("Error, Train Model First");
 
-    gMat2D<T>* xtx = new gMat2D<T>(d,d);
-    gMat2D<T>* xty = new gMat2D<T>(d,t);
+    const unsigned long n = X.rows();
+    const unsigned long d = X.cols();
+    const unsigned long t = y.cols();
 
-    dot(X.getData(), X.getData(), xtx->getData(), 1, d, 1, d, d, d, CblasTrans, CblasNoTrans, CblasColMajor);
-    dot(X.getData(), y.getData(), xty->getData(), 1, d, 1, t, d, t, CblasTrans, CblasNoTrans, CblasColMajor);
+    if(y.rows() != n)
+        throw gException(Exception_Inconsistent_Size);
 
-    GurlsOptionsList* kernel = this->opt->template getOptAs<GurlsOptionsList>("kernel");
+    RLSPrimalRecUpdate<T> optimizer;
 
-    const gMat2D<T>& XtX = kernel->getOptValue<OptMatrix<gMat2D<T> > >("XtX");
-    const gMat2D<T>& Xty = kernel->getOptValue<OptMatrix<gMat2D<T> > >("Xty");
+    GurlsOptionsList* ret = optimizer.execute(X, y, *(this->opt));
+    this->opt->removeOpt("optimizer");
+    this->opt->addOpt("optimizer", ret);
 
-    axpy(d*d, (T)1.0, XtX.getData(), 1, xtx->getData(), 1);
-    axpy(d*t, (T)1.0, Xty.getData(), 1, xty->getData(), 1);
+    GurlsOptionsList* kernel = this->opt->template getOptAs<GurlsOptionsList>("kernel");
 
-    kernel->removeOpt("XtX");
-    kernel->addOpt("XtX", new OptMatrix<gMat2D<T> >(*xtx));
+    gMat2D<T>& XtX = kernel->getOptValue<OptMatrix<gMat2D<T> > >("XtX");
+    gMat2D<T>& Xty = kernel->getOptValue<OptMatrix<gMat2D<T> > >("Xty");
 
-    kernel->removeOpt("Xty");
-    kernel->addOpt("Xty", new OptMatrix<gMat2D<T> >(*xty));
+    // XtX += X'*X; Xty += X'*y;
+    gemm(CblasTrans, CblasNoTrans, d, d, n, (T)1.0, X.getData(), n, X.getData(), n, (T)1.0, XtX.getData(), d);
+    gemm(CblasTrans, CblasNoTrans, d, t, n, (T)1.0, X.getData(), n, y.getData(), n, (T)1.0, Xty.getData(), d);
 
 
+    // every proportion-th sample is added to the validation set
     unsigned long proportion = static_cast<unsigned long>(gurls::round(1.0/this->opt->getOptAsNumber("hoproportion")));
 
-    if(nTot % proportion == 0)
+    std::vector<unsigned long> va;
+    for(unsigned long i=0; i<n; ++i)
+    {
+        ++nTot;
+        if(nTot % proportion == 0)
+            va.push_back(i);
+    }
+
+    if(!va.empty())
     {
         const gMat2D<T>& Xva = kernel->getOptValue<OptMatrix<gMat2D<T> > >("Xva");
         const gMat2D<T>& yva = kernel->getOptValue<OptMatrix<gMat2D<T> > >("yva");
 
         const unsigned long nva = Xva.rows();
-        const unsigned long nva_new = nva+1;
-
+        const unsigned long nadd = va.size();
+        const unsigned long nva_new = nva+nadd;
 
         gMat2D<T>* Xva_new = new gMat2D<T>(nva_new, d);
+        gMat2D<T>* yva_new = new gMat2D<T>(nva_new, t);
 
-        const T* old_it = Xva.getData();
-        T* new_it = Xva_new->getData();
-        for(const T* end = new_it+(nva_new*d); new_it< end; old_it+=nva, new_it +=nva_new)
-            copy(new_it, old_it, nva);
+        for(unsigned long j=0; j<d; ++j)
+            copy(Xva_new->getData()+j*nva_new, Xva.getData()+j*nva, nva);
+        for(unsigned long j=0; j<t; ++j)
+            copy(yva_new->getData()+j*nva_new, yva.getData()+j*nva, nva);
 
-        copy(Xva_new->getData()+nva, X.getData(), d, nva_new, 1);
+        for(unsigned long a=0; a<nadd; ++a)
+        {
+            copy(Xva_new->getData()+nva+a, X.getData()+va[a], d, nva_new, n);
+            copy(yva_new->getData()+nva+a, y.getData()+va[a], t, nva_new, n);
+        }
 
         kernel->removeOpt("Xva");
         kernel->addOpt("Xva", new OptMatrix<gMat2D<T> >(*Xva_new));
 
-
-        gMat2D<T>* yva_new = new gMat2D<T>(nva_new, t);
-
-        old_it = yva.getData();
-        new_it = yva_new->getData();
-        for(const T* end = new_it+(nva_new*t); new_it< end; old_it+=nva, new_it +=nva_new)
-            copy(new_it, old_it, nva);
-
-        copy(yva_new->getData()+nva, y.getData(), t, nva_new, 1);
-
         kernel->removeOpt("yva");
         kernel->addOpt("yva", new OptMatrix<gMat2D<T> >(*yva_new));
-
     }
 }
 
@@ -59,6 +59,9 @@ namespace gurls
   * Once the information about initial training is stored, given a new input-output pair, 
   * the RLS estimator can be efficiently updated via the method update().
   * Every time a new input-output pair is available, method update() can be invoked again.
+  * Samples can be removed again via method downdate(), so that a fixed-size window
+  * slides forward at O(d^2) per sample; alternatively, setForgettingFactor() makes
+  * update() discount the past exponentially.
   * Finally, the eval() method estimates the output for new data.
   */
 template<typename T>
@@ -81,13 +84,27 @@ public:
     void train(const gMat2D<T> &X, const gMat2D<T> &y);
 
     /**
-      * Estimator update
+      * Estimator update with a rank-k Cholesky update
       *
-      * \param[in] X Input data vector
-      * \param[in] Y Labels vector
+      * \param[in] X Input data matrix, one sample per row
+      * \param[in] Y Labels matrix
       */
     void update(const gMat2D<T> &X, const gMat2D<T> &y);
 
+    /**
+      * Removes samples previously added to the estimator with a rank-k Cholesky downdate
+      *
+      * \param[in] X Input data matrix, one sample per row
+      * \param[in] Y Labels matrix
+      */
+    void downdate(const gMat2D<T> &X, const gMat2D<T> &y);
+
+    /**
+      * Sets the exponential forgetting factor used by update(), in (0, 1].
+      * The regularization term is forgotten along with the data.
+      */
+    void setForgettingFactor(double value);
+
     /**
       * Estimates label for an input matrix
       *
@@ -76,21 +76,44 @@ void RecursiveRLSCholUpdateWrapper<T>::update(const gMat2D<T> &X, const gMat2D<T
     if(!this->trainedModel())
         throw gException("Error, Train Model First");
 
+    if(X.rows() != y.rows())
+        throw gException(Exception_Inconsistent_Size);
+
     RLSPrimalRecUpdateCholesky<T> optimizer;
 
-    const unsigned long d = X.getSize();
-    const unsigned long t = y.getSize();
+    GurlsOptionsList* ret = optimizer.execute(X, y, *(this->opt));
+    this->opt->removeOpt("optimizer");
+    this->opt->addOpt("optimizer", ret);
 
-    gMat2D<T>X_mat(1, d);
-    copy(X_mat.getData(), X.getData(), d);
-        
-    gMat2D<T>y_mat(1, t);
-    copy(y_mat.getData(), y.getData(), t);
-    
-    GurlsOptionsList* ret = optimizer.execute(X_mat, y_mat, *(this->opt));
+    nTot += X.rows();
+}
+
+template <typename T>
+void RecursiveRLSCholUpdateWrapper<T>::downdate(const gMat2D<T> &X, const gMat2D<T> &y)
+{
+    if(!this->trainedModel())
+        throw gException("Error, Train Model First");
+
+    if(X.rows() != y.rows())
+        throw gException(Exception_Inconsistent_Size);
+
+    RLSPrimalRecUpdateCholesky<T> optimizer;
+
+    GurlsOptionsList* ret = optimizer.downdate(X, y, *(this->opt));
     this->opt->removeOpt("optimizer");
     this->opt->addOpt("optimizer", ret);
 
+    nTot -= std::min(nTot, X.rows());
+}
+
+template <typename T>
+void RecursiveRLSCholUpdateWrapper<T>::setForgettingFactor(double value)
+{
+    if(value <= 0.0 || value > 1.0)
+        throw gException("The forgetting factor must be in (0, 1]");
+
+    this->opt->removeOpt("forgetting");
+    this->opt->addOpt("forgetting", new OptNumber(value));
 }
 
 template <typename T>
@@ -44,6 +44,7 @@
 #define _GURLS_RLSDUAL_H_
 
 #include "gurls++/optimization.h"
+#include "gurls++/utils.h"
 
 #include <set>
 
@@ -81,7 +82,8 @@ public:
      * \param opt options with the following:
      *  - singlelambda (default)
      *  - paramsel (settable with the class ParamSelection and its subclasses)
-     *  - kernel (settable with the class Kernel and its subclasses)
+     *  - kernel (settable with the class Kernel and its subclasses). If the eigendecomposition
+     *    of kernel.K has been stored with \ref addKernelEig, it is used instead of a new factorization
      *
      * \return adds to opt the field optimizer, which is a list containing the following fields:
      *  - W = empty matrix
@@ -102,15 +104,37 @@ GurlsOptionsList* RLSDual<T>::execute(const gMat2D<T>& X, const gMat2D<T>& Y, co
    const GurlsOptionsList* kernel = opt.getOptAs<GurlsOptionsList>("kernel");
    const gMat2D<T>& K_mat = kernel->getOptValue<OptMatrix<gMat2D<T> > >("K");
 
-   T* K = new T[K_mat.getSize()];
-   copy(K, K_mat.getData(), K_mat.getSize());
-
     //n = size(opt.kernel.K,1);
    const long n = K_mat.rows();
 
    //T = size(y,2);
    const long t = Y.cols();
 
+   gMat2D<T>* retC = NULL;
+   T* K = NULL;
+
+   const T* Q_cached = NULL;
+   const T* L_cached = NULL;
+
+   // cfr.C = rls_eigen(Q,L,Q'*y,lambda,n), with the decomposition stored by addKernelEig
+   if(kernelEig(opt, n, false, Q_cached, L_cached))
+   {
+       retC = new gMat2D<T>(n, t);
+
+       T* Qty = new T[n*t];
+       dot(Q_cached, Y.getData(), Qty, n, n, Y.rows(), t, n, t, CblasTrans, CblasNoTrans, CblasColMajor);
+
+       T* work = new T[n*(n+1)];
+       rls_eigen(Q_cached, L_cached, Qty, retC->getData(), lambda, n, n, n, n, n, t, work);
+
+       delete [] work;
+       delete [] Qty;
+   }
+   else
+   {
+
+   K = new T[K_mat.getSize()];
+   copy(K, K_mat.getData(), K_mat.getSize());
 
 //    std::cout << "Solving dual RLS... " << std::endl;
 
@@ -122,8 +146,6 @@ GurlsOptionsList* RLSDual<T>::execute(const gMat2D<T>& X, const gMat2D<T>& Y, co
 
    std::set<T*> garbage;
 
-   gMat2D<T>* retC = NULL;
-
    try // Try solving it with cholesky first.
    {
 //        R = chol(K);
@@ -179,6 +201,8 @@ GurlsOptionsList* RLSDual<T>::execute(const gMat2D<T>& X, const gMat2D<T>& Y, co
        delete [] V;
    }
 
+   }
+
    delete[] K;
 
    GurlsOptionsList* optimizer = new GurlsOptionsList("optimizer");
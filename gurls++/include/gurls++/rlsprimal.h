@@ -83,6 +83,8 @@ public:
      * \param opt options with the following:
      *  - singlelambda (default)
      *  - paramsel (settable with the class ParamSelection and its subclasses)
+     *  - kernel.Q, kernel.L (optional) eigendecomposition of X'*X stored with \ref addKernelEig,
+     *    used instead of a new factorization
      *
      * \return adds to opt the field optimizer which is a list containing the following fields:
      *  - W = matrix of coefficient vectors of rls estimator for each class
@@ -112,18 +114,39 @@ GurlsOptionsList* RLSPrimal<T>::execute(const gMat2D<T>& X, const gMat2D<T>& Y,
 
     //	===================================== Primal K
 
-    //	K = X'*X;
-    T* K = new T[d*d];
-    dot(X.getData(), X.getData(), K, n, d, n, d, d, d, CblasTrans, CblasNoTrans, CblasColMajor);
-
     //	Xty = X'*y;
     T* Xty = new T[d*Yd];
     dot(X.getData(), Y.getData(), Xty, n, d, Yn, Yd, d, Yd, CblasTrans, CblasNoTrans, CblasColMajor);
 
+    gMat2D<T> *W = NULL;
+
+    const T* Q = NULL;
+    const T* L = NULL;
+
+    // W = rls_eigen(Q,L,Q'*Xty,lambda,n), with the decomposition of X'*X stored by addKernelEig
+    if(kernelEig(opt, d, true, Q, L))
+    {
+        T* QtXty = new T[d*Yd];
+        dot(Q, Xty, QtXty, d, d, d, Yd, d, Yd, CblasTrans, CblasNoTrans, CblasColMajor);
+
+        W = new gMat2D<T>(d, Yd);
+        T* work = new T[d*(d+1)];
+        rls_eigen(Q, L, QtXty, W->getData(), lambda, n, d, d, d, d, Yd, work);
+
+        delete[] work;
+        delete[] QtXty;
+    }
+    else
+    {
+        //	K = X'*X;
+        T* K = new T[d*d];
+        dot(X.getData(), X.getData(), K, n, d, n, d, d, d, CblasTrans, CblasNoTrans, CblasColMajor);
+
+        W = rls_primal_driver(K, Xty, n, d, Yd, lambda);
 
-    gMat2D<T> *W = rls_primal_driver(K, Xty, n, d, Yd, lambda);
+        delete[] K;
+    }
 
-    delete[] K;
     delete[] Xty;
 
     GurlsOptionsList* optimizer = new GurlsOptionsList("optimizer");
@@ -176,13 +176,6 @@ GurlsOptionsList* RLSPrimalRecInitCholesky<T>::execute(const gMat2D<T>& X, const
     //Save results in OPT
     GurlsOptionsList* optimizer = new GurlsOptionsList("optimizer");
     
-    std::cout << "W:" << std::endl;
-    std::cout << *W << std::endl;
-    std::cout << "b:" << std::endl;
-    std::cout << *b << std::endl;
-    std::cout << "R:" << std::endl;
-    std::cout << *R_mat << std::endl;
-    
     //  cfr.W = W;
     optimizer->addOpt("W", new OptMatrix<gMat2D<T> >(*W));
 
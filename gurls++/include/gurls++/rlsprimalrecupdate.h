@@ -113,51 +113,62 @@ GurlsOptionsList* RLSPrimalRecUpdate<T>::execute(const gMat2D<T>& X, const gMat2
     gMat2D<T>* Cinv = new gMat2D<T>(prev_Cinv);
 
     T* WData = W->getData();
-    const unsigned long wn = W->rows();
-    const unsigned long wd = W->cols();
-
-
     T* CinvData = Cinv->getData();
-    const unsigned long cn = Cinv->rows();
-    const unsigned long cd = Cinv->cols();
-
-    T* Cx = new T[cn];
-    T* x = new T[d];
-    T* y = new T[t];
-    T xCx;
-    T* CxCxt = new T[cn*cn];
-    T* xW = new T[wd];
-    T* Cxy = new T[cn*t];
-
-    for(unsigned long i=0; i<n; ++i)
-    {
-        getRow(X.getData(), n, d, i, x);
-        getRow(Y.getData(), n, t, i, y);
-
-        //  Cx = Cinv*X(i,:)';
-        gemv(CblasNoTrans, cn, cd, (T)1.0, CinvData, cn, x, 1, (T)0.0, Cx, 1);
 
-        //  xCx = X(i,:)*Cx;
-        gemv(CblasNoTrans, 1, d, (T)1.0, x, 1, Cx, 1, (T)0.0, &xCx, 1);
-
-        //  Cinv = Cinv - Cx*Cx'./(1+xCx);
-        dot(Cx, Cx, CxCxt, cn, 1, cn, 1, cn, cn, CblasNoTrans, CblasTrans, CblasColMajor);
-        axpy(cn*cn, (T)(-1.0/(xCx+1)), CxCxt, 1, CinvData, 1);
-
-
-        //  W = W +(Cx*(y(i,:)-X(i,:)*W))./(1+xCx);
-        dot(x, WData, xW, 1, d, wn, wd, 1, wd, CblasNoTrans, CblasNoTrans, CblasColMajor);
-        axpy(t, (T)-1.0, xW, 1, y, 1);
-        dot(Cx, y, Cxy, cn, 1, 1, t, cn, t, CblasNoTrans, CblasNoTrans, CblasColMajor);
-        axpy(cn*t, (T)(1.0/(xCx+1)), Cxy, 1, WData, 1);
+    // Rows are added k at a time with the Woodbury identity, which turns the
+    // rank-one updates into matrix-matrix products:
+    //  S = eye(k) + Xb*Cinv*Xb';
+    //  Cinv = Cinv - (Xb*Cinv)'*(S\(Xb*Cinv));
+    //  W = W + Cinv*Xb'*(yb - Xb*W);
+    // With k=1 this is the classic recursive update.
+    const unsigned long block = std::max(1ul, std::min(n, d));
+
+    T* XC = new T[block*d];
+    T* S = new T[block*block];
+    T* R = new T[block*block];
+    T* SXC = new T[block*d];
+    T* res = new T[block*t];
+    T* Xtres = new T[d*t];
+
+    for(unsigned long i=0; i<n; i+=block)
+    {
+        const unsigned long k = std::min(block, n-i);
+        const T* Xb = X.getData()+i; // rows i:i+k of X, leading dimension n
+        const T* yb = Y.getData()+i;
+
+        //  XC = Xb*Cinv;
+        gemm(CblasNoTrans, CblasNoTrans, k, d, d, (T)1.0, Xb, n, CinvData, d, (T)0.0, XC, k);
+
+        //  S = eye(k) + XC*Xb';
+        set(S, (T)0.0, k*k);
+        set(S, (T)1.0, k, k+1);
+        gemm(CblasNoTrans, CblasTrans, k, k, d, (T)1.0, XC, k, Xb, n, (T)1.0, S, k);
+
+        //  SXC = S\XC;
+        cholesky(S, k, k, R);
+        copy(SXC, XC, k*d);
+        mldivide_squared(R, SXC, k, k, k, d, CblasTrans);
+        mldivide_squared(R, SXC, k, k, k, d, CblasNoTrans);
+
+        //  Cinv = Cinv - XC'*SXC;
+        gemm(CblasTrans, CblasNoTrans, d, d, k, (T)-1.0, XC, k, SXC, k, (T)1.0, CinvData, d);
+
+        //  res = yb - Xb*W;
+        for(unsigned long j=0; j<t; ++j)
+            copy(res+j*k, yb+j*n, k);
+        gemm(CblasNoTrans, CblasNoTrans, k, t, d, (T)-1.0, Xb, n, WData, d, (T)1.0, res, k);
+
+        //  W = W + Cinv*(Xb'*res);
+        gemm(CblasTrans, CblasNoTrans, d, t, k, (T)1.0, Xb, n, res, k, (T)0.0, Xtres, d);
+        gemm(CblasNoTrans, CblasNoTrans, d, t, d, (T)1.0, CinvData, d, Xtres, d, (T)1.0, WData, d);
     }
 
-    delete[] Cx;
-    delete[] x;
-    delete[] y;
-    delete[] CxCxt;
-    delete[] xW;
-    delete[] Cxy;
+    delete[] XC;
+    delete[] S;
+    delete[] R;
+    delete[] SXC;
+    delete[] res;
+    delete[] Xtres;
 
 
     GurlsOptionsList* optimizer = new GurlsOptionsList("optimizer");
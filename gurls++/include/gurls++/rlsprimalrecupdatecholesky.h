@@ -81,12 +81,14 @@ public:
      * Computes a classifier for the primal formulation of RLS, using a
      * recursive Cholesky update, starting from an initial estimator found in opt.optimizer.
      *
-     * \param X input data matrix
+     * \param X input data matrix, each row is a sample added to the estimator
      * \param Y labels matrix
      * \param opt options with the following fields that need to be set through previous gurls++ tasks:
      *  - optimizer.W (settable with the class RLSPrimalRecInitCholesky)
      *  - optimizer.R (settable with the class RLSPrimalRecInitCholesky)
      *  - optimizer.b (settable with the class RLSPrimalRecInitCholesky)
+     *  - forgetting (default 1) exponential forgetting factor in (0, 1]: before each
+     *    sample is added, the accumulated X'X + n*lambda*I and X'y are scaled by it
      *
      * \return adds to opt the field optimizer which is a list containing the following fields:
      *  - W = updated matrix of coefficient vectors of rls estimator for each class
@@ -94,12 +96,43 @@ public:
      *  - b = Updated Xty matrix
      */
     GurlsOptionsList* execute(const gMat2D<T>& X, const gMat2D<T>& Y, const GurlsOptionsList& opt);
+
+    /**
+     * Removes the rows of X from the estimator found in opt.optimizer with a
+     * rank-k Cholesky downdate, at O(d^2) per row. Rows are removed with unit
+     * weight, so they must be the same rows previously added with forgetting = 1.
+     *
+     * \param X input data matrix, each row is a sample removed from the estimator
+     * \param Y labels matrix
+     * \param opt options with the fields optimizer.W, optimizer.R and optimizer.b
+     *
+     * \return the same optimizer list returned by execute()
+     */
+    GurlsOptionsList* downdate(const gMat2D<T>& X, const gMat2D<T>& Y, const GurlsOptionsList& opt);
+
+protected:
+    /**
+     * Applies the update (down = false) or the downdate (down = true) shared by execute() and downdate()
+     */
+    GurlsOptionsList* modify(const gMat2D<T>& X, const gMat2D<T>& Y, const GurlsOptionsList& opt, bool down);
 };
 
 
 template <typename T>
 GurlsOptionsList* RLSPrimalRecUpdateCholesky<T>::execute(const gMat2D<T>& X, const gMat2D<T>& Y, const GurlsOptionsList &opt)
-{   
+{
+    return modify(X, Y, opt, false);
+}
+
+template <typename T>
+GurlsOptionsList* RLSPrimalRecUpdateCholesky<T>::downdate(const gMat2D<T>& X, const gMat2D<T>& Y, const GurlsOptionsList &opt)
+{
+    return modify(X, Y, opt, true);
+}
+
+template <typename T>
+GurlsOptionsList* RLSPrimalRecUpdateCholesky<T>::modify(const gMat2D<T>& X, const gMat2D<T>& Y, const GurlsOptionsList &opt, bool down)
+{
     // Get significant sizes
     //	[n,d] = size(X);
 
@@ -107,69 +140,97 @@ GurlsOptionsList* RLSPrimalRecUpdateCholesky<T>::execute(const gMat2D<T>& X, con
     const unsigned long d = X.cols();
     const unsigned long t = Y.cols();
 
-    // Xty = X'*y;
-    T* Xty;
-    Xty = new T[d*t];
-    dot(X.getData(), Y.getData(), Xty, n, d, n, t, d, t, CblasTrans, CblasNoTrans, CblasColMajor);
-    
-    // Retrieve previous W, R, b
-    
-    //  W = opt.rls.W;
-    const gMat2D<T>& prev_W = opt.getOptValue<OptMatrix<gMat2D<T> > >("optimizer.W");
-    gMat2D<T>* W = new gMat2D<T>(prev_W);
-    
+    const T beta = (!down && opt.hasOpt("forgetting"))? static_cast<T>(opt.getOptAsNumber("forgetting")) : (T)1.0;
+    if(beta <= 0 || beta > 1)
+        throw gException("The forgetting factor must be in (0, 1]");
+
+    // Retrieve previous R, b
+
     //  R = opt.rls.R;
     const gMat2D<T>& prev_R = opt.getOptValue<OptMatrix<gMat2D<T> > >("optimizer.R");
     gMat2D<T>* R = new gMat2D<T>(prev_R);
-    
+
     //  b = opt.rls.b;
     const gMat2D<T>& prev_b = opt.getOptValue<OptMatrix<gMat2D<T> > >("optimizer.b");
     gMat2D<T>* b = new gMat2D<T>(prev_b);
-    
-    // Update R
-    for(unsigned long i=0; i<n; i++)
+
+    if(R->rows() != d || b->rows() != d || b->cols() != t)
+    {
+        delete R;
+        delete b;
+        throw gException(Exception_Inconsistent_Size);
+    }
+
+    // Row i of a block of n samples has been forgotten n-1-i times by the end
+    // of the block: weights[i] = sqrt(beta)^(n-1-i), b = beta^n*b + X'*diag(weights)^2*Y
+    T* weights = NULL;
+    const T* Xw = X.getData();
+    T* Xscaled = NULL;
+    T bscale = (T)1.0;
+    if(beta < 1 && n > 0)
+    {
+        weights = new T[n];
+        const T sqbeta = sqrt(beta);
+        weights[n-1] = (T)1.0;
+        for(long i = (long)n-2; i >= 0; --i)
+            weights[i] = weights[i+1]*sqbeta;
+
+        // R'*R is scaled by beta^n
+        scal(d*d, weights[0]*sqbeta, R->getData(), 1);
+        bscale = weights[0]*weights[0]*beta;
+
+        Xscaled = new T[n*d];
+        copy(Xscaled, X.getData(), n*d);
+        for(unsigned long i = 0; i < n; ++i)
+            scal(d, weights[i]*weights[i], Xscaled+i, n);
+        Xw = Xscaled;
+    }
+
+    // Update or downdate R, one rank-1 modification per row
+    try
+    {
+        if(down)
+            choldowndaterows(*R, X.getData(), n);
+        else
+            cholupdaterows(*R, X.getData(), n, weights);
+    }
+    catch(gException&)
     {
-        // Get pointer to the i-th input
-//         gVec<T> v( X[i] );
-//         double* input =  v.getData();
-        T* input = (T*)X.getData() + i;
-        
-        // Rank-1 Cholesky update of R
-        cholupdate(*R, *input, 1);
-
-        // Update b = b + X[i]ty
-        // TODO: Maybe the update of b can be done in 1-shot outside the for loop.
-        gMat2D<T> transposedinput(d, 1);
-        X.transpose(transposedinput);
-        gMat2D<T> res( d , t );          // Temporary variable for result storage
-        
-        dot( transposedinput , Y , res );
-        *b = (*b) + res;
+        delete R;
+        delete b;
+        delete[] weights;
+        delete[] Xscaled;
+        throw;
     }
 
+    // b = bscale*b +/- X'*(weighted Y), in one shot
+    if(n > 0)
+        gemm(CblasTrans, CblasNoTrans, d, t, n, down? (T)-1.0 : (T)1.0, Xw, n, Y.getData(), n, bscale, b->getData(), d);
+
+    delete[] weights;
+    delete[] Xscaled;
+
     // Update W
-    
+    gMat2D<T>* W = new gMat2D<T>(d, t);
     copy(W->getData(), b->getData(), W->getSize());
-    
+
     // Forward substitution
-    mldivide_squared(R->getData(), W->getData(), d, d, W->rows(), W->cols(), CblasTrans);    //(R'\Xty) 
-    
+    mldivide_squared(R->getData(), W->getData(), d, d, W->rows(), W->cols(), CblasTrans);    //(R'\Xty)
+
     // Backward substitution
-    mldivide_squared(R->getData(), W->getData(), d, d, W->rows(), W->cols(), CblasNoTrans);  //R\(R'\Xty)     
+    mldivide_squared(R->getData(), W->getData(), d, d, W->rows(), W->cols(), CblasNoTrans);  //R\(R'\Xty)
 
     GurlsOptionsList* optimizer = new GurlsOptionsList("optimizer");
 
     // cfr.R = R;
     optimizer->addOpt("R", new OptMatrix<gMat2D<T> >(*R));
-    
+
     //  cfr.W = W;
     optimizer->addOpt("W", new OptMatrix<gMat2D<T> >(*W));
 
     //  cfr.b = b;
     optimizer->addOpt("b", new OptMatrix<gMat2D<T> >(*b));
-    
-    delete[] Xty;
-    
+
     return optimizer;
 }
 
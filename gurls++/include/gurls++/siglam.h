@@ -59,6 +59,8 @@
 #include "gurls++/paramsel.h"
 #include "gurls++/perf.h"
 #include "gurls++/rbfkernel.h"
+#include "gurls++/gridrefine.h"
+#include "gurls++/kernelcache.h"
 #include "gurls++/loocvdual.h"
 
 namespace gurls {
@@ -95,6 +97,11 @@ public:
      *  - nsigma (default)
      *  - hoperf (default)
      *  - smallnumber (default)
+     *  - nsigmarefine (default) number of evaluations added around the best sigma of the grid, see \ref GridRefine;
+     *    the lambdas of each sigma are scanned on the nlambda grid
+     *  - njobs (default 1) number of sigmas evaluated concurrently, all the processors if <= 0 (requires OpenMP)
+     *  - maxmemory (default unlimited) memory budget in bytes, which limits njobs to the workers whose n x n buffers fit in it
+     *  - kernelcache, kernelcachesize (optional) on-disk cache of the distances and eigendecompositions, see KernelCache
      *
      * \return adds the field paramsel to opt, which is alist containing the following fields:
      *  - lambdas = array containing the value of the regularization parameter lambda maximizing the mean validation accuracy over the classes, replicated as many times as the number of classes
@@ -152,16 +159,10 @@ GurlsOptionsList* ParamSelSiglam<T>::execute(const gMat2D<T>& X, const gMat2D<T>
     if(!kernel->hasOpt("distance"))
         // 	opt.kernel.distance = squareform(pdist(X));
     {
-        squareform<T>(X.getData(), X.rows(), X.cols(), dist->getData(), X.rows());
-
-        T *distSquared = new T[X.rows()*X.rows()];
-        copy(distSquared , dist->getData(), X.rows()*X.rows());
-
-        mult<T>(distSquared, distSquared, dist->getData(), X.rows()*X.rows());
+        // squared distances, computed by blocks with GEMM
+        cachedDistance(opt, X, *dist);
 
         kernel->addOpt("distance", new OptMatrix<gMat2D<T> >(*dist));
-
-        delete [] distSquared;
     }
     else
         dist = &(kernel->getOptValue<OptMatrix<gMat2D<T> > >("distance"));
@@ -241,67 +242,121 @@ GurlsOptionsList* ParamSelSiglam<T>::execute(const gMat2D<T>& X, const gMat2D<T>
     T q = pow( sigmamax/sigmamin, static_cast<T>(1.0/(nsigma-1.0)));
 
     // LOOSQE = zeros(opt.nsigma,opt.nlambda,T);
-    //T* LOOSQE = new T[nsigma*nlambda*t];
-    T* perf = new T[nlambda];
+    // lambda guess for each sigma, whose best performance is kept by search
+    std::vector<T> sigma_guess;
 
-    // sigmas = zeros(1,opt.nsigma);
-    // for i = 1:opt.nsigma
+    // the grid of sigmas, refined around the best one
+    T* sigmas = new T[nsigma];
+    for(unsigned long i=0; i<(unsigned long)nsigma; ++i)
+        sigmas[i] = sigmamin * pow(q, (T)i);
 
-    KernelRBF<T> rbfkernel;
-    ParamSelLoocvDual<T> loocvdual;
+    GridRefine<T> search(sigmas, nsigma, 1, GridRefine<T>::budgetOf(opt, "nsigmarefine"));
+    delete [] sigmas;
 
-    T* work = new T[std::max(nlambda, t+1)];
-    T maxTmp = (T)-1.0;
-    int m = -1;
-    T guess = (T)-1.0;
+    // each sigma gets its own kernel matrix (plus the eigendecomposition and
+    // work buffers of loocvdual), so the sigmas can be evaluated concurrently
+    const int njobs = gridWorkers<T>(opt, X.rows(), nsigma, 4);
+    bool failed = false;
+    std::string error;
 
-    for(unsigned long i=0; i<nsigma; ++i)
+    // sigmas = zeros(1,opt.nsigma);
+    // for i = 1:opt.nsigma
+    long first = 0;
+    do
     {
-        nestedOpt->addOpt("paramsel", paramsel);
-
-        paramsel->removeOpt("sigma");
-        paramsel->addOpt("sigma", new OptNumber( sigmamin * pow(q, (T)i)));
-
-        // 	opt.kernel = kernel_rbf(X,y,opt);
-        GurlsOptionsList* retKernel = rbfkernel.execute(X, Y, *nestedOpt);
-
-        nestedOpt->removeOpt("kernel");
-        nestedOpt->addOpt("kernel", retKernel);
+        const long last = search.size();
+        sigma_guess.resize(last);
 
-        nestedOpt->removeOpt("paramsel", false);
-
-        // 	paramsel = paramsel_loocvdual(X,y,opt);
-        GurlsOptionsList* ret_paramsel = loocvdual.execute(X, Y, *nestedOpt);
-
-
-        gMat2D<T> &looe_mat = ret_paramsel->getOptValue<OptMatrix<gMat2D<T> > >("perf");
-
-        // 	LOOSQE(i,:,:) = paramsel.looe{1};
-        // 	guesses(i,:) = paramsel.guesses;
-        gMat2D<T> &guesses_mat = ret_paramsel->getOptValue<OptMatrix<gMat2D<T> > >("guesses");
-
-        for(unsigned long j=0; j<nlambda; ++j)
+#ifdef _OPENMP
+#pragma omp parallel for num_threads(njobs) schedule(dynamic)
+#endif
+        for(long i=first; i<last; ++i)
         {
-            perf[j] = 0;
-
-            T* end = looe_mat.getData()+looe_mat.getSize();
-            for(T* it = looe_mat.getData()+j; it< end ; it+=nlambda)
-                perf[j] += *it;
+            GurlsOptionsList* sigmaOpt = NULL;
+            GurlsOptionsList* ret_paramsel = NULL;
+            T* perf = NULL;
+
+            try
+            {
+                sigmaOpt = new GurlsOptionsList("nested");
+                sigmaOpt->copyOpt("nlambda", opt);
+                sigmaOpt->copyOpt("hoperf", opt);
+                sigmaOpt->copyOpt("smallnumber", opt);
+                KernelCache::copyOptions(*sigmaOpt, opt);
+
+                // 	opt.kernel = kernel_rbf(X,y,opt);
+                sigmaOpt->addOpt("kernel", rbfKernelFromDistance(*dist, search.candidate(i)));
+
+                // 	paramsel = paramsel_loocvdual(X,y,opt);
+                // all the lambda guesses are scored on a single eigendecomposition of K
+                ParamSelLoocvDual<T> loocvdual;
+                ret_paramsel = loocvdual.execute(X, Y, *sigmaOpt);
+
+                gMat2D<T> &looe_mat = ret_paramsel->getOptValue<OptMatrix<gMat2D<T> > >("perf");
+
+                // 	LOOSQE(i,:,:) = paramsel.looe{1};
+                // 	guesses(i,:) = paramsel.guesses;
+                gMat2D<T> &guesses_mat = ret_paramsel->getOptValue<OptMatrix<gMat2D<T> > >("guesses");
+
+                perf = new T[nlambda];
+                for(unsigned long j=0; j<nlambda; ++j)
+                {
+                    perf[j] = 0;
+
+                    T* end = looe_mat.getData()+looe_mat.getSize();
+                    for(T* it = looe_mat.getData()+j; it< end ; it+=nlambda)
+                        perf[j] += *it;
+                }
+                std::size_t mm = std::max_element(perf, perf + nlambda) - perf;
+
+                *search.perf(i) = perf[mm];
+                sigma_guess[i] = guesses_mat.getData()[mm*guesses_mat.rows()];
+            }
+            catch(gException& ex)
+            {
+#ifdef _OPENMP
+#pragma omp critical(gurls_siglam)
+#endif
+                {
+                    failed = true;
+                    error = ex.getMessage();
+                }
+            }
+            catch(std::exception& ex)
+            {
+#ifdef _OPENMP
+#pragma omp critical(gurls_siglam)
+#endif
+                {
+                    failed = true;
+                    error = ex.what();
+                }
+            }
+
+            delete [] perf;
+            delete ret_paramsel;
+            delete sigmaOpt;
         }
-        std::size_t mm = std::max_element(perf, perf + nlambda) - perf;
 
-        if( gt(perf[mm], maxTmp) || i==0)
+        if(failed)
         {
-            maxTmp = perf[mm];
-            m = i;
-            guess = guesses_mat.getData()[mm*guesses_mat.rows()];
+            delete nestedOpt;
+            delete paramsel;
+            throw gException(error);
         }
 
-        delete ret_paramsel;
+        first = last;
     }
+    while(search.refine());
+
+    // the first sigma wins the ties, as in a sequential scan
+    unsigned long m = 0;
+    for(unsigned long i=1; i<search.size(); ++i)
+        if( gt(*search.perf(i), *search.perf(m)) )
+            m = i;
+
+    T guess = sigma_guess[m];
 
-    delete [] work;
-    delete [] perf;
     delete nestedOpt;
 
     // M = sum(LOOSQE,3); % sum over classes
@@ -314,7 +369,7 @@ GurlsOptionsList* ParamSelSiglam<T>::execute(const gMat2D<T>& X, const gMat2D<T>
 
 
     paramsel->removeOpt("sigma");
-    paramsel->addOpt("sigma", new OptNumber( sigmamin * pow(q,m) ));
+    paramsel->addOpt("sigma", new OptNumber( search.candidate(m) ));
 
     // % opt lambda
     // vout.lambdas = guesses(m,n)*ones(1,T);
@@ -59,6 +59,8 @@
 #include "gurls++/paramsel.h"
 #include "gurls++/perf.h"
 #include "gurls++/rbfkernel.h"
+#include "gurls++/gridrefine.h"
+#include "gurls++/kernelcache.h"
 #include "gurls++/hodual.h"
 
 namespace gurls {
@@ -97,6 +99,11 @@ public:
      *  - hoperf (default)
      *  - smallnumber (default)
      *  - split (settable with the class Split and its subclasses)
+     *  - nsigmarefine (default) number of evaluations added around the best sigma of the grid, see \ref GridRefine;
+     *    the lambdas of each sigma are scanned on the nlambda grid
+     *  - njobs (default 1) number of sigmas evaluated concurrently, all the processors if <= 0 (requires OpenMP)
+     *  - maxmemory (default unlimited) memory budget in bytes, which limits njobs to the workers whose n x n buffers fit in it
+     *  - kernelcache, kernelcachesize (optional) on-disk cache of the distances and eigendecompositions, see KernelCache
      *
      * \return adds the field paramsel to opt, which is alist containing the following fields:
      *  - lambdas = array containing the value of the regularization parameter lambda maximizing the mean validation accuracy over the classes, replicated as many times as the number of classes
@@ -152,15 +159,10 @@ GurlsOptionsList *ParamSelSiglamHo<T>::execute(const gMat2D<T>& X, const gMat2D<
     {
         dist = new gMat2D<T>(X.rows(), X.rows());
 
-        squareform<T>(X.getData(), X.rows(), X.cols(), dist->getData(), X.rows());
-
-        T *distSquared = new T[X.rows()*X.rows()];
-        copy(distSquared , dist->getData(), X.rows()*X.rows());
-
-        mult<T>(distSquared, distSquared, dist->getData(), X.rows()*X.rows());
+        // squared distances, computed by blocks with GEMM
+        cachedDistance(opt, X, *dist);
 
         kernel->addOpt("distance", new OptMatrix<gMat2D<T> >(*dist));
-        delete [] distSquared;
     }
     else
     {
@@ -246,82 +248,143 @@ GurlsOptionsList *ParamSelSiglamHo<T>::execute(const gMat2D<T>& X, const gMat2D<
     T q = pow( sigmamax/sigmamin, static_cast<T>(1.0/(nsigma-1.0)));
 
     // PERF = zeros(opt.nsigma,opt.nlambda,T);
-    T* perf = new T[nlambda];
-
-    // sigmas = zeros(1,opt.nsigma);
-
-    KernelRBF<T> rbfkernel;
-    ParamSelHoDual<T> hodual;
-
+    // median lambda guess for each sigma, whose best performance is kept by search
+    std::vector<T> sigma_guess;
 
-    T maxPerf = (T)-1.0;
-    int m = -1;
-    T guess = (T)-1.0;
+    // the grid of sigmas, refined around the best one
+    T* sigmas = new T[nsigma];
+    for(unsigned long i=0; i<(unsigned long)nsigma; ++i)
+        sigmas[i] = sigmamin * pow(q, (T)i);
 
-    T* perf_median = new T[nlambda*t];
-    T* guesses_median = new T[nlambda];
-    T* row = new T[t];
+    GridRefine<T> search(sigmas, nsigma, 1, GridRefine<T>::budgetOf(opt, "nsigmarefine"));
+    delete [] sigmas;
 
     const unsigned long nholdouts = static_cast<unsigned long>(opt.getOptAsNumber("nholdouts"));
-    T* work = new T[nholdouts];
 
+    // each sigma gets its own kernel matrix (plus the eigendecompositions and
+    // work buffers of hodual), so the sigmas can be evaluated concurrently
+    const int njobs = gridWorkers<T>(opt, X.rows(), nsigma, 4);
+    bool failed = false;
+    std::string error;
+
+    // sigmas = zeros(1,opt.nsigma);
 //    for i = 1:opt.nsigma
-    for(int i=0; i<nsigma; ++i)
+    long first = 0;
+    do
     {
-        nestedOpt->addOpt("paramsel", paramsel);
-
-        paramsel->removeOpt("sigma");
-        paramsel->addOpt("sigma", new OptNumber( sigmamin * pow(q, i)));
-
-        // 	opt.kernel = kernel_rbf(X,y,opt);
-        GurlsOptionsList* retKernel = rbfkernel.execute(X, Y, *nestedOpt);
-
-        nestedOpt->removeOpt("kernel");
-        nestedOpt->addOpt("kernel", retKernel);
-
-        nestedOpt->removeOpt("paramsel", false);
-
-        // 	paramsel = paramsel_hodual(X,y,opt);
-        GurlsOptionsList* ret_paramsel = hodual.execute(X, Y, *nestedOpt);
+        const long last = search.size();
+        sigma_guess.resize(last);
 
+#ifdef _OPENMP
+#pragma omp parallel for num_threads(njobs) schedule(dynamic)
+#endif
+        for(long i=first; i<last; ++i)
+        {
+            GurlsOptionsList* sigmaOpt = NULL;
+            GurlsOptionsList* ret_paramsel = NULL;
+            T* perf = NULL;
+            T* perf_median = NULL;
+            T* guesses_median = NULL;
+            T* row = NULL;
+            T* work = NULL;
+
+            try
+            {
+                sigmaOpt = new GurlsOptionsList("nested");
+                sigmaOpt->copyOpt("nlambda", opt);
+                sigmaOpt->copyOpt("nholdouts", opt);
+                sigmaOpt->copyOpt("hoperf", opt);
+                sigmaOpt->copyOpt("smallnumber", opt);
+                KernelCache::copyOptions(*sigmaOpt, opt);
+                sigmaOpt->copyOpt("split", opt);
+
+                // 	opt.kernel = kernel_rbf(X,y,opt);
+                sigmaOpt->addOpt("kernel", rbfKernelFromDistance(*dist, search.candidate(i)));
+
+                // 	paramsel = paramsel_hodual(X,y,opt);
+                // all the lambda guesses of a split are scored on a single eigendecomposition
+                ParamSelHoDual<T> hodual;
+                ret_paramsel = hodual.execute(X, Y, *sigmaOpt);
+
+                perf = new T[nlambda];
+                perf_median = new T[nlambda*t];
+                guesses_median = new T[nlambda];
+                row = new T[t];
+                work = new T[nholdouts];
 
 //        PERF(i,:,:) = reshape(median(reshape(cell2mat(paramsel.perf')',opt.nlambda*T,nh),2),T,opt.nlambda)';
-        gMat2D<T> &perf_mat = ret_paramsel->getOptValue<OptMatrix<gMat2D<T> > >("perf"); // nholdouts x nlambda*t
-        median(perf_mat.getData(), perf_mat.rows(), perf_mat.cols(), 1, perf_median, work);
+                gMat2D<T> &perf_mat = ret_paramsel->getOptValue<OptMatrix<gMat2D<T> > >("perf"); // nholdouts x nlambda*t
+                median(perf_mat.getData(), perf_mat.rows(), perf_mat.cols(), 1, perf_median, work);
 
-        for(int j=0;j<nlambda;++j)
-        {
-            getRow(perf_median, nlambda, t, j, row);
-            perf[j] = sumv(row, t);
-        }
+                for(int j=0;j<nlambda;++j)
+                {
+                    getRow(perf_median, nlambda, t, j, row);
+                    perf[j] = sumv(row, t);
+                }
 
 //        guesses(i,:) = median(cell2mat(paramsel.guesses'),1);
-        std::size_t mm =std::max_element(perf, perf + nlambda) - perf;
+                std::size_t mm =std::max_element(perf, perf + nlambda) - perf;
+
+                gMat2D<T> &guesses_mat = ret_paramsel->getOptValue<OptMatrix<gMat2D<T> > >("guesses"); // nholdouts x nlambda
+                median(guesses_mat.getData(), guesses_mat.rows(), guesses_mat.cols(), 1, guesses_median, work);
+
+                *search.perf(i) = perf[mm];
+                sigma_guess[i] = guesses_median[mm];
+            }
+            catch(gException& ex)
+            {
+#ifdef _OPENMP
+#pragma omp critical(gurls_siglamho)
+#endif
+                {
+                    failed = true;
+                    error = ex.getMessage();
+                }
+            }
+            catch(std::exception& ex)
+            {
+#ifdef _OPENMP
+#pragma omp critical(gurls_siglamho)
+#endif
+                {
+                    failed = true;
+                    error = ex.what();
+                }
+            }
+
+            delete [] row;
+            delete [] work;
+            delete [] perf;
+            delete [] perf_median;
+            delete [] guesses_median;
+            delete ret_paramsel;
+            delete sigmaOpt;
+        }
 
-        if( gt(perf[mm], maxPerf) || i==0 )
+        if(failed)
         {
-            maxPerf = perf[mm];
-            m = i;
-
-            gMat2D<T> &guesses_mat = ret_paramsel->getOptValue<OptMatrix<gMat2D<T> > >("guesses"); // nholdouts x nlambda
-            median(guesses_mat.getData(), guesses_mat.rows(), guesses_mat.cols(), 1, guesses_median, work);
-
-            guess = guesses_median[mm];
+            delete nestedOpt;
+            delete paramsel;
+            throw gException(error);
         }
 
-        delete ret_paramsel;
+        first = last;
     }
+    while(search.refine());
+
+    // the first sigma wins the ties, as in a sequential scan
+    unsigned long m = 0;
+    for(unsigned long i=1; i<search.size(); ++i)
+        if( gt(*search.perf(i), *search.perf(m)) )
+            m = i;
+
+    T guess = sigma_guess[m];
 
-    delete [] row;
-    delete [] work;
-    delete [] perf;
-    delete [] perf_median;
-    delete [] guesses_median;
     delete nestedOpt;
 
 
     paramsel->removeOpt("sigma");
-    paramsel->addOpt("sigma", new OptNumber( sigmamin * pow(q,m) ));
+    paramsel->addOpt("sigma", new OptNumber( search.candidate(m) ));
 
     // % opt lambda
     // vout.lambdas = guesses(m,n)*ones(1,T);
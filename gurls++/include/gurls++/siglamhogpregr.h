@@ -142,7 +142,7 @@ GurlsOptionsList* ParamSelSiglamHoGPRegr<T>::execute(const gMat2D<T>& X, const g
         distance = new gMat2D<T>(n, n);
 
 //        opt.kernel.distance = square_distance(X',X');
-        distance_transposed(X.getData(), X.getData(), d, n, n, distance->getData());
+        distance_transposed_blocked(X.getData(), X.getData(), d, n, n, distance->getData());
 
         kernel->addOpt("distance", new OptMatrix<gMat2D<T> >(*distance));
     }
@@ -138,7 +138,7 @@ GurlsOptionsList *ParamSelSiglamLooGPRegr<T>::execute(const gMat2D<T>& X, const
         distance = new gMat2D<T>(n, n);
 
 //        opt.kernel.distance = square_distance(X',X');
-        distance_transposed(X.getData(), X.getData(), d, n, n, distance->getData());
+        distance_transposed_blocked(X.getData(), X.getData(), d, n, n, distance->getData());
 
         kernel->addOpt("distance", new OptMatrix<gMat2D<T> >(*distance));
     }
@@ -0,0 +1,370 @@
+/*
+ * The GURLS Package in C++
+ *
+ * Copyright (C) 2011-1013, IIT@MIT Lab
+ * All rights reserved.
+ *
+ * authors:  M. Santoro
+ * email:   msantoro@mit.edu
+ * website: http://cbcl.mit.edu/IIT@MIT/IIT@MIT.html
+ *
+ * Redistribution and use in source and binary forms, with or without
+ * modification, are permitted provided that the following conditions
+ * are met:
+ *
+ *     * Redistributions of source code must retain the above
+ *       copyright notice, this list of conditions and the following
+ *       disclaimer.
+ *     * Redistributions in binary form must reproduce the above
+ *       copyright notice, this list of conditions and the following
+ *       disclaimer in the documentation and/or other materials
+ *       provided with the distribution.
+ *     * Neither the name(s) of the copyright holders nor the names
+ *       of its contributors or of the Massacusetts Institute of
+ *       Technology or of the Italian Institute of Technology may be
+ *       used to endorse or promote products derived from this software
+ *       without specific prior written permission.
+ *
+ * THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+ * "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+ * LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+ * FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+ * COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+ * INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+ * BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+ * LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+ * CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+ * LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+ * ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+ * POSSIBILITY OF SUCH DAMAGE.
+ */
+
+
+#ifndef _GURLS_SUBSAMPLE_H_
+#define _GURLS_SUBSAMPLE_H_
+
+#include <cmath>
+#include <vector>
+#include <algorithm>
+
+#include "gurls++/options.h"
+#include "gurls++/optlist.h"
+#include "gurls++/optmatrix.h"
+#include "gurls++/gmat2d.h"
+#include "gurls++/gmath.h"
+#include "gurls++/utils.h"
+
+#include "gurls++/paramsel.h"
+#include "gurls++/splitho.h"
+
+namespace gurls {
+
+/**
+ * \ingroup ParameterSelection
+ * \brief ParamSelSubsample is the sub-class of ParamSelection that runs another parameter selection on a subsample of the training set
+ */
+
+template <typename T>
+class ParamSelSubsample: public ParamSelection<T>{
+
+public:
+	///
+	/// Default constructor
+	///
+	ParamSelSubsample():ParamSelection<T>("subsample"){}
+
+	///
+	/// Clone method
+	///
+	TaskBase *clone()
+	{
+		return new ParamSelSubsample<T>();
+	}
+
+    /**
+     * Selects the parameters with the method opt.subsampleparamsel on a random subsample of
+     * the rows of X. If Y is in the gurls classification format the subsample is stratified,
+     * so that each class keeps its proportion. The selected parameters are then used by the
+     * optimizer on the whole training set.
+     * When subsamplegrowth > 1 the selection is repeated on a sequence of growing, nested
+     * subsamples, until sigma and lambdas change by less than a factor 1+subsampletol between
+     * two consecutive subsamples, or the subsample covers the whole training set.
+     * \param X input data matrix
+     * \param Y labels matrix
+     * \param opt options with the following:
+     *  - subsampleparamsel (default) name of the parameter selection run on the subsamples
+     *  - subsamplesize (default) number of samples of the first subsample
+     *  - subsamplegrowth (default) ratio between the sizes of two consecutive subsamples, 1 for a single subsample
+     *  - subsampletol (default)
+     *  - the fields required by opt.subsampleparamsel. If present, kernel.K is restricted to the
+     *    subsample and split is recomputed on it with nholdouts and hoproportion
+     *
+     * \return adds the field paramsel to opt, which is the list returned by opt.subsampleparamsel
+     * on the last subsample, plus the following field:
+     *  - subsamplesize = number of samples used to select the parameters
+     */
+    GurlsOptionsList* execute(const gMat2D<T>& X, const gMat2D<T>& Y, const GurlsOptionsList& opt);
+
+protected:
+    /**
+     * Runs the parameter selection task on the rows idx[0], ..., idx[m-1] of X and Y
+     */
+    GurlsOptionsList* select(ParamSelection<T>* task, const gMat2D<T>& X, const gMat2D<T>& Y,
+                             const GurlsOptionsList& opt, const std::vector<unsigned long>& idx);
+
+    /**
+     * Checks whether sigma and lambdas of two paramsel lists differ by less than a factor 1+tol
+     */
+    bool stable(const GurlsOptionsList& prev, const GurlsOptionsList& cur, T tol);
+};
+
+template <typename T>
+GurlsOptionsList* ParamSelSubsample<T>::execute(const gMat2D<T>& X, const gMat2D<T>& Y, const GurlsOptionsList &opt)
+{
+    const unsigned long n = X.rows();
+    const unsigned long t = Y.cols();
+
+    const std::string name = opt.getOptAsString("subsampleparamsel");
+    if(name == "subsample")
+        throw gException("The parameter selection of subsampleparamsel cannot be subsample");
+
+    const T size = static_cast<T>(opt.getOptAsNumber("subsamplesize"));
+    const T growth = static_cast<T>(opt.getOptAsNumber("subsamplegrowth"));
+    const T tol = static_cast<T>(opt.getOptAsNumber("subsampletol"));
+
+    if(le(size, (T)0.0))
+        throw gException("subsamplesize must be positive");
+
+    ParamSelection<T>* task = ParamSelection<T>::factory(name);
+
+    // whole training set, no copies
+    if(size >= n)
+    {
+        GurlsOptionsList* paramsel = NULL;
+        try
+        {
+            paramsel = task->execute(X, Y, opt);
+        }
+        catch(gException&)
+        {
+            delete task;
+            throw;
+        }
+        delete task;
+
+        paramsel->removeOpt("subsamplesize");
+        paramsel->addOpt("subsamplesize", new OptNumber(n));
+        return paramsel;
+    }
+
+    // the rows of each class, in random order: the subsample of size m takes the
+    // first rows of each class in proportion to its size, so the subsamples are nested
+    std::vector<std::vector<unsigned long> > classes;
+
+    if(isLabel(Y))
+    {
+        const int nclass = (t==1)? 2 : t;
+        classes.resize(nclass);
+
+        if(t > 1)
+        {
+//            [dummy, y] = max(y,[],2);
+            T* work = new T[Y.getSize()];
+            unsigned long* y = new unsigned long[n];
+            indicesOfMax(Y.getData(), n, t, y, work, 2);
+            delete[] work;
+
+            for(unsigned long i=0; i<n; ++i)
+                classes[y[i]].push_back(i);
+
+            delete[] y;
+        }
+        else
+        {
+            const T ymax = Y.max();
+            for(unsigned long i=0; i<n; ++i)
+                classes[(Y.getData()[i] == ymax)? 1 : 0].push_back(i);
+        }
+
+        for(int c=0; c<nclass; ++c)
+            if(!classes[c].empty())
+                randperm(classes[c].size(), &classes[c][0], false);
+    }
+    else
+    {
+        classes.resize(1);
+        classes[0].resize(n);
+        randperm(n, &classes[0][0], true, 0);
+    }
+
+    GurlsOptionsList* prev = NULL;
+    GurlsOptionsList* cur = NULL;
+    unsigned long m = static_cast<unsigned long>(std::ceil(size));
+    std::vector<unsigned long> idx;
+
+    try
+    {
+        while(true)
+        {
+            idx.clear();
+            for(typename std::vector<std::vector<unsigned long> >::iterator it = classes.begin(); it != classes.end(); ++it)
+            {
+                if(it->empty())
+                    continue;
+
+                // at least one sample of each class
+                unsigned long mc = static_cast<unsigned long>(gurls::round(static_cast<T>(m)*it->size()/n));
+                mc = std::min(std::max(mc, 1ul), static_cast<unsigned long>(it->size()));
+
+                idx.insert(idx.end(), it->begin(), it->begin()+mc);
+            }
+            std::sort(idx.begin(), idx.end());
+
+            cur = select(task, X, Y, opt, idx);
+
+            const bool done = (prev != NULL) && stable(*prev, *cur, tol);
+
+            delete prev;
+            prev = NULL;
+
+            if(done || growth <= 1 || idx.size() >= n)
+                break;
+
+            prev = cur;
+            cur = NULL;
+            m = std::min(n, static_cast<unsigned long>(std::ceil(m*growth)));
+        }
+    }
+    catch(gException&)
+    {
+        delete prev;
+        delete task;
+        throw;
+    }
+
+    delete task;
+
+    cur->removeOpt("subsamplesize");
+    cur->addOpt("subsamplesize", new OptNumber(idx.size()));
+
+    return cur;
+}
+
+template <typename T>
+GurlsOptionsList* ParamSelSubsample<T>::select(ParamSelection<T>* task, const gMat2D<T>& X, const gMat2D<T>& Y,
+                                               const GurlsOptionsList& opt, const std::vector<unsigned long>& idx)
+{
+    const unsigned long n = X.rows();
+    const unsigned long m = idx.size();
+
+    gMat2D<T> Xsub(m, X.cols());
+    gMat2D<T> Ysub(m, Y.cols());
+    subMatrixFromRows(X.getData(), n, X.cols(), &idx[0], m, Xsub.getData());
+    subMatrixFromRows(Y.getData(), n, Y.cols(), &idx[0], m, Ysub.getData());
+
+    // the plain options, the fields computed on the whole training set are left out
+    GurlsOptionsList* nestedOpt = new GurlsOptionsList("nested");
+
+    const GurlsOptionsList::ValueType& values = opt.getValue();
+    for(GurlsOptionsList::ValueType::const_iterator it = values.begin(); it != values.end(); ++it)
+    {
+        if(it->first == "Name")
+            continue;
+
+        switch(it->second->getType())
+        {
+        case StringOption:
+        case NumberOption:
+        case StringListOption:
+        case NumberListOption:
+        case FunctionOption:
+            nestedOpt->copyOpt(it->first, opt);
+            break;
+        default:
+            break;
+        }
+    }
+
+    GurlsOptionsList* ret = NULL;
+
+    try
+    {
+        if(opt.hasOpt("paramsel"))
+            nestedOpt->copyOpt("paramsel", opt);
+
+        // opt.kernel.K = opt.kernel.K(idx,idx);
+        if(opt.hasOpt("kernel"))
+        {
+            const GurlsOptionsList* kernel = opt.getOptAs<GurlsOptionsList>("kernel");
+            GurlsOptionsList* subKernel = new GurlsOptionsList("kernel");
+            nestedOpt->addOpt("kernel", subKernel);
+
+            if(kernel->hasOpt("type"))
+                subKernel->copyOpt("type", *kernel);
+
+            if(kernel->hasOpt("K"))
+            {
+                const gMat2D<T>& K = kernel->getOptValue<OptMatrix<gMat2D<T> > >("K");
+                if(K.rows() != n || K.cols() != n)
+                    throw gException(Exception_Inconsistent_Size);
+
+                gMat2D<T>* Ksub = new gMat2D<T>(m, m);
+                unsigned long* rows = const_cast<unsigned long*>(&idx[0]);
+                copy_submatrix(Ksub->getData(), K.getData(), n, m, m, rows, rows);
+                subKernel->addOpt("K", new OptMatrix<gMat2D<T> >(*Ksub));
+            }
+        }
+
+        // opt.split = split_ho(X(idx,:),y(idx,:),opt);
+        if(opt.hasOpt("split"))
+        {
+            SplitHo<T> split;
+            nestedOpt->addOpt("split", split.execute(Xsub, Ysub, *nestedOpt));
+        }
+
+        ret = task->execute(Xsub, Ysub, *nestedOpt);
+    }
+    catch(gException&)
+    {
+        delete nestedOpt;
+        throw;
+    }
+
+    delete nestedOpt;
+    return ret;
+}
+
+template <typename T>
+bool ParamSelSubsample<T>::stable(const GurlsOptionsList& prev, const GurlsOptionsList& cur, T tol)
+{
+    const T ratio = (T)1.0 + tol;
+
+    if(prev.hasOpt("sigma") != cur.hasOpt("sigma") || prev.hasOpt("lambdas") != cur.hasOpt("lambdas"))
+        return false;
+
+    if(cur.hasOpt("sigma"))
+    {
+        const T s0 = static_cast<T>(prev.getOptAsNumber("sigma"));
+        const T s1 = static_cast<T>(cur.getOptAsNumber("sigma"));
+        if(s1 > s0*ratio || s0 > s1*ratio)
+            return false;
+    }
+
+    if(cur.hasOpt("lambdas"))
+    {
+        const gMat2D<T>& l0 = prev.getOptValue<OptMatrix<gMat2D<T> > >("lambdas");
+        const gMat2D<T>& l1 = cur.getOptValue<OptMatrix<gMat2D<T> > >("lambdas");
+        if(l0.getSize() != l1.getSize())
+            return false;
+
+        for(unsigned long i=0; i<l1.getSize(); ++i)
+            if(l1.getData()[i] > l0.getData()[i]*ratio || l0.getData()[i] > l1.getData()[i]*ratio)
+                return false;
+    }
+
+    return true;
+}
+
+}
+
+#endif // _GURLS_SUBSAMPLE_H_
@@ -0,0 +1,118 @@
+/*
+ * The GURLS Package in C++
+ *
+ * Copyright (C) 2011-1013, IIT@MIT Lab
+ * All rights reserved.
+ *
+ * authors:  M. Santoro
+ * email:   msantoro@mit.edu
+ * website: http://cbcl.mit.edu/IIT@MIT/IIT@MIT.html
+ *
+ * Redistribution and use in source and binary forms, with or without
+ * modification, are permitted provided that the following conditions
+ * are met:
+ *
+ *     * Redistributions of source code must retain the above
+ *       copyright notice, this list of conditions and the following
+ *       disclaimer.
+ *     * Redistributions in binary form must reproduce the above
+ *       copyright notice, this list of conditions and the following
+ *       disclaimer in the documentation and/or other materials
+ *       provided with the distribution.
+ *     * Neither the name(s) of the copyright holders nor the names
+ *       of its contributors or of the Massacusetts Institute of
+ *       Technology or of the Italian Institute of Technology may be
+ *       used to endorse or promote products derived from this software
+ *       without specific prior written permission.
+ *
+ * THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+ * "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+ * LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+ * FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+ * COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+ * INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+ * BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+ * LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+ * CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+ * LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+ * ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+ * POSSIBILITY OF SUCH DAMAGE.
+ */
+
+#ifndef _GURLS_TASKPROFILE_H_
+#define _GURLS_TASKPROFILE_H_
+
+#include <string>
+#include <vector>
+
+#include "gurls++/exports.h"
+#include "gurls++/options.h"
+
+namespace gurls
+{
+
+/**
+ * Size of a matrix found in the option tree after a task
+ */
+struct TaskMatrix
+{
+    std::string name;       ///< path of the matrix in the options, e.g. "kernel.K"
+    unsigned long rows;
+    unsigned long cols;
+    unsigned long bytes;    ///< rows*cols*element size
+};
+
+/**
+ * Measurements of one task of a GURLS process
+ */
+struct TaskProfile
+{
+    unsigned long index;    ///< position of the task in the sequence
+    std::string field;      ///< field of the options written by the task (kernel, paramsel, ...)
+    std::string task;       ///< name of the task (linear, siglam, ...)
+    std::string action;     ///< ignore, compute, computeNsave or load
+    double wall;            ///< elapsed time in seconds
+    double cpu;             ///< processor time of the process in seconds, summed over its threads
+    long rssDelta;          ///< growth of the peak resident memory of the process, in bytes
+    std::vector<TaskMatrix> matrices; ///< matrices of the field of the task, after it
+};
+
+/**
+ * \brief TaskObserver is notified by GURLS::run when each task starts and ends
+ *
+ * taskStarted receives the index, field, task and action of the profile; taskEnded the complete profile.
+ */
+class GURLS_EXPORT TaskObserver
+{
+public:
+    virtual ~TaskObserver() {}
+
+    virtual void taskStarted(const TaskProfile& /*profile*/) {}
+    virtual void taskEnded(const TaskProfile& /*profile*/) {}
+};
+
+/**
+ * Returns the name of a process action (OptProcess::Action) as used in process definitions: ignore, compute,
+ * computeNsave, load or remove
+ */
+GURLS_EXPORT std::string actionName(int action);
+
+/**
+ * Returns the processor time used by the process so far, in seconds
+ */
+GURLS_EXPORT double processCpuSeconds();
+
+/**
+ * Returns the peak resident memory of the process so far, in bytes (0 where it is not available)
+ */
+GURLS_EXPORT long processPeakRss();
+
+/**
+ * Appends to \a matrices the sizes of the matrices in \a option, recursing into option lists.
+ * \a name is the path of the option
+ */
+GURLS_EXPORT void listMatrices(const GurlsOption* option, const std::string& name, std::vector<TaskMatrix>& matrices);
+
+}
+
+#endif // _GURLS_TASKPROFILE_H_
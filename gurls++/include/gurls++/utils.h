@@ -63,6 +63,10 @@
 
 #include <set>
 
+#ifdef _OPENMP
+#include <omp.h>
+#endif
+
 #include <boost/random/normal_distribution.hpp>
 #include <boost/random/mersenne_twister.hpp>
 #include <boost/version.hpp>
@@ -464,6 +468,129 @@ void distance_transposed(const T* A, const T* B, const int cols, const int A_row
 
 }
 
+/**
+ * Returns the number of workers used to evaluate a grid of \a ncandidates kernel parameters on \a n samples concurrently,
+ * each with its own buffers of \a nbuffers n x n matrices:
+ *  - njobs (default 1) is the requested number of workers, all the processors if <= 0;
+ *  - maxmemory (default unlimited) is a budget in bytes for the buffers of all the workers.
+ * The result is capped by the number of candidates and by the budget, but is always at least 1.
+ * Without OpenMP the candidates are always evaluated one at a time.
+ */
+template <typename T>
+int gridWorkers(const GurlsOptionsList& opt, unsigned long n, unsigned long ncandidates, unsigned long nbuffers)
+{
+#ifdef _OPENMP
+    double njobs = opt.hasOpt("njobs")? opt.getOptAsNumber("njobs") : 1.0;
+    if(njobs <= 0)
+        njobs = omp_get_num_procs();
+
+    if(opt.hasOpt("maxmemory") && opt.getOptAsNumber("maxmemory") > 0)
+    {
+        const double workerBytes = (double)nbuffers*n*n*sizeof(T);
+        njobs = std::min(njobs, std::floor(opt.getOptAsNumber("maxmemory")/workerBytes));
+    }
+
+    njobs = std::min(njobs, (double)ncandidates);
+    return std::max(1, static_cast<int>(njobs));
+#else
+    return 1;
+#endif
+}
+
+/**
+ * Blocked version of distance_transposed: computes the matrix of the squared euclidean distance between each row of A and each row of B
+ * as ||a_i||^2 + ||b_j||^2 - 2*a_i*b_j', with one GEMM per tile of D, so that the work runs at BLAS speed (on as many threads as the
+ * BLAS library uses) and each tile is completed while it is in cache. Negative values due to rounding are set to zero.
+ * If A and B are the same matrix only the tiles on and above the diagonal are computed (the diagonal ones with SYRK), and D is
+ * exactly symmetric with a zero diagonal.
+ *
+ * \param A matrix
+ * \param B matrix
+ * \param cols number of cols of both A and B
+ * \param A_rows number of rows of A
+ * \param B_rows number of rows of B
+ * \param D output A_rowsxB_rows kernel matrix
+ * \param block side of the square tiles of D
+ */
+template <typename T>
+void distance_transposed_blocked(const T* A, const T* B, const int cols, const int A_rows, const int B_rows, T* D, const int block = 512)
+{
+    const bool symmetric = (A == B) && (A_rows == B_rows);
+
+    // squared norms of the rows, accumulated column by column
+    T* normA = new T[A_rows];
+    T* normB = symmetric? normA : new T[B_rows];
+
+    set(normA, (T)0.0, A_rows);
+    for(int k=0; k<cols; ++k)
+    {
+        const T* A_k = A+(long)A_rows*k;
+        for(int i=0; i<A_rows; ++i)
+            normA[i] += A_k[i]*A_k[i];
+    }
+
+    if(!symmetric)
+    {
+        set(normB, (T)0.0, B_rows);
+        for(int k=0; k<cols; ++k)
+        {
+            const T* B_k = B+(long)B_rows*k;
+            for(int j=0; j<B_rows; ++j)
+                normB[j] += B_k[j]*B_k[j];
+        }
+    }
+
+    for(int j0=0; j0<B_rows; j0+=block)
+    {
+        const int nb = std::min(block, B_rows-j0);
+        const int i_end = symmetric? j0+1 : A_rows;
+
+        for(int i0=0; i0<i_end; i0+=block)
+        {
+            const int mb = std::min(block, A_rows-i0);
+            T* Dij = D+i0+(long)A_rows*j0;
+            const bool diagonal = symmetric && (i0 == j0);
+
+            // Dij = -2*A(i0:i0+mb,:)*B(j0:j0+nb,:)'
+            if(diagonal)
+                syrk(CblasUpper, CblasNoTrans, mb, cols, (T)-2.0, A+i0, A_rows, (T)0.0, Dij, A_rows);
+            else
+                gemm(CblasNoTrans, CblasTrans, mb, nb, cols, (T)-2.0, A+i0, A_rows, B+j0, B_rows, (T)0.0, Dij, A_rows);
+
+            for(int j=0; j<nb; ++j)
+            {
+                T* Dij_j = Dij+(long)A_rows*j;
+                const T nB = normB[j0+j];
+                const int m = diagonal? j : mb;
+
+                for(int i=0; i<m; ++i)
+                {
+                    const T value = Dij_j[i]+normA[i0+i]+nB;
+                    Dij_j[i] = (value > 0)? value : (T)0.0;
+                }
+
+                if(diagonal)
+                    Dij_j[j] = 0;
+            }
+
+            // mirror the tile below the diagonal while it is still in cache
+            if(symmetric)
+            {
+                for(int j=0; j<nb; ++j)
+                {
+                    const int m = diagonal? j : mb;
+                    for(int i=0; i<m; ++i)
+                        D[(j0+j)+(long)A_rows*(i0+i)] = Dij[i+(long)A_rows*j];
+                }
+            }
+        }
+    }
+
+    delete [] normA;
+    if(!symmetric)
+        delete [] normB;
+}
+
 /**
  * Utility function used to build the kernel matrix; it computes the matrix of the squared euclidean distance between a vector A and each row of B
  *
@@ -930,6 +1057,77 @@ gMat2D<T>* rls_primal_driver(T* K, const T* Xty, const unsigned long n, const un
 
 }
 
+/**
+  * Adds to the kernel list the eigendecomposition [Q,L] = eig(K) of kernel.K or, when
+  * kernel.K is not present (primal formulation), of X'*X. paramsel:loocvdual, optimizer:rlsdual,
+  * paramsel:loocvprimal and optimizer:rlsprimal then reuse it instead of factorizing again,
+  * so that training on new labels for the same X only costs a few matrix products and the
+  * scan of the lambda guesses. The fields Q and L must be removed whenever X changes.
+  *
+  * \param X input data matrix
+  * \param kernel kernel options list, on exit contains the fields Q (eigenvectors) and L (eigenvalues)
+  */
+template<typename T>
+void addKernelEig(const gMat2D<T>& X, GurlsOptionsList& kernel)
+{
+    kernel.removeOpt("Q");
+    kernel.removeOpt("L");
+
+    gMat2D<T>* Q = NULL;
+    if(kernel.hasOpt("K"))
+        Q = new gMat2D<T>(kernel.getOptValue<OptMatrix<gMat2D<T> > >("K"));
+    else
+    {
+        //	K = X'*X;
+        const unsigned long d = X.cols();
+        Q = new gMat2D<T>(d, d);
+        dot(X.getData(), X.getData(), Q->getData(), X.rows(), d, X.rows(), d, d, d, CblasTrans, CblasNoTrans, CblasColMajor);
+    }
+
+    gMat2D<T>* L = new gMat2D<T>(1, Q->rows());
+
+    try
+    {
+        eig_sm(Q->getData(), L->getData(), Q->rows());
+    }
+    catch(gException&)
+    {
+        delete Q;
+        delete L;
+        throw;
+    }
+
+    kernel.addOpt("Q", new OptMatrix<gMat2D<T> >(*Q));
+    kernel.addOpt("L", new OptMatrix<gMat2D<T> >(*L));
+}
+
+/**
+  * Looks for the eigendecomposition stored by \ref addKernelEig in opt.kernel
+  *
+  * \param opt options structure
+  * \param size order of the decomposed matrix: number of samples for the kernel matrix, number of variables for X'*X
+  * \param primal true to look for the decomposition of X'*X, false for the one of kernel.K
+  * \param Q on exit points to the eigenvectors
+  * \param L on exit points to the eigenvalues
+  * \return true if a decomposition of the required kind and size has been found
+  */
+template<typename T>
+bool kernelEig(const GurlsOptionsList& opt, const unsigned long size, bool primal, const T*& Q, const T*& L)
+{
+    if(!opt.hasOpt("kernel.Q") || !opt.hasOpt("kernel.L") || opt.hasOpt("kernel.K") == primal)
+        return false;
+
+    const gMat2D<T>& Qmat = opt.getOptValue<OptMatrix<gMat2D<T> > >("kernel.Q");
+    const gMat2D<T>& Lmat = opt.getOptValue<OptMatrix<gMat2D<T> > >("kernel.L");
+
+    if(Qmat.rows() != size || Qmat.cols() != size || Lmat.getSize() != size)
+        return false;
+
+    Q = Qmat.getData();
+    L = Lmat.getData();
+    return true;
+}
+
 template<typename T>
 gMat2D<T>* rp_apply_real(const T *X, const T *W, const unsigned long n, const unsigned long d, const unsigned long D)
 {
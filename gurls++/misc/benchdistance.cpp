@@ -0,0 +1,165 @@
+/*
+ * The GURLS Package in C++
+ *
+ * Copyright (C) 2011-1013, IIT@MIT Lab
+ * All rights reserved.
+ *
+ * authors:  M. Santoro
+ * email:   msantoro@mit.edu
+ * website: http://cbcl.mit.edu/IIT@MIT/IIT@MIT.html
+ *
+ * Redistribution and use in source and binary forms, with or without
+ * modification, are permitted provided that the following conditions
+ * are met:
+ *
+ *     * Redistributions of source code must retain the above
+ *       copyright notice, this list of conditions and the following
+ *       disclaimer.
+ *     * Redistributions in binary form must reproduce the above
+ *       copyright notice, this list of conditions and the following
+ *       disclaimer in the documentation and/or other materials
+ *       provided with the distribution.
+ *     * Neither the name(s) of the copyright holders nor the names
+ *       of its contributors or of the Massacusetts Institute of
+ *       Technology or of the Italian Institute of Technology may be
+ *       used to endorse or promote products derived from this software
+ *       without specific prior written permission.
+ *
+ * THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+ * "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+ * LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+ * FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+ * COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+ * INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+ * BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+ * LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+ * CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+ * LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+ * ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+ * POSSIBILITY OF SUCH DAMAGE.
+ */
+
+/**
+ * \ingroup Tutorials
+ * \file
+ *
+ * Micro-benchmark of the squared distance matrices used by the rbf kernel:
+ * the loops of distance_transposed (train kernel and test kernel) and of
+ * squareform (paramsel siglam), against distance_transposed_blocked.
+ *
+ * Usage: benchdistance [n1,n2,...] [d1,d2,...] [block]
+ */
+
+#include <cstdlib>
+#include <iostream>
+#include <sstream>
+#include <string>
+#include <vector>
+
+#include <boost/date_time/posix_time/posix_time_types.hpp>
+
+#include "gurls++/gmath.h"
+#include "gurls++/utils.h"
+
+using namespace gurls;
+using namespace std;
+
+typedef double T;
+
+static vector<int> parse_list(const char* arg)
+{
+    vector<int> values;
+    stringstream ss(arg);
+    string token;
+    while(getline(ss, token, ','))
+        values.push_back(atoi(token.c_str()));
+    return values;
+}
+
+static double elapsed(const boost::posix_time::ptime& begin)
+{
+    return (boost::posix_time::microsec_clock::local_time()-begin).total_microseconds()/1e6;
+}
+
+static void random_fill(T* A, long size)
+{
+    for(long i=0; i<size; ++i)
+        A[i] = (T)rand()/RAND_MAX;
+}
+
+static T max_abs_diff(const T* A, const T* B, long size)
+{
+    T diff = 0;
+    for(long i=0; i<size; ++i)
+        diff = std::max(diff, std::abs(A[i]-B[i]));
+    return diff;
+}
+
+int main(int argc, char *argv[])
+{
+    const vector<int> ns = parse_list((argc > 1)? argv[1] : "1000,2000,4000");
+    const vector<int> ds = parse_list((argc > 2)? argv[2] : "10,100,800");
+    const int block = (argc > 3)? atoi(argv[3]) : 512;
+
+    srand(0);
+
+    cout.precision(3);
+    cout << fixed;
+    cout << "     n      d |  train loop  squareform     blocked  speedup |   test loop     blocked  speedup |  max diff" << endl;
+
+    for(vector<int>::const_iterator n_it = ns.begin(); n_it != ns.end(); ++n_it)
+    {
+        for(vector<int>::const_iterator d_it = ds.begin(); d_it != ds.end(); ++d_it)
+        {
+            const int n = *n_it, d = *d_it;
+            const int nte = n/4;
+
+            gMat2D<T> X(n, d), Xte(nte, d);
+            random_fill(X.getData(), X.getSize());
+            random_fill(Xte.getData(), Xte.getSize());
+
+            gMat2D<T> D_loop(n, n), D_block(n, n);
+            gMat2D<T> Dte_loop(nte, n), Dte_block(nte, n);
+            boost::posix_time::ptime begin;
+
+            // train kernel, as in KernelRBF
+            begin = boost::posix_time::microsec_clock::local_time();
+            distance_transposed(X.getData(), X.getData(), d, n, n, D_loop.getData());
+            const double t_loop = elapsed(begin);
+
+            // euclidean distances, as in ParamSelSiglam (squared afterwards)
+            begin = boost::posix_time::microsec_clock::local_time();
+            squareform<T>(X.getData(), n, d, D_block.getData(), n);
+            const double t_squareform = elapsed(begin);
+
+            begin = boost::posix_time::microsec_clock::local_time();
+            distance_transposed_blocked(X.getData(), X.getData(), d, n, n, D_block.getData(), block);
+            const double t_block = elapsed(begin);
+
+            // test kernel, as in PredKernelTrainTest
+            begin = boost::posix_time::microsec_clock::local_time();
+            distance_transposed(Xte.getData(), X.getData(), d, nte, n, Dte_loop.getData());
+            const double t_te_loop = elapsed(begin);
+
+            begin = boost::posix_time::microsec_clock::local_time();
+            distance_transposed_blocked(Xte.getData(), X.getData(), d, nte, n, Dte_block.getData(), block);
+            const double t_te_block = elapsed(begin);
+
+            const T diff = std::max(max_abs_diff(D_loop.getData(), D_block.getData(), D_loop.getSize()),
+                                    max_abs_diff(Dte_loop.getData(), Dte_block.getData(), Dte_loop.getSize()));
+
+            cout.width(6);  cout << n << " ";
+            cout.width(6);  cout << d << " | ";
+            cout.width(10); cout << t_loop << "  ";
+            cout.width(10); cout << t_squareform << "  ";
+            cout.width(10); cout << t_block << "  ";
+            cout.width(6);  cout << t_loop/t_block << "x | ";
+            cout.width(10); cout << t_te_loop << "  ";
+            cout.width(10); cout << t_te_block << "  ";
+            cout.width(6);  cout << t_te_loop/t_te_block << "x | ";
+            cout << scientific << diff << fixed << endl;
+        }
+    }
+
+    return EXIT_SUCCESS;
+}
@@ -81,6 +81,38 @@ GURLS_EXPORT void gemm(const CBLAS_TRANSPOSE TransA, const CBLAS_TRANSPOSE Trans
           const_cast<double*>(C), const_cast<int*>(&ldc));
 }
 
+/**
+  * Specialized version of syrk for float buffers
+  */
+template<>
+GURLS_EXPORT void syrk(const CBLAS_UPLO Uplo, const CBLAS_TRANSPOSE Trans,
+          const int N, const int K, const float alpha, const float *A, const int lda,
+          const float beta, float *C, const int ldc)
+{
+    char uplo = BlasUtils::charValue(Uplo);
+    char trans = BlasUtils::charValue(Trans);
+
+    ssyrk_(&uplo, &trans, const_cast<int*>(&N), const_cast<int*>(&K),
+           const_cast<float*>(&alpha), const_cast<float*>(A), const_cast<int*>(&lda),
+           const_cast<float*>(&beta), C, const_cast<int*>(&ldc));
+}
+
+/**
+  * Specialized version of syrk for double buffers
+  */
+template<>
+GURLS_EXPORT void syrk(const CBLAS_UPLO Uplo, const CBLAS_TRANSPOSE Trans,
+          const int N, const int K, const double alpha, const double *A, const int lda,
+          const double beta, double *C, const int ldc)
+{
+    char uplo = BlasUtils::charValue(Uplo);
+    char trans = BlasUtils::charValue(Trans);
+
+    dsyrk_(&uplo, &trans, const_cast<int*>(&N), const_cast<int*>(&K),
+           const_cast<double*>(&alpha), const_cast<double*>(A), const_cast<int*>(&lda),
+           const_cast<double*>(&beta), C, const_cast<int*>(&ldc));
+}
+
 /**
   * Specialized version of potrf_ for float buffers
   */
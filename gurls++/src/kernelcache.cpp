@@ -0,0 +1,363 @@
+/*
+ * The GURLS Package in C++
+ *
+ * Copyright (C) 2011-1013, IIT@MIT Lab
+ * All rights reserved.
+ *
+ * author:  M. Santoro
+ * email:   msantoro@mit.edu
+ * website: http://cbcl.mit.edu/IIT@MIT/IIT@MIT.html
+ *
+ * Redistribution and use in source and binary forms, with or without
+ * modification, are permitted provided that the following conditions
+ * are met:
+ *
+ *     * Redistributions of source code must retain the above
+ *       copyright notice, this list of conditions and the following
+ *       disclaimer.
+ *     * Redistributions in binary form must reproduce the above
+ *       copyright notice, this list of conditions and the following
+ *       disclaimer in the documentation and/or other materials
+ *       provided with the distribution.
+ *     * Neither the name(s) of the copyright holders nor the names
+ *       of its contributors or of the Massacusetts Institute of
+ *       Technology or of the Italian Institute of Technology may be
+ *       used to endorse or promote products derived from this software
+ *       without specific prior written permission.
+ *
+ * THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+ * "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+ * LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+ * FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+ * COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+ * INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+ * BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+ * LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+ * CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+ * LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+ * ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+ * POSSIBILITY OF SUCH DAMAGE.
+ */
+
+#include "gurls++/kernelcache.h"
+#include "gurls++/exceptions.h"
+
+#include <algorithm>
+#include <cstring>
+#include <fstream>
+#include <map>
+#include <utility>
+#include <vector>
+
+#include <boost/filesystem.hpp>
+
+namespace fs = boost::filesystem;
+
+namespace gurls {
+
+namespace
+{
+
+const char magic[] = "GURLSKC1";
+const unsigned long headerSize = 32;
+const char extension[] = ".gkc";
+const char indexName[] = "lru.idx";
+
+KernelCacheStats counters = {0, 0, 0, 0};
+
+void increment(unsigned long& counter)
+{
+#ifdef _OPENMP
+#pragma omp atomic
+#endif
+    ++counter;
+}
+
+inline boost::uint64_t rotl(boost::uint64_t x, int r)
+{
+    return (x << r) | (x >> (64 - r));
+}
+
+// Recency index of a cache directory: file name of each entry -> sequence
+// number of its last store or hit. Entries missing from the index are older
+// than all the others.
+typedef std::map<std::string, boost::uint64_t> RecencyIndex;
+
+RecencyIndex readIndex(const std::string& dir)
+{
+    RecencyIndex index;
+    std::ifstream in((fs::path(dir) / indexName).string().c_str());
+
+    boost::uint64_t seq;
+    std::string name;
+    while(in >> seq >> name)
+        index[name] = seq;
+
+    return index;
+}
+
+void writeIndex(const std::string& dir, const RecencyIndex& index)
+{
+    boost::system::error_code ec;
+    const std::string tmp = (fs::path(dir) / fs::unique_path("lru.%%%%-%%%%-%%%%.tmp")).string();
+    std::ofstream out(tmp.c_str(), std::ios::out | std::ios::trunc);
+
+    for(RecencyIndex::const_iterator it = index.begin(); it != index.end(); ++it)
+        out << it->second << ' ' << it->first << '\n';
+
+    out.close();
+    if(out)
+        fs::rename(tmp, fs::path(dir) / indexName, ec);
+    if(!out || ec)
+        fs::remove(tmp, ec);
+}
+
+// Marks the entry file as the most recently used one
+void touch(const std::string& dir, const std::string& file)
+{
+    RecencyIndex index = readIndex(dir);
+
+    boost::uint64_t last = 0;
+    for(RecencyIndex::const_iterator it = index.begin(); it != index.end(); ++it)
+        last = std::max(last, it->second);
+
+    index[fs::path(file).filename().string()] = last + 1;
+    writeIndex(dir, index);
+}
+
+}
+
+KernelCache::KernelCache(const GurlsOptionsList& opt): maxSize(0)
+{
+    if(opt.hasOpt("kernelcache"))
+        dir = opt.getOptAsString("kernelcache");
+
+    if(opt.hasOpt("kernelcachesize"))
+        maxSize = opt.getOptAsNumber("kernelcachesize");
+}
+
+bool KernelCache::enabled() const
+{
+    return !dir.empty();
+}
+
+void KernelCache::copyOptions(GurlsOptionsList& to, const GurlsOptionsList& from)
+{
+    if(from.hasOpt("kernelcache"))
+        to.copyOpt("kernelcache", from);
+
+    if(from.hasOpt("kernelcachesize"))
+        to.copyOpt("kernelcachesize", from);
+}
+
+KernelCacheStats KernelCache::stats()
+{
+    KernelCacheStats ret;
+
+#ifdef _OPENMP
+#pragma omp critical(gurls_kernelcache)
+#endif
+    ret = counters;
+
+    return ret;
+}
+
+void KernelCache::resetStats()
+{
+#ifdef _OPENMP
+#pragma omp critical(gurls_kernelcache)
+#endif
+    {
+        counters.hits = 0;
+        counters.misses = 0;
+        counters.stores = 0;
+        counters.evictions = 0;
+    }
+}
+
+boost::uint64_t KernelCache::fingerprint(const void* data, unsigned long bytes)
+{
+    // four independent lanes over 64-bit words, mixed by rotation and multiplication
+    const boost::uint64_t prime = UINT64_C(0x9e3779b97f4a7c15);
+    boost::uint64_t h[4] = {UINT64_C(0xcbf29ce484222325), UINT64_C(0x84222325cbf29ce4),
+                            UINT64_C(0x100000001b3), UINT64_C(0x1b3000000010000)};
+    boost::uint64_t w[4];
+
+    const unsigned char* p = static_cast<const unsigned char*>(data);
+    unsigned long i = 0;
+
+    for(; i + sizeof(w) <= bytes; i += sizeof(w))
+    {
+        memcpy(w, p + i, sizeof(w));
+        for(int j = 0; j < 4; ++j)
+            h[j] = rotl(h[j] ^ w[j], 31) * prime;
+    }
+
+    for(; i < bytes; ++i)
+        h[0] = rotl(h[0] ^ p[i], 31) * prime;
+
+    boost::uint64_t ret = bytes;
+    for(int j = 0; j < 4; ++j)
+        ret = rotl(ret ^ h[j], 27) * prime;
+
+    return ret ^ (ret >> 32);
+}
+
+std::string KernelCache::path(const std::string& key) const
+{
+    return (fs::path(dir) / (key + extension)).string();
+}
+
+bool KernelCache::read(const std::string& key, void* data, void* column, unsigned long rows, unsigned long cols, unsigned long elemSize) const
+{
+    if(!enabled())
+        return false;
+
+    const std::string file = path(key);
+    const boost::uint64_t dataBytes = static_cast<boost::uint64_t>(rows)*cols*elemSize;
+    const boost::uint64_t columnBytes = (column != NULL)? static_cast<boost::uint64_t>(rows)*elemSize : 0;
+    const boost::uint64_t bytes = dataBytes + columnBytes;
+    const unsigned long fileCols = (column != NULL)? cols+1 : cols;
+
+    std::ifstream in(file.c_str(), std::ios::in | std::ios::binary);
+
+    char header[headerSize];
+    boost::uint64_t size[3];
+    bool found = in.is_open() && in.read(header, headerSize);
+    if(found)
+    {
+        memcpy(size, header + 8, sizeof(size));
+
+        boost::system::error_code ec;
+        const boost::uintmax_t fileSize = fs::file_size(file, ec);
+
+        found = !memcmp(header, magic, 8) && size[0] == rows && size[1] == fileCols && size[2] == elemSize
+                && !ec && fileSize == headerSize + bytes;
+    }
+
+    if(!found)
+    {
+        increment(counters.misses);
+        return false;
+    }
+
+    if(!in.read(static_cast<char*>(data), dataBytes) || (column != NULL && !in.read(static_cast<char*>(column), columnBytes)))
+        throw gException("Unable to read the kernel cache entry " + file);
+
+    if(maxSize > 0)
+    {
+#ifdef _OPENMP
+#pragma omp critical(gurls_kernelcache)
+#endif
+        touch(dir, file);
+    }
+
+    increment(counters.hits);
+    return true;
+}
+
+void KernelCache::write(const std::string& key, const void* data, const void* column, unsigned long rows, unsigned long cols, unsigned long elemSize) const
+{
+    const boost::uint64_t dataBytes = static_cast<boost::uint64_t>(rows)*cols*elemSize;
+    const boost::uint64_t columnBytes = (column != NULL)? static_cast<boost::uint64_t>(rows)*elemSize : 0;
+    const boost::uint64_t bytes = dataBytes + columnBytes;
+    if(!enabled() || (maxSize > 0 && headerSize + bytes > maxSize))
+        return;
+
+    const std::string file = path(key);
+
+    char header[headerSize];
+    const boost::uint64_t size[3] = {rows, (column != NULL)? cols+1 : cols, elemSize};
+    memset(header, 0, headerSize);
+    memcpy(header, magic, 8);
+    memcpy(header + 8, size, sizeof(size));
+
+    bool written = false;
+
+#ifdef _OPENMP
+#pragma omp critical(gurls_kernelcache)
+#endif
+    {
+        boost::system::error_code ec;
+        fs::create_directories(dir, ec);
+
+        // a unique temporary file, renamed when complete, so readers never see a partial entry
+        const std::string tmp = (fs::path(dir) / fs::unique_path(key + ".%%%%-%%%%-%%%%.tmp")).string();
+        std::ofstream out(tmp.c_str(), std::ios::out | std::ios::binary | std::ios::trunc);
+
+        if(out.write(header, headerSize) && out.write(static_cast<const char*>(data), dataBytes)
+           && (column == NULL || out.write(static_cast<const char*>(column), columnBytes)))
+        {
+            out.close();
+            fs::rename(tmp, file, ec);
+            written = !ec;
+        }
+        else
+            out.close();
+
+        if(!written)
+            fs::remove(tmp, ec);
+        else
+        {
+            ++counters.stores;
+            if(maxSize > 0)
+            {
+                touch(dir, file);
+                evict(file);
+            }
+        }
+    }
+}
+
+void KernelCache::evict(const std::string& keep) const
+{
+    if(maxSize <= 0)
+        return;
+
+    // (sequence number, path) of the entries, the least recently used first
+    RecencyIndex index = readIndex(dir);
+    RecencyIndex present;
+    std::vector<std::pair<boost::uint64_t, std::string> > entries;
+    boost::uintmax_t total = 0;
+
+    boost::system::error_code ec;
+    for(fs::directory_iterator it(dir, ec), end; !ec && it != end; it.increment(ec))
+    {
+        const fs::path& p = it->path();
+        if(p.extension() != extension)
+            continue;
+
+        boost::system::error_code fec;
+        const boost::uintmax_t size = fs::file_size(p, fec);
+        if(fec)
+            continue;
+
+        const std::string name = p.filename().string();
+        const RecencyIndex::const_iterator seq = index.find(name);
+        present[name] = (seq != index.end())? seq->second : 0;
+
+        total += size;
+        if(p.string() != keep)
+            entries.push_back(std::make_pair(present[name], p.string()));
+    }
+
+    std::sort(entries.begin(), entries.end());
+
+    for(std::vector<std::pair<boost::uint64_t, std::string> >::iterator it = entries.begin(); it != entries.end() && total > maxSize; ++it)
+    {
+        boost::system::error_code fec;
+        const boost::uintmax_t size = fs::file_size(it->second, fec);
+        if(!fec && fs::remove(it->second, fec))
+        {
+            total -= size;
+            present.erase(fs::path(it->second).filename().string());
+            ++counters.evictions;
+        }
+    }
+
+    // drops the removed entries from the index
+    if(present != index)
+        writeIndex(dir, present);
+}
+
+}
@@ -120,6 +120,14 @@ GurlsOptionsList::GurlsOptionsList(std::string ExpName, bool usedefopt): GurlsOp
         (*table)["nsigma"] =  new OptNumber(25);
         (*table)["nlambda"] = new OptNumber(20);
 //        (*table)["nsigma"] =  new OptNumber(10);
+        // coarse-to-fine search: evaluations added around the best value of the grids
+        (*table)["nsigmarefine"] = new OptNumber(0);
+        (*table)["nlambdarefine"] = new OptNumber(0);
+        // paramsel subsample: selection on growing subsamples of the training set
+        (*table)["subsampleparamsel"] = new OptString("siglam");
+        (*table)["subsamplesize"] = new OptNumber(2000);
+        (*table)["subsamplegrowth"] = new OptNumber(1);
+        (*table)["subsampletol"] = new OptNumber(1);
         (*table)["eig_percentage"] = new OptNumber(5);
 
 
@@ -0,0 +1,140 @@
+/*
+ * The GURLS Package in C++
+ *
+ * Copyright (C) 2011-1013, IIT@MIT Lab
+ * All rights reserved.
+ *
+ * author:  M. Santoro
+ * email:   msantoro@mit.edu
+ * website: http://cbcl.mit.edu/IIT@MIT/IIT@MIT.html
+ *
+ * Redistribution and use in source and binary forms, with or without
+ * modification, are permitted provided that the following conditions
+ * are met:
+ *
+ *     * Redistributions of source code must retain the above
+ *       copyright notice, this list of conditions and the following
+ *       disclaimer.
+ *     * Redistributions in binary form must reproduce the above
+ *       copyright notice, this list of conditions and the following
+ *       disclaimer in the documentation and/or other materials
+ *       provided with the distribution.
+ *     * Neither the name(s) of the copyright holders nor the names
+ *       of its contributors or of the Massacusetts Institute of
+ *       Technology or of the Italian Institute of Technology may be
+ *       used to endorse or promote products derived from this software
+ *       without specific prior written permission.
+ *
+ * THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+ * "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+ * LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+ * FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+ * COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+ * INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+ * BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+ * LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+ * CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+ * LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+ * ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+ * POSSIBILITY OF SUCH DAMAGE.
+ */
+
+#include "gurls++/taskprofile.h"
+#include "gurls++/optlist.h"
+#include "gurls++/optmatrix.h"
+#include "gurls++/gmat2d.h"
+
+#include <ctime>
+
+#if !defined(_WIN32)
+#include <sys/resource.h>
+#endif
+
+namespace gurls {
+
+std::string actionName(int action)
+{
+    static const char* names[] = {"ignore", "compute", "computeNsave", "load", "remove"};
+
+    if(action < 0 || action > OptProcess::remove)
+        return "unknown";
+
+    return names[action];
+}
+
+double processCpuSeconds()
+{
+#if !defined(_WIN32)
+    struct rusage usage;
+    if(getrusage(RUSAGE_SELF, &usage) == 0)
+        return usage.ru_utime.tv_sec + usage.ru_stime.tv_sec
+                + (usage.ru_utime.tv_usec + usage.ru_stime.tv_usec)*1e-6;
+#endif
+    return static_cast<double>(std::clock())/CLOCKS_PER_SEC;
+}
+
+long processPeakRss()
+{
+#if defined(_WIN32)
+    return 0;
+#else
+    struct rusage usage;
+    if(getrusage(RUSAGE_SELF, &usage) != 0)
+        return 0;
+#if defined(__APPLE__)
+    return usage.ru_maxrss;        // bytes
+#else
+    return usage.ru_maxrss*1024L;  // kilobytes
+#endif
+#endif
+}
+
+template <typename Matrix>
+void addMatrix(const GurlsOption* option, const std::string& name, unsigned long elemSize, std::vector<TaskMatrix>& matrices)
+{
+    const Matrix& m = static_cast<const OptMatrix<Matrix>*>(option)->getValue();
+
+    TaskMatrix info;
+    info.name = name;
+    info.rows = m.rows();
+    info.cols = m.cols();
+    info.bytes = info.rows*info.cols*elemSize;
+    matrices.push_back(info);
+}
+
+void listMatrices(const GurlsOption* option, const std::string& name, std::vector<TaskMatrix>& matrices)
+{
+    if(option == NULL)
+        return;
+
+    if(option->getType() == OptListOption)
+    {
+        const GurlsOptionsList::ValueType& table = static_cast<const GurlsOptionsList*>(option)->getValue();
+        for(GurlsOptionsList::ValueType::const_iterator it = table.begin(), end = table.end(); it != end; ++it)
+            listMatrices(it->second, name + "." + it->first, matrices);
+        return;
+    }
+
+    if(option->getType() != MatrixOption)
+        return;
+
+    const OptMatrixBase* matrix = static_cast<const OptMatrixBase*>(option);
+#ifdef _BGURLS
+    if(matrix->hasBigArray())
+        return;
+#endif
+    switch(matrix->getMatrixType())
+    {
+    case OptMatrixBase::FLOAT:
+        addMatrix<gMat2D<float> >(option, name, sizeof(float), matrices);
+        break;
+    case OptMatrixBase::DOUBLE:
+        addMatrix<gMat2D<double> >(option, name, sizeof(double), matrices);
+        break;
+    case OptMatrixBase::ULONG:
+        addMatrix<gMat2D<unsigned long> >(option, name, sizeof(unsigned long), matrices);
+        break;
+    }
+}
+
+}
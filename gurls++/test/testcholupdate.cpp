@@ -0,0 +1,253 @@
+#include "gurls++/gmat2d.h"
+#include "gurls++/gmath.h"
+#include "gurls++/optlist.h"
+#include "gurls++/optmatrix.h"
+#include "gurls++/exceptions.h"
+
+#include "gurls++/rlsprimalrecupdatecholesky.h"
+
+#include <cstdlib>
+#include <cmath>
+#include <algorithm>
+
+#define BOOST_TEST_MODULE cholupdate
+
+#include <boost/test/unit_test.hpp>
+
+using namespace gurls;
+
+typedef double T;
+
+// Regression tests of the recursive Cholesky update, downdate, forgetting
+// factor and sliding window of RLSPrimalRecUpdateCholesky: after every
+// modification, R'*R and W are compared against a from-scratch factorization
+// of the same weighted X'*X + lambda*I and X'*Y.
+
+const unsigned long d = 6;
+const unsigned long t = 2;
+const T lambda = 0.5;
+const T errCoeff = 1.0e-10;
+
+// n x cols column-major matrix of uniform entries in [-1, 1)
+gMat2D<T> randomMatrix(unsigned long n, unsigned long cols)
+{
+    gMat2D<T> M(n, cols);
+    T* data = M.getData();
+    for(unsigned long i = 0; i < n*cols; ++i)
+        data[i] = 2*(rand()/(RAND_MAX+1.0)) - 1;
+    return M;
+}
+
+// Rows [begin, end) of the column-major matrix M
+gMat2D<T> rows(const gMat2D<T>& M, unsigned long begin, unsigned long end)
+{
+    gMat2D<T> S(end-begin, M.cols());
+    for(unsigned long j = 0; j < M.cols(); ++j)
+        for(unsigned long i = begin; i < end; ++i)
+            S.getData()[(i-begin)+j*S.rows()] = M.getData()[i+j*M.rows()];
+    return S;
+}
+
+// Batch statistics of a window: A = sum_i w_i*x_i'*x_i + scale*lambda*I and
+// b = sum_i w_i*x_i'*y_i over rows [begin, end), with w_i = beta^(end-1-i)
+struct Batch
+{
+    gMat2D<T> A;
+    gMat2D<T> b;
+
+    Batch(const gMat2D<T>& X, const gMat2D<T>& Y, unsigned long begin,
+          unsigned long end, T beta = 1.0, T scale = 1.0): A(d, d), b(d, t)
+    {
+        set(A.getData(), (T)0.0, d*d);
+        set(b.getData(), (T)0.0, d*t);
+        for(unsigned long i = begin; i < end; ++i)
+        {
+            const T w = std::pow(beta, (T)(end-1-i));
+            for(unsigned long k = 0; k < d; ++k)
+            {
+                const T xk = X.getData()[i+k*X.rows()];
+                for(unsigned long l = 0; l < d; ++l)
+                    A.getData()[k+l*d] += w*xk*X.getData()[i+l*X.rows()];
+                for(unsigned long l = 0; l < t; ++l)
+                    b.getData()[k+l*d] += w*xk*Y.getData()[i+l*Y.rows()];
+            }
+        }
+        for(unsigned long k = 0; k < d; ++k)
+            A.getData()[k+k*d] += scale*lambda;
+    }
+};
+
+// Options holding the estimator of the batch statistics, as initialized by
+// RLSPrimalRecInitCholesky
+GurlsOptionsList* initialOptions(const Batch& batch)
+{
+    gMat2D<T>* R = new gMat2D<T>(d, d);
+    cholesky(batch.A.getData(), d, d, R->getData(), true);
+
+    gMat2D<T>* W = new gMat2D<T>(batch.b);
+    mldivide_squared(R->getData(), W->getData(), d, d, d, t, CblasTrans);
+    mldivide_squared(R->getData(), W->getData(), d, d, d, t, CblasNoTrans);
+
+    GurlsOptionsList* optimizer = new GurlsOptionsList("optimizer");
+    optimizer->addOpt("R", new OptMatrix<gMat2D<T> >(*R));
+    optimizer->addOpt("b", new OptMatrix<gMat2D<T> >(*(new gMat2D<T>(batch.b))));
+    optimizer->addOpt("W", new OptMatrix<gMat2D<T> >(*W));
+
+    GurlsOptionsList* opt = new GurlsOptionsList("test");
+    opt->addOpt("optimizer", optimizer);
+    return opt;
+}
+
+void replaceOptimizer(GurlsOptionsList& opt, GurlsOptionsList* optimizer)
+{
+    opt.removeOpt("optimizer");
+    opt.addOpt("optimizer", optimizer);
+}
+
+void checkClose(const T* result, const T* reference, unsigned long size)
+{
+    T scale = 1.0;
+    for(unsigned long i = 0; i < size; ++i)
+        scale = std::max(scale, std::abs(reference[i]));
+
+    for(unsigned long i = 0; i < size; ++i)
+        BOOST_REQUIRE_LE(std::abs(result[i] - reference[i]), errCoeff*scale);
+}
+
+// Checks that the estimator in opt matches a from-scratch factorization of
+// the batch statistics: R'*R = A, b = b and W = A\b
+void checkEstimator(const GurlsOptionsList& opt, const Batch& batch)
+{
+    const gMat2D<T>& R = opt.getOptValue<OptMatrix<gMat2D<T> > >("optimizer.R");
+    const gMat2D<T>& b = opt.getOptValue<OptMatrix<gMat2D<T> > >("optimizer.b");
+    const gMat2D<T>& W = opt.getOptValue<OptMatrix<gMat2D<T> > >("optimizer.W");
+
+    BOOST_REQUIRE_EQUAL(R.rows(), d);
+    BOOST_REQUIRE_EQUAL(W.rows(), d);
+    BOOST_REQUIRE_EQUAL(W.cols(), t);
+
+    gMat2D<T> RtR(d, d);
+    dot(R.getData(), R.getData(), RtR.getData(), d, d, d, d, d, d, CblasTrans, CblasNoTrans, CblasColMajor);
+    checkClose(RtR.getData(), batch.A.getData(), d*d);
+    checkClose(b.getData(), batch.b.getData(), d*t);
+
+    gMat2D<T> R_ref(d, d);
+    cholesky(batch.A.getData(), d, d, R_ref.getData(), true);
+    gMat2D<T> W_ref(batch.b);
+    mldivide_squared(R_ref.getData(), W_ref.getData(), d, d, d, t, CblasTrans);
+    mldivide_squared(R_ref.getData(), W_ref.getData(), d, d, d, t, CblasNoTrans);
+    checkClose(W.getData(), W_ref.getData(), d*t);
+}
+
+BOOST_AUTO_TEST_CASE(TestCholUpdate)
+{
+    srand(1);
+    gMat2D<T> X = randomMatrix(40, d);
+    gMat2D<T> Y = randomMatrix(40, t);
+
+    GurlsOptionsList* opt = initialOptions(Batch(X, Y, 0, 10));
+    RLSPrimalRecUpdateCholesky<T> task;
+
+    // one block of rows, then single rows
+    replaceOptimizer(*opt, task.execute(rows(X, 10, 25), rows(Y, 10, 25), *opt));
+    checkEstimator(*opt, Batch(X, Y, 0, 25));
+
+    for(unsigned long i = 25; i < 40; ++i)
+        replaceOptimizer(*opt, task.execute(rows(X, i, i+1), rows(Y, i, i+1), *opt));
+    checkEstimator(*opt, Batch(X, Y, 0, 40));
+
+    delete opt;
+}
+
+BOOST_AUTO_TEST_CASE(TestCholDowndate)
+{
+    srand(2);
+    gMat2D<T> X = randomMatrix(40, d);
+    gMat2D<T> Y = randomMatrix(40, t);
+
+    GurlsOptionsList* opt = initialOptions(Batch(X, Y, 0, 40));
+    RLSPrimalRecUpdateCholesky<T> task;
+
+    // removes the first rows as one block, then one by one
+    replaceOptimizer(*opt, task.downdate(rows(X, 0, 15), rows(Y, 0, 15), *opt));
+    checkEstimator(*opt, Batch(X, Y, 15, 40));
+
+    for(unsigned long i = 15; i < 30; ++i)
+        replaceOptimizer(*opt, task.downdate(rows(X, i, i+1), rows(Y, i, i+1), *opt));
+    checkEstimator(*opt, Batch(X, Y, 30, 40));
+
+    delete opt;
+}
+
+BOOST_AUTO_TEST_CASE(TestCholDowndateIndefinite)
+{
+    srand(3);
+    gMat2D<T> X = randomMatrix(10, d);
+    gMat2D<T> Y = randomMatrix(10, t);
+
+    GurlsOptionsList* opt = initialOptions(Batch(X, Y, 0, 10));
+    RLSPrimalRecUpdateCholesky<T> task;
+
+    // removing a row never added, larger than the whole data set, would
+    // leave an indefinite matrix
+    gMat2D<T> x = rows(X, 0, 1);
+    scal(d, (T)100.0, x.getData(), 1);
+    BOOST_REQUIRE_THROW(task.downdate(x, rows(Y, 0, 1), *opt), gException);
+
+    // the estimator is left untouched
+    checkEstimator(*opt, Batch(X, Y, 0, 10));
+
+    delete opt;
+}
+
+BOOST_AUTO_TEST_CASE(TestCholSlidingWindow)
+{
+    srand(4);
+    const unsigned long window = 12;
+    gMat2D<T> X = randomMatrix(200, d);
+    gMat2D<T> Y = randomMatrix(200, t);
+
+    GurlsOptionsList* opt = initialOptions(Batch(X, Y, 0, window));
+    RLSPrimalRecUpdateCholesky<T> task;
+
+    for(unsigned long i = window; i < X.rows(); ++i)
+    {
+        replaceOptimizer(*opt, task.execute(rows(X, i, i+1), rows(Y, i, i+1), *opt));
+        replaceOptimizer(*opt, task.downdate(rows(X, i-window, i-window+1), rows(Y, i-window, i-window+1), *opt));
+        checkEstimator(*opt, Batch(X, Y, i-window+1, i+1));
+    }
+
+    delete opt;
+}
+
+BOOST_AUTO_TEST_CASE(TestCholForgetting)
+{
+    srand(5);
+    const T beta = 0.9;
+    gMat2D<T> X = randomMatrix(30, d);
+    gMat2D<T> Y = randomMatrix(30, t);
+
+    GurlsOptionsList* opt = initialOptions(Batch(X, Y, 0, 10));
+    opt->addOpt("forgetting", new OptNumber(beta));
+    RLSPrimalRecUpdateCholesky<T> task;
+
+    // the initial rows and the regularization are forgotten along with the
+    // data: after the 20 new rows they weigh beta^20
+    replaceOptimizer(*opt, task.execute(rows(X, 10, 20), rows(Y, 10, 20), *opt));
+    for(unsigned long i = 20; i < 30; ++i)
+        replaceOptimizer(*opt, task.execute(rows(X, i, i+1), rows(Y, i, i+1), *opt));
+
+    Batch old(X, Y, 0, 10);
+    Batch recent(X, Y, 10, 30, beta, 0.0);
+    const T decay = std::pow(beta, (T)20);
+    axpy(d*d, decay, old.A.getData(), 1, recent.A.getData(), 1);
+    axpy(d*t, decay, old.b.getData(), 1, recent.b.getData(), 1);
+    checkEstimator(*opt, recent);
+
+    // factors outside (0, 1] are rejected
+    opt->removeOpt("forgetting");
+    opt->addOpt("forgetting", new OptNumber(1.5));
+    BOOST_REQUIRE_THROW(task.execute(rows(X, 0, 1), rows(Y, 0, 1), *opt), gException);
+
+    delete opt;
+}
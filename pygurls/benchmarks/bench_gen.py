@@ -39,15 +39,17 @@
 """
 A Python wrapper for GURLS++.
 
-Sets up the benchmarking scripts based on the configuration file.
+Reads the configuration file of the benchmarks and times a learning function
+on a data set. The benchmarks themselves are run by bench_harness.py.
 
 @author: Pedro Santana (psantana@mit.edu).
 """ 
+import dataset_cache
+import gc
 import misc
-import time
+import pygurls
 import os
 import re
-import scipy.io
 from collections import OrderedDict
 
 def read_bench_config(config_file='config_benchmarks.txt'):    
@@ -68,115 +70,59 @@ def read_bench_config(config_file='config_benchmarks.txt'):
             
     return learning_func_dict                                 
                  
-def generate_bench_code(config_file='config_benchmarks.txt',force_datasets=False):
-    """Genereate code that runs all benchmarks."""    
-    #Loads datasets
-    mat_file_dict,error = misc.generate_datasets(force=force_datasets)     
-    if not error:                 
-        #Loads benchmark configuration
-        learning_func_dict = read_bench_config(config_file)
-        
-        for func_name,param_dic in learning_func_dict.iteritems():          
-            if len(param_dic['datasets']) == 1 and param_dic['datasets'][0] == '_all_':
-                param_dic['datasets'] = [os.path.join(v,k) for k,v in mat_file_dict.iteritems()]
-            else:
-                #Adds path to data set name
-                for i,dset in enumerate(param_dic['datasets']):
-                    if dset in mat_file_dict.keys():                        
-                        full_path = os.path.join(mat_file_dict[dset],dset)
-                        param_dic['datasets'][i] = full_path     
-                    else:
-                        raise Exception('Data set '+dset+' not found.')        
-        #Writes a Python script that runs all desired tests
-        #(if only Python had macros...)
-        write_run_script(learning_func_dict)
-    else:
-        raise Exception('Failed to load the data sets.')
+def resolve_datasets(learning_func_dict,mat_file_dict):
+    """Replace the data set names of the configuration by the paths of their
+    cache entries (all of them for _all_)."""
+    for func_name,param_dic in learning_func_dict.items():
+        if len(param_dic['datasets']) == 1 and param_dic['datasets'][0] == '_all_':
+            param_dic['datasets'] = [os.path.join(v,k) for k,v in sorted(mat_file_dict.items())]
+        else:
+            #Adds path to data set name
+            for i,dset in enumerate(param_dic['datasets']):
+                if dset in mat_file_dict:
+                    param_dic['datasets'][i] = os.path.join(mat_file_dict[dset],dset)
+                else:
+                    raise Exception('Data set '+dset+' not found.')
+    return learning_func_dict
 
-def write_run_script(learning_func_dict,ident=' '*4):
-    """Write benchmarking script file."""
-    with open('bench_run.py','w') as f_run:
-        f_run.write('#!/usr/bin/env python\n') #shebang
-        f_run.write('#--Automatically generated by bench.py. Any changes will be discarded.\n')        
-        f_run.write('import os\n')        
-        f_run.write('import time\n')        
-        f_run.write('from bench_gen import benchmark\n')
-        f_run.write('import misc\n')        
-        f_run.write('from bench_tests import *\n\n')
-        
-        f_run.write('benchmark_results={}\n')
-        
-        f_run.write('if not os.path.exists(\"results\"):\n')
-        f_run.write(ident+'os.makedirs(\"results\")\n\n')
-        
-        f_run.write('bench_file = \"benchmark_results_\"+time.strftime(\"%m_%d_%y-%H_%M_%S\")+\".txt\"\n')
-        f_run.write('bench_file = os.path.join(os.path.relpath(\"results\"),bench_file)\n\n')
-        
-        f_run.write('with open(bench_file,\"w\") as f_r:\n')                
-        for func_name,param_dic in learning_func_dict.iteritems(): 
-            dic_func = 'benchmark_results[\"'+func_name+'\"]'
-            f_run.write(ident+dic_func+'={}\n')
-
-            for dset in param_dic['datasets']:
-                dset_name = os.path.split(dset)[1]
-                bench_str = 'elap,perf = benchmark(mat_file=\"'+dset+'\",'
-                bench_str +='learning_func='+func_name+','                
-                bench_str += 'n_runs='+str(param_dic['nruns'])+','
-                bench_str += 'msg='+'\"Running '+func_name+' on '
-                bench_str += dset_name+'\")\n'                
-                f_run.write(ident+bench_str)
-                
-                dic_ds = dic_func+'[\"'+dset_name+'\"]'
-                f_run.write(ident+dic_ds+'={\"elap\":elap,\"perf\":perf}\n')
-
-                bench_str ='perf_str = [str(f) for f in perf];'                                 
-                f_run.write(ident+bench_str)                
-                bench_str ='elap_str = [str(f) for f in elap]\n'                                 
-                f_run.write(ident+bench_str)                
-                
-                bench_str ='f_r.write(\"#'+func_name+','+dset_name+'\\n\")\n'  
-                f_run.write(ident+bench_str)                
-                
-                bench_str ='f_r.write(\" \".join(perf_str)+\"\\n\");'                 
-                f_run.write(ident+bench_str)                
-                bench_str ='f_r.write(\" \".join(elap_str)+\"\\n\\n\")\n\n'                 
-                f_run.write(ident+bench_str)
-        
-        f_run.write(ident+'print \"\\n\\nResults recorded in \"+bench_file+\"\\n\\n\"\n')
-        f_run.write(ident+'bench_tab = misc.print_benchmark_results(benchmark_results)\n')
-                 
-        f_run.write(ident+'f_r.write((\"-\"*20)+\"\\n\\n\")\n')         
-        f_run.write(ident+'f_r.write(bench_tab)')                
-                                
-            
-def benchmark(mat_file,learning_func,n_runs=1,msg=''):
-    """Benchmark a learning algorithm."""
-    print msg #Prints optional message
-    ws = scipy.io.loadmat(mat_file,squeeze_me=True) #Loads data set    
+def benchmark(mat_file,learning_func,n_runs=1,msg='',cache_dir=None,warmup=0):
+    """Benchmark a learning algorithm.
+    
+    The function is first run warmup times, untimed; each of the n_runs 
+    timed runs is measured with the monotonic clock of misc. The data set is
+    memory-mapped from its cache entry (or loaded from a .mat file).
+    
+    With cache_dir (by default, the PYGURLS_KERNEL_CACHE environment 
+    variable), the PyGURLS tests share an on-disk cache of the kernel, 
+    distance and eigendecomposition matrices across runs and invocations.
+    """
+    print(msg) #Prints optional message
+    if cache_dir is None:
+        cache_dir = os.environ.get('PYGURLS_KERNEL_CACHE')
+    ws = dataset_cache.load_dataset(mat_file) #Memory-maps the data set
+    for n in range(warmup):
+        learning_func(Xtrain=ws['Xtrain'],Ytrain=ws['Ytrain'],
+                      Xtest=ws['Xtest'],Ytest=ws['Ytest'],cache_dir=cache_dir)
     elap_list=[]; perf_list=[]
     for n in range(n_runs):            
-        start = time.time()         
+        if cache_dir is not None:
+            pygurls.reset_kernel_cache_stats()
+        gc.collect()
+        start = misc.clock()
         perf = learning_func(Xtrain=ws['Xtrain'],
                              Ytrain=ws['Ytrain'],
                              Xtest=ws['Xtest'],
-                             Ytest=ws['Ytest'])        
-        elap_list.append(time.time()-start)
+                             Ytest=ws['Ytest'],
+                             cache_dir=cache_dir)        
+        elap_list.append(misc.clock()-start)
         perf_list.append(perf)
-        print "Run %d: Elap(s)=%.4f, Perf(%%)=%.2f\n"%(n+1,elap_list[-1],perf_list[-1])
+        print("Run %d: Elap(s)=%.4f, Perf(%%)=%.2f\n"%(n+1,elap_list[-1],perf_list[-1]))
+        if cache_dir is not None:
+            print("Kernel cache: %(hits)d hits, %(misses)d misses, %(stores)d stores, %(evictions)d evictions\n"%(pygurls.kernel_cache_stats()))
     return elap_list,perf_list
 
 
 if __name__ == '__main__':
-    generate_bench_code(config_file='config_benchmarks.txt',force_datasets=False)    
-
-    
-
-    
-    
-    
-    
-    
-    
-    
-    
- 
\ No newline at end of file
+    import sys
+    import bench_harness
+    sys.exit(bench_harness.main())
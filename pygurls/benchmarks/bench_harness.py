@@ -0,0 +1,424 @@
+#!/usr/bin/env python
+#
+#  A Python wrapper for GURLS++.
+#
+#  Copyright (c) 2014 MIT. All rights reserved.
+#
+#   author: Pedro Santana
+#   e-mail: psantana@mit.edu
+#   website: people.csail.mit.edu/psantana
+#
+#  Redistribution and use in source and binary forms, with or without
+#  modification, are permitted provided that the following conditions
+#  are met:
+#
+#  1. Redistributions of source code must retain the above copyright
+#     notice, this list of conditions and the following disclaimer.
+#  2. Redistributions in binary form must reproduce the above copyright
+#     notice, this list of conditions and the following disclaimer in
+#     the documentation and/or other materials provided with the
+#     distribution.
+#  3. Neither the name(s) of the copyright holders nor the names of its 
+#     contributors or of the Massachusetts Institute of Technology may be 
+#     used to endorse or promote products derived from this software
+#     without specific prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+#  "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+#  LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+#  FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+#  COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+#  INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+#  BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS
+#  OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED
+#  AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+#  LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+#  ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+#  POSSIBILITY OF SUCH DAMAGE.
+"""
+A Python wrapper for GURLS++.
+
+Benchmark harness driven by config_benchmarks.txt. Every learning function of
+the configuration (looked up in bench_tests.py) is run on each of its data 
+sets: first --warmup untimed runs, then the configured number of timed runs
+(at least --min-runs), measured with a monotonic high-resolution clock. The 
+median, quartiles, interquartile range (IQR) and minimum of the elapsed times 
+and the median accuracy of each (method, data set) are printed and written to
+results/ as JSON (with the raw measurements and the configuration of the 
+workers) and CSV.
+
+Each (method, data set) runs in a worker interpreter pinned to a set of CPUs
+(--cpus, Linux only) with OPENBLAS_NUM_THREADS, MKL_NUM_THREADS and 
+OMP_NUM_THREADS set to --threads, and is killed after --timeout seconds. In 
+the isolated mode (default) one worker at a time uses all the CPUs; in the 
+throughput mode, up to --jobs workers run concurrently on disjoint sets of 
+--threads CPUs (1 by default).
+
+The compare command checks results against a saved baseline: a time 
+regression is a median more than --time-threshold (relative) above the 
+baseline median and above it by more than the larger IQR of the two; an 
+accuracy regression is a median accuracy more than --acc-threshold 
+(absolute) below the baseline. It exits with status 1 if there is any.
+
+Usage: python bench_harness.py run [--config FILE] [--warmup N] 
+                                   [--min-runs N] [--methods NAME ...] 
+                                   [--mode isolated|throughput] [--cpus LIST]
+                                   [--threads N] [--jobs N] [--timeout S]
+                                   [-o PREFIX] [--baseline FILE]
+       python bench_harness.py compare BASELINE CURRENT 
+                                   [--time-threshold F] [--acc-threshold F]
+
+@author: Pedro Santana (psantana@mit.edu).
+""" 
+import argparse
+import csv
+import importlib
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+import misc
+
+_CSV_FIELDS = ['method','dataset','status','n_runs','warmup','time_median',
+               'time_q1','time_q3','time_iqr','time_min','time_max',
+               'acc_median','acc_min','acc_max','cpus','threads']
+
+#Environment variables that set the number of threads of the BLAS and OpenMP
+_THREAD_VARS = ['OPENBLAS_NUM_THREADS','MKL_NUM_THREADS','OMP_NUM_THREADS',
+                'VECLIB_MAXIMUM_THREADS']
+
+def parse_cpus(spec):
+    """CPU ids of a list such as '0-3,6,8-9'."""
+    cpus = []
+    for part in spec.split(','):
+        if '-' in part:
+            first,last = part.split('-')
+            cpus.extend(range(int(first),int(last)+1))
+        elif part.strip():
+            cpus.append(int(part))
+    return sorted(set(cpus))
+
+def available_cpus():
+    """CPUs this process may run on."""
+    if hasattr(os,'sched_getaffinity'):
+        return sorted(os.sched_getaffinity(0))
+    import multiprocessing
+    return list(range(multiprocessing.cpu_count()))
+
+def worker_slots(mode,cpus=None,threads=None,jobs=None):
+    """CPU sets of the concurrent workers, and the BLAS threads of each.
+    
+    isolated -- a single worker on all the CPUs, with one thread per CPU 
+                (unless threads is given).
+    throughput -- jobs workers (as many as fit by default), each pinned to 
+                  its own threads CPUs (1 by default).
+    """
+    cpus = list(cpus or available_cpus())
+    if mode == 'isolated':
+        return [cpus],(threads or len(cpus))
+    if mode != 'throughput':
+        raise ValueError('Unknown mode '+mode)
+    threads = threads or 1
+    n_slots = max(1,len(cpus)//threads)
+    if jobs:
+        n_slots = min(n_slots,jobs)
+    return [cpus[i*threads:(i+1)*threads] for i in range(n_slots)],threads
+
+def run_case(case):
+    """Run the warm-up and timed runs of one (method, data set) in this 
+    process and return its entry of the results."""
+    from bench_gen import benchmark
+    module = importlib.import_module(case['tests'])
+    elap,perf = benchmark(mat_file=case['dataset_file'],
+                          learning_func=getattr(module,case['method']),
+                          n_runs=case['n_runs'],cache_dir=case['cache_dir'],
+                          warmup=case['warmup'],
+                          msg='Running %s on %s'%(case['method'],case['dataset']))
+    entry = {'method':case['method'],'dataset':case['dataset'],
+             'n_runs':case['n_runs'],'warmup':case['warmup'],'status':'ok',
+             'times':[float(e) for e in elap],'accs':[float(p) for p in perf]}
+    for key,value in misc.summarize(entry['times']).items():
+        entry['time_'+key] = value
+    acc = misc.summarize(entry['accs'])
+    entry.update({'acc_median':acc['median'],'acc_min':acc['min'],
+                  'acc_max':acc['max']})
+    if hasattr(os,'sched_getaffinity'):
+        entry['affinity'] = sorted(os.sched_getaffinity(0))
+    return entry
+
+def _start_case(case,cpus,threads,folder):
+    """Start a worker interpreter running case, pinned to cpus with threads
+    BLAS and OpenMP threads; its output goes to a log file in folder."""
+    case_file = os.path.join(folder,'case%d.json'%case['id'])
+    with open(case_file,'w') as f:
+        json.dump(case,f)
+    env = dict(os.environ)
+    for var in _THREAD_VARS:
+        env[var] = str(threads)
+    preexec = None
+    if hasattr(os,'sched_setaffinity'):
+        preexec = lambda: os.sched_setaffinity(0,cpus)
+    log = open(os.path.join(folder,'case%d.log'%case['id']),'w')
+    proc = subprocess.Popen([sys.executable,os.path.abspath(__file__),'--case',
+                             case_file],stdout=log,stderr=subprocess.STDOUT,
+                            env=env,preexec_fn=preexec)
+    log.close()
+    return proc,case_file
+
+def _failed_entry(case,status,folder):
+    """Entry of a case that did not complete, with the end of its log."""
+    with open(os.path.join(folder,'case%d.log'%case['id'])) as f:
+        tail = f.read()[-2000:]
+    return {'method':case['method'],'dataset':case['dataset'],
+            'n_runs':case['n_runs'],'warmup':case['warmup'],'status':status,
+            'log':tail}
+
+def execute(cases,slots,threads,timeout=None,verbose=True):
+    """Run the cases on a pool of worker interpreters, one per CPU set of 
+    slots, killing the cases that run longer than timeout seconds. Return 
+    the entries in the order of cases."""
+    folder = tempfile.mkdtemp(prefix='bench_harness')
+    pending = list(cases)
+    running = {} #slot index -> (process, case, case file, start time)
+    entries = {}
+    try:
+        while pending or running:
+            for slot in range(len(slots)):
+                if slot not in running and pending:
+                    case = pending.pop(0)
+                    proc,case_file = _start_case(case,slots[slot],threads,
+                                                 folder)
+                    running[slot] = (proc,case,case_file,misc.clock())
+            time.sleep(0.05)
+            for slot,(proc,case,case_file,start) in list(running.items()):
+                status = None
+                if proc.poll() is not None:
+                    status = 'ok' if proc.returncode == 0 else 'error'
+                elif timeout is not None and misc.clock()-start > timeout:
+                    proc.kill()
+                    proc.wait()
+                    status = 'timeout'
+                if status is None:
+                    continue
+                del running[slot]
+                if status == 'ok':
+                    with open(case_file+'.out') as f:
+                        entry = json.load(f)
+                else:
+                    entry = _failed_entry(case,status,folder)
+                entry.update({'cpus':' '.join(str(c) for c in slots[slot]),
+                              'threads':threads,'wall':misc.clock()-start})
+                entries[case['id']] = entry
+                if verbose:
+                    print('[%d/%d] %s on %s: %s (%.1fs, CPUs %s)'%(len(entries),
+                          len(cases),case['method'],case['dataset'],status,
+                          entry['wall'],entry['cpus']))
+    finally:
+        for proc,_,_,_ in running.values(): #interrupted
+            proc.kill()
+            proc.wait()
+        shutil.rmtree(folder,ignore_errors=True)
+    return [entries[case['id']] for case in cases]
+
+def run(config_file='config_benchmarks.txt',warmup=1,min_runs=1,methods=None,
+        tests='bench_tests',cache_dir=None,force_datasets=False,
+        mode='isolated',cpus=None,threads=None,jobs=None,timeout=None):
+    """Run the benchmarks of the configuration and return their results, a
+    dictionary with the list of per (method, data set) entries in 'results'
+    and a description of the run in 'meta'.
+    
+    Each (method, data set) runs in its own worker interpreter, pinned to a 
+    CPU set and with its BLAS and OpenMP thread counts set (see 
+    worker_slots for the modes), and is stopped after timeout seconds.
+    """
+    from bench_gen import read_bench_config, resolve_datasets
+    if cache_dir is not None: #the workers run in scratch directories
+        cache_dir = os.path.abspath(cache_dir)
+    mat_file_dict,error = misc.generate_datasets(force=force_datasets)
+    if error:
+        raise Exception('Failed to load the data sets.')
+    config = resolve_datasets(read_bench_config(config_file),mat_file_dict)
+    
+    cases = []
+    for func_name,param_dic in config.items():
+        if methods and func_name not in methods:
+            continue
+        n_runs = max(int(param_dic['nruns']),min_runs)
+        for dset in param_dic['datasets']:
+            cases.append({'id':len(cases),'method':func_name,
+                          'dataset':os.path.split(dset)[1],
+                          'dataset_file':os.path.abspath(dset),'n_runs':n_runs,
+                          'warmup':warmup,'tests':tests,'cache_dir':cache_dir,
+                          'cwd':os.getcwd()})
+    slots,threads = worker_slots(mode,cpus,threads,jobs)
+    results = execute(cases,slots,threads,timeout)
+    
+    meta = {'date':time.strftime('%Y-%m-%d %H:%M:%S'),'config':config_file,
+            'host':platform.node(),'platform':platform.platform(),
+            'python':platform.python_version(),'numpy':np.__version__,
+            'warmup':warmup,'clock':misc.clock.__name__,'mode':mode,
+            'workers':[' '.join(str(c) for c in slot) for slot in slots],
+            'threads':threads,'timeout':timeout,
+            'cpu_count':len(available_cpus()),
+            'pinned':hasattr(os,'sched_setaffinity')}
+    return {'meta':meta,'results':results}
+
+def save(bench,prefix):
+    """Write the results to prefix.json and prefix.csv."""
+    folder = os.path.dirname(prefix)
+    if folder and not os.path.exists(folder):
+        os.makedirs(folder)
+    with open(prefix+'.json','w') as f:
+        json.dump(bench,f,indent=1,sort_keys=True)
+    with open(prefix+'.csv','w') as f:
+        writer = csv.DictWriter(f,fieldnames=_CSV_FIELDS,extrasaction='ignore')
+        writer.writeheader()
+        for entry in bench['results']:
+            writer.writerow(entry)
+
+def print_summary(bench):
+    """Print the statistics of each (method, data set)."""
+    print('%-28s%-20s%6s%12s%12s%12s%10s'%('method','dataset','runs',
+          'median(s)','iqr(s)','min(s)','acc(%)'))
+    for e in bench['results']:
+        if e.get('status','ok') != 'ok':
+            print('%-28s%-20s%6d  %s'%(e['method'],e['dataset'],e['n_runs'],
+                                       e['status']))
+            continue
+        print('%-28s%-20s%6d%12.4f%12.4f%12.4f%10.2f'%(e['method'],e['dataset'],
+              e['n_runs'],e['time_median'],e['time_iqr'],e['time_min'],
+              e['acc_median']*100.0))
+
+def compare(baseline,current,time_threshold=0.1,acc_threshold=0.005):
+    """Compare two results (as returned by run() or loaded from JSON) and 
+    return a list of (method, dataset, status, message) for the entries of 
+    current, where status is 'ok', 'regression', 'improved' or 'new'."""
+    base = dict(((e['method'],e['dataset']),e) for e in baseline['results']
+                if e.get('status','ok') == 'ok')
+    report = []
+    for e in current['results']:
+        key = (e['method'],e['dataset'])
+        if e.get('status','ok') != 'ok':
+            report.append(key+('regression' if key in base else 'new',
+                               'did not complete: '+e['status']))
+            continue
+        if key not in base:
+            report.append(key+('new','not in the baseline'))
+            continue
+        b = base[key]
+        noise = max(b['time_iqr'],e['time_iqr'])
+        ratio = e['time_median']/b['time_median'] if b['time_median'] > 0 else float('inf')
+        dacc = e['acc_median']-b['acc_median']
+        msg = 'time %.4fs -> %.4fs (x%.2f), acc %.2f%% -> %.2f%%'%(
+            b['time_median'],e['time_median'],ratio,b['acc_median']*100.0,
+            e['acc_median']*100.0)
+        slower = (ratio > 1.0+time_threshold and 
+                  e['time_median']-b['time_median'] > noise)
+        faster = (ratio < 1.0-time_threshold and 
+                  b['time_median']-e['time_median'] > noise)
+        if slower or dacc < -acc_threshold:
+            status = 'regression'
+        elif faster or dacc > acc_threshold:
+            status = 'improved'
+        else:
+            status = 'ok'
+        report.append(key+(status,msg))
+    return report
+
+def print_comparison(report):
+    """Print a comparison report, return True if it has regressions."""
+    for method,dataset,status,msg in report:
+        print('%-12s%-28s%-20s%s'%(status.upper(),method,dataset,msg))
+    return any(r[2] == 'regression' for r in report)
+
+def load(path):
+    with open(path,'r') as f:
+        return json.load(f)
+
+def _case_main(case_file):
+    """Run the case of case_file and write its entry to case_file.out."""
+    with open(case_file) as f:
+        case = json.load(f)
+    sys.path.insert(0,case['cwd']) #the module of the tests
+    #GURLS++ savefiles of concurrent cases, in the folder of the harness so
+    #that they are removed along with it if the case is killed
+    scratch = tempfile.mkdtemp(dir=os.path.dirname(os.path.abspath(case_file)))
+    os.chdir(scratch)
+    try:
+        entry = run_case(case)
+    finally:
+        os.chdir(case['cwd'])
+        shutil.rmtree(scratch,ignore_errors=True)
+    with open(case_file+'.out','w') as f:
+        json.dump(entry,f)
+    return 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[1])
+    sub = parser.add_subparsers(dest='command')
+    p_run = sub.add_parser('run',help='run the configured benchmarks')
+    p_run.add_argument('--config',default='config_benchmarks.txt')
+    p_run.add_argument('--warmup',type=int,default=1,help='untimed runs before timing')
+    p_run.add_argument('--min-runs',type=int,default=5,
+                       help='minimum number of timed runs (raises n-runs of the config)')
+    p_run.add_argument('--methods',nargs='*',help='learning functions to run (default: all)')
+    p_run.add_argument('--tests',default='bench_tests',help='module of the learning functions')
+    p_run.add_argument('--cache-dir',default=os.environ.get('PYGURLS_KERNEL_CACHE'),
+                       help='kernel cache shared by the runs (off by default)')
+    p_run.add_argument('--force-datasets',action='store_true',
+                       help='run the pre-processing scripts again')
+    p_run.add_argument('-o','--output',help='prefix of the JSON and CSV files '
+                       '(default: results/benchmark_results_<date>)')
+    p_run.add_argument('--baseline',help='compare the results to this JSON file')
+    p_run.add_argument('--mode',default='isolated',choices=['isolated','throughput'],
+                       help='one case at a time on all the CPUs (default), or '
+                       'concurrent cases on disjoint CPU sets')
+    p_run.add_argument('--cpus',type=parse_cpus,
+                       help='CPUs of the workers, e.g. 0-7 (default: all available)')
+    p_run.add_argument('--threads',type=int,help='BLAS/OpenMP threads (and CPUs) '
+                       'per worker (default: all the CPUs if isolated, 1 otherwise)')
+    p_run.add_argument('--jobs',type=int,help='maximum concurrent workers in '
+                       'throughput mode (default: as many as the CPUs allow)')
+    p_run.add_argument('--timeout',type=float,help='seconds per (method, data set), '
+                       'warm-up included (default: none)')
+    p_cmp = sub.add_parser('compare',help='compare results to a baseline')
+    p_cmp.add_argument('baseline')
+    p_cmp.add_argument('current')
+    for p in (p_run,p_cmp):
+        p.add_argument('--time-threshold',type=float,default=0.1,
+                       help='relative slowdown of the median time flagged (default 0.1)')
+        p.add_argument('--acc-threshold',type=float,default=0.005,
+                       help='absolute drop of the median accuracy flagged (default 0.005)')
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if argv[:1] == ['--case']: #worker interpreter started by execute()
+        return _case_main(argv[1])
+    if not argv or argv[0] not in ('run','compare','-h','--help'):
+        argv = ['run']+argv #run is the default command
+    args = parser.parse_args(argv)
+    
+    if args.command == 'compare':
+        report = compare(load(args.baseline),load(args.current),
+                         args.time_threshold,args.acc_threshold)
+        return 1 if print_comparison(report) else 0
+    
+    bench = run(args.config,args.warmup,args.min_runs,args.methods,args.tests,
+                args.cache_dir,args.force_datasets,args.mode,args.cpus,
+                args.threads,args.jobs,args.timeout)
+    prefix = args.output or os.path.join('results','benchmark_results_'+
+                                         time.strftime('%m_%d_%y-%H_%M_%S'))
+    save(bench,prefix)
+    print_summary(bench)
+    print('\nResults recorded in %s.json and %s.csv\n'%(prefix,prefix))
+    if args.baseline:
+        report = compare(load(args.baseline),bench,args.time_threshold,
+                         args.acc_threshold)
+        return 1 if print_comparison(report) else 0
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
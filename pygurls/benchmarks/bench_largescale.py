@@ -0,0 +1,152 @@
+#!/usr/bin/env python
+#
+#  A Python wrapper for GURLS++.
+#
+#  Copyright (c) 2014 MIT. All rights reserved.
+#
+#   author: Pedro Santana
+#   e-mail: psantana@mit.edu
+#   website: people.csail.mit.edu/psantana
+#
+#  Redistribution and use in source and binary forms, with or without
+#  modification, are permitted provided that the following conditions
+#  are met:
+#
+#  1. Redistributions of source code must retain the above copyright
+#     notice, this list of conditions and the following disclaimer.
+#  2. Redistributions in binary form must reproduce the above copyright
+#     notice, this list of conditions and the following disclaimer in
+#     the documentation and/or other materials provided with the
+#     distribution.
+#  3. Neither the name(s) of the copyright holders nor the names of its 
+#     contributors or of the Massachusetts Institute of Technology may be 
+#     used to endorse or promote products derived from this software
+#     without specific prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+#  "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+#  LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+#  FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+#  COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+#  INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+#  BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS
+#  OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED
+#  AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+#  LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+#  ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+#  POSSIBILITY OF SUCH DAMAGE.
+"""
+A Python wrapper for GURLS++.
+
+Charts accuracy against training time and peak memory for the Gaussian kernel
+models that avoid the n x n kernel (NystromRLSClassifier, 
+RandomFeaturesRLSClassifier) and for the exact RBF pipeline (RLSClassifier 
+with kernel='rbf', which builds the whole kernel and is only run up to 
+--max-exact samples). Each model is trained in a new interpreter, whose 
+peak resident memory is reported. If matplotlib is available, the chart is 
+saved to --plot.
+
+Usage: python bench_largescale.py [-n SIZES] [-d FEATURES] [--max-exact N]
+                                  [--plot FILE]
+
+@author: Pedro Santana (psantana@mit.edu).
+""" 
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+import pygurls
+
+def synthetic_data(n,d,seed=0):
+    """Two classes separated by a sphere (not linearly separable)."""
+    rng = np.random.RandomState(seed)
+    X = rng.randn(n,d)
+    r = np.sqrt(np.sum(X[:,:2]**2,axis=1))
+    y = np.where(r+0.2*rng.randn(n) > 1.2,1,-1)
+    return X,y
+
+def methods(landmarks=(250,1000),features=(250,1000)):
+    """Name and constructor of each benchmarked model."""
+    out = [('exact rbf',lambda: pygurls.RLSClassifier(kernel='rbf',
+                                                      options={'verbose':0}))]
+    for m in landmarks:
+        out.append(('nystrom %d'%m,lambda m=m: pygurls.NystromRLSClassifier(n_landmarks=m)))
+    for D in features:
+        out.append(('randfeats %d'%D,lambda D=D: pygurls.RandomFeaturesRLSClassifier(n_features=D)))
+    return out
+
+def run_model(name,n,d):
+    """Train and test one model; return time, accuracy and peak memory (MB)
+    on top of the memory used before training."""
+    os.chdir(tempfile.mkdtemp()) #GURLS++ savefiles go to a scratch folder
+    X,y = synthetic_data(n,d)
+    Xt,yt = synthetic_data(max(1000,n//4),d,seed=1)
+    base = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.time()
+    model = dict(methods())[name]().fit(X,y)
+    elap = time.time()-start
+    acc = model.score(Xt,yt)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return elap,acc,(peak-base)/1024.0 #ru_maxrss is in KB
+
+def run_isolated(name,n,d):
+    """Run the model in a new interpreter, so that peak memories are not 
+    mixed (and BLAS threads are not inherited through fork)."""
+    out = subprocess.check_output([sys.executable,os.path.abspath(__file__),
+                                   '--child',name,str(n),str(d)])
+    return tuple(float(v) for v in out.decode().split()[-3:])
+
+def benchmark(sizes=(2000,5000,10000,20000),d=10,max_exact=5000):
+    """Print (and return) time, accuracy and memory of every model and size."""
+    print('%-18s%-10s%-12s%-10s%-12s'%('method','n','elap(s)','acc','mem(MB)'))
+    results = []
+    for name,_ in methods():
+        for n in sizes:
+            if name == 'exact rbf' and n > max_exact:
+                continue
+            elap,acc,mem = run_isolated(name,n,d)
+            print('%-18s%-10d%-12.3f%-10.4f%-12.1f'%(name,n,elap,acc,mem))
+            results.append((name,n,elap,acc,mem))
+    return results
+
+def plot(results,filename):
+    """Accuracy against time and against memory, one line per model."""
+    try:
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+    except ImportError:
+        print('matplotlib is not available, no chart saved.')
+        return
+    fig,axes = plt.subplots(1,2,figsize=(12,5))
+    for name in sorted(set(r[0] for r in results)):
+        rows = [r for r in results if r[0] == name]
+        axes[0].plot([r[2] for r in rows],[r[3] for r in rows],'o-',label=name)
+        axes[1].plot([r[4] for r in rows],[r[3] for r in rows],'o-',label=name)
+    axes[0].set_xlabel('training time (s)'); axes[0].set_xscale('log')
+    axes[1].set_xlabel('peak memory (MB)'); axes[1].set_xscale('log')
+    for ax in axes:
+        ax.set_ylabel('test accuracy')
+        ax.legend(loc='lower right')
+    fig.savefig(filename)
+    print('Chart saved to %s'%filename)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[1])
+    parser.add_argument('-n',type=int,nargs='+',default=[2000,5000,10000,20000],
+                        help='training set sizes')
+    parser.add_argument('-d',type=int,default=10,help='features')
+    parser.add_argument('--max-exact',type=int,default=5000,
+                        help='largest training set for the exact RBF pipeline')
+    parser.add_argument('--plot',default='largescale.png',help='chart file')
+    parser.add_argument('--child',nargs=3,metavar=('METHOD','N','D'),
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        print('%f %f %f'%run_model(args.child[0],int(args.child[1]),int(args.child[2])))
+        sys.exit(0)
+    plot(benchmark(sizes=args.n,d=args.d,max_exact=args.max_exact),args.plot)
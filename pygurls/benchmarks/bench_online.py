@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+#
+#  A Python wrapper for GURLS++.
+#
+#  Copyright (c) 2014 MIT. All rights reserved.
+#
+#   author: Pedro Santana
+#   e-mail: psantana@mit.edu
+#   website: people.csail.mit.edu/psantana
+#
+#  Redistribution and use in source and binary forms, with or without
+#  modification, are permitted provided that the following conditions
+#  are met:
+#
+#  1. Redistributions of source code must retain the above copyright
+#     notice, this list of conditions and the following disclaimer.
+#  2. Redistributions in binary form must reproduce the above copyright
+#     notice, this list of conditions and the following disclaimer in
+#     the documentation and/or other materials provided with the
+#     distribution.
+#  3. Neither the name(s) of the copyright holders nor the names of its 
+#     contributors or of the Massachusetts Institute of Technology may be 
+#     used to endorse or promote products derived from this software
+#     without specific prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+#  "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+#  LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+#  FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+#  COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+#  INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+#  BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS
+#  OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED
+#  AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+#  LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+#  ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+#  POSSIBILITY OF SUCH DAMAGE.
+#
+"""
+A Python wrapper for GURLS++.
+
+Compares the throughput of online updates (RecursiveRLSRegressor.partial_fit)
+for several block sizes with retraining a batch model (RLSRegressor, linear
+primal, hold-out) on the whole history every time a block arrives.
+
+Usage: python bench_online.py [-n SAMPLES] [-d FEATURES] [-i INITIAL]
+
+@author: Pedro Santana (psantana@mit.edu).
+""" 
+import argparse
+import os
+import tempfile
+import time
+import numpy as np
+import pygurls
+
+def synthetic_data(n,d,seed=0):
+    """Noisy linear regression data."""
+    rng = np.random.RandomState(seed)
+    X = rng.randn(n,d)
+    y = X.dot(rng.randn(d)) + 0.1*rng.randn(n)
+    return X,y
+
+def bench_updates(X,y,n_init,block):
+    """Rows/s of partial_fit with blocks of block rows, after fit on n_init."""
+    model = pygurls.RecursiveRLSRegressor().fit(X[:n_init],y[:n_init])
+    start = time.time()
+    for i in range(n_init,X.shape[0],block):
+        model.partial_fit(X[i:i+block],y[i:i+block])
+    elap = time.time()-start
+    return elap,(X.shape[0]-n_init)/elap,model
+
+def bench_retrain(X,y,n_init,block,max_refits=20):
+    """Rows/s when a batch model is retrained on the history for each block.
+    
+    At most max_refits blocks are timed, and the time is extrapolated to the
+    whole stream.
+    """
+    ends = list(range(n_init+block,X.shape[0]+1,block))
+    step = max(1,len(ends)//max_refits)
+    timed = ends[::step]
+    start = time.time()
+    for end in timed:
+        model = pygurls.RLSRegressor(paramsel='ho',options={'verbose':0})
+        model.fit(X[:end],y[:end])
+    elap = (time.time()-start)*len(ends)/len(timed)
+    return elap,(X.shape[0]-n_init)/elap,model
+
+def benchmark(n=20000,d=50,n_init=1000,blocks=(1,10,100,1000)):
+    """Print rows/s of online updates and batch retraining."""
+    X,y = synthetic_data(n,d)
+    os.chdir(tempfile.mkdtemp()) #GURLS++ savefiles go to a scratch folder
+    
+    print('%-28s%-12s%-14s%-10s'%('method','elap(s)','rows/s','rmse'))
+    results = []
+    for block in blocks:
+        for name,bench in [('partial_fit',bench_updates),('retrain',bench_retrain)]:
+            if name == 'retrain' and block < 100:
+                continue #one full retraining per row or ten is hopeless
+            elap,rate,model = bench(X,y,n_init,block)
+            rmse = np.sqrt(np.mean((model.predict(X)-y)**2))
+            label = '%s (block %d)'%(name,block)
+            print('%-28s%-12.3f%-14.0f%-10.4f'%(label,elap,rate,rmse))
+            results.append((label,elap,rate,rmse))
+    return results
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[1])
+    parser.add_argument('-n',type=int,default=20000,help='total samples')
+    parser.add_argument('-d',type=int,default=50,help='features')
+    parser.add_argument('-i',type=int,default=1000,help='initial training samples')
+    args = parser.parse_args()
+    benchmark(n=args.n,d=args.d,n_init=args.i)
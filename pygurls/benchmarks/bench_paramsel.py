@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+#
+#  A Python wrapper for GURLS++.
+#
+#  Copyright (c) 2014 MIT. All rights reserved.
+#
+#   author: Pedro Santana
+#   e-mail: psantana@mit.edu
+#   website: people.csail.mit.edu/psantana
+#
+#  Redistribution and use in source and binary forms, with or without
+#  modification, are permitted provided that the following conditions
+#  are met:
+#
+#  1. Redistributions of source code must retain the above copyright
+#     notice, this list of conditions and the following disclaimer.
+#  2. Redistributions in binary form must reproduce the above copyright
+#     notice, this list of conditions and the following disclaimer in
+#     the documentation and/or other materials provided with the
+#     distribution.
+#  3. Neither the name(s) of the copyright holders nor the names of its 
+#     contributors or of the Massachusetts Institute of Technology may be 
+#     used to endorse or promote products derived from this software
+#     without specific prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+#  "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+#  LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+#  FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+#  COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+#  INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+#  BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS
+#  OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED
+#  AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+#  LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+#  ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+#  POSSIBILITY OF SUCH DAMAGE.
+"""
+A Python wrapper for GURLS++.
+
+Compares the coarse-to-fine parameter selection (options nsigmarefine and 
+nlambdarefine) with the full grids on the data sets of the datasets/ folder.
+For each data set and selection method (leave-one-out or hold-out, rbf and
+linear kernels), the full grid (nsigma=25, nlambda=20) and a coarse grid 
+refined around its optimum are trained on the same samples, and the training
+time, test accuracy and selected parameters are reported.
+
+Usage: python bench_paramsel.py [-n MAX_SAMPLES] [--nsigma N] [--nlambda N]
+                                [--refine N] [DATASET ...]
+
+@author: Pedro Santana (psantana@mit.edu).
+""" 
+import argparse
+import os
+import time
+import numpy as np
+import dataset_cache
+import pygurls
+from misc import generate_datasets
+
+def load_dataset(folder,mat_file,max_samples,seed=0):
+    """Training and test sets of a cached data set, with at most max_samples 
+    training samples."""
+    ws = dataset_cache.load_dataset(os.path.join(folder,mat_file))
+    Xtr,ytr = ws['Xtrain'],ws['Ytrain'].ravel()
+    Xte,yte = ws['Xtest'],ws['Ytest'].ravel()
+    if Xtr.shape[0] > max_samples:
+        idx = np.random.RandomState(seed).permutation(Xtr.shape[0])[:max_samples]
+        Xtr,ytr = Xtr[idx],ytr[idx]
+    return Xtr,ytr,Xte,yte
+
+def configurations(nsigma,nlambda,refine):
+    """Name, estimator arguments and GURLS++ options of each configuration:
+    the full grid first, then the coarse-to-fine search."""
+    out = []
+    for kernel,solver,paramsel in [('rbf','dual','loocv'),('rbf','dual','ho'),
+                                   ('linear','primal','loocv'),
+                                   ('linear','primal','ho')]:
+        args = {'kernel':kernel,'solver':solver,'paramsel':paramsel}
+        name = '%s %s'%(kernel,paramsel)
+        out.append((name+' grid',args,{'verbose':0}))
+        if kernel == 'rbf':
+            fine = {'nsigma':nsigma,'nsigmarefine':refine}
+        else:
+            fine = {'nlambda':nlambda,'nlambdarefine':refine}
+        fine['verbose'] = 0
+        out.append((name+' refine',args,fine))
+    return out
+
+def selected(clf):
+    """Selected sigma (if any) and lambda of a trained classifier."""
+    pg = clf.pygurls
+    sigma = None
+    if clf.kernel == 'rbf':
+        sigma = float(np.ravel(pg.get_field('paramsel.sigma'))[0])
+    lam = float(np.ravel(pg.get_field('paramsel.lambdas'))[0])
+    return sigma,lam
+
+def benchmark(datasets=None,max_samples=2000,nsigma=7,nlambda=8,refine=6):
+    """Print time, accuracy and parameters of each configuration."""
+    mat_files,_ = generate_datasets()
+    names = sorted(mat_files) if not datasets else datasets
+    
+    print('%-20s%-20s%-10s%-10s%-12s%-12s'%('dataset','method','elap(s)',
+                                           'acc(%)','sigma','lambda'))
+    results = []
+    for ds in names:
+        Xtr,ytr,Xte,yte = load_dataset(mat_files[ds],ds,max_samples)
+        for name,args,options in configurations(nsigma,nlambda,refine):
+            clf = pygurls.RLSClassifier(options=options,**args)
+            start = time.time()
+            clf.fit(Xtr,ytr)
+            elap = time.time()-start
+            acc = clf.score(Xte,yte)
+            sigma,lam = selected(clf)
+            results.append((ds,name,elap,acc,sigma,lam))
+            print('%-20s%-20s%-10.3f%-10.2f%-12s%-12.4g'%(ds,name,elap,acc*100.0,
+                        '-' if sigma is None else '%.4g'%(sigma),lam))
+    return results
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[1])
+    parser.add_argument('datasets',nargs='*',help='.mat files (default: all)')
+    parser.add_argument('-n',type=int,default=2000,help='maximum number of training samples')
+    parser.add_argument('--nsigma',type=int,default=7,help='coarse sigma grid')
+    parser.add_argument('--nlambda',type=int,default=8,help='coarse lambda grid (linear)')
+    parser.add_argument('--refine',type=int,default=6,help='refinement evaluations')
+    args = parser.parse_args()
+    benchmark(args.datasets,args.n,args.nsigma,args.nlambda,args.refine)
@@ -0,0 +1,320 @@
+#!/usr/bin/env python
+#
+#  A Python wrapper for GURLS++.
+#
+#  Copyright (c) 2014 MIT. All rights reserved.
+#
+#   author: Pedro Santana
+#   e-mail: psantana@mit.edu
+#   website: people.csail.mit.edu/psantana
+#
+#  Redistribution and use in source and binary forms, with or without
+#  modification, are permitted provided that the following conditions
+#  are met:
+#
+#  1. Redistributions of source code must retain the above copyright
+#     notice, this list of conditions and the following disclaimer.
+#  2. Redistributions in binary form must reproduce the above copyright
+#     notice, this list of conditions and the following disclaimer in
+#     the documentation and/or other materials provided with the
+#     distribution.
+#  3. Neither the name(s) of the copyright holders nor the names of its 
+#     contributors or of the Massachusetts Institute of Technology may be 
+#     used to endorse or promote products derived from this software
+#     without specific prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+#  "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+#  LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+#  FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+#  COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+#  INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+#  BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS
+#  OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED
+#  AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+#  LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+#  ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+#  POSSIBILITY OF SUCH DAMAGE.
+"""
+A Python wrapper for GURLS++.
+
+Scaling suite for the pipelines of bench_tests.py on synthetic data (see 
+misc.synthetic_dataset). Each pipeline is trained and tested on a log grid 
+of sample counts n (with d fixed) and then of feature counts d (with n 
+fixed), every point in a new interpreter, and the training and prediction 
+times, the peak resident memory (RSS) and the test accuracy (R^2 for 
+regression) are recorded. A point that exceeds --max-time seconds or 
+--max-memory MB is stopped, and the larger points of that pipeline and 
+sweep are skipped. The empirical complexity exponents, the slopes of 
+log(time) and log(memory) against log(n) or log(d), are fitted by least 
+squares, tabulated and, if matplotlib is available, plotted to --plot. The 
+results are written to results/ as JSON and CSV.
+
+Usage: python bench_scaling.py [--task classification|regression] 
+                               [--methods NAME ...] [-n MIN MAX] [-d MIN MAX]
+                               [--points N] [--fixed-n N] [--fixed-d D] 
+                               [--classes K] [--noise F] [--max-time S] 
+                               [--max-memory MB] [-o PREFIX] [--plot FILE]
+
+@author: Pedro Santana (psantana@mit.edu).
+""" 
+import argparse
+import csv
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+import misc
+
+#Pipelines of bench_tests.py swept by default for each task
+_METHODS = {'classification':['pygurls_linear_primal','pygurls_linear_dual',
+                              'pygurls_gaussian_kernel','pygurls_nystrom',
+                              'pygurls_random_features'],
+            'regression':['pygurls_regression_primal','pygurls_regression_dual',
+                          'pygurls_regression_rbf']}
+
+_CSV_FIELDS = ['method','sweep','n','d','status','time','train_time',
+               'predict_time','rss_mb','rss_delta_mb','accuracy']
+
+def log_grid(low,high,points):
+    """Integers spaced evenly on a log scale from low to high."""
+    grid = np.exp(np.linspace(np.log(low),np.log(high),points))
+    return sorted(set(int(round(v)) for v in grid))
+
+def _max_rss_mb():
+    """Peak resident memory of this process in MB."""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss/2.0**20 if sys.platform == 'darwin' else rss/1024.0
+
+def _rss_mb(pid):
+    """Current resident memory of process pid in MB, None if unknown (only 
+    Linux exposes it in /proc)."""
+    try:
+        with open('/proc/%d/status'%pid) as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return float(line.split()[1])/1024.0
+    except (IOError,OSError):
+        pass
+    return None
+
+def run_point(method,task,n,d,n_classes,noise,seed,scratch):
+    """Train and test one pipeline on one synthetic data set, in this 
+    process and in the folder scratch (GURLS++ savefiles); return a 
+    dictionary of measurements."""
+    import bench_tests
+    os.chdir(scratch)
+    ws = misc.synthetic_dataset(n,d,n_classes,noise,task,seed=seed)
+    base = _max_rss_mb()
+    timings = {}
+    start = misc.clock()
+    acc = getattr(bench_tests,method)(Xtrain=ws['Xtrain'],Ytrain=ws['Ytrain'],
+                                      Xtest=ws['Xtest'],Ytest=ws['Ytest'],
+                                      timings=timings)
+    elap = misc.clock()-start
+    peak = _max_rss_mb()
+    return {'time':elap,'train_time':timings.get('train'),
+            'predict_time':timings.get('predict'),'rss_mb':peak,
+            'rss_delta_mb':peak-base,'accuracy':float(acc)}
+
+def run_isolated(method,task,n,d,n_classes,noise,seed,max_time,max_memory):
+    """Run a point in a new interpreter, killed if it runs longer than 
+    max_time seconds or its RSS grows beyond max_memory MB (None for no 
+    cap). Return the measurements with a status: 'ok', 'timeout', 'memory' 
+    or 'error'. The scratch folder of the point is removed however it ends."""
+    scratch = tempfile.mkdtemp(prefix='bench_scaling')
+    cmd = [sys.executable,os.path.abspath(__file__),'--child',method,task,
+           str(n),str(d),str(n_classes),str(noise),str(seed),scratch]
+    out_file = tempfile.TemporaryFile()
+    proc = subprocess.Popen(cmd,stdout=out_file)
+    start = misc.clock()
+    status = None
+    try:
+        while proc.poll() is None:
+            time.sleep(0.05)
+            if max_time is not None and misc.clock()-start > max_time:
+                status = 'timeout'
+            else:
+                rss = _rss_mb(proc.pid)
+                if max_memory is not None and rss is not None and rss > max_memory:
+                    status = 'memory'
+            if status is not None:
+                break
+    finally:
+        if proc.poll() is None: #over a cap, or interrupted
+            proc.kill()
+        proc.wait()
+        shutil.rmtree(scratch,ignore_errors=True)
+    point = {'method':method,'n':n,'d':d}
+    if status is None and proc.returncode != 0:
+        status = 'error'
+    if status is not None:
+        point.update({'status':status,'time':misc.clock()-start})
+        return point
+    out_file.seek(0)
+    point.update(json.loads(out_file.read().decode().strip().split('\n')[-1]))
+    if max_memory is not None and point['rss_mb'] > max_memory:
+        point['status'] = 'memory' #exceeded between two polls
+    else:
+        point['status'] = 'ok'
+    return point
+
+def sweep(methods,task,sweep_name,grid,fixed,n_classes,noise,seed,max_time,
+          max_memory):
+    """Run every method on the grid of n (sweep_name 'n', d fixed) or of d 
+    (sweep_name 'd', n fixed), stopping a method at its first infeasible 
+    point."""
+    points = []
+    for method in methods:
+        for value in grid:
+            n,d = (value,fixed) if sweep_name == 'n' else (fixed,value)
+            p = run_isolated(method,task,n,d,n_classes,noise,seed,max_time,
+                             max_memory)
+            p['sweep'] = sweep_name
+            points.append(p)
+            if p['status'] == 'ok':
+                print('%-28s%-6s%-8d%-8d%-12.3f%-12.3f%-12.1f%-10.4f'%(method,
+                      sweep_name,n,d,p['time'],p['train_time'] or 0.0,
+                      p['rss_delta_mb'],p['accuracy']))
+            else:
+                print('%-28s%-6s%-8d%-8d%s, larger sizes skipped'%(method,
+                      sweep_name,n,d,p['status']))
+                break
+    return points
+
+def fit_exponents(points,min_time=0.01):
+    """Least squares slopes of log(time), log(train time) and log(memory 
+    delta) against log(n) or log(d), per (method, sweep), on the completed 
+    points (those faster than min_time are dominated by overheads and left 
+    out of the time fits)."""
+    exponents = []
+    keys = []
+    for p in points:
+        if (p['method'],p['sweep']) not in keys:
+            keys.append((p['method'],p['sweep']))
+    for method,sweep_name in keys:
+        ok = [p for p in points if p['method'] == method and 
+              p['sweep'] == sweep_name and p['status'] == 'ok']
+        row = {'method':method,'sweep':sweep_name,'points':len(ok)}
+        for field in ('time','train_time','rss_delta_mb'):
+            floor = min_time if field != 'rss_delta_mb' else 1.0
+            xy = [(p[sweep_name],p[field]) for p in ok 
+                  if p.get(field) is not None and p[field] > floor]
+            if len(xy) >= 2 and len(set(x for x,_ in xy)) >= 2:
+                x,y = np.log(np.array(xy,dtype=float)).T
+                row[field] = float(np.polyfit(x,y,1)[0])
+            else:
+                row[field] = None
+        exponents.append(row)
+    return exponents
+
+def print_exponents(exponents):
+    fmt = lambda v: '-' if v is None else '%.2f'%v
+    print('\n%-28s%-7s%-8s%-10s%-12s%-10s'%('method','sweep','points','time',
+                                           'train','memory'))
+    for e in exponents:
+        print('%-28s%-7s%-8d%-10s%-12s%-10s'%(e['method'],e['sweep'],e['points'],
+              fmt(e['time']),fmt(e['train_time']),fmt(e['rss_delta_mb'])))
+
+def save(results,prefix):
+    """Write the results to prefix.json and the points to prefix.csv."""
+    folder = os.path.dirname(prefix)
+    if folder and not os.path.exists(folder):
+        os.makedirs(folder)
+    with open(prefix+'.json','w') as f:
+        json.dump(results,f,indent=1,sort_keys=True)
+    with open(prefix+'.csv','w') as f:
+        writer = csv.DictWriter(f,fieldnames=_CSV_FIELDS,extrasaction='ignore')
+        writer.writeheader()
+        for p in results['points']:
+            writer.writerow(p)
+
+def plot(results,filename):
+    """Time and memory against n and d on log-log axes, one line per method,
+    with the fitted exponents in the legends."""
+    try:
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+    except ImportError:
+        print('matplotlib is not available, no chart saved.')
+        return
+    slopes = dict(((e['method'],e['sweep']),e) for e in results['exponents'])
+    fig,axes = plt.subplots(2,2,figsize=(12,10))
+    for col,sweep_name in enumerate(('n','d')):
+        for row,field in enumerate(('time','rss_delta_mb')):
+            ax = axes[row][col]
+            for method in results['methods']:
+                ok = [p for p in results['points'] if p['method'] == method and
+                      p['sweep'] == sweep_name and p['status'] == 'ok']
+                if not ok:
+                    continue
+                e = slopes[(method,sweep_name)][field]
+                label = method if e is None else '%s (%.2f)'%(method,e)
+                ax.plot([p[sweep_name] for p in ok],[p[field] for p in ok],
+                        'o-',label=label)
+            ax.set_xscale('log'); ax.set_yscale('log')
+            ax.set_xlabel(sweep_name)
+            ax.set_ylabel('time (s)' if field == 'time' else 'peak RSS growth (MB)')
+            ax.legend(loc='upper left',fontsize='small')
+    fig.savefig(filename)
+    print('Chart saved to %s'%filename)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[1])
+    parser.add_argument('--task',default='classification',
+                        choices=['classification','regression'])
+    parser.add_argument('--methods',nargs='*',help='pipelines of bench_tests.py '
+                        '(default: the pygurls ones for the task)')
+    parser.add_argument('-n',type=int,nargs=2,default=[500,8000],metavar=('MIN','MAX'),
+                        help='range of the sample sweep')
+    parser.add_argument('-d',type=int,nargs=2,default=[10,1000],metavar=('MIN','MAX'),
+                        help='range of the feature sweep')
+    parser.add_argument('--points',type=int,default=5,help='points per sweep')
+    parser.add_argument('--fixed-n',type=int,default=2000,help='samples in the feature sweep')
+    parser.add_argument('--fixed-d',type=int,default=20,help='features in the sample sweep')
+    parser.add_argument('--classes',type=int,default=2)
+    parser.add_argument('--noise',type=float,default=0.1)
+    parser.add_argument('--seed',type=int,default=0)
+    parser.add_argument('--max-time',type=float,default=300.0,help='seconds per point')
+    parser.add_argument('--max-memory',type=float,default=None,help='MB of RSS per point')
+    parser.add_argument('-o','--output',help='prefix of the JSON and CSV files '
+                        '(default: results/scaling_<date>)')
+    parser.add_argument('--plot',default=None,help='chart file (e.g., scaling.png)')
+    parser.add_argument('--child',nargs=8,help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.child:
+        method,task,n,d,k,noise,seed,scratch = args.child
+        point = run_point(method,task,int(n),int(d),int(k),float(noise),
+                          int(seed),scratch)
+        sys.stdout.write('\n'+json.dumps(point)+'\n')
+        return 0
+    
+    methods = args.methods or _METHODS[args.task]
+    print('%-28s%-6s%-8s%-8s%-12s%-12s%-12s%-10s'%('method','sweep','n','d',
+          'elap(s)','train(s)','mem(MB)','acc'))
+    points = []
+    for sweep_name,grid,fixed in (('n',log_grid(args.n[0],args.n[1],args.points),args.fixed_d),
+                                  ('d',log_grid(args.d[0],args.d[1],args.points),args.fixed_n)):
+        points += sweep(methods,args.task,sweep_name,grid,fixed,args.classes,
+                        args.noise,args.seed,args.max_time,args.max_memory)
+    results = {'task':args.task,'methods':methods,'classes':args.classes,
+               'noise':args.noise,'seed':args.seed,'max_time':args.max_time,
+               'max_memory':args.max_memory,'points':points,
+               'exponents':fit_exponents(points)}
+    print_exponents(results['exponents'])
+    prefix = args.output or os.path.join('results','scaling_'+
+                                         time.strftime('%m_%d_%y-%H_%M_%S'))
+    save(results,prefix)
+    print('\nResults recorded in %s.json and %s.csv'%(prefix,prefix))
+    if args.plot:
+        plot(results,args.plot)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,167 @@
+#!/usr/bin/env python
+#
+#  A Python wrapper for GURLS++.
+#
+#  Copyright (c) 2014 MIT. All rights reserved.
+#
+#   author: Pedro Santana
+#   e-mail: psantana@mit.edu
+#   website: people.csail.mit.edu/psantana
+#
+#  Redistribution and use in source and binary forms, with or without
+#  modification, are permitted provided that the following conditions
+#  are met:
+#
+#  1. Redistributions of source code must retain the above copyright
+#     notice, this list of conditions and the following disclaimer.
+#  2. Redistributions in binary form must reproduce the above copyright
+#     notice, this list of conditions and the following disclaimer in
+#     the documentation and/or other materials provided with the
+#     distribution.
+#  3. Neither the name(s) of the copyright holders nor the names of its 
+#     contributors or of the Massachusetts Institute of Technology may be 
+#     used to endorse or promote products derived from this software
+#     without specific prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+#  "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+#  LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+#  FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+#  COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+#  INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+#  BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS
+#  OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED
+#  AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+#  LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+#  ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+#  POSSIBILITY OF SUCH DAMAGE.
+#
+"""
+A Python wrapper for GURLS++.
+
+Load generator for the micro-batching inference server (pygurls_server.py,
+requires Python 3.7). A classifier is trained on synthetic data and served 
+from a Unix socket by a server subprocess; `clients` concurrent connections
+then send one-row requests in a closed loop. The client-side throughput and
+p50/p99 latency are reported without batching (max batch 1) and with 
+micro-batching, along with the server's mean batch size, and compared to 
+calling predict() on one row at a time in-process.
+
+Usage: python bench_server.py [-n SAMPLES] [-d FEATURES] [-c CLIENTS] 
+                              [-r REQUESTS] [--max-batch N] [--max-wait-ms T]
+
+@author: Pedro Santana (psantana@mit.edu).
+""" 
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+import pygurls
+
+SERVER = os.path.join(os.path.dirname(os.path.abspath(__file__)),'..',
+                      'pygurls_server.py')
+
+def train_model(path,n,d,kernel='rbf',seed=0):
+    """Train a classifier on Gaussian clusters, save it to path, and return
+    it with test rows."""
+    rng = np.random.RandomState(seed)
+    centers = rng.randn(4,d)*2.0
+    y = rng.randint(4,size=n)
+    X = centers[y] + rng.randn(n,d)
+    clf = pygurls.RLSClassifier(kernel=kernel,options={'nsigma':10})
+    clf.fit(X,y)
+    clf.save(path)
+    return clf,centers[rng.randint(4,size=1000)] + rng.randn(1000,d)
+
+async def client(path,rows,n_requests,latencies):
+    """Send n_requests one-row requests, each after the previous answer."""
+    reader,writer = await asyncio.open_unix_connection(path)
+    for i in range(n_requests):
+        msg = {'id':i,'model':'bench','x':rows[i%len(rows)].tolist()}
+        start = time.perf_counter()
+        writer.write((json.dumps(msg)+'\n').encode('utf-8'))
+        resp = json.loads((await reader.readline()).decode('utf-8'))
+        latencies.append(time.perf_counter()-start)
+        if 'error' in resp:
+            raise RuntimeError(resp['error'])
+    writer.close()
+
+async def server_stats(path):
+    reader,writer = await asyncio.open_unix_connection(path)
+    writer.write(b'{"id": 0, "stats": true}\n')
+    resp = json.loads((await reader.readline()).decode('utf-8'))
+    writer.close()
+    return resp['stats']['bench']
+
+async def load(path,rows,clients,n_requests):
+    """Run the clients concurrently, return the elapsed time, the latencies
+    and the server counters."""
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*[client(path,rows[i::clients],n_requests,latencies)
+                           for i in range(clients)])
+    elap = time.perf_counter()-start
+    return elap,np.asarray(latencies),await server_stats(path)
+
+def run_server(model_path,sock,max_batch,max_wait_ms):
+    """Start a server subprocess and wait until it is listening."""
+    proc = subprocess.Popen([sys.executable,SERVER,'-m','bench='+model_path,
+                             '-u',sock,'--max-batch',str(max_batch),
+                             '--max-wait-ms',str(max_wait_ms)],
+                            stdout=subprocess.PIPE)
+    if not proc.stdout.readline().startswith(b'Serving'): #printed when ready
+        proc.kill()
+        raise RuntimeError('The server failed to start.')
+    return proc
+
+def benchmark(n=2000,d=50,clients=32,n_requests=100,max_batch=64,max_wait_ms=2.0):
+    """Print throughput and latency with and without micro-batching."""
+    folder = tempfile.mkdtemp()
+    model_path = os.path.join(folder,'bench.pgm')
+    clf,Xtest = train_model(model_path,n,d)
+    
+    results = []
+    start = time.perf_counter()
+    lat = []
+    for i in range(n_requests):
+        t = time.perf_counter()
+        clf.predict(Xtest[i:i+1])
+        lat.append(time.perf_counter()-t)
+    lat = np.asarray(lat)
+    results.append(('in-process, 1 row',1,n_requests/(time.perf_counter()-start),
+                    lat,1.0))
+    
+    for label,batch,wait in [('server, no batching',1,0.0),
+                             ('server, micro-batching',max_batch,max_wait_ms)]:
+        sock = os.path.join(folder,'bench.sock')
+        proc = run_server(model_path,sock,batch,wait)
+        try:
+            elap,lat,stats = asyncio.run(load(sock,Xtest,clients,n_requests))
+        finally:
+            proc.terminate()
+            proc.wait()
+        results.append((label,clients,len(lat)/elap,lat,stats['mean_batch']))
+    
+    print('%-26s%-10s%-12s%-12s%-12s%-12s'%('mode','clients','req/s','p50(ms)',
+                                           'p99(ms)','batch'))
+    for label,c,thr,lat,batch in results:
+        print('%-26s%-10d%-12.0f%-12.2f%-12.2f%-12.1f'%(label,c,thr,
+                np.percentile(lat,50)*1e3,np.percentile(lat,99)*1e3,batch))
+    return results
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[1])
+    parser.add_argument('-n',type=int,default=2000,help='training samples')
+    parser.add_argument('-d',type=int,default=50,help='features')
+    parser.add_argument('-c',type=int,default=32,help='concurrent clients')
+    parser.add_argument('-r',type=int,default=100,help='requests per client')
+    parser.add_argument('--max-batch',type=int,default=64)
+    parser.add_argument('--max-wait-ms',type=float,default=2.0)
+    args = parser.parse_args()
+    benchmark(n=args.n,d=args.d,clients=args.c,n_requests=args.r,
+              max_batch=args.max_batch,max_wait_ms=args.max_wait_ms)
@@ -45,14 +45,35 @@ Module defining the different types of tests that can be executed.
 """ 
 import numpy as np
 import pygurls
-from misc import multiclass_to_one_vs_all
-from sklearn.svm import SVC, LinearSVC
-from sklearn.linear_model import  RidgeClassifierCV
-from sklearn.grid_search import GridSearchCV
+from misc import multiclass_to_one_vs_all, clock
+try:
+    from sklearn.svm import SVC, LinearSVC
+    from sklearn.linear_model import  RidgeClassifierCV
+    try:
+        from sklearn.model_selection import GridSearchCV
+    except ImportError: #scikit-learn < 0.18
+        from sklearn.grid_search import GridSearchCV
+    HAVE_SKLEARN = True
+except ImportError: #only the sklearn_* tests need scikit-learn
+    HAVE_SKLEARN = False
+
+def _require_sklearn():
+    if not HAVE_SKLEARN:
+        raise ImportError('scikit-learn is required by the sklearn_* tests.')
+
+def _timed(kwargs,phase,func,*args):
+    """Call func(*args) and, if the test was given a timings dictionary, 
+    add the elapsed time to its entry phase ('train' or 'predict')."""
+    start = clock()
+    out = func(*args)
+    timings = kwargs.get('timings')
+    if timings is not None:
+        timings[phase] = timings.get(phase,0.0)+clock()-start
+    return out
 
 def pygurls_linear_primal(Xtrain,Ytrain,Xtest,Ytest,*args,**kwargs):
     """Linear kernel (primal)."""
-    pg = pygurls.PyGURLS(data_type='double')    
+    pg = pygurls.PyGURLS(data_type='double',cache_dir=kwargs.get('cache_dir'))
     
     Ytrain = multiclass_to_one_vs_all(Ytrain)
     Ytest = multiclass_to_one_vs_all(Ytest)
@@ -83,14 +104,14 @@ def pygurls_linear_primal(Xtrain,Ytrain,Xtest,Ytest,*args,**kwargs):
     
     pg.build_pipeline('pygurls_lin_bench', True)
     
-    pg.run('Xtrain','Ytrain','train_process')
-    pg.run('Xtest','Ytest','eval_perf')
+    _timed(kwargs,'train',pg.run,'Xtrain','Ytrain','train_process')
+    _timed(kwargs,'predict',pg.run,'Xtest','Ytest','eval_perf')
     
     return pg.get_option_field('perf','acc')[0]
 
 def pygurls_linear_dual(Xtrain,Ytrain,Xtest,Ytest,*args,**kwargs):
     """Linear kernel (dual)."""
-    pg = pygurls.PyGURLS(data_type='double')    
+    pg = pygurls.PyGURLS(data_type='double',cache_dir=kwargs.get('cache_dir'))
     
     Ytrain = multiclass_to_one_vs_all(Ytrain)
     Ytest = multiclass_to_one_vs_all(Ytest)
@@ -119,14 +140,14 @@ def pygurls_linear_dual(Xtrain,Ytrain,Xtest,Ytest,*args,**kwargs):
     
     pg.build_pipeline('pygurls_lin_bench', True)
     
-    pg.run('Xtrain','Ytrain','train_process')
-    pg.run('Xtest','Ytest','eval_perf')
+    _timed(kwargs,'train',pg.run,'Xtrain','Ytrain','train_process')
+    _timed(kwargs,'predict',pg.run,'Xtest','Ytest','eval_perf')
     
     return pg.get_option_field('perf','acc')[0]    
 
 def pygurls_gaussian_kernel(Xtrain,Ytrain,Xtest,Ytest,*args,**kwargs):
     """RBF kernel."""
-    pg = pygurls.PyGURLS(data_type='double')
+    pg = pygurls.PyGURLS(data_type='double',cache_dir=kwargs.get('cache_dir'))
     
     Ytrain = multiclass_to_one_vs_all(Ytrain)
     Ytest = multiclass_to_one_vs_all(Ytest)
@@ -150,30 +171,71 @@ def pygurls_gaussian_kernel(Xtrain,Ytrain,Xtest,Ytest,*args,**kwargs):
     
     pg.build_pipeline('pygurls_rbf_bench', True)
     
-    pg.run('Xtrain','Ytrain','train_process')
-    pg.run('Xtest','Ytest','eval_perf')
+    _timed(kwargs,'train',pg.run,'Xtrain','Ytrain','train_process')
+    _timed(kwargs,'predict',pg.run,'Xtest','Ytest','eval_perf')
     
     return pg.get_option_field('perf','acc')[0]
 
+def pygurls_nystrom(Xtrain,Ytrain,Xtest,Ytest,n_landmarks=1000,*args,**kwargs):
+    """RBF kernel, Nystrom approximation (no n x n kernel)."""
+    clf = pygurls.NystromRLSClassifier(n_landmarks=n_landmarks)
+    _timed(kwargs,'train',clf.fit,Xtrain,Ytrain)
+    return _timed(kwargs,'predict',clf.score,Xtest,Ytest)
+
+def pygurls_random_features(Xtrain,Ytrain,Xtest,Ytest,n_features=1000,*args,**kwargs):
+    """RBF kernel, random features approximation (no n x n kernel)."""
+    clf = pygurls.RandomFeaturesRLSClassifier(n_features=n_features)
+    _timed(kwargs,'train',clf.fit,Xtrain,Ytrain)
+    return _timed(kwargs,'predict',clf.score,Xtest,Ytest)
+
+def _r2_score(reg,Xtest,Ytest):
+    """Coefficient of determination of a regressor on the test set."""
+    Ytest = np.asarray(Ytest,dtype=float)
+    res = Ytest-reg.predict(Xtest)
+    return 1.0-np.sum(res**2)/np.sum((Ytest-np.mean(Ytest,axis=0))**2)
+
+def _pygurls_regression(Xtrain,Ytrain,Xtest,Ytest,kwargs,**params):
+    reg = pygurls.RLSRegressor(options={'verbose':0},**params)
+    _timed(kwargs,'train',reg.fit,Xtrain,Ytrain)
+    return _timed(kwargs,'predict',_r2_score,reg,Xtest,Ytest)
+
+def pygurls_regression_primal(Xtrain,Ytrain,Xtest,Ytest,*args,**kwargs):
+    """Linear kernel regression (primal), returns R^2 instead of accuracy."""
+    return _pygurls_regression(Xtrain,Ytrain,Xtest,Ytest,kwargs,
+                               kernel='linear',solver='primal')
+
+def pygurls_regression_dual(Xtrain,Ytrain,Xtest,Ytest,*args,**kwargs):
+    """Linear kernel regression (dual), returns R^2 instead of accuracy."""
+    return _pygurls_regression(Xtrain,Ytrain,Xtest,Ytest,kwargs,
+                               kernel='linear',solver='dual')
+
+def pygurls_regression_rbf(Xtrain,Ytrain,Xtest,Ytest,*args,**kwargs):
+    """RBF kernel regression, returns R^2 instead of accuracy."""
+    return _pygurls_regression(Xtrain,Ytrain,Xtest,Ytest,kwargs,kernel='rbf')
+
 def sklearn_linear_SVC_primal(Xtrain,Ytrain,Xtest,Ytest,*args,**kwargs):
+    _require_sklearn()
     parameters={'C': [1e-2,1e-1,1e0, 1e1, 1e2, 1e3]}
     clf = GridSearchCV(LinearSVC(dual=False,fit_intercept=True), parameters)    
     clf.fit(Xtrain,Ytrain)
     return clf.score(Xtest,Ytest)
 
 def sklearn_linear_SVC_dual(Xtrain,Ytrain,Xtest,Ytest,*args,**kwargs):
+    _require_sklearn()
     parameters={'C': [1e-2,1e-1,1e0, 1e1, 1e2, 1e3]}
     clf = GridSearchCV(LinearSVC(dual=True,fit_intercept=True), parameters)    
     clf.fit(Xtrain,Ytrain)
     return clf.score(Xtest,Ytest)
 
 def sklearn_SVC_linear(Xtrain,Ytrain,Xtest,Ytest,*args,**kwargs):
+    _require_sklearn()
     parameters={'C': [1e-2,1e-1,1e0, 1e1, 1e2, 1e3]}    
     clf = GridSearchCV(SVC(kernel='linear'), parameters)     
     clf.fit(Xtrain,Ytrain)
     return clf.score(Xtest,Ytest)
 
 def sklearn_SVC_rbf(Xtrain,Ytrain,Xtest,Ytest,*args,**kwargs):
+    _require_sklearn()
     parameters={'C': [1e-3,1e-2,1e-1,1e0, 1e1, 1e2, 1e3],
                 'gamma':[1e-3,1e-2,1e-1,1e0, 1e1, 1e2, 1e3]}
     clf = GridSearchCV(SVC(kernel='rbf'), parameters)     
@@ -181,6 +243,7 @@ def sklearn_SVC_rbf(Xtrain,Ytrain,Xtest,Ytest,*args,**kwargs):
     return clf.score(Xtest,Ytest)
     
 def sklearn_ridge_cv(Xtrain,Ytrain,Xtest,Ytest,*args,**kwargs):
+    _require_sklearn()
     clf = RidgeClassifierCV(fit_intercept=True)
     clf.fit(Xtrain,Ytrain)
     return clf.score(Xtest,Ytest)
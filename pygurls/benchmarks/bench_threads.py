@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+#
+#  A Python wrapper for GURLS++.
+#
+#  Copyright (c) 2014 MIT. All rights reserved.
+#
+#   author: Pedro Santana
+#   e-mail: psantana@mit.edu
+#   website: people.csail.mit.edu/psantana
+#
+#  Redistribution and use in source and binary forms, with or without
+#  modification, are permitted provided that the following conditions
+#  are met:
+#
+#  1. Redistributions of source code must retain the above copyright
+#     notice, this list of conditions and the following disclaimer.
+#  2. Redistributions in binary form must reproduce the above copyright
+#     notice, this list of conditions and the following disclaimer in
+#     the documentation and/or other materials provided with the
+#     distribution.
+#  3. Neither the name(s) of the copyright holders nor the names of its 
+#     contributors or of the Massachusetts Institute of Technology may be 
+#     used to endorse or promote products derived from this software
+#     without specific prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+#  "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+#  LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+#  FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+#  COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+#  INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+#  BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS
+#  OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED
+#  AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+#  LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+#  ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+#  POSSIBILITY OF SUCH DAMAGE.
+#
+"""
+A Python wrapper for GURLS++.
+
+Measures how training scales when independent PyGURLS instances run in 
+parallel threads. PyGURLS.run releases the GIL, so with single-threaded BLAS
+the throughput should grow almost linearly with the number of threads, up to
+the number of physical cores.
+
+Usage: python bench_threads.py [-n SAMPLES] [-d FEATURES] [-t MAX_THREADS]
+
+@author: Pedro Santana (psantana@mit.edu).
+""" 
+import os
+#One BLAS thread per instance, so that the scaling measured is due to PyGURLS
+for var in ['OPENBLAS_NUM_THREADS','MKL_NUM_THREADS','OMP_NUM_THREADS']:
+    os.environ.setdefault(var,'1')
+
+import argparse
+import tempfile
+import threading
+import time
+import numpy as np
+import pygurls
+
+def synthetic_data(n,d,n_classes=4,seed=0):
+    """Random Gaussian clusters in one-vs-all format."""
+    rng = np.random.RandomState(seed)
+    centers = rng.randn(n_classes,d)*2.0
+    y = rng.randint(n_classes,size=n)
+    X = centers[y] + rng.randn(n,d)
+    Y = -np.ones((n,n_classes))
+    Y[np.arange(n),y] = 1.0
+    return np.asfortranarray(X),np.asfortranarray(Y)
+
+def train(X,Y,name):
+    """Train a linear dual RLS model on (X,Y) in its own PyGURLS instance."""
+    pg = pygurls.PyGURLS(data_type='double')
+    pg.add_data(X,'X'); pg.add_data(Y,'Y')
+    pg.set_task_sequence([['kernel','linear'],['paramsel','loocvdual'],
+                          ['optimizer','rlsdual']])
+    pg.init_processes('processes',True)
+    pg.add_process('train_process',['computeNsave','computeNsave','computeNsave'])
+    pg.build_pipeline(name,True) #one savefile per instance
+    pg.run('X','Y','train_process')
+
+def run_threads(X,Y,n_threads):
+    """Train n_threads instances concurrently and return the elapsed time."""
+    threads = [threading.Thread(target=train,args=(X,Y,'bench_threads_%d'%(i)))
+                    for i in range(n_threads)]
+    start = time.time()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return time.time()-start
+
+def benchmark(n=2000,d=100,max_threads=4):
+    """Print throughput and speedup for 1,2,4,... concurrent instances."""
+    X,Y = synthetic_data(n,d)
+    os.chdir(tempfile.mkdtemp()) #GURLS++ savefiles go to a scratch folder
+    train(X,Y,'bench_threads_warmup') #warm-up run
+    
+    counts = [1]
+    while counts[-1]*2 <= max_threads:
+        counts.append(counts[-1]*2)
+    if counts[-1] != max_threads:
+        counts.append(max_threads)
+    
+    results = []
+    for n_threads in counts:
+        elap = run_threads(X,Y,n_threads)
+        results.append((n_threads,elap,n_threads/elap))
+    
+    base = results[0][2]
+    print('%-10s%-12s%-16s%-10s'%('threads','elap(s)','models/s','speedup'))
+    for n_threads,elap,thr in results:
+        print('%-10d%-12.3f%-16.3f%-10.2f'%(n_threads,elap,thr,thr/base))
+    return results
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[1])
+    parser.add_argument('-n',type=int,default=2000,help='training samples')
+    parser.add_argument('-d',type=int,default=100,help='features')
+    parser.add_argument('-t',type=int,default=4,help='maximum number of threads')
+    args = parser.parse_args()
+    benchmark(n=args.n,d=args.d,max_threads=args.t)
@@ -0,0 +1,137 @@
+#!/usr/bin/env python
+#
+#  A Python wrapper for GURLS++.
+#
+#  Copyright (c) 2014 MIT. All rights reserved.
+#
+#   author: Pedro Santana
+#   e-mail: psantana@mit.edu
+#   website: people.csail.mit.edu/psantana
+#
+#  Redistribution and use in source and binary forms, with or without
+#  modification, are permitted provided that the following conditions
+#  are met:
+#
+#  1. Redistributions of source code must retain the above copyright
+#     notice, this list of conditions and the following disclaimer.
+#  2. Redistributions in binary form must reproduce the above copyright
+#     notice, this list of conditions and the following disclaimer in
+#     the documentation and/or other materials provided with the
+#     distribution.
+#  3. Neither the name(s) of the copyright holders nor the names of its 
+#     contributors or of the Massachusetts Institute of Technology may be 
+#     used to endorse or promote products derived from this software
+#     without specific prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+#  "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+#  LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+#  FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+#  COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+#  INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+#  BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS
+#  OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED
+#  AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+#  LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+#  ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+#  POSSIBILITY OF SUCH DAMAGE.
+"""
+A Python wrapper for GURLS++.
+
+Compares tracking drifting data with a sliding window (WindowedRLSRegressor, 
+Cholesky updates and downdates at O(d^2) per sample) or exponential 
+forgetting with retraining a batch model (RLSRegressor, linear primal, same 
+regularization) on the same window every time a block arrives. Reports the 
+rows/s, the prequential RMSE (each block is predicted before the model sees 
+it) and the largest difference between the final window model and a full 
+retrain on the final window.
+
+Usage: python bench_window.py [-n SAMPLES] [-d FEATURES] [-w WINDOW]
+
+@author: Pedro Santana (psantana@mit.edu).
+""" 
+import argparse
+import os
+import tempfile
+import time
+import numpy as np
+import pygurls
+
+def drifting_data(n,d,seed=0):
+    """Noisy linear regression data whose weights rotate slowly."""
+    rng = np.random.RandomState(seed)
+    X = rng.randn(n,d)
+    w0,w1 = rng.randn(d),rng.randn(d)
+    angle = np.linspace(0.0,np.pi,n)[:,np.newaxis]
+    W = np.cos(angle)*w0 + np.sin(angle)*w1
+    y = np.sum(X*W,axis=1) + 0.1*rng.randn(n)
+    return X,y
+
+def retrain_window(model):
+    """Batch model on the window of model, with the same regularization."""
+    X,Y = model.window_
+    n_init = min(model.n_init_,model.window)
+    batch = pygurls.RLSRegressor(kernel='linear',solver='primal',
+                                 fit_intercept=False,options={'verbose':0})
+    #the batch model is regularized with lambda*n, n the rows of the window
+    return batch.fit_stream([(X,Y[:,0])],
+                            fixed_lambda=model.lambdas_[0]*n_init/X.shape[0])
+
+def run_stream(model,X,y,n_init,block,retrain=False):
+    """Rows/s and prequential RMSE over the stream after fit on n_init rows.
+    
+    With retrain, a batch model is also retrained on the window after every
+    block, and it (not model) predicts the next block.
+    """
+    model.fit(X[:n_init],y[:n_init])
+    model.n_init_ = n_init
+    batch = None
+    sq_err,elap = 0.0,0.0
+    for i in range(n_init,X.shape[0],block):
+        Xb,yb = X[i:i+block],y[i:i+block]
+        if batch is None:
+            pred = model.predict(Xb)
+        else:
+            pred = batch.predict(model._inputs(Xb))
+        sq_err += np.sum((pred-yb)**2)
+        start = time.time()
+        model.partial_fit(Xb,yb)
+        if retrain:
+            batch = retrain_window(model)
+        elap += time.time()-start
+    return elap,(X.shape[0]-n_init)/elap,np.sqrt(sq_err/(X.shape[0]-n_init))
+
+def benchmark(n=20000,d=20,window=1000,n_init=1000,blocks=(1,10,100),
+              forgetting=0.999):
+    """Print rows/s and accuracy of windowed updates and window retraining."""
+    X,y = drifting_data(n,d)
+    os.chdir(tempfile.mkdtemp()) #GURLS++ savefiles go to a scratch folder
+    
+    print('%-34s%-12s%-14s%-10s'%('method','elap(s)','rows/s','rmse'))
+    results = []
+    for block in blocks:
+        runs = [('window %d'%window,pygurls.WindowedRLSRegressor(window=window),False),
+                ('forgetting %g'%forgetting,pygurls.WindowedRLSRegressor(forgetting=forgetting),False),
+                ('no forgetting',pygurls.RecursiveRLSRegressor(),False)]
+        if block >= 10:
+            #one full retraining per row is hopeless
+            runs.append(('retrain window %d'%window,pygurls.WindowedRLSRegressor(window=window),True))
+        for name,model,retrain in runs:
+            elap,rate,rmse = run_stream(model,X,y,n_init,block,retrain)
+            label = '%s (block %d)'%(name,block)
+            print('%-34s%-12.3f%-14.0f%-10.4f'%(label,elap,rate,rmse))
+            results.append((label,elap,rate,rmse))
+            if getattr(model,'window',None) is not None and not retrain:
+                Xw = model.window_[0]
+                diff = np.abs(retrain_window(model).predict(Xw)-
+                              model.decision_function(Xw[:,:-1])[:,0]).max()
+                print('  max |window - retrain| on the final window: %.2e'%diff)
+    return results
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[1])
+    parser.add_argument('-n',type=int,default=20000,help='total samples')
+    parser.add_argument('-d',type=int,default=20,help='features')
+    parser.add_argument('-w',type=int,default=1000,help='window size')
+    args = parser.parse_args()
+    benchmark(n=args.n,d=args.d,window=args.w,n_init=args.w)
@@ -0,0 +1,272 @@
+#!/usr/bin/env python
+#
+#  A Python wrapper for GURLS++.
+#
+#  Copyright (c) 2014 MIT. All rights reserved.
+#
+#   author: Pedro Santana
+#   e-mail: psantana@mit.edu
+#   website: people.csail.mit.edu/psantana
+#
+#  Redistribution and use in source and binary forms, with or without
+#  modification, are permitted provided that the following conditions
+#  are met:
+#
+#  1. Redistributions of source code must retain the above copyright
+#     notice, this list of conditions and the following disclaimer.
+#  2. Redistributions in binary form must reproduce the above copyright
+#     notice, this list of conditions and the following disclaimer in
+#     the documentation and/or other materials provided with the
+#     distribution.
+#  3. Neither the name(s) of the copyright holders nor the names of its 
+#     contributors or of the Massachusetts Institute of Technology may be 
+#     used to endorse or promote products derived from this software
+#     without specific prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+#  "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+#  LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+#  FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+#  COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+#  INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+#  BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS
+#  OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED
+#  AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+#  LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+#  ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+#  POSSIBILITY OF SUCH DAMAGE.
+"""
+A Python wrapper for GURLS++.
+
+Binary cache of the benchmark data sets. The data set folders of datasets/
+are preprocessed by their pre_process*.py scripts and the Xtrain, Ytrain, 
+Xtest and Ytest arrays are stored as .npy files in datasets/.cache, inputs 
+as Fortran-ordered float64 matrices and outputs as float64 vectors (or 
+Fortran-ordered matrices), so that they are memory-mapped on load and handed
+to PyGURLS.add_data without conversion. The .npy headers are padded to 64 
+bytes, so the mapped data is aligned.
+
+An entry is keyed by a hash of the contents of every file of its folder, the
+pre_process*.py script included, and rebuilt whenever the key changes. The 
+stale or missing entries are rebuilt in parallel, each script running in a
+scratch copy of its folder so that the data set folders are left untouched.
+
+Usage: python dataset_cache.py [--datasets FOLDER] [--cache FOLDER] 
+                               [--jobs N] [--force]
+
+@author: Pedro Santana (psantana@mit.edu).
+""" 
+import argparse
+import fnmatch as fn
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import multiprocessing
+from multiprocessing.pool import ThreadPool
+import numpy as np
+import scipy.io
+
+FIELDS = ('Xtrain','Ytrain','Xtest','Ytest')
+VERSION = 1 #bump when the layout of the entries changes
+
+def _ignored(name):
+    return name.startswith('.') or name == '__pycache__' or name.endswith('.pyc')
+
+def raw_files(folder):
+    """Sorted names of the files of a data set folder."""
+    return sorted(f for f in os.listdir(folder) 
+                  if not _ignored(f) and os.path.isfile(os.path.join(folder,f)))
+
+def find_datasets(dataset_folder='./datasets'):
+    """List of (folder, pre_process script) of the data set folders."""
+    found = []
+    for folder,subfolders,filenames in os.walk(dataset_folder):
+        subfolders[:] = sorted(s for s in subfolders if not _ignored(s))
+        scripts = fn.filter(sorted(filenames),'pre_process*.py')
+        if scripts:
+            found.append((folder,scripts[0]))
+    return found
+
+def dataset_key(folder):
+    """SHA-1 of the names and contents of the files of a data set folder."""
+    digest = hashlib.sha1(('v%d'%(VERSION)).encode())
+    for name in raw_files(folder):
+        digest.update(('\0%s\0%d\0'%(name,os.path.getsize(os.path.join(folder,name)))).encode())
+        with open(os.path.join(folder,name),'rb') as f:
+            for block in iter(lambda: f.read(1<<20),b''):
+                digest.update(block)
+    return digest.hexdigest()
+
+def _read_meta(slot):
+    try:
+        with open(os.path.join(slot,'meta.json')) as f:
+            return json.load(f)
+    except (IOError,OSError,ValueError):
+        return None
+
+def cached_entry(slot,key):
+    """Path of the entry in slot if it was built from the given key, else None."""
+    meta = _read_meta(slot)
+    if meta is None or meta.get('key') != key or meta.get('version') != VERSION:
+        return None
+    entry = os.path.join(slot,meta['name'])
+    for field in FIELDS:
+        if not os.path.isfile(os.path.join(entry,field+'.npy')):
+            return None
+    return entry
+
+def _as_cached(field,mat):
+    """float64 array in the layout of the cache: Fortran-ordered matrices for
+    the inputs, vectors for single-output targets."""
+    mat = np.asarray(mat,dtype=np.float64)
+    if field.startswith('Y') and (mat.ndim < 2 or min(mat.shape) == 1):
+        return np.ascontiguousarray(mat.ravel())
+    return np.asfortranarray(np.atleast_2d(mat))
+
+def _read_output(scratch,raw):
+    """Name and workspace of the .mat file written by the script, or of a .mat
+    file shipped with the data set for scripts that write nothing."""
+    names = sorted(os.listdir(scratch))
+    for name in [n for n in names if n not in raw]+[n for n in names if n in raw]:
+        path = os.path.join(scratch,name)
+        if not os.path.isfile(path) or (name in raw and not name.endswith('.mat')):
+            continue
+        try:
+            ws = scipy.io.loadmat(path,appendmat=False)
+        except Exception:
+            continue
+        if all(field in ws for field in FIELDS):
+            return (name if name.endswith('.mat') else name+'.mat'),ws
+    return None,None
+
+def build_entry(folder,script,slot,key):
+    """Run the script of a data set folder in a scratch copy of the folder and
+    store its output in slot. Return the path of the entry."""
+    parent = os.path.dirname(os.path.abspath(slot))
+    if not os.path.isdir(parent):
+        try:
+            os.makedirs(parent)
+        except OSError: #created by a concurrent build
+            pass
+    scratch = tempfile.mkdtemp(prefix='.build-',dir=parent)
+    try:
+        run_dir = os.path.join(scratch,'run')
+        raw = raw_files(folder)
+        os.mkdir(run_dir)
+        for name in raw:
+            shutil.copy2(os.path.join(folder,name),run_dir)
+        with open(os.path.join(scratch,'log.txt'),'w') as log:
+            status = subprocess.call([sys.executable,script],cwd=run_dir,
+                                     stdout=log,stderr=subprocess.STDOUT)
+        name,ws = _read_output(run_dir,raw)
+        if status != 0 or name is None:
+            with open(os.path.join(scratch,'log.txt')) as log:
+                output = log.read().strip()
+            raise RuntimeError('%s exited with status %d%s%s'%(script,status,
+                               '' if name else ' and wrote no data set',
+                               '\n'+output if output else ''))
+        
+        new_slot = os.path.join(scratch,'entry')
+        os.makedirs(os.path.join(new_slot,name))
+        shapes = {}
+        for field in FIELDS:
+            mat = _as_cached(field,ws[field])
+            np.save(os.path.join(new_slot,name,field+'.npy'),mat)
+            shapes[field] = list(mat.shape)
+        with open(os.path.join(new_slot,'meta.json'),'w') as f:
+            json.dump({'name':name,'key':key,'version':VERSION,
+                       'source':os.path.abspath(folder),'script':script,
+                       'shapes':shapes},f,indent=1)
+        
+        if os.path.exists(slot):
+            shutil.rmtree(slot)
+        os.rename(new_slot,slot)
+        return os.path.join(slot,name)
+    finally:
+        shutil.rmtree(scratch,ignore_errors=True)
+
+def prepare_datasets(dataset_folder='./datasets',cache_folder=None,jobs=None,
+                     force=False,verbose=False):
+    """Build the stale or missing cache entries of the data sets, in parallel
+    on jobs threads (by default, one per CPU). Return a dictionary mapping the
+    name of each data set (its .mat file) to the folder of its entry, and 
+    whether any data set failed."""
+    sep = '-->'
+    if cache_folder is None:
+        cache_folder = os.path.join(dataset_folder,'.cache')
+    
+    entries = {}
+    stale = []
+    for folder,script in find_datasets(dataset_folder):
+        slot = os.path.join(cache_folder,os.path.relpath(folder,dataset_folder))
+        key = dataset_key(folder)
+        entry = None if force else cached_entry(slot,key)
+        if entry is None:
+            stale.append((folder,script,slot,key))
+        else:
+            entries[folder] = entry
+            if verbose:
+                print(sep+folder+': cached '+os.path.basename(entry))
+    
+    def build(args):
+        try:
+            return build_entry(*args),None
+        except Exception as err:
+            return None,err
+    
+    if stale:
+        if verbose:
+            print(sep+'Preprocessing %d data set(s)'%(len(stale)))
+        pool = ThreadPool(max(1,min(jobs or multiprocessing.cpu_count(),len(stale))))
+        try:
+            built = pool.map(build,stale)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        built = []
+    
+    error_flag = False
+    for (folder,script,slot,key),(entry,err) in zip(stale,built):
+        if entry is None:
+            error_flag = True
+            if verbose:
+                print(sep+folder+': ERROR: '+str(err))
+            continue
+        entries[folder] = entry
+        if verbose:
+            print(sep+folder+': generated '+os.path.basename(entry)+' with '+script)
+    
+    datasets = {}
+    for folder in sorted(entries):
+        slot,name = os.path.split(entries[folder])
+        datasets[name] = slot
+    return datasets,error_flag
+
+def load_dataset(path,mmap=True):
+    """Dictionary with the Xtrain, Ytrain, Xtest and Ytest arrays of a cache 
+    entry, memory-mapped read-only unless mmap is False, or of a .mat file."""
+    if not os.path.isdir(path):
+        ws = scipy.io.loadmat(path,squeeze_me=True)
+        return dict((field,ws[field]) for field in FIELDS)
+    return dict((field,np.load(os.path.join(path,field+'.npy'),
+                               mmap_mode='r' if mmap else None))
+                for field in FIELDS)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[1])
+    parser.add_argument('--datasets',default='./datasets',help='data set folder')
+    parser.add_argument('--cache',help='cache folder (default: DATASETS/.cache)')
+    parser.add_argument('--jobs',type=int,help='concurrent preprocessing scripts (default: one per CPU)')
+    parser.add_argument('--force',action='store_true',help='rebuild every entry')
+    args = parser.parse_args()
+    datasets,error = prepare_datasets(args.datasets,args.cache,args.jobs,
+                                      args.force,verbose=True)
+    for name,slot in sorted(datasets.items()):
+        print('%-24s%s'%(name,os.path.join(slot,name)))
+    sys.exit(1 if error else 0)
@@ -43,9 +43,14 @@ Miscellaneous functions for benchmarking pyGURLS.
 
 @author: Pedro Santana (psantana@mit.edu).
 """ 
-import os   
+import time
+import timeit
 import fnmatch as fn
 import numpy as np
+import dataset_cache
+
+#Monotonic high-resolution clock (time.perf_counter from Python 3.3 on)
+clock = getattr(time,'perf_counter',timeit.default_timer)
 
 def has_file_pattern(file_list,pattern):
     for filename in file_list:
@@ -55,42 +60,27 @@ def has_file_pattern(file_list,pattern):
 
 def cprint(pstring,cond):
     if cond:
-        print pstring        
-
-def generate_datasets(dataset_folder='./datasets',verbose=False,force=False):
-    """Return dictionary of datasets mapping to their paths."""
-    sep='-->'       
-    mat_file_dict={}
-    error_flag=False
-    for folder,subfolders,filenames in os.walk(dataset_folder): 
-        cprint(sep+folder,verbose)    
+        print(pstring)
 
-        pp_script = has_file_pattern(filenames,'pre_process*.py')
-        mat_file = has_file_pattern(filenames,'*.mat')
-        
-        if pp_script != None:
-            if mat_file == None or force:
-                cprint(' '*(len(sep)+2)+'Executing script '+pp_script,verbose)                           
-                cwd = os.getcwd()                        
-                os.chdir(folder)            
-                os.system('python '+pp_script)
-                mat_file = has_file_pattern(os.listdir('.'),'*.mat')                
-                if mat_file != None:
-                    mat_file_dict[mat_file] = os.path.abspath('.')                    
-                    cprint(' '*(len(sep)+2)+'Matlab file '+mat_file+' successfully generated.',verbose)                             
-                else:
-                    error_flag = True
-                    cprint(' '*(len(sep)+2)+'ERROR: failed to generated Matlab file in '+folder,verbose)
-                    
-                os.chdir(cwd)            
-            else:
-                mat_file_dict[mat_file] = os.path.abspath(folder)                
-                cprint(' '*(len(sep)+2)+'Found '+mat_file+'. Skipping script '+pp_script,verbose)
-                 
-    return mat_file_dict,error_flag #Returns the list of generated mat files
+def generate_datasets(dataset_folder='./datasets',verbose=False,force=False,
+                      jobs=None):
+    """Return dictionary of datasets mapping to the folders of their cache 
+    entries (see dataset_cache), and whether any of them failed."""
+    return dataset_cache.prepare_datasets(dataset_folder,jobs=jobs,force=force,
+                                          verbose=verbose)
    
    
+def summarize(samples):
+    """Median, quartiles, interquartile range, min and max of a list of 
+    measurements."""
+    q1,med,q3 = np.percentile(samples,[25,50,75])
+    return {'median':float(med),'q1':float(q1),'q3':float(q3),
+            'iqr':float(q3-q1),'min':float(np.min(samples)),
+            'max':float(np.max(samples))}
+
 def print_benchmark_results(results_dict,sep='   '):
+    """Print (and return) a table of the median accuracy and elapsed time
+    of each method on each data set."""
     methods = results_dict.keys()
     datasets = set()
     for m in results_dict.keys(): 
@@ -102,8 +92,8 @@ def print_benchmark_results(results_dict,sep='   '):
     for i,m in enumerate(methods):        
         for j,ds in enumerate(datasets):        
             if ds in results_dict[m].keys():
-                results_table[i][j] ='%.2f   %.4f'%(results_dict[m][ds]['perf'][0]*100.0,
-                                      results_dict[m][ds]['elap'][0])
+                results_table[i][j] ='%.2f   %.4f'%(np.median(results_dict[m][ds]['perf'])*100.0,
+                                      np.median(results_dict[m][ds]['elap']))
             else:
                 results_table[i][j] ='---   ---'            
 
@@ -135,7 +125,7 @@ def print_benchmark_results(results_dict,sep='   '):
             bench_str+= results_table[i][j]+' '*(max_col_width-len(results_table[i][j]))+sep            
         bench_str+='\n'
         
-    print bench_str  
+    print(bench_str)
     return bench_str
 
 def multiclass_to_one_vs_all(y):
@@ -148,4 +138,39 @@ def multiclass_to_one_vs_all(y):
         Y.fill(-1.0)
         for i in range(Y.shape[0]):
             Y[ i,values.index(y[i])] = 1.0
-        return Y    
+        return Y
+
+def synthetic_dataset(n,d,n_classes=2,noise=0.1,task='classification',
+                      n_test=None,seed=0):
+    """Reproducible synthetic data set, a dictionary with the keys of the .mat
+    files of datasets/ (Xtrain, Ytrain, Xtest, Ytest).
+    
+    The inputs are standard Gaussian and the targets a nonlinear function of
+    them (linear plus sinusoidal terms) drawn from seed, so that data sets of
+    any size with the same seed share it. For classification, the label is
+    the largest of n_classes such scores (-1/1 for two classes, 1..n_classes
+    otherwise) and a fraction noise of the labels is drawn at random; for 
+    regression, Gaussian noise with noise times the standard deviation of 
+    the function is added. The test set has n_test samples (n/4, at least 
+    200, by default).
+    """
+    if n_test is None:
+        n_test = max(200,n//4)
+    k = n_classes if task == 'classification' else 1
+    model = np.random.RandomState(seed)
+    W = model.randn(d,k)/np.sqrt(d)
+    V = 2.0*model.randn(d,k)/np.sqrt(d)
+    rng = np.random.RandomState([seed,n,d]) #samples differ with the size
+    X = rng.randn(n+n_test,d)
+    F = X.dot(W)+np.sin(X.dot(V))
+    if task == 'classification':
+        y = np.argmax(F,axis=1)
+        flip = rng.rand(y.shape[0]) < noise
+        y[flip] = rng.randint(0,k,np.sum(flip))
+        Y = np.where(y == 1,1.0,-1.0) if k == 2 else y+1.0
+    elif task == 'regression':
+        f = F[:,0]
+        Y = f+noise*np.std(f)*rng.randn(f.shape[0])
+    else:
+        raise ValueError('Unknown task '+task)
+    return {'Xtrain':X[:n],'Ytrain':Y[:n],'Xtest':X[n:],'Ytest':Y[n:]}
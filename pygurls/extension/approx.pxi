@@ -0,0 +1,233 @@
+#!/usr/bin/env python
+#
+#  A Python wrapper for GURLS++.
+#
+#  Copyright (c) 2014 MIT. All rights reserved.
+#
+#   author: Pedro Santana
+#   e-mail: psantana@mit.edu
+#   website: people.csail.mit.edu/psantana
+#
+#  Redistribution and use in source and binary forms, with or without
+#  modification, are permitted provided that the following conditions
+#  are met:
+#
+#  1. Redistributions of source code must retain the above copyright
+#     notice, this list of conditions and the following disclaimer.
+#  2. Redistributions in binary form must reproduce the above copyright
+#     notice, this list of conditions and the following disclaimer in
+#     the documentation and/or other materials provided with the
+#     distribution.
+#  3. Neither the name(s) of the copyright holders nor the names of its 
+#     contributors or of the Massachusetts Institute of Technology may be 
+#     used to endorse or promote products derived from this software
+#     without specific prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+#  "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+#  LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+#  FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+#  COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+#  INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+#  BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS
+#  OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED
+#  AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+#  LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+#  ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+#  POSSIBILITY OF SUCH DAMAGE.
+#
+"""
+A Python wrapper for GURLS++.
+
+Nonlinear models for large data sets, which approximate the Gaussian kernel 
+instead of computing the n x n kernel matrix: Nystrom regularization 
+(NystromWrapper) and random features (RandomFeaturesWrapper). Included by 
+pygurls.pyx, after online.pxi.
+
+@author: Pedro Santana (psantana@mit.edu).
+""" 
+
+def _median_sigma(X,max_rows=1000,seed=0):
+    """Median distance between the rows of (a random subset of) X, used as 
+    the default width of the Gaussian kernel."""
+    
+    X = np.asarray(X,dtype=np.float64)
+    if X.shape[0] > max_rows:
+        X = X[np.random.RandomState(seed).permutation(X.shape[0])[:max_rows]]
+    sq = np.sum(X**2,axis=1)
+    D2 = sq[:,np.newaxis]+sq[np.newaxis,:]-2.0*X.dot(X.T)
+    D2 = D2[np.triu_indices(X.shape[0],1)]
+    D2 = D2[D2 > 0]
+    if D2.size == 0:
+        return 1.0
+    return float(np.sqrt(np.median(D2)))
+
+
+class _KernelApproxRLS(object):
+    """Fit/predict on top of a GURLS++ wrapper approximating the Gaussian 
+    kernel exp(-||x-x'||^2/sigma^2). Subclasses set _kind and configure the 
+    wrapper in _set_options."""
+    
+    _regression = True
+    
+    def _targets(self,Y):
+        Y = np.asarray(Y)
+        self._single_output = (Y.ndim == 1)
+        return Y.reshape((Y.shape[0],-1))
+    
+    def fit(self,X,Y):
+        """Select the parameters and train on inputs X and targets Y."""
+        
+        X = np.atleast_2d(np.asarray(X))
+        Y = self._targets(Y)
+        self.sigma_ = _median_sigma(X) if self.sigma is None else float(self.sigma)
+        w = _RLSWrapper(self._kind,self.data_type,'pygurls_'+self._kind)
+        w.set_option('hoproportion',self.hoproportion)
+        w.set_option('regression',1 if self._regression else 0)
+        w.set_option('sigma',self.sigma_)
+        self._set_options(w,X.shape[0])
+        w.train(X,Y)
+        self.n_features_ = X.shape[1]
+        self._wrapper = w
+        return self
+    
+    def decision_function(self,X):
+        """Return the real-valued outputs of the model for the rows of X, 
+        evaluated chunk_size rows at a time."""
+        
+        if self._wrapper is None:
+            raise RuntimeError('The model has not been fitted yet.')
+        return self._wrapper.eval(np.atleast_2d(np.asarray(X)),self.chunk_size)
+    
+    def predict(self,X):
+        """Return the predicted targets for the rows of X."""
+        
+        Z = self.decision_function(X)
+        return Z[:,0] if self._single_output else Z
+
+
+class NystromRLSRegressor(_KernelApproxRLS):
+    """Gaussian kernel RLS with Nystrom regularization.
+    
+    The kernel matrix is replaced by its low rank approximation on a random 
+    subset of the training samples (the landmarks). Training needs the 
+    n x m kernel between the samples and the m landmarks instead of the 
+    n x n one, and prediction the kernel between the inputs and the 
+    landmarks, computed chunk_size rows at a time. The number of landmarks 
+    plays the role of the regularization parameter: it is selected by 
+    hold-out among n_ranks values up to n_landmarks. Wraps NystromWrapper of
+    GURLS++.
+    
+    Optional arguments:
+    n_landmarks -- maximum number of landmarks (default 500).
+    sigma -- width of the Gaussian kernel (default: median distance between
+             the training samples).
+    n_ranks -- number of landmark counts tried by hold-out (default 10; 1 
+               uses n_landmarks).
+    hoproportion -- fraction of the samples held out (default 0.2).
+    largescale -- if True, train with train_largescale, which adds the 
+                  landmarks by blocks of block_size and only keeps an n x 
+                  block_size kernel in memory. There is no selection: all 
+                  landmarks are used.
+    block_size -- landmarks per block with largescale (default 
+                  n_landmarks/10).
+    chunk_size -- rows evaluated at a time by predict (default 4096).
+    data_type -- 'double' (default) or 'float'.
+    """
+    
+    _kind = 'nystrom'
+    
+    def __init__(self,n_landmarks=500,sigma=None,n_ranks=10,hoproportion=0.2,
+                 largescale=False,block_size=None,chunk_size=4096,
+                 data_type='double'):
+        self.n_landmarks = n_landmarks
+        self.sigma = sigma
+        self.n_ranks = n_ranks
+        self.hoproportion = hoproportion
+        self.largescale = largescale
+        self.block_size = block_size
+        self.chunk_size = chunk_size
+        self.data_type = data_type
+        self._wrapper = None
+    
+    def _set_options(self,w,n):
+        w.set_option('landmarks',min(self.n_landmarks,n))
+        if self.largescale:
+            block = self.block_size or max(1,self.n_landmarks//10)
+            w.set_option('largescale',1)
+            w.set_option('nlambda',block)
+        else:
+            w.set_option('nlambda',self.n_ranks)
+    
+    @property
+    def landmarks_(self):
+        """Landmarks of the trained model (m x d)."""
+        
+        return self._wrapper.get_field('paramsel.X')
+    
+    @property
+    def coef_(self):
+        """Coefficients of the landmarks (m x T)."""
+        
+        return self._wrapper.get_field('paramsel.C')
+
+
+class RandomFeaturesRLSRegressor(_KernelApproxRLS):
+    """Gaussian kernel RLS with random Fourier features.
+    
+    The inputs are mapped to 2*n_features features [cos(XW) sin(XW)], with 
+    random Gaussian projections W, whose inner products approximate the 
+    Gaussian kernel; a linear RLS model is then trained on them, selecting 
+    the regularization by hold-out. Memory grows as n*n_features rather 
+    than n^2, and predict maps chunk_size rows at a time. Wraps 
+    RandomFeaturesWrapper of GURLS++.
+    
+    Optional arguments:
+    n_features -- number of random projections (default 500).
+    sigma -- width of the Gaussian kernel (default: median distance between
+             the training samples).
+    nlambda -- number of regularization parameters tried (default 20).
+    hoproportion -- fraction of the samples held out (default 0.2).
+    chunk_size -- rows evaluated at a time by predict (default 4096).
+    data_type -- 'double' (default) or 'float'.
+    """
+    
+    _kind = 'randfeats'
+    
+    def __init__(self,n_features=500,sigma=None,nlambda=20,hoproportion=0.2,
+                 chunk_size=4096,data_type='double'):
+        self.n_features = n_features
+        self.sigma = sigma
+        self.nlambda = nlambda
+        self.hoproportion = hoproportion
+        self.chunk_size = chunk_size
+        self.data_type = data_type
+        self._wrapper = None
+    
+    def _set_options(self,w,n):
+        w.set_option('features',self.n_features)
+        w.set_option('nlambda',self.nlambda)
+    
+    @property
+    def coef_(self):
+        """Weights of the linear model on the random features (2D x T)."""
+        
+        return self._wrapper.get_field('optimizer.W')
+    
+    @property
+    def lambdas_(self):
+        """Selected regularization parameters."""
+        
+        return self._wrapper.get_field('paramsel.lambdas').ravel()
+
+
+class NystromRLSClassifier(_WrapperClassifierMixin,NystromRLSRegressor):
+    """Gaussian kernel RLS classifier with Nystrom regularization. Labels are 
+    coded as in RLSClassifier; see NystromRLSRegressor for the arguments.
+    """
+
+
+class RandomFeaturesRLSClassifier(_WrapperClassifierMixin,RandomFeaturesRLSRegressor):
+    """Gaussian kernel RLS classifier with random features. Labels are coded 
+    as in RLSClassifier; see RandomFeaturesRLSRegressor for the arguments.
+    """
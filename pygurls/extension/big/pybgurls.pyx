@@ -0,0 +1,466 @@
+#!/usr/bin/env python
+#
+#  A Python wrapper for GURLS++.
+#
+#  Copyright (c) 2014 MIT. All rights reserved.
+#
+#   author: Pedro Santana
+#   e-mail: psantana@mit.edu
+#   website: people.csail.mit.edu/psantana
+#
+#  Redistribution and use in source and binary forms, with or without
+#  modification, are permitted provided that the following conditions
+#  are met:
+#
+#  1. Redistributions of source code must retain the above copyright
+#     notice, this list of conditions and the following disclaimer.
+#  2. Redistributions in binary form must reproduce the above copyright
+#     notice, this list of conditions and the following disclaimer in
+#     the documentation and/or other materials provided with the
+#     distribution.
+#  3. Neither the name(s) of the copyright holders nor the names of its 
+#     contributors or of the Massachusetts Institute of Technology may be 
+#     used to endorse or promote products derived from this software
+#     without specific prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+#  "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+#  LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+#  FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+#  COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+#  INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+#  BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS
+#  OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED
+#  AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+#  LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+#  ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+#  POSSIBILITY OF SUCH DAMAGE.
+"""
+A Python wrapper for GURLS++.
+
+Out-of-core training with BGURLS++: the data live in HDF5 files (BigArray) and
+are read by blocks of rows by the bigsplit, bigparamsel, bigoptimizer, bigpred
+and bigperf tasks, so that the matrices are never loaded in memory. Built as 
+the separate extension module pybgurls when libbgurls++ is available.
+
+@author: Pedro Santana (psantana@mit.edu).
+""" 
+
+import atexit
+import json
+import os
+import subprocess
+import sys
+try:
+    from shutil import which
+except ImportError: #Python 2
+    from distutils.spawn import find_executable as which
+import numpy as np
+cimport numpy as np
+from libcpp.string cimport string
+
+np.import_array()
+
+cdef extern from "pybgurls_wrapper.h" namespace "gurls":
+    void bgurls_init() except +
+    void bgurls_finalize() except +
+    int bgurls_rank() except +
+    int bgurls_size() except +
+    void import_hdf5(char*, char*, char*, unsigned long, bint) nogil except +
+    
+    cdef cppclass PyBigArray:
+        PyBigArray(char*) except +
+        PyBigArray(char*, unsigned long, unsigned long) except +
+        unsigned long rows()
+        unsigned long cols()
+        void set_rows(unsigned long, void*, unsigned long, 
+                      unsigned long) nogil except +
+        void get_rows(unsigned long, unsigned long, void*) nogil except +
+        void flush() except +
+        
+    cdef cppclass PyBGURLSWrapper:
+        PyBGURLSWrapper(char*, char*) except +
+        void set_number(char*, double) except +
+        void set_string(char*, char*) except +
+        double get_number(char*) except +
+        string get_string(char*) except +
+        void set_task_sequence(char*) except +
+        void add_process(char*, char*) except +
+        void* get_field(char*, unsigned long&, unsigned long&) except +
+        void load(char*) except +
+        int run(PyBigArray&, PyBigArray&, char*) nogil except +
+
+
+#Task sequence of BigRLS and the actions of its processes, as in bigdemo.cpp
+_SEQUENCE = ['bigsplit:ho','bigparamsel:hoprimal','bigoptimizer:rlsprimal',
+             'bigpred:primal','bigperf:macroavg']
+_PROCESSES = {'train':['computeNsave']*3+['ignore']*2,
+              'predict':['load']*3+['computeNsave','ignore'],
+              'test':['load']*3+['computeNsave']*2}
+
+_mpi_ready = False
+
+def _init_mpi():
+    """Initialize MPI on first use. A process that was not started by mpiexec
+    is an MPI world of its own, so BGURLS++ runs unchanged on a single node."""
+    
+    global _mpi_ready
+    if not _mpi_ready:
+        bgurls_init()
+        atexit.register(bgurls_finalize)
+        _mpi_ready = True
+
+def mpi_rank():
+    """Rank of this process in MPI_COMM_WORLD."""
+    
+    _init_mpi()
+    return bgurls_rank()
+
+def mpi_size():
+    """Number of processes in MPI_COMM_WORLD."""
+    
+    _init_mpi()
+    return bgurls_size()
+
+
+cdef class BigArray:
+    """HDF5-backed matrix of BGURLS++, read and written by blocks of rows.
+    
+    Under MPI, every process must create or open the same BigArrays in the 
+    same order.
+    """
+    cdef PyBigArray *thisptr
+    cdef readonly object file_name
+    
+    def __cinit__(self,file_name,shape=None):
+        """Open the BigArray stored in file_name or, if shape=(rows,cols) is
+        given, create it (replacing any existing file)."""
+        
+        _init_mpi()
+        self.file_name = file_name
+        if shape is None:
+            self.thisptr = new PyBigArray(file_name)
+        else:
+            self.thisptr = new PyBigArray(file_name,shape[0],shape[1])
+    
+    def __dealloc__(self):
+        """Destructor."""
+        
+        del self.thisptr
+    
+    property shape:
+        def __get__(self):
+            return (self.thisptr.rows(),self.thisptr.cols())
+    
+    def __len__(self):
+        return self.thisptr.rows()
+    
+    def write(self,start,rows):
+        """Write the rows of a 1D or 2D array from row start on."""
+        
+        cdef double[::1,:] mv
+        cdef unsigned long c_start = start, n, cols
+        
+        mat = np.asarray(rows)
+        if mat.ndim == 1:
+            mat = mat.reshape((mat.shape[0],1))
+        mv = np.asfortranarray(mat,dtype=np.float64)
+        n = mv.shape[0]
+        cols = mv.shape[1]
+        if n == 0:
+            return
+        with nogil:
+            self.thisptr.set_rows(c_start,&mv[0,0],n,cols)
+    
+    def read(self,start=0,n_rows=None):
+        """Read n_rows rows (all the remaining ones by default) from row start
+        on, as a Fortran-ordered 2D array."""
+        
+        cdef double[::1,:] mv
+        cdef unsigned long c_start = start, n
+        
+        if n_rows is None:
+            n_rows = self.thisptr.rows()-start
+        mat = np.empty((n_rows,self.thisptr.cols()),dtype=np.float64,order='F')
+        if mat.size == 0:
+            return mat
+        mv = mat
+        n = n_rows
+        with nogil:
+            self.thisptr.get_rows(c_start,n,&mv[0,0])
+        return mat
+    
+    def iter_blocks(self,block_rows=4096):
+        """Iterate over the matrix by blocks of at most block_rows rows."""
+        
+        for start in xrange(0,self.thisptr.rows(),block_rows):
+            yield self.read(start,min(block_rows,self.thisptr.rows()-start))
+    
+    def flush(self):
+        """Flush the data written so far to the file."""
+        
+        self.thisptr.flush()
+
+
+def from_chunks(file_name,chunks,shape):
+    """Create a BigArray of the given shape in file_name and fill it with the
+    row blocks produced by chunks (e.g. a generator of NumPy arrays), one 
+    block in memory at a time. Only the process of rank 0 writes."""
+    
+    arr = BigArray(file_name,shape)
+    start = 0
+    for chunk in chunks:
+        chunk = np.asarray(chunk)
+        if mpi_rank() == 0:
+            arr.write(start,chunk)
+        start += chunk.shape[0]
+    if start != shape[0]:
+        raise ValueError('The chunks hold %d rows, expected %d.'%(start,shape[0]))
+    arr.flush()
+    return arr
+
+def import_dataset(src_file,dataset,dst_file,block_rows=4096,transposed=False):
+    """Copy dataset of the HDF5 file src_file into the BigArray file dst_file
+    by blocks of block_rows rows, and return the BigArray. 
+    
+    The dataset is read as written by NumPy and h5py, i.e. (samples,features)
+    or (samples,); with transposed=True it is read as (features,samples), 
+    which is how MATLAB and BigArray itself store matrices. Under MPI each 
+    process copies a slice of the rows.
+    """
+    
+    cdef char *c_src = src_file
+    cdef char *c_dataset = dataset
+    cdef char *c_dst = dst_file
+    cdef unsigned long c_block = block_rows
+    cdef bint c_transposed = transposed
+    
+    _init_mpi()
+    with nogil:
+        import_hdf5(c_src,c_dataset,c_dst,c_block,c_transposed)
+    return BigArray(dst_file)
+
+
+class BigRLS(object):
+    """Linear RLS classifier trained out of core with BGURLS++.
+    
+    The hold-out split, the selection of the regularization parameter, the 
+    training and the prediction are computed by blocks of rows straight from
+    the HDF5 files, and their intermediate results (X'X, X'Y, the weights and 
+    the predictions) are BigArrays written in shared_dir, which all processes
+    must be able to access. Labels are coded as for the GURLS++ pipeline, one 
+    column per class with entries +1/-1.
+    
+    When the script is not started by mpiexec, n_jobs > 1 runs each task 
+    sequence on n_jobs local MPI processes through mpiexec; otherwise (or if
+    mpiexec is not found) the sequence runs in this process, with the 
+    multithreaded BLAS doing the work.
+    """
+    
+    def __init__(self,shared_dir,name='bigrls',hoproportion=0.2,nlambda=20,
+                 memlimit=None,n_jobs=1,mpiexec='mpiexec'):
+        """Constructor.
+        
+        Mandatory arguments:
+        shared_dir -- folder for the files shared by the processes.
+        
+        Optional arguments:
+        name -- name of the experiment, which names its saved options.
+        hoproportion -- fraction of the samples held out for validation.
+        nlambda -- number of regularization parameters tried.
+        memlimit -- bytes of memory the tasks may use per block (1 GB by 
+                    default).
+        n_jobs -- number of local MPI processes, see the class docstring.
+        mpiexec -- MPI launcher used when n_jobs > 1.
+        """
+        
+        self.shared_dir = os.path.join(os.path.abspath(shared_dir),'')
+        self.name = name
+        self.hoproportion = hoproportion
+        self.nlambda = nlambda
+        self.memlimit = memlimit
+        self.n_jobs = n_jobs
+        self.mpiexec = mpiexec
+        self._wrapper = None
+    
+    def _params(self):
+        return {'name':self.name,'hoproportion':self.hoproportion,
+                'nlambda':self.nlambda,'memlimit':self.memlimit}
+    
+    def _new_wrapper(self):
+        """Build the BGURLS++ options with the task sequence and processes."""
+        
+        w = _BGURLS(self.name,self.shared_dir)
+        w.set_number('hoproportion',self.hoproportion)
+        w.set_number('nlambda',self.nlambda)
+        if self.memlimit is not None:
+            w.set_number('memlimit',self.memlimit)
+        w.set_task_sequence('\n'.join(_SEQUENCE))
+        for p_name in sorted(_PROCESSES):
+            w.add_process(p_name,'\n'.join(_PROCESSES[p_name]))
+        return w
+    
+    def _launcher(self):
+        """Path of the MPI launcher if this process should spawn n_jobs local
+        processes, None to run in this process."""
+        
+        if self.n_jobs <= 1 or mpi_size() > 1:
+            return None
+        return which(self.mpiexec)
+    
+    def _as_bigarray(self,data,file_name):
+        """BigArray for data: a BigArray, the file name of one, or a pair
+        (HDF5 file, dataset name) imported into shared_dir as file_name."""
+        
+        if isinstance(data,BigArray):
+            return data
+        if isinstance(data,basestring):
+            return BigArray(data)
+        src_file, dataset = data
+        return import_dataset(src_file,dataset,
+                              os.path.join(self.shared_dir,file_name))
+    
+    def _run(self,job,X,y):
+        """Run process job of the task sequence on X and y."""
+        
+        launcher = self._launcher()
+        if self._wrapper is None:
+            self._wrapper = self._new_wrapper()
+        if launcher is None:
+            if self._wrapper.run(X,y,job) != 0:
+                raise RuntimeError('BGURLS++ failed to run the %s process.'%job)
+            return
+        
+        arg_file = os.path.join(self.shared_dir,self.name+'_'+job+'.json')
+        with open(arg_file,'w') as f:
+            json.dump({'shared_dir':self.shared_dir,'params':self._params(),
+                       'job':job,'X':X.file_name,'y':y.file_name},f)
+        cmd = [launcher,'-n',str(self.n_jobs),sys.executable,'-c',
+               'import pybgurls; pybgurls._worker(%r)'%(arg_file)]
+        #the files stay open in this process: let the workers open them too
+        env = dict(os.environ,HDF5_USE_FILE_LOCKING='FALSE')
+        if subprocess.call(cmd,env=env) != 0:
+            raise RuntimeError('BGURLS++ failed to run the %s process on %d '
+                               'MPI processes.'%(job,self.n_jobs))
+        #the results are in the options saved by the workers
+        self._wrapper.load(self._wrapper.get_string('savefile'))
+    
+    def fit(self,X,y):
+        """Select the regularization and train on X and y.
+        
+        X and y are BigArrays, BigArray file names or pairs (HDF5 file, 
+        dataset name), which are first copied by blocks into shared_dir.
+        """
+        
+        X = self._as_bigarray(X,'X_train.h5')
+        y = self._as_bigarray(y,'y_train.h5')
+        if X.shape[0] != y.shape[0]:
+            raise ValueError('X and y have different numbers of rows.')
+        
+        self._wrapper = self._new_wrapper()
+        save_file = self._wrapper.get_string('savefile')
+        if mpi_rank() == 0 and os.path.exists(save_file):
+            os.remove(save_file) #would be loaded by the train process
+        self._run('train',X,y)
+        return self
+    
+    def predict(self,X):
+        """Scores of the trained model on X, as a BigArray in shared_dir."""
+        
+        if self._wrapper is None:
+            raise RuntimeError('The model has not been trained.')
+        X = self._as_bigarray(X,'X_test.h5')
+        no_labels = BigArray(os.path.join(self.shared_dir,'no_labels.h5'),(0,0))
+        self._run('predict',X,no_labels)
+        return BigArray(self._wrapper.get_string('files.pred_filename'))
+    
+    def score(self,X,y):
+        """Accuracy of the trained model on X and y, for each class."""
+        
+        if self._wrapper is None:
+            raise RuntimeError('The model has not been trained.')
+        X = self._as_bigarray(X,'X_test.h5')
+        y = self._as_bigarray(y,'y_test.h5')
+        self._run('test',X,y)
+        return self._wrapper.get_field('perf.acc')
+    
+    @property
+    def coef_(self):
+        """Weights of the trained model, d x t."""
+        
+        if self._wrapper is None:
+            raise RuntimeError('The model has not been trained.')
+        return BigArray(self._wrapper.get_string('files.optimizer_W_filename')).read()
+    
+    @property
+    def lambda_(self):
+        """Regularization parameter selected on the hold-out samples."""
+        
+        if self._wrapper is None:
+            raise RuntimeError('The model has not been trained.')
+        return self._wrapper.get_field('paramsel.lambdas')
+
+
+cdef class _BGURLS:
+    """Thin holder of the BGURLS++ options (PyBGURLSWrapper)."""
+    cdef PyBGURLSWrapper *thisptr
+    
+    def __cinit__(self,name,shared_dir):
+        _init_mpi()
+        self.thisptr = new PyBGURLSWrapper(name,shared_dir)
+    
+    def __dealloc__(self):
+        del self.thisptr
+    
+    def set_number(self,field,value):
+        self.thisptr.set_number(field,<double>value)
+    
+    def set_string(self,field,value):
+        self.thisptr.set_string(field,value)
+    
+    def get_string(self,field):
+        return self.thisptr.get_string(field)
+    
+    def set_task_sequence(self,seq):
+        self.thisptr.set_task_sequence(seq)
+    
+    def add_process(self,p_name,actions):
+        self.thisptr.add_process(p_name,actions)
+    
+    def load(self,save_file):
+        self.thisptr.load(save_file)
+    
+    def get_field(self,field):
+        """Copy of a matrix (or number) option, as a 1D or 2D array."""
+        
+        cdef unsigned long rows, cols
+        cdef np.npy_intp shape[2]
+        cdef void *buf = self.thisptr.get_field(field,rows,cols)
+        if buf == NULL:
+            return np.array([self.thisptr.get_number(field)])
+        shape[0] = <np.npy_intp>rows
+        shape[1] = <np.npy_intp>cols
+        mat = np.PyArray_New(np.ndarray,2,shape,np.NPY_DOUBLE,NULL,buf,0,
+                             np.NPY_ARRAY_F_CONTIGUOUS|np.NPY_ARRAY_ALIGNED,
+                             None).copy(order='F')
+        if (rows > 1) and (cols > 1):
+            return mat
+        return mat.reshape(-1,order='F')
+    
+    def run(self,BigArray X,BigArray y,job_id):
+        cdef char *c_job_id = job_id
+        cdef int ret
+        with nogil:
+            ret = self.thisptr.run(X.thisptr[0],y.thisptr[0],c_job_id)
+        return ret
+
+
+def _worker(arg_file):
+    """Entry point of the processes spawned by BigRLS with n_jobs > 1."""
+    
+    with open(arg_file) as f:
+        args = json.load(f)
+    params = dict((str(k),v) for k,v in args['params'].items())
+    params['name'] = str(params['name'])
+    model = BigRLS(args['shared_dir'],**params)
+    model._run(str(args['job']),BigArray(str(args['X'])),BigArray(str(args['y'])))
@@ -0,0 +1,499 @@
+#
+#  A Python wrapper for GURLS++.
+#
+#  Copyright (c) 2014 MIT. All rights reserved.
+#
+#   author: Pedro Santana
+#   e-mail: psantana@mit.edu
+#   website: people.csail.mit.edu/psantana
+#
+#  Redistribution and use in source and binary forms, with or without
+#  modification, are permitted provided that the following conditions
+#  are met:
+#
+#  1. Redistributions of source code must retain the above copyright
+#     notice, this list of conditions and the following disclaimer.
+#  2. Redistributions in binary form must reproduce the above copyright
+#     notice, this list of conditions and the following disclaimer in
+#     the documentation and/or other materials provided with the
+#     distribution.
+#  3. Neither the name(s) of the copyright holders nor the names of its 
+#     contributors or of the Massachusetts Institute of Technology may be 
+#     used to endorse or promote products derived from this software
+#     without specific prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+#  "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+#  LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+#  FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+#  COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+#  INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+#  BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS
+#  OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED
+#  AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+#  LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+#  ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+#  POSSIBILITY OF SUCH DAMAGE.
+#
+"""
+A Python wrapper for GURLS++.
+
+Estimator interface (fit/predict) on top of PyGURLS. Included by pygurls.pyx.
+
+@author: Pedro Santana (psantana@mit.edu).
+""" 
+
+#Task sequences for each (kernel, solver, paramsel) combination
+_RLS_TASKS = {
+    ('linear','primal','loocv'): [['paramsel','loocvprimal'],
+                                  ['optimizer','rlsprimal'],['pred','primal']],
+    ('linear','primal','ho'):    [['split','ho'],['paramsel','hoprimal'],
+                                  ['optimizer','rlsprimal'],['pred','primal']],
+    ('linear','dual','loocv'):   [['kernel','linear'],['paramsel','loocvdual'],
+                                  ['optimizer','rlsdual'],['pred','dual']],
+    ('linear','dual','ho'):      [['split','ho'],['kernel','linear'],
+                                  ['paramsel','hodual'],['optimizer','rlsdual'],
+                                  ['pred','dual']],
+    ('rbf','dual','loocv'):      [['paramsel','siglam'],['kernel','rbf'],
+                                  ['optimizer','rlsdual'],['predkernel','traintest'],
+                                  ['pred','dual']],
+    ('rbf','dual','ho'):         [['split','ho'],['paramsel','siglamho'],
+                                  ['kernel','rbf'],['optimizer','rlsdual'],
+                                  ['predkernel','traintest'],['pred','dual']]}
+
+#Tasks that are executed on new data by predict()
+_PRED_FIELDS = ['predkernel','pred']
+
+#Tasks that refit() runs on new targets, on top of the kernel, split and 
+#eigendecomposition of the last fit (the rbf bandwidth is not selected again)
+_REFIT_TASKS = {
+    ('linear','primal','loocv'): ['paramsel','optimizer'],
+    ('linear','primal','ho'):    ['paramsel','optimizer'],
+    ('linear','dual','loocv'):   ['paramsel','optimizer'],
+    ('linear','dual','ho'):      ['paramsel','optimizer'],
+    ('rbf','dual','loocv'):      ['paramsel:loocvdual','optimizer'],
+    ('rbf','dual','ho'):         ['paramsel:hodual','optimizer']}
+
+
+class RLSRegressor(object):
+    """Regularized least squares regression with GURLS++.
+    
+    fit() runs the training tasks once and keeps the trained optimizer, 
+    kernel parameters and selected regularization resident in memory. 
+    predict() then executes only the predkernel and pred tasks on the new 
+    data: no pipeline is rebuilt, no perf task is run and no labels are 
+    needed.
+    
+    Optional arguments:
+    kernel -- 'linear' (default) or 'rbf'.
+    solver -- 'primal' (default, best when samples >> features) or 'dual'.
+              The rbf kernel is always solved in the dual.
+    paramsel -- regularization (and, for rbf, bandwidth) selection by 
+                leave-one-out, 'loocv' (default), or hold-out, 'ho'.
+    fit_intercept -- if True (default), outputs are centered, as are the 
+                     inputs of linear models, so that a bias is learned.
+    data_type -- 'double' (default) or 'float'.
+    options -- dictionary of additional GURLS++ options (e.g., {'nlambda':40}).
+    n_jobs -- number of bandwidths evaluated concurrently by the rbf 
+              parameter selection (1 by default, all the processors if <= 0).
+    max_memory -- memory budget in bytes of the concurrent evaluations, and
+                  of a block of rows in prediction. None (default) for 
+                  unlimited. See PyGURLS and PyGURLS.predict.
+    subsample -- if given, the parameters are selected on a random subsample 
+                 of this many training samples (stratified by class for 
+                 classification), and the model is then trained on all the 
+                 samples with them. None (default) uses the whole set.
+    subsample_growth -- if > 1, the selection is repeated on subsamples grown
+                        by this factor until the parameters stabilize (see 
+                        the subsampletol option). The size of the subsample 
+                        that was used is stored in subsample_size_.
+    cache_factorization -- if True, the training inputs, the kernel matrix 
+                           and its eigendecomposition (of X'X for linear 
+                           primal models) are kept after fit(), so that 
+                           refit() learns new targets for the same inputs 
+                           without factorizing again. False by default.
+    
+    The parameters are selected by minimizing the root mean square error 
+    (the hoperf option, 'rmse'; RLSClassifier maximizes the macro-averaged 
+    accuracy, 'macroavg'), unless options sets hoperf.
+    """
+    
+    #Performance measure of the parameter selection
+    _hoperf = 'rmse'
+    
+    def __init__(self,kernel='linear',solver='primal',paramsel='loocv',
+                 fit_intercept=True,data_type='double',options=None,n_jobs=1,
+                 max_memory=None,subsample=None,subsample_growth=1,
+                 cache_factorization=False):
+        self.kernel = kernel
+        self.solver = 'dual' if kernel == 'rbf' else solver
+        self.paramsel = paramsel
+        self.fit_intercept = fit_intercept
+        self.data_type = data_type
+        self.options = options
+        self.n_jobs = n_jobs
+        self.max_memory = max_memory
+        self.subsample = subsample
+        self.subsample_growth = subsample_growth
+        self.cache_factorization = cache_factorization
+        self._pg = None
+        self._lock = threading.Lock()
+        
+        if (self.kernel,self.solver,self.paramsel) not in _RLS_TASKS:
+            raise ValueError('Unsupported combination kernel=%s, solver=%s, '
+                             'paramsel=%s.'%(kernel,solver,paramsel))
+    
+    def _new_pygurls(self):
+        """Return a PyGURLS object with the training pipeline built."""
+        
+        pg = PyGURLS(data_type=self.data_type,n_jobs=self.n_jobs,
+                     max_memory=self.max_memory)
+        task_list = _RLS_TASKS[(self.kernel,self.solver,self.paramsel)]
+        if self.subsample is not None: #the selection task runs on subsamples
+            selection = [t[1] for t in task_list if t[0] == 'paramsel'][0]
+            task_list = [['paramsel','subsample'] if t[0] == 'paramsel' else t
+                         for t in task_list]
+        pg.set_task_sequence(task_list)
+        pg.init_processes('processes',False)
+        pg.add_process('train',['ignore' if t[0] in _PRED_FIELDS else 'computeNsave'
+                                    for t in task_list])
+        pg.build_pipeline('pygurls_rls_%x'%(id(self)),True)
+        pg.set_option('todisk',0) #the trained model stays in memory
+        pg.set_option('hoperf',self._hoperf)
+        if self.subsample is not None:
+            pg.set_option('subsampleparamsel',selection)
+            pg.set_option('subsamplesize',self.subsample)
+            pg.set_option('subsamplegrowth',self.subsample_growth)
+        for field,value in (self.options or {}).items():
+            pg.set_option(field,value)
+        return pg
+    
+    def _fit_targets(self,X,Y):
+        """Train on the 2D target matrix Y."""
+        
+        pg = self._new_pygurls()
+        X = np.atleast_2d(np.asarray(X))
+        Y = np.asarray(Y,dtype=pg.dtype)
+        
+        self._x_mean = None
+        self._y_mean = None
+        if self.fit_intercept:
+            self._y_mean = np.mean(Y,axis=0)
+            Y = Y - self._y_mean
+            if self.kernel == 'linear':
+                self._x_mean = np.mean(X,axis=0)
+                X = X - self._x_mean
+        
+        pg.add_data(X,'X')
+        pg.add_data(Y,'Y')
+        if self.cache_factorization:
+            self._run_factorized(pg)
+        else:
+            if pg.run('X','Y','train') != 0:
+                raise RuntimeError('GURLS++ training failed.')
+            pg.erase_data('X') #the optimizer keeps what prediction needs
+            pg.erase_data('Y')
+            if self.solver == 'dual':
+                pg.erase_field('kernel.K') #only the kernel type is needed later
+        if self.subsample is not None:
+            self.subsample_size_ = int(pg.get_field('paramsel.subsamplesize')[0])
+            
+        self.n_features_ = X.shape[1]
+        self._refit_rows = X.shape[0] if self.cache_factorization else None
+        self._pg = pg
+        return self
+    
+    def _run_factorized(self,pg):
+        """Run the training tasks, factorizing the kernel once it is known."""
+        
+        fields = [t[0] for t in _RLS_TASKS[(self.kernel,self.solver,
+                                            self.paramsel)]
+                  if t[0] not in _PRED_FIELDS]
+        if 'kernel' in fields: #dual: after the kernel task
+            first = fields[:fields.index('kernel')+1]
+        else: #primal: X'X only depends on X
+            first = fields[:fields.index('paramsel')]
+        if pg.run_tasks('X',first,'Y') != 0:
+            raise RuntimeError('GURLS++ training failed.')
+        pg.factorize('X')
+        if pg.run_tasks('X',fields[len(first):],'Y') != 0:
+            raise RuntimeError('GURLS++ training failed.')
+    
+    def _refit_targets(self,Y):
+        """Train on the 2D target matrix Y for the inputs of the last fit."""
+        
+        if self._pg is None or getattr(self,'_refit_rows',None) is None:
+            raise RuntimeError('refit needs a model fitted by fit() with '
+                               'cache_factorization=True.')
+        pg = self._pg
+        Y = np.asarray(Y,dtype=pg.dtype)
+        if Y.shape[0] != self._refit_rows:
+            raise ValueError('Expected %d samples, got %d.'%(self._refit_rows,
+                                                           Y.shape[0]))
+        if self.fit_intercept:
+            self._y_mean = np.mean(Y,axis=0)
+            Y = Y - self._y_mean
+        
+        pg.add_data(Y,'Y')
+        if pg.run_tasks('X',_REFIT_TASKS[(self.kernel,self.solver,
+                                          self.paramsel)],'Y') != 0:
+            raise RuntimeError('GURLS++ training failed.')
+        return self
+    
+    def refit(self,Y):
+        """Train on new targets Y (n, or n x T) for the inputs of the last fit.
+        
+        Needs cache_factorization=True. The kernel, its eigendecomposition 
+        and the hold-out split of the last fit are reused: only the 
+        regularization is selected again (the rbf bandwidth is kept) and the
+        model solved, which costs a few matrix products.
+        """
+        
+        Y = np.asarray(Y)
+        self._single_output = (Y.ndim == 1)
+        return self._refit_targets(Y.reshape((Y.shape[0],-1)))
+    
+    def iter_fit(self,X,Ys):
+        """Train on inputs X for each target matrix of Ys, in turn.
+        
+        The estimator is fitted on the first targets, then refitted on each
+        of the following ones (see refit), and yielded after each fit, so 
+        predict or save before advancing. Needs cache_factorization=True.
+        """
+        
+        if not self.cache_factorization:
+            raise RuntimeError('iter_fit needs cache_factorization=True.')
+        for i,Y in enumerate(Ys):
+            yield self.fit(X,Y) if i == 0 else self.refit(Y)
+    
+    def decision_function(self,X,out=None):
+        """Return the real-valued outputs of the model for the rows of X.
+        
+        Rows are predicted in blocks that fit in max_memory (see 
+        PyGURLS.predict), and out is an optional preallocated output: a 
+        Fortran-ordered n x T array or memmap, or the path of a memmap file 
+        to create.
+        """
+        
+        if self._pg is None:
+            raise RuntimeError('The model has not been fitted yet.')
+        X = np.atleast_2d(np.asarray(X))
+        if X.shape[1] != self.n_features_:
+            raise ValueError('Expected %d features, got %d.'%(self.n_features_,
+                                                            X.shape[1]))
+        if self._x_mean is not None:
+            X = X - self._x_mean
+        
+        with self._lock: #prediction fields are shared by all callers
+            self._pg.add_data(X,'Xpred')
+            try:
+                Z = self._pg.predict('Xpred',out=out,max_memory=self.max_memory,
+                                     fields=_PRED_FIELDS)
+            finally:
+                self._pg.erase_data('Xpred')
+        
+        if self._y_mean is not None:
+            Z += self._y_mean
+        return Z
+    
+    def fit(self,X,Y):
+        """Train on inputs X (n x d) and targets Y (n, or n x T)."""
+        
+        Y = np.asarray(Y)
+        self._single_output = (Y.ndim == 1)
+        return self._fit_targets(X,Y.reshape((Y.shape[0],-1)))
+    
+    def _stream_targets(self,chunks):
+        """Turn the target blocks of a stream into 2D matrices."""
+        
+        for X,Y in chunks:
+            Y = np.asarray(Y)
+            self._single_output = (Y.ndim == 1)
+            yield X, Y.reshape((Y.shape[0],-1))
+    
+    def fit_stream(self,chunks,fixed_lambda=None,random_state=0):
+        """Train a linear primal model on an iterable of (X, Y) blocks.
+        
+        The blocks are only used to accumulate X'X and X'Y, so memory does
+        not grow with the number of samples (see PyGURLS.fit_stream). The
+        regularization is always selected by hold-out on the accumulated 
+        statistics, whatever the paramsel argument.
+        
+        Optional arguments:
+        fixed_lambda -- if given, use this lambda instead of selecting it.
+        random_state -- seed of the selection of the held-out rows.
+        """
+        
+        if self.kernel != 'linear' or self.solver != 'primal':
+            raise ValueError('fit_stream needs kernel=linear and solver=primal.')
+        
+        pg = self._new_pygurls()
+        pg.fit_stream(self._stream_targets(chunks),fixed_lambda=fixed_lambda,
+                      center=self.fit_intercept,random_state=random_state)
+        self.n_features_ = pg.get_field('kernel.XtX').shape[0]
+        self._refit_rows = None
+        self._x_mean = None
+        self._y_mean = None
+        if self.fit_intercept:
+            self._x_mean = pg.get_field('kernel.Xmean')
+            self._y_mean = pg.get_field('kernel.ymean')
+        pg.erase_field('kernel') #prediction only needs the optimizer
+        self._pg = pg
+        return self
+    
+    def predict(self,X):
+        """Return the predicted targets for the rows of X."""
+        
+        Z = self.decision_function(X)
+        return Z[:,0] if self._single_output else Z
+    
+    def _model_meta(self):
+        """Metadata that save() stores along with the GURLS++ model."""
+        
+        mean = lambda v: None if v is None else v.tolist()
+        return {'estimator':type(self).__name__,
+                'params':{'kernel':self.kernel,'solver':self.solver,
+                          'paramsel':self.paramsel,
+                          'fit_intercept':self.fit_intercept,
+                          'data_type':self.data_type,'options':self.options,
+                          'subsample':self.subsample,
+                          'subsample_growth':self.subsample_growth},
+                'n_features':self.n_features_,
+                'x_mean':mean(self._x_mean),'y_mean':mean(self._y_mean),
+                'single_output':getattr(self,'_single_output',False),
+                'subsample_size':getattr(self,'subsample_size_',None)}
+    
+    def _set_model_meta(self,meta):
+        """Restore the attributes stored by _model_meta."""
+        
+        mean = lambda v: None if v is None else np.asarray(v,dtype=self._pg.dtype)
+        self.n_features_ = meta['n_features']
+        self._x_mean = mean(meta['x_mean'])
+        self._y_mean = mean(meta['y_mean'])
+        self._single_output = meta['single_output']
+        if meta.get('subsample_size') is not None:
+            self.subsample_size_ = meta['subsample_size']
+    
+    def save(self,path):
+        """Save the trained model to path (see PyGURLS.save_model)."""
+        
+        if self._pg is None:
+            raise RuntimeError('The model has not been fitted yet.')
+        self._pg.save_model(path,meta=self._model_meta())
+    
+    @classmethod
+    def load(cls,path,mmap=True):
+        """Return the estimator saved to path by save().
+        
+        With mmap=True (default), the trained matrices are memory-mapped 
+        from the file rather than read into memory.
+        """
+        
+        meta = _read_model_header(path)[0]['meta']
+        if meta.get('estimator') != cls.__name__:
+            raise ValueError('%s does not hold a %s.'%(path,cls.__name__))
+        params = dict((str(k),v) for k,v in meta['params'].items())
+        params = dict((k,str(v) if isinstance(v,basestring) else v) 
+                      for k,v in params.items())
+        est = cls(**params)
+        est._pg = PyGURLS(data_type=est.data_type)
+        est._pg.load_model(path,mmap)
+        est._set_model_meta(meta)
+        return est
+    
+    @property
+    def pygurls(self):
+        """The PyGURLS object holding the trained model."""
+        
+        return self._pg
+
+
+class RLSClassifier(RLSRegressor):
+    """Regularized least squares classification with GURLS++.
+    
+    Labels can be of any type. Two classes are coded as +1/-1 on a single 
+    output; more classes are coded one-vs-all, and the predicted class is 
+    the one with the largest output. See RLSRegressor for the arguments.
+    """
+    
+    _hoperf = 'macroavg'
+    
+    def _code_labels(self,y_idx):
+        """Return the +1/-1 target matrix of the class indices y_idx."""
+        
+        if len(self.classes_) < 2:
+            raise ValueError('At least two classes are needed.')
+        elif len(self.classes_) == 2:
+            return np.where(y_idx == 1,1.0,-1.0).reshape((-1,1))
+        Y = -np.ones((y_idx.shape[0],len(self.classes_)))
+        Y[np.arange(y_idx.shape[0]),y_idx] = 1.0
+        return Y
+    
+    def fit(self,X,y):
+        """Train on inputs X (n x d) and labels y (n)."""
+        
+        y = np.asarray(y).ravel()
+        self.classes_,y_idx = np.unique(y,return_inverse=True)
+        return self._fit_targets(X,self._code_labels(y_idx))
+    
+    def refit(self,y):
+        """Train on new labels y (n) for the inputs of the last fit.
+        
+        See RLSRegressor.refit.
+        """
+        
+        y = np.asarray(y).ravel()
+        self.classes_,y_idx = np.unique(y,return_inverse=True)
+        return self._refit_targets(self._code_labels(y_idx))
+    
+    def _stream_targets(self,chunks):
+        for X,y in chunks:
+            y = np.asarray(y).ravel()
+            y_idx = np.searchsorted(self.classes_,y)
+            if np.any(self.classes_[np.minimum(y_idx,len(self.classes_)-1)] != y):
+                raise ValueError('The stream holds labels not listed in classes.')
+            yield X, self._code_labels(y_idx)
+    
+    def fit_stream(self,chunks,classes,fixed_lambda=None,random_state=0):
+        """Train on an iterable of (X, y) blocks whose labels are in classes.
+        
+        See RLSRegressor.fit_stream.
+        """
+        
+        self.classes_ = np.unique(np.asarray(classes).ravel())
+        if len(self.classes_) < 2:
+            raise ValueError('At least two classes are needed.')
+        return RLSRegressor.fit_stream(self,chunks,fixed_lambda,random_state)
+    
+    def _model_meta(self):
+        meta = RLSRegressor._model_meta(self)
+        meta['classes'] = self.classes_.tolist()
+        return meta
+    
+    def _set_model_meta(self,meta):
+        RLSRegressor._set_model_meta(self,meta)
+        self.classes_ = np.array(meta['classes'])
+    
+    def predict(self,X):
+        """Return the predicted labels for the rows of X."""
+        
+        Z = self.decision_function(X)
+        if len(self.classes_) == 2:
+            return self.classes_[(Z[:,0] > 0).astype(int)]
+        return self.classes_[np.argmax(Z,axis=1)]
+    
+    def score(self,X,y):
+        """Return the accuracy on inputs X and labels y."""
+        
+        return np.mean(self.predict(X) == np.asarray(y).ravel())
+
+
+def load_estimator(path,mmap=True):
+    """Return the RLSRegressor or RLSClassifier saved to path by save(), 
+    whichever it holds (see RLSRegressor.load)."""
+    
+    name = _read_model_header(path)[0]['meta'].get('estimator')
+    for cls in [RLSRegressor,RLSClassifier]:
+        if cls.__name__ == name:
+            return cls.load(path,mmap)
+    raise ValueError('%s does not hold an RLS estimator.'%(path))
@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+#
+#  A Python wrapper for GURLS++.
+#
+#  Copyright (c) 2014 MIT. All rights reserved.
+#
+#   author: Pedro Santana
+#   e-mail: psantana@mit.edu
+#   website: people.csail.mit.edu/psantana
+#
+#  Redistribution and use in source and binary forms, with or without
+#  modification, are permitted provided that the following conditions
+#  are met:
+#
+#  1. Redistributions of source code must retain the above copyright
+#     notice, this list of conditions and the following disclaimer.
+#  2. Redistributions in binary form must reproduce the above copyright
+#     notice, this list of conditions and the following disclaimer in
+#     the documentation and/or other materials provided with the
+#     distribution.
+#  3. Neither the name(s) of the copyright holders nor the names of its 
+#     contributors or of the Massachusetts Institute of Technology may be 
+#     used to endorse or promote products derived from this software
+#     without specific prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+#  "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+#  LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+#  FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+#  COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+#  INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+#  BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS
+#  OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED
+#  AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+#  LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+#  ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+#  POSSIBILITY OF SUCH DAMAGE.
+#
+"""
+A Python wrapper for GURLS++.
+
+On-disk kernel cache of GURLS++. Included by pygurls.pyx.
+
+The kernel tasks (linear, rbf) and the parameter selections built on them 
+(siglam, siglamho, loocvdual, loocvprimal, hodual, hoprimal) read the 
+kernel, distance and eigendecomposition matrices from the cache directory 
+given by the option 'kernelcache' (see PyGURLS cache_dir) when they have been
+computed before from the same data and parameters. An entry file is laid out
+as
+    8 bytes   magic string 'GURLSKC1'
+    24 bytes  rows, columns and element size (native unsigned 64-bit 
+              integers)
+    data      the matrix in Fortran (column-major) order
+
+@author: Pedro Santana (psantana@mit.edu).
+""" 
+
+cdef extern from "gurls++/kernelcache.h" namespace "gurls":
+    cdef struct KernelCacheStats:
+        unsigned long hits
+        unsigned long misses
+        unsigned long stores
+        unsigned long evictions
+    
+    cdef cppclass KernelCache:
+        @staticmethod
+        KernelCacheStats stats()
+        @staticmethod
+        void resetStats()
+
+_KERNEL_CACHE_MAGIC = b'GURLSKC1'
+_KERNEL_CACHE_HEADER = 32
+
+def kernel_cache_stats():
+    """Counters of the kernel cache, summed over all the PyGURLS instances 
+    of the process since the last reset_kernel_cache_stats: a dict with the
+    number of 'hits', 'misses', 'stores' and 'evictions'."""
+    
+    cdef KernelCacheStats s = KernelCache.stats()
+    return {'hits':s.hits,'misses':s.misses,'stores':s.stores,
+            'evictions':s.evictions}
+
+def reset_kernel_cache_stats():
+    """Reset the counters returned by kernel_cache_stats."""
+    
+    KernelCache.resetStats()
+
+def read_kernel_cache_entry(path,mmap=True):
+    """Return the matrix of a kernel cache entry file (*.gkc) as a NumPy 
+    array, memory-mapped read-only unless mmap is False."""
+    
+    with open(path,'rb') as f:
+        header = f.read(_KERNEL_CACHE_HEADER)
+        if len(header) < _KERNEL_CACHE_HEADER or header[:8] != _KERNEL_CACHE_MAGIC:
+            raise ValueError('%s is not a kernel cache entry.'%(path))
+        rows,cols,elem_size = [int(v) for v in np.frombuffer(header[8:32],dtype=np.uint64)]
+        dtype = {4:np.float32,8:np.float64}[elem_size]
+        if not mmap:
+            data = np.fromfile(f,dtype=dtype,count=rows*cols)
+            return data.reshape((rows,cols),order='F')
+    return np.memmap(path,dtype=dtype,mode='r',offset=_KERNEL_CACHE_HEADER,
+                     shape=(rows,cols),order='F')
@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+#
+#  A Python wrapper for GURLS++.
+#
+#  Copyright (c) 2014 MIT. All rights reserved.
+#
+#   author: Pedro Santana
+#   e-mail: psantana@mit.edu
+#   website: people.csail.mit.edu/psantana
+#
+#  Redistribution and use in source and binary forms, with or without
+#  modification, are permitted provided that the following conditions
+#  are met:
+#
+#  1. Redistributions of source code must retain the above copyright
+#     notice, this list of conditions and the following disclaimer.
+#  2. Redistributions in binary form must reproduce the above copyright
+#     notice, this list of conditions and the following disclaimer in
+#     the documentation and/or other materials provided with the
+#     distribution.
+#  3. Neither the name(s) of the copyright holders nor the names of its 
+#     contributors or of the Massachusetts Institute of Technology may be 
+#     used to endorse or promote products derived from this software
+#     without specific prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+#  "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+#  LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+#  FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+#  COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+#  INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+#  BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS
+#  OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED
+#  AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+#  LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+#  ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+#  POSSIBILITY OF SUCH DAMAGE.
+#
+"""
+A Python wrapper for GURLS++.
+
+Binary model files written by PyGURLS.save_model. Included by pygurls.pyx.
+
+A model file is laid out as
+    8 bytes   magic string 'PYGURLS1'
+    8 bytes   length of the header (little-endian unsigned 64-bit integer)
+    header    JSON description of the model (data type, task sequence, 
+              processes, numeric and string options, matrices and user 
+              metadata)
+    data      raw matrices in Fortran (column-major) order, each starting on
+              a 64-byte boundary of the file
+
+Matrix offsets in the header are relative to the start of the data section,
+which is the first 64-byte boundary after the header. Since the matrices are
+stored exactly as GURLS++ holds them in memory, they can be memory-mapped
+and handed to GURLS++ without copying, and shared by several processes 
+through the page cache.
+
+@author: Pedro Santana (psantana@mit.edu).
+""" 
+
+import json
+import struct
+
+_MODEL_MAGIC = b'PYGURLS1'
+_MODEL_ALIGN = 64 #alignment of the matrices within the file
+_MODEL_FORMAT = 1
+
+def _aligned(offset):
+    """Round offset up to the next multiple of _MODEL_ALIGN."""
+    
+    return (offset+_MODEL_ALIGN-1)//_MODEL_ALIGN*_MODEL_ALIGN
+
+def _write_model_file(path,header,matrices):
+    """Write header (dictionary) and matrices (list of (field, 2D array))."""
+    
+    header = dict(header)
+    header['matrices'] = {}
+    offset = 0
+    for field,mat in matrices:
+        offset = _aligned(offset)
+        header['matrices'][field] = {'dtype':mat.dtype.newbyteorder('<').str,
+                                     'shape':list(mat.shape),
+                                     'offset':offset}
+        offset += mat.nbytes
+    header_bytes = json.dumps(header,sort_keys=True).encode('utf-8')
+    
+    with open(path,'wb') as f:
+        f.write(_MODEL_MAGIC)
+        f.write(struct.pack('<Q',len(header_bytes)))
+        f.write(header_bytes)
+        data_start = _aligned(f.tell())
+        for field,mat in matrices:
+            entry = header['matrices'][field]
+            f.write(b'\0'*(data_start+entry['offset']-f.tell()))
+            f.write(np.asfortranarray(mat,dtype=entry['dtype']).tobytes(order='F'))
+
+def _read_model_header(path):
+    """Return the header of a model file and the offset of its data."""
+    
+    with open(path,'rb') as f:
+        if f.read(len(_MODEL_MAGIC)) != _MODEL_MAGIC:
+            raise ValueError('%s is not a PyGURLS model file.'%(path))
+        header_len, = struct.unpack('<Q',f.read(8))
+        header = json.loads(f.read(header_len).decode('utf-8'))
+    if header.get('format') != _MODEL_FORMAT:
+        raise ValueError('Unsupported model file format %s.'%(header.get('format')))
+    return header, _aligned(len(_MODEL_MAGIC)+8+header_len)
+
+def _read_model_file(path,mmap=True):
+    """Return the header and the matrices (dictionary) of a model file.
+    
+    With mmap=True, the matrices are read-only views over a single memory 
+    map of the file; otherwise they are read into memory.
+    """
+    
+    header,data_start = _read_model_header(path)
+    matrices = {}
+    if mmap and header['matrices']:
+        raw = np.memmap(path,dtype=np.uint8,mode='r')
+    else:
+        raw = None
+    
+    with open(path,'rb') as f:
+        for field,entry in header['matrices'].items():
+            dtype = np.dtype(str(entry['dtype']))
+            shape = tuple(entry['shape'])
+            count = int(np.prod(shape))
+            start = data_start+entry['offset']
+            if raw is not None:
+                mat = raw[start:start+count*dtype.itemsize].view(dtype)
+            else:
+                f.seek(start)
+                mat = np.fromfile(f,dtype=dtype,count=count)
+            matrices[str(field)] = mat.reshape(shape,order='F')
+    return header, matrices
+
+def _model_matrix(field,mat):
+    """Return a matrix of a model file as an array GURLS++ can wrap and its 
+    element type (FLOAT, DOUBLE or ULONG).
+    
+    Unsigned integer matrices (e.g., the Nystrom landmark indices) are 
+    converted to unsigned long if they were saved on a platform where it 
+    has another size.
+    """
+    
+    if mat.dtype == np.float32:
+        return mat, FLOAT
+    elif mat.dtype == np.float64:
+        return mat, DOUBLE
+    elif mat.dtype.kind == 'u':
+        return np.asfortranarray(mat,dtype=np.dtype('L')), ULONG
+    raise ValueError('Unsupported type %s of the matrix %s.'%(mat.dtype,field))
@@ -0,0 +1,500 @@
+#!/usr/bin/env python
+#
+#  A Python wrapper for GURLS++.
+#
+#  Copyright (c) 2014 MIT. All rights reserved.
+#
+#   author: Pedro Santana
+#   e-mail: psantana@mit.edu
+#   website: people.csail.mit.edu/psantana
+#
+#  Redistribution and use in source and binary forms, with or without
+#  modification, are permitted provided that the following conditions
+#  are met:
+#
+#  1. Redistributions of source code must retain the above copyright
+#     notice, this list of conditions and the following disclaimer.
+#  2. Redistributions in binary form must reproduce the above copyright
+#     notice, this list of conditions and the following disclaimer in
+#     the documentation and/or other materials provided with the
+#     distribution.
+#  3. Neither the name(s) of the copyright holders nor the names of its 
+#     contributors or of the Massachusetts Institute of Technology may be 
+#     used to endorse or promote products derived from this software
+#     without specific prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+#  "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+#  LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+#  FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+#  COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+#  INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+#  BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS
+#  OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED
+#  AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+#  LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+#  ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+#  POSSIBILITY OF SUCH DAMAGE.
+#
+"""
+A Python wrapper for GURLS++.
+
+Online learning on top of the GURLS++ wrappers (RecursiveRLSWrapper and
+RecursiveRLSCholUpdateWrapper). 
+Included by pygurls.pyx.
+
+@author: Pedro Santana (psantana@mit.edu).
+""" 
+
+#Declares the C++ wrapper around the GurlsWrapper classes
+cdef extern from "pyrls_wrapper.h" namespace "gurls":
+    cdef cppclass PyRLSWrapper:
+        PyRLSWrapper(char*, char*, char*) except +
+        void train(void*, void*, unsigned long, unsigned long, 
+                   unsigned long) nogil except +
+        void update(void*, void*, unsigned long, unsigned long, 
+                    unsigned long) nogil except +
+        void downdate(void*, void*, unsigned long, unsigned long, 
+                      unsigned long) nogil except +
+        void* eval(void*, unsigned long, unsigned long, unsigned long&, 
+                   unsigned long&) nogil except +
+        void retrain() nogil except +
+        void set_option(char*, double) except +
+        double get_number(char*) except +
+        void* get_field(char*, unsigned long&, unsigned long&) except +
+
+
+cdef class _RLSWrapper:
+    """Thin interface to a GURLS++ wrapper object (see pyrls_wrapper.h).
+    
+    Matrices are passed as 2D arrays (rows are samples) and converted, if 
+    needed, to Fortran-ordered arrays of the wrapper's dtype. The GIL is 
+    released during training, updates and evaluation; calls on the same 
+    object are serialized by a lock.
+    """
+    cdef PyRLSWrapper *thisptr
+    cdef readonly object dtype
+    cdef object _lock
+    
+    def __cinit__(self,kind,data_type='double',name='pygurls_wrapper'):
+        self.thisptr = new PyRLSWrapper(kind,data_type,name)
+        self.dtype = np.dtype('float32' if data_type == 'float' else 'float64')
+        self._lock = threading.Lock()
+    
+    def __dealloc__(self):
+        del self.thisptr
+    
+    cdef void* _ptr(self,mat) except NULL:
+        """Address of the data of a Fortran-ordered array of type self.dtype."""
+        
+        cdef const double[::1,:] mv_double 
+        cdef const float[::1,:] mv_float        
+        if self.dtype == np.float64:
+            mv_double = mat
+            return <void*>&mv_double[0,0]
+        mv_float = mat
+        return <void*>&mv_float[0,0]
+    
+    def _matrix(self,mat):
+        """Return mat as a non-empty 2D Fortran-ordered array of type self.dtype."""
+        
+        mat = np.asarray(mat)
+        if mat.ndim == 1:
+            mat = mat.reshape((-1,1))
+        if mat.ndim != 2 or mat.size == 0:
+            raise ValueError('Expected a non-empty 1D or 2D array.')
+        return np.asfortranarray(mat,dtype=self.dtype)
+    
+    def _fit(self,X,Y,int mode):
+        X = self._matrix(X)
+        Y = self._matrix(Y)
+        if X.shape[0] != Y.shape[0]:
+            raise ValueError('X and Y must have the same number of rows.')
+        cdef void *X_buf = self._ptr(X)
+        cdef void *Y_buf = self._ptr(Y)
+        cdef unsigned long n = X.shape[0], d = X.shape[1], t = Y.shape[1]
+        with self._lock:
+            with nogil:
+                if mode == 0:
+                    self.thisptr.train(X_buf,Y_buf,n,d,t)
+                elif mode == 1:
+                    self.thisptr.update(X_buf,Y_buf,n,d,t)
+                else:
+                    self.thisptr.downdate(X_buf,Y_buf,n,d,t)
+    
+    def train(self,X,Y):
+        """Select the parameters and train on inputs X and outputs Y."""
+        
+        self._fit(X,Y,0)
+    
+    def update(self,X,Y):
+        """Update the trained model with a block of samples."""
+        
+        self._fit(X,Y,1)
+    
+    def downdate(self,X,Y):
+        """Remove a block of samples, added before, from the trained model."""
+        
+        self._fit(X,Y,2)
+    
+    def retrain(self):
+        """Select the parameters again and retrain on all samples seen."""
+        
+        with self._lock:
+            with nogil:
+                self.thisptr.retrain()
+    
+    def eval(self,X,chunk_size=None):
+        """Return the outputs of the model for the rows of X (2D array).
+        
+        If chunk_size is given, X is evaluated chunk_size rows at a time, so 
+        that the memory used by the wrapper (e.g., a kernel between the 
+        rows and the landmarks) stays bounded.
+        """
+        
+        X = np.asarray(X)
+        if chunk_size is None or X.ndim != 2 or X.shape[0] <= chunk_size:
+            return self._eval(X)
+        Z = None
+        for start in range(0,X.shape[0],chunk_size):
+            Z_chunk = self._eval(X[start:start+chunk_size])
+            if Z is None:
+                Z = np.empty((X.shape[0],Z_chunk.shape[1]),dtype=self.dtype,order='F')
+            Z[start:start+Z_chunk.shape[0]] = Z_chunk
+        return Z
+    
+    def _eval(self,X):
+        X = self._matrix(X)
+        cdef void *X_buf = self._ptr(X)
+        cdef unsigned long n = X.shape[0], d = X.shape[1], rows, cols
+        cdef void *buf
+        with self._lock:
+            with nogil:
+                buf = self.thisptr.eval(X_buf,n,d,rows,cols)
+            return _copy_matrix(buf,rows,cols,self.dtype)
+    
+    def set_option(self,field,value):
+        """Set nlambda, lambda, hoproportion, regression, forgetting, sigma,
+        landmarks, largescale or features (see the C++ wrapper)."""
+        
+        with self._lock:
+            self.thisptr.set_option(field,value)
+    
+    def get_number(self,field):
+        """Return a numeric field of the options structure."""
+        
+        with self._lock:
+            return self.thisptr.get_number(field)
+    
+    def get_field(self,field):
+        """Return a copy of a matrix field of the options structure."""
+        
+        cdef unsigned long rows, cols
+        cdef void *buf
+        with self._lock:
+            buf = self.thisptr.get_field(field,rows,cols)
+            return _copy_matrix(buf,rows,cols,self.dtype)
+
+
+cdef object _copy_matrix(void *buf,unsigned long rows,unsigned long cols,dtype):
+    """Copy a column-major rows x cols buffer of type dtype to a new array."""
+    
+    mat = np.empty((rows,cols),dtype=dtype,order='F')
+    if mat.size > 0:
+        memcpy(np.PyArray_DATA(mat),buf,mat.nbytes)
+    return mat
+
+
+class RecursiveRLSRegressor(object):
+    """Linear regularized least squares with recursive (online) updates.
+    
+    fit() selects the regularization by hold-out and trains on an initial 
+    set of samples. partial_fit() then adds blocks of samples to the model 
+    in O(k*d^2) for k new samples, with rank-k updates of the inverse of the
+    regularized covariance, rather than retraining on the whole history. 
+    retrain() selects the regularization again, on the held-out samples 
+    collected so far, and recomputes the model from the accumulated X'X and 
+    X'Y. Wraps RecursiveRLSWrapper of GURLS++.
+    
+    Optional arguments:
+    fit_intercept -- if True (default), a constant input is appended so 
+                     that a (regularized) bias is learned.
+    hoproportion -- fraction of the samples held out to select the 
+                    regularization (default 0.2).
+    nlambda -- number of regularization parameters tried (default 20).
+    data_type -- 'double' (default) or 'float'.
+    """
+    
+    _regression = True
+    _kind = 'recursive'
+    
+    def __init__(self,fit_intercept=True,hoproportion=0.2,nlambda=20,
+                 data_type='double'):
+        self.fit_intercept = fit_intercept
+        self.hoproportion = hoproportion
+        self.nlambda = nlambda
+        self.data_type = data_type
+        self._wrapper = None
+    
+    def _inputs(self,X):
+        X = np.atleast_2d(np.asarray(X))
+        if self.fit_intercept:
+            X = np.hstack([X,np.ones((X.shape[0],1),dtype=X.dtype)])
+        return X
+    
+    def _targets(self,Y):
+        Y = np.asarray(Y)
+        self._single_output = (Y.ndim == 1)
+        return Y.reshape((Y.shape[0],-1))
+    
+    def fit(self,X,Y):
+        """Select the regularization and train on inputs X and targets Y."""
+        
+        self._train(self._inputs(X),self._targets(Y))
+        return self
+    
+    def _new_wrapper(self):
+        w = _RLSWrapper(self._kind,self.data_type,'pygurls_recrls')
+        w.set_option('hoproportion',self.hoproportion)
+        w.set_option('nlambda',self.nlambda)
+        w.set_option('regression',1 if self._regression else 0)
+        return w
+    
+    def _train(self,X,Y):
+        """Train a new wrapper on inputs X (with the intercept column) and 
+        coded targets Y."""
+        
+        w = self._new_wrapper()
+        w.train(X,Y)
+        self.n_features_ = X.shape[1]-(1 if self.fit_intercept else 0)
+        self.n_samples_ = X.shape[0]
+        self._wrapper = w
+    
+    def partial_fit(self,X,Y):
+        """Update the model with a block of samples (fit on the first call)."""
+        
+        if self._wrapper is None:
+            return self.fit(X,Y)
+        X = self._inputs(X)
+        self._wrapper.update(X,self._targets(Y))
+        self.n_samples_ += X.shape[0]
+        return self
+    
+    def retrain(self):
+        """Select the regularization again and retrain on all samples seen."""
+        
+        if self._wrapper is None:
+            raise RuntimeError('The model has not been fitted yet.')
+        self._wrapper.retrain()
+        return self
+    
+    def decision_function(self,X):
+        """Return the real-valued outputs of the model for the rows of X."""
+        
+        if self._wrapper is None:
+            raise RuntimeError('The model has not been fitted yet.')
+        return self._wrapper.eval(self._inputs(X))
+    
+    def predict(self,X):
+        """Return the predicted targets for the rows of X."""
+        
+        Z = self.decision_function(X)
+        return Z[:,0] if self._single_output else Z
+    
+    @property
+    def coef_(self):
+        """Weights of the linear model (d x T, bias in the last row)."""
+        
+        return self._wrapper.get_field('optimizer.W')
+    
+    @property
+    def lambdas_(self):
+        """Selected regularization parameters."""
+        
+        return self._wrapper.get_field('paramsel.lambdas').ravel()
+
+
+class _WrapperClassifierMixin(object):
+    """Classification on top of the regressors of this module.
+    
+    Labels are coded as in RLSClassifier (one output in {-1, 1} for two 
+    classes, one-vs-all otherwise). The classes are those in the labels 
+    given to fit(), or the classes argument.
+    """
+    
+    _regression = False
+    
+    def _targets(self,y):
+        y = np.asarray(y).ravel()
+        y_idx = np.searchsorted(self.classes_,y)
+        if np.any(self.classes_[np.minimum(y_idx,len(self.classes_)-1)] != y):
+            raise ValueError('Labels not listed in classes.')
+        if len(self.classes_) == 2:
+            return np.where(y_idx == 1,1.0,-1.0).reshape((-1,1))
+        Y = -np.ones((y.shape[0],len(self.classes_)))
+        Y[np.arange(y.shape[0]),y_idx] = 1.0
+        return Y
+    
+    def fit(self,X,y,classes=None):
+        """Select the parameters and train on inputs X and labels y."""
+        
+        self.classes_ = np.unique(np.asarray(y if classes is None else classes).ravel())
+        if len(self.classes_) < 2:
+            raise ValueError('At least two classes are needed.')
+        return super(_WrapperClassifierMixin,self).fit(X,y)
+    
+    def predict(self,X):
+        """Return the predicted labels for the rows of X."""
+        
+        Z = self.decision_function(X)
+        if len(self.classes_) == 2:
+            return self.classes_[(Z[:,0] > 0).astype(int)]
+        return self.classes_[np.argmax(Z,axis=1)]
+    
+    def score(self,X,y):
+        """Return the accuracy on inputs X and labels y."""
+        
+        return np.mean(self.predict(X) == np.asarray(y).ravel())
+
+
+class RecursiveRLSClassifier(_WrapperClassifierMixin,RecursiveRLSRegressor):
+    """Linear RLS classifier with recursive (online) updates.
+    
+    Labels are coded as in RLSClassifier. The classes must either all be 
+    present in the first block or be given on the first call of fit or 
+    partial_fit. See RecursiveRLSRegressor for the arguments.
+    """
+    
+    def partial_fit(self,X,y,classes=None):
+        """Update the model with a block of samples (fit on the first call)."""
+        
+        if self._wrapper is None:
+            return self.fit(X,y,classes)
+        return super(RecursiveRLSClassifier,self).partial_fit(X,y)
+
+
+class WindowedRLSRegressor(RecursiveRLSRegressor):
+    """Linear RLS that tracks drifting data, with Cholesky updates and 
+    downdates.
+    
+    The model is the RLS solution on either the last `window` samples seen 
+    (sliding window) or on all samples, exponentially discounted by 
+    `forgetting` per sample. Each call of partial_fit() costs O(d^2) per 
+    sample: new samples are added to the upper Cholesky factor of the 
+    regularized covariance with rank-k updates and, for a sliding window, 
+    the samples leaving the window are removed with rank-k downdates. 
+    The regularization is selected by hold-out on the first block and 
+    kept fixed (as n*lambda, with n the size of the first block); with 
+    forgetting it decays along with the data. Wraps 
+    RecursiveRLSCholUpdateWrapper of GURLS++.
+    
+    Exactly one of the following must be given:
+    window -- number of most recent samples the model is trained on. The 
+              samples in the window are kept in memory.
+    forgetting -- exponential forgetting factor in (0, 1].
+    
+    See RecursiveRLSRegressor for the other arguments.
+    """
+    
+    _kind = 'recursivechol'
+    
+    def __init__(self,window=None,forgetting=None,fit_intercept=True,
+                 hoproportion=0.2,nlambda=20,data_type='double'):
+        if (window is None) == (forgetting is None):
+            raise ValueError('Give exactly one of window and forgetting.')
+        if window is not None and window < 1:
+            raise ValueError('The window must contain at least one sample.')
+        if forgetting is not None and not 0.0 < forgetting <= 1.0:
+            raise ValueError('The forgetting factor must be in (0, 1].')
+        super(WindowedRLSRegressor,self).__init__(fit_intercept,hoproportion,
+                                                  nlambda,data_type)
+        self.window = window
+        self.forgetting = forgetting
+        self._window = collections.deque()
+        self._window_rows = 0
+    
+    def _new_wrapper(self):
+        w = super(WindowedRLSRegressor,self)._new_wrapper()
+        if self.forgetting is not None:
+            w.set_option('forgetting',self.forgetting)
+        return w
+    
+    def fit(self,X,Y):
+        """Select the regularization and train on inputs X and targets Y 
+        (on their last `window` rows, for a sliding window)."""
+        
+        X = self._inputs(X)
+        Y = self._targets(Y)
+        if self.window is not None:
+            X = X[-self.window:]
+            Y = Y[-self.window:]
+        self._train(X,Y)
+        self._window.clear()
+        self._window_rows = 0
+        if self.window is not None:
+            self._window.append((X,Y))
+            self._window_rows = X.shape[0]
+        return self
+    
+    def partial_fit(self,X,Y):
+        """Add a block of samples to the model and, for a sliding window, 
+        remove the samples that leave it (fit on the first call)."""
+        
+        if self._wrapper is None:
+            return self.fit(X,Y)
+        X = self._inputs(X)
+        Y = self._targets(Y)
+        self._wrapper.update(X,Y)
+        self.n_samples_ += X.shape[0]
+        if self.window is not None:
+            self._window.append((X,Y))
+            self._window_rows += X.shape[0]
+            self._slide()
+        return self
+    
+    def _slide(self):
+        """Downdate the oldest buffered samples until the window fits."""
+        
+        while self._window_rows > self.window:
+            X,Y = self._window[0]
+            k = min(self._window_rows-self.window,X.shape[0])
+            self._wrapper.downdate(X[:k],Y[:k])
+            if k == X.shape[0]:
+                self._window.popleft()
+            else:
+                self._window[0] = (X[k:],Y[k:])
+            self._window_rows -= k
+    
+    def retrain(self):
+        """Select the regularization again and retrain on the samples in the 
+        window (sliding window only)."""
+        
+        if self._wrapper is None:
+            raise RuntimeError('The model has not been fitted yet.')
+        if self.window is None:
+            raise RuntimeError('Retraining needs a sliding window.')
+        X = np.vstack([blk[0] for blk in self._window])
+        Y = np.vstack([blk[1] for blk in self._window])
+        n_samples = self.n_samples_
+        self._train(X,Y)
+        self.n_samples_ = n_samples
+        self._window.clear()
+        self._window.append((X,Y))
+        return self
+    
+    @property
+    def window_(self):
+        """Inputs (with the intercept column) and coded targets the model is 
+        trained on, for a sliding window."""
+        
+        if not self._window:
+            return None
+        return (np.vstack([blk[0] for blk in self._window]),
+                np.vstack([blk[1] for blk in self._window]))
+
+
+class WindowedRLSClassifier(RecursiveRLSClassifier,WindowedRLSRegressor):
+    """Linear RLS classifier on a sliding window or with exponential 
+    forgetting. Labels are coded as in RLSClassifier; see 
+    RecursiveRLSClassifier and WindowedRLSRegressor for the arguments.
+    """
@@ -0,0 +1,407 @@
+#!/usr/bin/env python
+#
+#  A Python wrapper for GURLS++.
+#
+#  Copyright (c) 2014 MIT. All rights reserved.
+#
+#   author: Pedro Santana
+#   e-mail: psantana@mit.edu
+#   website: people.csail.mit.edu/psantana
+#
+#  Redistribution and use in source and binary forms, with or without
+#  modification, are permitted provided that the following conditions
+#  are met:
+#
+#  1. Redistributions of source code must retain the above copyright
+#     notice, this list of conditions and the following disclaimer.
+#  2. Redistributions in binary form must reproduce the above copyright
+#     notice, this list of conditions and the following disclaimer in
+#     the documentation and/or other materials provided with the
+#     distribution.
+#  3. Neither the name(s) of the copyright holders nor the names of its 
+#     contributors or of the Massachusetts Institute of Technology may be 
+#     used to endorse or promote products derived from this software
+#     without specific prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+#  "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+#  LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+#  FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+#  COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+#  INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+#  BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS
+#  OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED
+#  AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+#  LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+#  ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+#  POSSIBILITY OF SUCH DAMAGE.
+"""
+A Python wrapper for GURLS++.
+
+Automatic choice of the solver. Included by pygurls.pyx.
+
+plan_solver() estimates the training time and the peak memory of each route
+that can learn the requested kernel (linear: primal, dual and, when BGURLS++ 
+is built, the out-of-core BigArray pipeline; rbf: the exact dual, Nystrom and
+random features), discards the routes that do not fit the memory budget and 
+returns a SolverPlan with the fastest exact route, or the fastest 
+approximation if no exact route fits. The estimates are flop counts of the 
+dominant products and eigendecompositions, converted to seconds with the 
+throughput of a small matrix product measured on this machine, so they are 
+meant to rank the routes rather than to predict run times.
+
+@author: Pedro Santana (psantana@mit.edu).
+""" 
+
+import multiprocessing
+import os
+import time
+
+#Task sequence of BigRLS (pybgurls), for inspection
+_BIG_TASKS = [['bigsplit','ho'],['bigparamsel','hoprimal'],
+              ['bigoptimizer','rlsprimal'],['bigpred','primal']]
+
+#Routes that learn each kernel, exact ones first
+_KERNEL_ROUTES = {'linear':['primal','dual','bigarray'],
+                  'rbf':['dual','nystrom','randfeats']}
+
+_EXACT_ROUTES = ('primal','dual')
+
+#Flops of a symmetric eigendecomposition with eigenvectors, per n^3
+_EIG_FLOPS = 9.0
+
+#Bytes per second at which the out-of-core route is assumed to read its blocks
+_DISK_RATE = 200e6
+
+_flop_rate = None
+
+
+def _core_flop_rate():
+    """Flops per second of one core, measured once with a small matrix 
+    product (small enough not to be split among threads by the BLAS)."""
+    
+    global _flop_rate
+    if _flop_rate is None:
+        A = np.random.RandomState(0).rand(128,128)
+        A.dot(A)
+        reps = 20
+        start = time.time()
+        for i in range(reps):
+            A.dot(A)
+        elapsed = max(time.time()-start,1e-6)
+        _flop_rate = reps*2.0*128**3/elapsed
+    return _flop_rate
+
+
+def _physical_memory():
+    """Bytes of physical memory, None if unknown."""
+    
+    try:
+        return os.sysconf('SC_PAGE_SIZE')*os.sysconf('SC_PHYS_PAGES')
+    except (AttributeError,ValueError,OSError):
+        return None
+
+
+def _bgurls_available():
+    try:
+        import pybgurls
+    except ImportError:
+        return False
+    return True
+
+
+class SolverRoute(object):
+    """Estimate for one route of a SolverPlan.
+    
+    Attributes:
+    name -- 'primal', 'dual', 'nystrom', 'randfeats' or 'bigarray'.
+    exact -- False for the kernel approximations (nystrom, randfeats).
+    flops -- estimated floating point operations of the training.
+    time -- estimated training time in seconds.
+    memory -- estimated peak memory of the training in bytes.
+    feasible -- whether the route can run within the memory budget.
+    reason -- why the route is not feasible ('' if it is).
+    tasks -- GURLS++ task sequence of the route, as [task, name] pairs, for 
+             the approximations the GURLS++ wrapper that trains them.
+    params -- arguments of the estimator that trains the route.
+    """
+    
+    def __init__(self,name,flops,memory,tasks,params,rate,n_jobs,io_bytes=0):
+        self.name = name
+        self.exact = name in _EXACT_ROUTES or name == 'bigarray'
+        self.flops = float(flops)
+        self.memory = int(memory)
+        self.time = self.flops/(rate*n_jobs)+io_bytes/_DISK_RATE
+        self.tasks = tasks
+        self.params = params
+        self.feasible = True
+        self.reason = ''
+    
+    def __repr__(self):
+        return ('SolverRoute(%s, time=%.3gs, memory=%.3gMB%s)'
+                %(self.name,self.time,self.memory/2.0**20,
+                  '' if self.feasible else ', infeasible: '+self.reason))
+
+
+class SolverPlan(object):
+    """Routes estimated by plan_solver() and the one it chose.
+    
+    Attributes:
+    route -- the chosen SolverRoute.
+    routes -- list of the SolverRoute of every candidate, feasible or not.
+    n_samples, n_features, n_outputs, kernel, paramsel, n_jobs, max_memory,
+    data_type -- the problem the plan was made for.
+    """
+    
+    def __init__(self,routes,route,**problem):
+        self.routes = routes
+        self.route = route
+        for key,value in problem.items():
+            setattr(self,key,value)
+    
+    @property
+    def tasks(self):
+        """Task sequence of the chosen route."""
+        
+        return self.route.tasks
+    
+    def estimator(self,classifier=False,**kwargs):
+        """Return an unfitted estimator that trains the chosen route, a 
+        classifier if classifier is True. kwargs are passed to its 
+        constructor (BigRLS, always a classifier, needs shared_dir)."""
+        
+        params = dict(self.route.params)
+        params.update(kwargs)
+        name = self.route.name
+        if name == 'bigarray':
+            import pybgurls
+            return pybgurls.BigRLS(**params)
+        if name in _EXACT_ROUTES:
+            cls = RLSClassifier if classifier else RLSRegressor
+        elif name == 'nystrom':
+            cls = NystromRLSClassifier if classifier else NystromRLSRegressor
+        else:
+            cls = RandomFeaturesRLSClassifier if classifier else RandomFeaturesRLSRegressor
+        return cls(**params)
+    
+    def __str__(self):
+        lines = ['Solver plan for %d x %d, %s kernel: %s'
+                 %(self.n_samples,self.n_features,self.kernel,self.route.name)]
+        for r in self.routes:
+            lines.append('  %s %-10s %10.3g s %10.1f MB  %s'
+                         %('*' if r is self.route else ' ',r.name,r.time,
+                           r.memory/2.0**20,r.reason))
+        return '\n'.join(lines)
+
+
+def plan_solver(n_samples,n_features,kernel='linear',n_outputs=1,n_jobs=None,
+                max_memory=None,paramsel='loocv',data_type='double',
+                n_components=1000,options=None,routes=None,max_time=None):
+    """Estimate the training cost of each route for a data set and return the
+    SolverPlan of the fastest one that fits in memory.
+    
+    Mandatory arguments:
+    n_samples, n_features -- shape of the training inputs.
+    
+    Optional arguments:
+    kernel -- 'linear' (default) or 'rbf'.
+    n_outputs -- number of columns of the targets (classes for one-vs-all).
+    n_jobs -- number of cores (all the processors by default, or if <= 0).
+    max_memory -- memory budget in bytes (the physical memory by default).
+    paramsel -- 'loocv' (default) or 'ho', for the exact routes.
+    data_type -- 'double' (default) or 'float'.
+    n_components -- landmarks (nystrom) or random projections (randfeats) 
+                    of the approximations, capped by n_samples.
+    options -- GURLS++ options of the estimators, which the estimates use 
+               for nlambda and nsigma.
+    routes -- names of the routes considered (all by default).
+    max_time -- if given, exact routes estimated to take longer (in seconds)
+                give way to the approximations.
+    
+    Exact routes are preferred to the approximations whenever one fits (and,
+    with max_time, is fast enough); the out-of-core route only when no 
+    in-memory one does. Raises MemoryError if no route fits in max_memory.
+    """
+    
+    if kernel not in _KERNEL_ROUTES:
+        raise ValueError('Unsupported kernel %s.'%kernel)
+    if paramsel not in ('loocv','ho'):
+        raise ValueError('Unsupported paramsel %s.'%paramsel)
+    n, d, t = int(n_samples), int(n_features), int(n_outputs)
+    if n_jobs is None or n_jobs <= 0:
+        n_jobs = multiprocessing.cpu_count()
+    if max_memory is None:
+        max_memory = _physical_memory()
+    options = options or {}
+    nlambda = options.get('nlambda',20)
+    nsigma = options.get('nsigma',25)
+    s = 4 if data_type == 'float' else 8
+    rate = _core_flop_rate()
+    m = min(int(n_components),n)
+    
+    #Inputs and targets, plus their Fortran copies in PyGURLS
+    data = 2*s*(n*d+n*t)
+    candidates = []
+    for name in _KERNEL_ROUTES[kernel]:
+        if routes is not None and name not in routes:
+            continue
+        if name == 'bigarray' and not _bgurls_available():
+            continue
+        if name == 'primal':
+            #X'X, its eigendecomposition and the leave-one-out residuals
+            flops = 2.0*n*d*d+_EIG_FLOPS*d**3+2.0*nlambda*n*d*t
+            memory = data+s*(3*d*d+2*n*t+n*d)
+            params = {'kernel':'linear','solver':'primal','paramsel':paramsel,
+                      'n_jobs':n_jobs,'max_memory':max_memory,
+                      'data_type':data_type}
+            r = SolverRoute(name,flops,memory,_RLS_TASKS[('linear','primal',paramsel)],
+                            params,rate,n_jobs)
+        elif name == 'dual' and kernel == 'linear':
+            flops = 2.0*n*n*d+_EIG_FLOPS*n**3+2.0*nlambda*n*n*t
+            memory = data+s*3*n*n
+            params = {'kernel':'linear','solver':'dual','paramsel':paramsel,
+                      'n_jobs':n_jobs,'max_memory':max_memory,
+                      'data_type':data_type}
+            r = SolverRoute(name,flops,memory,_RLS_TASKS[('linear','dual',paramsel)],
+                            params,rate,n_jobs)
+        elif name == 'dual':
+            #Distances, then nsigma kernels and eigendecompositions on as many
+            #workers (4 n x n buffers each, see gridWorkers) as fit in memory
+            worker = 4*s*n*n
+            free = (max_memory or float('inf'))-data-s*n*n
+            workers = int(max(1,min(n_jobs,nsigma,free//worker)))
+            flops = 3.0*n*n*d+nsigma*(_EIG_FLOPS*n**3+2.0*nlambda*n*n*t)+_EIG_FLOPS*n**3
+            memory = data+s*n*n+workers*worker
+            params = {'kernel':'rbf','solver':'dual','paramsel':paramsel,
+                      'n_jobs':n_jobs,'max_memory':max_memory,
+                      'data_type':data_type}
+            r = SolverRoute(name,flops,memory,_RLS_TASKS[('rbf','dual',paramsel)],
+                            params,rate,n_jobs)
+        elif name == 'nystrom':
+            #n x m and m x m kernels, with the hold-out over the ranks
+            flops = 3.0*n*m*d+2.0*n*m*m+_EIG_FLOPS*m**3
+            memory = data+s*(2*n*m+3*m*m)
+            params = {'n_landmarks':m,'data_type':data_type}
+            r = SolverRoute(name,flops,memory,[['wrapper','nystrom']],params,
+                            rate,n_jobs)
+        elif name == 'randfeats':
+            #n x 2m features, then linear RLS on them
+            f = 2*m
+            flops = 2.0*n*d*m+2.0*n*f*f+_EIG_FLOPS*f**3+2.0*nlambda*n*f*t
+            memory = data+s*(2*n*f+3*f*f)
+            params = {'n_features':m,'data_type':data_type}
+            r = SolverRoute(name,flops,memory,[['wrapper','randfeats']],params,
+                            rate,n_jobs)
+        else:
+            #Blocks of rows read from disk in three passes (split, paramsel,
+            #optimizer), only the d x d matrices are resident
+            flops = 2.0*n*d*d+nlambda*d**3/3.0+2.0*nlambda*n*d*t
+            memory = 8*(3*d*d+2*d*t)+min(8*n*d,2**30 if max_memory is None else max_memory//4)
+            params = {'nlambda':nlambda,'n_jobs':n_jobs,
+                      'memlimit':None if max_memory is None else max_memory//4}
+            r = SolverRoute(name,flops,memory,_BIG_TASKS,params,rate,n_jobs,
+                            io_bytes=3*8*n*(d+t))
+        if max_memory is not None and r.memory > max_memory:
+            r.feasible = False
+            r.reason = 'needs %.1f MB of %.1f MB'%(r.memory/2.0**20,max_memory/2.0**20)
+        candidates.append(r)
+    
+    feasible = [r for r in candidates if r.feasible]
+    if not feasible:
+        raise MemoryError('No solver fits in %s bytes: %s'
+                          %(max_memory,', '.join(repr(r) for r in candidates)))
+    in_memory = [r for r in feasible if r.name != 'bigarray']
+    exact = [r for r in in_memory if r.exact and
+             (max_time is None or r.time <= max_time)]
+    chosen = min(exact or in_memory or feasible,key=lambda r: r.time)
+    return SolverPlan(candidates,chosen,n_samples=n,n_features=d,n_outputs=t,
+                      kernel=kernel,paramsel=paramsel,n_jobs=n_jobs,
+                      max_memory=max_memory,data_type=data_type)
+
+
+class AutoRLSRegressor(object):
+    """RLS regression with the solver chosen by plan_solver() from the shape
+    of the training inputs.
+    
+    fit() plans with the arguments below, builds the estimator of the chosen
+    route (RLSRegressor, NystromRLSRegressor or RandomFeaturesRLSRegressor; 
+    the out-of-core route is not considered since X is already in memory) 
+    and trains it. The plan is kept in plan_ and the estimator in 
+    estimator_, to which predict and decision_function are delegated.
+    
+    Optional arguments: kernel, n_jobs, max_memory, paramsel, data_type, 
+    n_components, options and max_time, as in plan_solver(). options are 
+    also passed to the exact estimators.
+    """
+    
+    _classifier = False
+    
+    def __init__(self,kernel='linear',n_jobs=None,max_memory=None,
+                 paramsel='loocv',data_type='double',n_components=1000,
+                 options=None,max_time=None):
+        self.kernel = kernel
+        self.n_jobs = n_jobs
+        self.max_memory = max_memory
+        self.paramsel = paramsel
+        self.data_type = data_type
+        self.n_components = n_components
+        self.options = options
+        self.max_time = max_time
+        self.plan_ = None
+        self.estimator_ = None
+    
+    def _n_outputs(self,X,Y):
+        Y = np.asarray(Y)
+        return 1 if Y.ndim == 1 else Y.shape[1]
+    
+    def fit(self,X,Y):
+        """Plan the solver for X and train it on inputs X and targets Y."""
+        
+        X = np.atleast_2d(np.asarray(X))
+        self.plan_ = plan_solver(X.shape[0],X.shape[1],self.kernel,
+                                 self._n_outputs(X,Y),self.n_jobs,
+                                 self.max_memory,self.paramsel,self.data_type,
+                                 self.n_components,self.options,
+                                 routes=('primal','dual','nystrom','randfeats'),
+                                 max_time=self.max_time)
+        kwargs = {}
+        if self.plan_.route.name in _EXACT_ROUTES:
+            kwargs['options'] = self.options
+        self.estimator_ = self.plan_.estimator(self._classifier,**kwargs)
+        self.estimator_.fit(X,Y)
+        return self
+    
+    def decision_function(self,X):
+        """Return the real-valued outputs of the model for the rows of X."""
+        
+        if self.estimator_ is None:
+            raise RuntimeError('The model has not been fitted yet.')
+        return self.estimator_.decision_function(X)
+    
+    def predict(self,X):
+        """Return the predictions of the model for the rows of X."""
+        
+        if self.estimator_ is None:
+            raise RuntimeError('The model has not been fitted yet.')
+        return self.estimator_.predict(X)
+
+
+class AutoRLSClassifier(AutoRLSRegressor):
+    """RLS classification with the solver chosen by plan_solver(). Labels are
+    coded as in RLSClassifier; see AutoRLSRegressor for the arguments.
+    """
+    
+    _classifier = True
+    
+    def _n_outputs(self,X,y):
+        classes = np.unique(np.asarray(y).ravel())
+        return 1 if len(classes) <= 2 else len(classes)
+    
+    @property
+    def classes_(self):
+        return self.estimator_.classes_
+    
+    def score(self,X,y):
+        """Return the accuracy on inputs X and labels y."""
+        
+        return np.mean(self.predict(X) == np.asarray(y).ravel())
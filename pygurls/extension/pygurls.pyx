@@ -44,22 +44,66 @@ Cython wrapper that allows GURLS++ to be called natively from within Python.
 @author: Pedro Santana (psantana@mit.edu).
 """ 
 
+import collections
+import threading
 import numpy as np
 cimport numpy as np
 import scipy.io
 from cython.view cimport array as cvarray
 from libcpp.vector cimport vector
+from libcpp.string cimport string
+from libcpp cimport bool as cbool
+from libc.string cimport memcpy
+
+np.import_array()
+
+#Element types of the matrices stored in a GurlsOptionsList
+cdef extern from "gurls++/optmatrix.h" namespace "gurls::OptMatrixBase":
+    cdef enum MatrixType:
+        FLOAT, DOUBLE, ULONG
+
+#Types of the options in a GurlsOptionsList
+cdef extern from "gurls++/options.h" namespace "gurls":
+    cdef enum OptTypes:
+        StringOption, NumberOption, MatrixOption, OptListOption
+
+#Measurements of the tasks of a GURLS++ run
+cdef extern from "gurls++/taskprofile.h" namespace "gurls":
+    cdef cppclass TaskMatrix:
+        string name
+        unsigned long rows
+        unsigned long cols
+        unsigned long bytes
+    cdef cppclass TaskProfile:
+        unsigned long index
+        string field
+        string task
+        string action
+        double wall
+        double cpu
+        long rssDelta
+        vector[TaskMatrix] matrices
 
 #Declares the C++ wrapper class
 cdef extern from "pygurls_wrapper.h" namespace "gurls":
+    ctypedef void (*task_event_fn)(void*, cbool, const TaskProfile&)
     cdef cppclass PyGURLSWrapper:
         PyGURLSWrapper() except +               
         PyGURLSWrapper(char*) except +
-        const vector[double] get_opt_field(char*,char*) except +        
-        const vector[double] get_field(char*) except +
-        void add_data(vector[double]&, unsigned long, unsigned long, char*) except +             
-        void load_data(char*, char*) except +             
-        vector[double] get_data_vec(char*) except +
+        void* get_opt_field(char*, char*, unsigned long&, unsigned long&, int&) except +
+        void* get_field(char*, unsigned long&, unsigned long&, int&) except +
+        double get_number(char*) except +
+        void set_number(char*, double) except +
+        void set_string(char*, char*) except +
+        void erase_field(char*) except +
+        void set_matrix(char*, void*, unsigned long, unsigned long, int) except +
+        int get_field_type(char*) except +
+        string get_string(char*) except +
+        vector[string] get_field_names(char*) except +
+        vector[string] get_task_sequence() except +
+        void add_data(void*, unsigned long, unsigned long, char*) nogil except +
+        void load_data(char*, char*) nogil except +
+        void* get_data(char*, unsigned long&, unsigned long&) except +
         void erase_data(char*) except +
         void set_task_sequence(char*) except +
         void clear_task_sequence() except +
@@ -68,68 +112,356 @@ cdef extern from "pygurls_wrapper.h" namespace "gurls":
         void clear_processes() except +
         void build_pipeline(char*, bool) except +
         void clear_pipeline() except +
-        int  run(char*, char*, char*) except +   
-        unsigned long get_num_rows() except +
-        unsigned long get_num_cols() except +
-        
+        int  run(char*, char*, char*) nogil except +
+        const vector[TaskProfile]& last_run_profile()
+        void set_task_callback(task_event_fn, void*)
+        int  run_tasks(char*, char*, char*) nogil except +
+        void predict(char*, char*, void*, unsigned long, unsigned long, 
+                     unsigned long, double) nogil except +
+        void factorize(char*) nogil except +
+        void stream_init(unsigned long, unsigned long) except +
+        void stream_add(void*, void*, unsigned long, unsigned long, 
+                        unsigned long, bint) nogil except +
+        void stream_solve(double, bint) nogil except +
+        void* detach_field(char*) except +
+        void* detach_data(char*) except +
+        vector[void*] get_field_buffers() except +
+    void free_matrix(void*, int)
         
+
+cdef dict _profile_record(const TaskProfile& p):
+    """Python record of the profile of a task."""
+    
+    cdef size_t i
+    matrices = [{'name':p.matrices[i].name,'rows':p.matrices[i].rows,
+                 'cols':p.matrices[i].cols,'bytes':p.matrices[i].bytes}
+                for i in range(p.matrices.size())]
+    return {'index':p.index,'field':p.field,'task':p.task,'action':p.action,
+            'wall':p.wall,'cpu':p.cpu,'rss_delta':p.rssDelta,
+            'matrices':matrices}
+
+cdef void _task_event(void* user, cbool end, const TaskProfile& p) with gil:
+    """Forward a task event of GURLS++ to the callback of a PyGURLS object. 
+    Exceptions cannot cross GURLS++: the first one is kept and raised by 
+    run() once the process is over."""
+    
+    cdef PyGURLS pg = <PyGURLS>user
+    try:
+        pg._task_callback('end' if end else 'start',_profile_record(p))
+    except BaseException as e:
+        if pg._callback_error is None:
+            pg._callback_error = e
+
+
+cdef class _MatrixOwner:
+    """Owns a GURLS++ matrix handed over by detach_field or detach_data, and
+    deletes it once the last NumPy view over its buffer (and the PyGURLS 
+    object, while its options or data still read the buffer) is gone."""
+    
+    cdef void *mat
+    cdef int cell_type
+    
+    def __dealloc__(self):
+        if self.mat != NULL:
+            free_matrix(self.mat,self.cell_type)
+
+
+cdef _MatrixOwner _own_matrix(void *mat,int cell_type):
+    cdef _MatrixOwner owner = _MatrixOwner()
+    owner.mat = mat
+    owner.cell_type = cell_type
+    return owner
+
+
+#Options structure fields saved by save_model besides the numeric and 
+#string options at the top level
+_MODEL_FIELDS = ['optimizer','paramsel','kernel']
+#Fields that are either recomputed on new data or tied to the training run
+_MODEL_SKIP = ['name','savefile','kernel.K','kernel.distance','kernel.Q',
+               'kernel.L','kernelcache','kernelcachesize']
+
+
 cdef class PyGURLS:
-    """Class that provides a Python interface to GURLS++."""
+    """Class that provides a Python interface to GURLS++.
+    
+    Concurrency: run and load_data release the GIL while GURLS++ works, so
+    independent PyGURLS instances can train or predict in parallel threads.
+    Calls on the same instance are serialized by a per-instance lock that
+    protects its data and options. Since GURLS++ saves and loads the option
+    structure to a file named after the pipeline, instances running
+    concurrently in the same folder must be built with different pipeline 
+    names.
+    """
     cdef PyGURLSWrapper *thisptr
+    cdef readonly object dtype #NumPy dtype of the matrices handed to GURLS++
+    cdef dict _buffers #NumPy arrays or _MatrixOwners of the data, by data id
+    cdef dict _field_owners #_MatrixOwners of the viewed fields, by address
+    cdef object _lock #serializes access to the data and options of GURLS++
+    cdef list _processes #[name, actions] of the processes, for save_model
+    cdef list _model_buffers #matrices of a loaded model wrapped by GURLS++
+    cdef public object n_jobs #workers of the kernel parameter grids
+    cdef public object max_memory #memory budget of the workers, in bytes
+    cdef public object cache_dir #directory of the on-disk kernel cache
+    cdef public object cache_size #size budget of the kernel cache, in bytes
+    cdef object _task_callback #called on task events, see set_task_callback
+    cdef object _callback_error #first exception raised by _task_callback
         
-    def __cinit__(self,data_type=None,*args,**kwargs):
+    def __cinit__(self,data_type=None,n_jobs=1,max_memory=None,cache_dir=None,
+                  cache_size=None,*args,**kwargs):
         """Constructor.
 
         Optional arguments:
-        data_type -- either 'double' (default) or 'float'
+        data_type -- either 'double' (default) or 'float'. With 'float', data
+                     is stored, processed and returned in single precision 
+                     (float32) throughout the pipeline.
+        n_jobs -- number of kernel parameters (sigma) evaluated concurrently 
+                  by the rbf parameter selections siglam and siglamho. 
+                  Defaults to 1, all the processors if <= 0.
+        max_memory -- memory budget in bytes of the concurrent evaluations, 
+                      each of which needs a few n x n matrices. n_jobs is 
+                      reduced to fit in it. Unlimited if None (default).
+        cache_dir -- directory of an on-disk cache of the kernel, distance 
+                     and eigendecomposition matrices, shared by the runs 
+                     on the same data (see kernel_cache_stats). Disabled 
+                     if None (default).
+        cache_size -- size budget of cache_dir in bytes, beyond which the 
+                      least recently used entries are removed. Unlimited 
+                      if None (default).
+        The last four are also attributes, whose changes apply from the next
+        run, run_tasks or predict on.
         """        
                 
         if data_type != None:
             self.thisptr = new PyGURLSWrapper(data_type) 
         else:
             self.thisptr = new PyGURLSWrapper() 
+        self.dtype = np.dtype('float32' if data_type == 'float' else 'float64')
+        self._buffers = {}
+        self._field_owners = {}
+        self._lock = threading.RLock()
+        self._processes = []
+        self._model_buffers = []
+        self.n_jobs = n_jobs
+        self.max_memory = max_memory
+        self.cache_dir = cache_dir
+        self.cache_size = cache_size
             
     def __dealloc__(self):
         """Destructor."""
         
         del self.thisptr
     
-    def _gMat2D_to_np(self,gMat2D_vec):
-        """Convert from gMat2D type (GURLS++) to 2D NumPy array."""
+    cdef object _gMat2D_to_np(self,void *buf,unsigned long rows,
+                              unsigned long cols,int cell_type,bint copy,
+                              object owner=None):
+        """Convert from gMat2D type (GURLS++) to NumPy array.
+        
+        If copy is True, the array is an independent copy. Otherwise it is a
+        read-only view over the GURLS++ buffer whose base is owner, the 
+        object that keeps the buffer alive (see _field_owner); with no owner
+        the view is only valid while the lock is held. Vectors (rows or cols 
+        equal to 1) are returned as 1D arrays.
+        """
         
-        vec_mat = np.array(gMat2D_vec)
-        rows = self.thisptr.get_num_rows();
-        cols = self.thisptr.get_num_cols();         
+        cdef np.npy_intp shape[2]
+        cdef int type_num
+        shape[0] = <np.npy_intp>rows
+        shape[1] = <np.npy_intp>cols
+        
+        if cell_type == FLOAT:
+            type_num = np.NPY_FLOAT
+        elif cell_type == DOUBLE:
+            type_num = np.NPY_DOUBLE
+        else:
+            type_num = np.NPY_ULONG
+        
+        mat = np.PyArray_New(np.ndarray,2,shape,type_num,NULL,buf,0,
+                             np.NPY_ARRAY_F_CONTIGUOUS|np.NPY_ARRAY_ALIGNED,None)
+        if copy:
+            mat = mat.copy(order='F')
+        elif owner is not None:
+            np.set_array_base(mat,owner)
         if (rows > 1) and (cols > 1):
-            return vec_mat.reshape((rows,cols),order='F')        
+            return mat
         else:
-            return vec_mat
+            return mat.reshape(-1,order='F')
+    
+    cdef object _field_owner(self,field,void *buf,int cell_type):
+        """Object that keeps buf, the buffer of the matrix at field, alive: 
+        the array it was loaded from by load_model, or a _MatrixOwner of the
+        matrix, which GURLS++ hands over the first time the field is viewed.
+        The PyGURLS object holds the _MatrixOwners while its options read 
+        their buffers, and the views hold them after that."""
+        
+        cdef void *detached
+        address = <size_t>buf
+        owner = self._field_owners.get(address)
+        if owner is not None:
+            return owner
+        for mat in self._model_buffers:
+            if mat.__array_interface__['data'][0] == address:
+                return mat
+        self._release_field_owners()
+        detached = self.thisptr.detach_field(field)
+        if detached == NULL: #not owned by GURLS++, nor by a known array
+            return None
+        owner = _own_matrix(detached,cell_type)
+        self._field_owners[address] = owner
+        return owner
+    
+    cdef _release_field_owners(self):
+        """Drop the _MatrixOwners whose buffers the options no longer read,
+        e.g. after their field was recomputed or erased. The matrices are 
+        deleted with the last view over them."""
+        
+        cdef vector[void*] buffers
+        cdef size_t i
+        if not self._field_owners:
+            return
+        buffers = self.thisptr.get_field_buffers()
+        in_use = set()
+        for i in range(buffers.size()):
+            in_use.add(<size_t>buffers[i])
+        for address in list(self._field_owners):
+            if address not in in_use:
+                del self._field_owners[address]
     
-    def get_field(self,field):    
-        """Return field within a GurlsOptionsList structure."""        
+    cdef object _field_to_np(self,field,void *buf,unsigned long rows,
+                             unsigned long cols,int cell_type,bint copy):
+        """Return the matrix at field as a NumPy array (see get_field)."""
         
-        return self._gMat2D_to_np(self.thisptr.get_field(field))
+        owner = None if copy else self._field_owner(field,buf,cell_type)
+        return self._gMat2D_to_np(buf,rows,cols,cell_type,owner is None,owner)
     
-    def get_option_field(self,option,field):
-        """Return field within nested option in a GurlsOptionsList structure."""        
+    def get_field(self,field,copy=False):    
+        """Return field within a GurlsOptionsList structure.
         
-        return self._gMat2D_to_np(self.thisptr.get_opt_field(option,field))
+        Matrices are returned as read-only views over GURLS++ memory, without
+        copying them. A view keeps its matrix alive: when the field is 
+        recomputed by a task, set or erased, or the pipeline is cleared or 
+        replaced by load_model, GURLS++ goes on with a new matrix and the 
+        view keeps the values it had.
+        
+        Optional arguments:
+        copy -- if True, return an independent, writeable copy instead.
+        """        
+        
+        cdef unsigned long rows, cols
+        cdef int cell_type
+        cdef void *buf
+        with self._lock:
+            buf = self.thisptr.get_field(field,rows,cols,cell_type)
+            if buf == NULL: #numeric option
+                return np.array([self.thisptr.get_number(field)],dtype=self.dtype)
+            return self._field_to_np(field,buf,rows,cols,cell_type,copy)
+    
+    def get_option_field(self,option,field,copy=False):
+        """Return field within nested option in a GurlsOptionsList structure.
+        
+        See get_field for the lifetime of the returned array.
+        
+        Optional arguments:
+        copy -- if True, return an independent, writeable copy instead.
+        """        
+        
+        cdef unsigned long rows, cols
+        cdef int cell_type
+        cdef void *buf
+        path = option+'.'+field
+        with self._lock:
+            buf = self.thisptr.get_opt_field(option,field,rows,cols,cell_type)
+            if buf == NULL: #numeric option, e.g. paramsel.sigma
+                return np.array([self.thisptr.get_number(path)],dtype=self.dtype)
+            return self._field_to_np(path,buf,rows,cols,cell_type,copy)
                          
-    def add_data(self,mat2D, data_id):
-        """Add 2D NumPy array to GURLS++ pipeline with id=data_id."""
+    def set_option(self,field,value):
+        """Set a numeric or string option of the GURLS++ pipeline.
         
-        mat = np.reshape(mat2D,(mat2D.shape[0],1)) if len(mat2D.shape) == 1 else mat2D
-                
-        cdef vector[double] vec_mat = mat.flatten('F')       
-        self.thisptr.add_data(vec_mat,
-                              <unsigned long>mat.shape[0],
-                              <unsigned long>mat.shape[1],
-                              data_id)             
+        field is a dot-separated path within the options structure, e.g. 
+        'nlambda' or 'randfeats.D'. The pipeline must have been built.
+        """
+        
+        with self._lock:
+            if isinstance(value,basestring):
+                self.thisptr.set_string(field,value)
+            else:
+                self.thisptr.set_number(field,<double>value)
+    
+    def erase_field(self,field):
+        """Remove field (dot-separated path) from the options structure."""
+        
+        with self._lock:
+            self.thisptr.erase_field(field)
+            self._release_field_owners()
+    
+    def add_data(self,mat2D, data_id, copy=True):
+        """Add 2D NumPy array to GURLS++ pipeline with id=data_id.
+        
+        Fortran-ordered arrays of the same dtype as the pipeline (float64 for
+        'double', float32 for 'float') are handed to GURLS++ without copying:
+        GURLS++ reads straight from the NumPy buffer, and a reference to the
+        array is held until the data is erased or replaced. The array must 
+        not be modified in the meantime.
+        
+        Optional arguments:
+        copy -- if True (default), C-ordered, strided or differently typed
+                arrays are copied once into a Fortran-ordered buffer of the
+                right dtype. If False, such arrays raise a ValueError.
+        """
+        
+        mat = np.asarray(mat2D)
+        if mat.ndim == 1:
+            mat = mat.reshape((mat.shape[0],1))
+        if mat.ndim != 2:
+            raise ValueError('Expected a 1D or 2D array, got %dD.'%(mat.ndim))
+        if mat.size == 0:
+            raise ValueError('Cannot add an empty matrix to GURLS++.')
+        
+        if not (mat.flags.f_contiguous and mat.dtype == self.dtype):
+            if not copy:
+                raise ValueError('Zero-copy add_data needs a Fortran-ordered '
+                                 '%s array (use copy=True).'%(self.dtype.name))
+            mat = np.asfortranarray(mat,dtype=self.dtype) 
+        
+        with self._lock:
+            self._add_buffer(mat,data_id)
+        
+    cdef void* _buffer_ptr(self,mat) except NULL:
+        """Address of the data of a Fortran-ordered array of type self.dtype.
+        
+        The caller must keep a reference to mat while the address is in use.
+        """
+        
+        cdef const double[::1,:] mv_double 
+        cdef const float[::1,:] mv_float        
+        
+        if self.dtype == np.float64:
+            mv_double = mat
+            return <void*>&mv_double[0,0]
+        else:
+            mv_float = mat
+            return <void*>&mv_float[0,0]
+    
+    cdef _add_buffer(self,mat,data_id):
+        """Wrap a Fortran-ordered array of type self.dtype as a gMat2D."""
+        
+        cdef void *buf = self._buffer_ptr(mat)
+        cdef unsigned long rows = mat.shape[0], cols = mat.shape[1]
+        cdef char *c_data_id = data_id
+        
+        with nogil:
+            self.thisptr.add_data(buf,rows,cols,c_data_id)
+        self._buffers[data_id] = mat #keeps the buffer alive
              
     def load_data(self,data_file,data_id):                
         """Load file=data_file and add to GURLS++ pipeline with id=data_id."""
                 
-        self.thisptr.load_data(data_file,data_id)         
+        cdef char *c_data_file = data_file
+        cdef char *c_data_id = data_id
+        with self._lock:
+            with nogil:
+                self.thisptr.load_data(c_data_file,c_data_id)         
+            self._buffers.pop(data_id,None)
 
     def import_mat_file(self,mat_file,var_names=[]):           
         """Load MATLAB workspace file mat_file as Python dictionary.
@@ -145,15 +477,40 @@ cdef class PyGURLS:
             data_dic = scipy.io.loadmat(mat_file,appendmat=True)        
         return data_dic 
     
-    def get_data(self,data_id):
-        """Retrieve 2D matrix from GURLS++ with id=data_id as NumPy array."""        
+    def get_data(self,data_id,copy=False):
+        """Retrieve 2D matrix from GURLS++ with id=data_id as NumPy array.
+        
+        The array is a read-only view over the matrix, which keeps it alive: 
+        it stays valid, with the values it had, after the data is erased or 
+        replaced.
         
-        return self._gMat2D_to_np(self.thisptr.get_data_vec(data_id))        
+        Optional arguments:
+        copy -- if True, return an independent, writeable copy instead.
+        """        
+        
+        cdef unsigned long rows, cols
+        cdef void *buf
+        cdef void *detached
+        cell_type = FLOAT if self.dtype == np.float32 else DOUBLE
+        with self._lock:
+            buf = self.thisptr.get_data(data_id,rows,cols)
+            owner = None
+            if not copy:
+                owner = self._buffers.get(data_id)
+                if owner is None: #loaded by GURLS++, which hands it over
+                    detached = self.thisptr.detach_data(data_id)
+                    if detached != NULL:
+                        owner = _own_matrix(detached,cell_type)
+                        self._buffers[data_id] = owner
+            return self._gMat2D_to_np(buf,rows,cols,cell_type,owner is None,
+                                      owner)
         
     def erase_data(self,data_id):
         """Remove 2D matrix from GURLS++ with id=data_id."""
         
-        self.thisptr.erase_data(data_id)        
+        with self._lock:
+            self.thisptr.erase_data(data_id)        
+            self._buffers.pop(data_id,None)
         
     def set_task_sequence(self,task_list):
         """Set the sequence of tasks in the GURLS++ opt. pipeline.
@@ -161,54 +518,432 @@ cdef class PyGURLS:
         task_list = [ ['opt_1','arg_1'], ['opt_2','arg_2'], ... ]        
         """
         
-        str_list = [p[0]+":"+p[1] for p in task_list]    
-        self.thisptr.set_task_sequence("\n".join(str_list))
+        with self._lock:
+            str_list = [p[0]+":"+p[1] for p in task_list]    
+            self.thisptr.set_task_sequence("\n".join(str_list))
     
     def clear_task_sequence(self):
         """Clear the sequence of tasks in the GURLS++ opt. pipeline."""
         
-        self.thisptr.clear_task_sequence()
+        with self._lock:
+            self.thisptr.clear_task_sequence()
     
     def add_process(self,p_name,opt_str_list):
         """Add an optimization process to GURLS++."""
         
-        self.thisptr.add_process(p_name,"\n".join(opt_str_list))
+        with self._lock:
+            self.thisptr.add_process(p_name,"\n".join(opt_str_list))
+            self._processes.append([p_name,list(opt_str_list)])
     
     def init_processes(self,p_name,use_default):     
         """Initialize list of GURLS++ optimization processes."""
         
-        self.thisptr.init_processes(p_name,use_default)   
+        with self._lock:
+            self.thisptr.init_processes(p_name,use_default)   
+            self._processes = []
     
     def clear_processes(self):        
         """Clear list of GURLS++ optimization processes."""
         
-        self.thisptr.clear_processes()
+        with self._lock:
+            self.thisptr.clear_processes()
     
     def build_pipeline(self,p_name,use_default):
         """Build the GURLS++ optimization pipeline."""
         
-        self.thisptr.build_pipeline(p_name,use_default)
+        with self._lock:
+            self.thisptr.build_pipeline(p_name,use_default)
+            self._set_workers()
+    
+    cdef _set_workers(self):
+        """Pass n_jobs, max_memory and the kernel cache to the options of the
+        pipeline, removing those that were reset to None. Called before the 
+        tasks run, so that the attributes can be changed at any time."""
+        
+        names = list(self.thisptr.get_field_names(''))
+        self.thisptr.set_number('njobs',<double>self.n_jobs)
+        for name,value in [('maxmemory',self.max_memory),
+                           ('kernelcachesize',self.cache_size)]:
+            if value is not None:
+                self.thisptr.set_number(name,<double>value)
+            elif name in names:
+                self.thisptr.erase_field(name)
+        if self.cache_dir is not None:
+            self.thisptr.set_string('kernelcache',self.cache_dir)
+        elif 'kernelcache' in names:
+            self.thisptr.erase_field('kernelcache')
     
     def clear_pipeline(self):
         """Clear the GURLS++ optimization pipeline."""
         
-        self.thisptr.clear_pipeline()
+        with self._lock:
+            self.thisptr.clear_pipeline()
+            self._model_buffers = []
+            self._release_field_owners()
     
     def run(self,in_data_id, out_data_id, job_id):
         """Run a process with given input and output data.
         
+        The GIL is released while the process runs.
+        
         Mandatory arguments:
         in_data_id -- string id of the input data.
         out_data_id -- string id of the output data.
         job_id -- string id of the process to be executed.   
         """
         
-        return self.thisptr.run(in_data_id,out_data_id,job_id)    
+        cdef char *c_in_data_id = in_data_id
+        cdef char *c_out_data_id = out_data_id
+        cdef char *c_job_id = job_id
+        cdef int ret
+        with self._lock:
+            self._set_workers()
+            self._callback_error = None
+            with nogil:
+                ret = self.thisptr.run(c_in_data_id,c_out_data_id,c_job_id)
+            self._release_field_owners()
+            if self._callback_error is not None:
+                error, self._callback_error = self._callback_error, None
+                raise error
+        return ret
+    
+    def last_run_profile(self):
+        """Return the measurements of each task of the last run(), a list of
+        records (dictionaries) in sequence order with the keys
+            index, field, task -- position, field (kernel, paramsel, ...) and
+                                  name (linear, siglam, ...) of the task;
+            action -- 'ignore', 'compute', 'computeNsave' or 'load';
+            wall, cpu -- elapsed and processor time in seconds (the 
+                         processor time of all the threads of the process);
+            rss_delta -- growth in bytes of the peak resident memory of the 
+                         process (0 when the task stays below the previous 
+                         peak, or where it is not measured);
+            matrices -- name ('kernel.K', ...), rows, cols and bytes of the
+                        matrices in the field of the task after it.
+        If the last run failed, the list stops at the failing task.
+        """
+        
+        cdef vector[TaskProfile] profile
+        cdef size_t i
+        with self._lock:
+            profile = self.thisptr.last_run_profile()
+            return [_profile_record(profile[i]) for i in range(profile.size())]
+    
+    def set_task_callback(self,callback):
+        """Call callback(event,record) when each task of run() starts 
+        (event 'start') and ends (event 'end'), e.g. to forward the 
+        measurements to a metrics system. record is as in last_run_profile,
+        with zero measurements and no matrices at the start. callback runs 
+        in the thread of run(), with the GIL, and must not use this PyGURLS
+        object; if it raises, the process still completes and run() raises
+        the exception. None removes the callback.
+        """
+        
+        with self._lock:
+            self._task_callback = callback
+            if callback is None:
+                self.thisptr.set_task_callback(NULL,NULL)
+            else:
+                self.thisptr.set_task_callback(_task_event,<void*>self)
+    
+    def run_tasks(self,in_data_id,fields,out_data_id=None):
+        """Run selected tasks on the given input data.
+        
+        The tasks listed in fields are executed in memory and in that order,
+        on top of the options left by previous runs. An entry of fields is 
+        either the field name of a task of the sequence (e.g., 
+        ['predkernel','pred']) or a 'field:task' string (e.g., 
+        'paramsel:loocvdual'), which runs that task whether or not it is in
+        the sequence. Nothing is loaded from or saved to disk. The GIL is
+        released while the tasks run.
+        
+        Mandatory arguments:
+        in_data_id -- string id of the input data.
+        fields -- list of field names or 'field:task' strings.
         
+        Optional arguments:
+        out_data_id -- string id of the labels, if the tasks need them 
+                       (e.g., paramsel and optimizer). None by default.
+        """
+        
+        fields_str = "\n".join(fields)
+        out_id = out_data_id if out_data_id is not None else ''
+        cdef char *c_in_data_id = in_data_id
+        cdef char *c_out_data_id = out_id
+        cdef char *c_fields = fields_str
+        cdef int ret
+        with self._lock:
+            self._set_workers()
+            with nogil:
+                ret = self.thisptr.run_tasks(c_in_data_id,c_out_data_id,c_fields)
+            self._release_field_owners()
+        return ret
     
+    def predict(self,data_id,out=None,max_memory=None,block_rows=None,
+                fields=('predkernel','pred')):
+        """Predict the outputs of the trained model for the input data.
         
+        The prediction tasks are run on blocks of consecutive rows of the 
+        data, and the predictions of each block are written into a 
+        preallocated n x T output, so that only a block and its test kernel 
+        (block rows x training samples, for dual models) are held in memory
+        at once. No labels nor perf task are involved. The GIL is released 
+        while the tasks run.
         
+        Mandatory arguments:
+        data_id -- string id of the input data (see add_data; with 
+                   copy=False, a memmap input is read block by block).
         
+        Optional arguments:
+        out -- None (default) to allocate the output, the path of a file to 
+               create as a NumPy memmap, or an existing Fortran-ordered n x T
+               array (or memmap) of the pipeline dtype, written in place.
+        max_memory -- memory budget in bytes of a block, which sets its 
+                      number of rows. None (default) for a single block.
+        block_rows -- number of rows of a block, overrides max_memory.
+        fields -- prediction tasks to run on each block, the last of which 
+                  gives the predictions (default ['predkernel','pred']).
         
+        Returns out.
+        """
         
+        cdef unsigned long rows, cols, n_out
+        cdef unsigned long c_block_rows = block_rows if block_rows is not None else 0
+        cdef double c_max_memory = max_memory if max_memory is not None else 0.0
+        cdef void *out_buf
+        fields_str = "\n".join(fields)
+        cdef char *c_data_id = data_id
+        cdef char *c_fields = fields_str
+        with self._lock:
+            self.thisptr.get_data(data_id,rows,cols)
+            n_out = self._n_outputs()
+            if out is None:
+                out = np.empty((rows,n_out),dtype=self.dtype,order='F')
+            elif isinstance(out,basestring):
+                out = np.memmap(out,dtype=self.dtype,mode='w+',
+                                shape=(rows,n_out),order='F')
+            elif (out.shape != (rows,n_out) or out.dtype != self.dtype or 
+                  not out.flags.f_contiguous or not out.flags.writeable):
+                raise ValueError('out must be a writeable Fortran-ordered '
+                                 '%d x %d array of %s.'%(rows,n_out,self.dtype))
+            if out.size > 0:
+                out_buf = np.PyArray_DATA(<np.ndarray>out)
+                self._set_workers()
+                with nogil:
+                    self.thisptr.predict(c_data_id,c_fields,out_buf,rows,n_out,
+                                         c_block_rows,c_max_memory)
+                self._release_field_owners()
+        return out
+    
+    cdef unsigned long _n_outputs(self) except? 0:
+        """Number of outputs of the trained model, i.e., the columns of the
+        coefficients optimizer.C (dual) or optimizer.W (primal, and linear 
+        dual models, whose C may be empty)."""
+        
+        cdef unsigned long rows, cols, n_out = 0
+        cdef int cell_type
+        names = list(self.thisptr.get_field_names('optimizer'))
+        for name in ['C','W']:
+            if name in names:
+                self.thisptr.get_field('optimizer.'+name,rows,cols,cell_type)
+                n_out = max(n_out,cols)
+        if n_out == 0:
+            raise RuntimeError('The model has not been trained yet.')
+        return n_out
+    
+    def factorize(self,data_id):
+        """Cache the eigendecomposition of the kernel for the input data.
         
+        The decomposition of kernel.K (dual formulation, the kernel task must
+        have been run) or of X'X (primal formulation) is stored in the kernel 
+        field. The paramsel loocvdual/loocvprimal and optimizer 
+        rlsdual/rlsprimal tasks then reuse it, so that every new label matrix
+        for the same inputs (see run_tasks with out_data_id) only costs a few
+        matrix products and the scan of the lambda guesses. Erase the kernel 
+        field when the inputs change.
+        """
+        
+        cdef char *c_data_id = data_id
+        with self._lock:
+            with nogil:
+                self.thisptr.factorize(c_data_id)
+
+
+    def fit_stream(self,chunks,fixed_lambda=None,center=False,
+                   random_state=0):
+        """Train a linear primal RLS model on a stream of data blocks.
+        
+        chunks is an iterable of (X_block, Y_block) pairs, e.g. a generator
+        reading a large file piece by piece. Only X'X and X'Y are accumulated
+        (in the kernel field), so memory is O(d^2) whatever the number of 
+        samples. A fraction hoproportion of the rows of every block is held
+        out to select lambda among nlambda guesses by mean squared error, 
+        and the final estimator is trained on all rows. The paramsel and 
+        optimizer fields are filled as by paramsel:hoprimal and 
+        optimizer:rlsprimal, so pred:primal (e.g., through run_tasks) and
+        save_model work as after run. The pipeline must have been built. 
+        Returns the number of samples.
+        
+        Optional arguments:
+        fixed_lambda -- if given, use this lambda and hold out no rows.
+        center -- if True, center inputs and outputs around their means, 
+                  which are stored in kernel.Xmean and kernel.ymean. New 
+                  inputs must then be centered before prediction.
+        random_state -- seed of the selection of the held-out rows.
+        """
+        
+        cdef unsigned long n, d = 0, t = 0
+        cdef bint validation, c_center = center
+        cdef double lam = 0.0 if fixed_lambda is None else fixed_lambda
+        cdef void *X_buf
+        cdef void *Y_buf
+        rng = np.random.RandomState(random_state)
+        with self._lock:
+            hoproportion = self.thisptr.get_number('hoproportion')
+            started = False
+            for X_block,Y_block in chunks:
+                X_block = np.atleast_2d(np.asarray(X_block))
+                Y_block = np.asarray(Y_block)
+                Y_block = Y_block.reshape((Y_block.shape[0],-1))
+                if X_block.shape[0] != Y_block.shape[0]:
+                    raise ValueError('X and Y blocks must have the same number of rows.')
+                if not started:
+                    d, t = X_block.shape[1], Y_block.shape[1]
+                    self.thisptr.stream_init(d,t)
+                    started = True
+                
+                if fixed_lambda is None:
+                    held_out = rng.rand(X_block.shape[0]) < hoproportion
+                    parts = [(X_block[~held_out],Y_block[~held_out],False),
+                             (X_block[held_out],Y_block[held_out],True)]
+                else:
+                    parts = [(X_block,Y_block,False)]
+                for X_part,Y_part,validation in parts:
+                    if X_part.shape[0] == 0:
+                        continue
+                    X_part = np.asfortranarray(X_part,dtype=self.dtype)
+                    Y_part = np.asfortranarray(Y_part,dtype=self.dtype)
+                    X_buf = self._buffer_ptr(X_part)
+                    Y_buf = self._buffer_ptr(Y_part)
+                    n = X_part.shape[0]
+                    if X_part.shape[1] != d or Y_part.shape[1] != t:
+                        raise ValueError('All blocks must have the same number of columns.')
+                    with nogil:
+                        self.thisptr.stream_add(X_buf,Y_buf,n,d,t,validation)
+            if not started:
+                raise ValueError('The stream holds no data.')
+            
+            with nogil:
+                self.thisptr.stream_solve(lam,c_center)
+            return int(self.thisptr.get_number('kernel.n') + 
+                       self.thisptr.get_number('kernel.nva'))
+    
+    def save_model(self,path,meta=None):
+        """Save the trained model to the binary file path.
+        
+        Only what is needed to predict is written: the optimizer, kernel and
+        paramsel fields (without the training kernel matrix), the numeric 
+        and string options, the task sequence and the processes. Matrices 
+        keep their element type (index matrices are unsigned integers) and 
+        are stored in column-major order, aligned so that load_model can 
+        memory-map them.
+        
+        Optional arguments:
+        meta -- JSON-serializable dictionary stored along with the model and
+                returned by load_model.
+        """
+        
+        with self._lock:
+            tasks = self.thisptr.get_task_sequence()
+            header = {'format':_MODEL_FORMAT,
+                      'data_type':'float' if self.dtype == np.float32 else 'double',
+                      'name':self.thisptr.get_string('name'),
+                      'tasks':tasks,
+                      'processes':self._processes,
+                      'numbers':{},'strings':{},
+                      'meta':meta or {}}
+            skip = list(_MODEL_SKIP)
+            if not any(t.startswith('predkernel:') for t in tasks):
+                skip.append('optimizer.X') #only kernels on new data need it
+            matrices = []
+            self._collect_model_fields('',header,matrices,skip)
+            _write_model_file(path,header,matrices)
+    
+    cdef _collect_model_fields(self,prefix,header,matrices,skip):
+        """Add the fields of the options list at prefix to a model header."""
+        
+        cdef unsigned long rows, cols
+        cdef int cell_type
+        cdef void *buf
+        cdef list names = self.thisptr.get_field_names(prefix)
+        for name in names:
+            field = prefix+'.'+name if prefix else name
+            if field in skip:
+                continue
+            field_type = self.thisptr.get_field_type(field)
+            if field_type == NumberOption:
+                header['numbers'][field] = self.thisptr.get_number(field)
+            elif field_type == StringOption:
+                header['strings'][field] = self.thisptr.get_string(field)
+            elif field_type == MatrixOption and (prefix or name in _MODEL_FIELDS):
+                #whatever its element type, so index matrices are kept too
+                buf = self.thisptr.get_field(field,rows,cols,cell_type)
+                mat = self._gMat2D_to_np(buf,rows,cols,cell_type,False)
+                matrices.append((field,mat.reshape((rows,cols),order='F')))
+            elif field_type == OptListOption and (prefix or name in _MODEL_FIELDS):
+                self._collect_model_fields(field,header,matrices,skip)
+    
+    def load_model(self,path,mmap=True):
+        """Load a model saved by save_model and return its metadata.
+        
+        The pipeline is rebuilt with the saved task sequence and processes
+        and the trained fields are restored, so that run_tasks (or a process
+        that ignores the training tasks) can predict on new data right away.
+        Any previous pipeline is cleared.
+        
+        Optional arguments:
+        mmap -- if True (default), the matrices are memory-mapped from the 
+                file and used by GURLS++ in place, so loading is immediate 
+                and processes that load the same file share its memory. The
+                file must not be modified while the model is in use.
+        """
+        
+        cdef unsigned long rows, cols
+        cdef int cell_type
+        cdef np.ndarray arr
+        cdef void *buf
+        header,matrices = _read_model_file(path,mmap)
+        if header['data_type'] != ('float' if self.dtype == np.float32 else 'double'):
+            raise ValueError('The model was saved with data_type=%s.'%(header['data_type']))
+        
+        with self._lock:
+            self.thisptr.clear_pipeline()
+            self._model_buffers = []
+            self._release_field_owners()
+            self.thisptr.set_task_sequence("\n".join([str(t) for t in header['tasks']]))
+            self.thisptr.init_processes('processes',False)
+            self._processes = []
+            for p_name,actions in header['processes']:
+                self.thisptr.add_process(str(p_name),"\n".join([str(a) for a in actions]))
+                self._processes.append([str(p_name),[str(a) for a in actions]])
+            self.thisptr.build_pipeline(str(header['name']),True)
+            
+            for field,value in header['numbers'].items():
+                self.thisptr.set_number(str(field),value)
+            for field,value in header['strings'].items():
+                self.thisptr.set_string(str(field),str(value))
+            for field,mat in matrices.items():
+                arr,cell_type = _model_matrix(field,mat)
+                rows, cols = arr.shape[0], arr.shape[1]
+                buf = np.PyArray_DATA(arr) if arr.size > 0 else NULL
+                self.thisptr.set_matrix(field,buf,rows,cols,cell_type)
+                self._model_buffers.append(arr) #keeps the buffer alive
+        return header['meta']
+
+
+include "model_io.pxi"
+include "estimators.pxi"
+include "online.pxi"
+include "approx.pxi"
+include "kernel_cache.pxi"
+include "planner.pxi"
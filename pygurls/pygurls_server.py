@@ -0,0 +1,338 @@
+#!/usr/bin/env python
+#
+#  A Python wrapper for GURLS++.
+#
+#  Copyright (c) 2014 MIT. All rights reserved.
+#
+#   author: Pedro Santana
+#   e-mail: psantana@mit.edu
+#   website: people.csail.mit.edu/psantana
+#
+#  Redistribution and use in source and binary forms, with or without
+#  modification, are permitted provided that the following conditions
+#  are met:
+#
+#  1. Redistributions of source code must retain the above copyright
+#     notice, this list of conditions and the following disclaimer.
+#  2. Redistributions in binary form must reproduce the above copyright
+#     notice, this list of conditions and the following disclaimer in
+#     the documentation and/or other materials provided with the
+#     distribution.
+#  3. Neither the name(s) of the copyright holders nor the names of its 
+#     contributors or of the Massachusetts Institute of Technology may be 
+#     used to endorse or promote products derived from this software
+#     without specific prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+#  "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+#  LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+#  FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+#  COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+#  INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+#  BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS
+#  OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED
+#  AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+#  LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+#  ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+#  POSSIBILITY OF SUCH DAMAGE.
+#
+"""
+A Python wrapper for GURLS++.
+
+Micro-batching inference server for models saved by RLSRegressor.save and 
+RLSClassifier.save (requires Python 3.7). The models are loaded once and 
+served over a Unix socket or a TCP port. Concurrent requests for the same 
+model are coalesced into a batch of at most max_batch rows, waiting at most 
+max_wait seconds for the batch to fill, and every batch is predicted in a 
+worker thread (GURLS++ releases the GIL), off the event loop.
+
+The protocol is one JSON object per line, in both directions:
+    {"id": 1, "model": "digits", "x": [0.1, 0.2]}        one row
+    {"id": 2, "model": "digits", "x": [[...], [...]]}    several rows
+    -> {"id": 1, "y": [3]}  or  {"id": 1, "error": "..."}
+    {"id": 3, "stats": true}
+    -> {"id": 3, "stats": {"digits": {"requests": ..., "p50_ms": ...}}}
+Requests on one connection may be pipelined; responses carry the id of 
+their request and may come back in a different order. A request line longer
+than max_request bytes is skipped and answered with {"id": null, "error": 
+"..."}; the connection goes on with the next line.
+
+Usage: python pygurls_server.py -m NAME=PATH [-m NAME=PATH ...] 
+                                (-u SOCKET | -p PORT) [--max-batch N] 
+                                [--max-wait-ms T] [--threads N]
+                                [--max-request-mb S]
+
+@author: Pedro Santana (psantana@mit.edu).
+""" 
+import argparse
+import asyncio
+import collections
+import concurrent.futures
+import json
+import os
+import time
+import numpy as np
+import pygurls
+
+class LatencyStats(object):
+    """Request, row and batch counters and the latencies of the last 
+    `window` requests of a model."""
+    
+    def __init__(self,window=10000):
+        self.start = time.monotonic()
+        self.requests = 0
+        self.rows = 0
+        self.batches = 0
+        self.errors = 0
+        self.latencies = collections.deque(maxlen=window)
+    
+    def add_batch(self,latencies,rows):
+        """Record a batch of requests with the given latencies (seconds)."""
+        self.batches += 1
+        self.requests += len(latencies)
+        self.rows += rows
+        self.latencies.extend(latencies)
+    
+    def summary(self):
+        """Counters, throughput and p50/p99 latency in milliseconds."""
+        elap = time.monotonic()-self.start
+        lat = np.asarray(self.latencies)*1e3
+        return {'requests':self.requests,'rows':self.rows,
+                'batches':self.batches,'errors':self.errors,
+                'mean_batch':self.requests/float(max(self.batches,1)),
+                'requests_per_s':self.requests/elap if elap > 0 else 0.0,
+                'p50_ms':float(np.percentile(lat,50)) if lat.size else None,
+                'p99_ms':float(np.percentile(lat,99)) if lat.size else None}
+
+class ModelBatcher(object):
+    """Coalesces the requests for one model into micro-batches."""
+    
+    def __init__(self,model,executor,max_batch=64,max_wait=0.002):
+        self.model = model
+        self.executor = executor
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.stats = LatencyStats()
+        self._queue = asyncio.Queue()
+        self._task = asyncio.ensure_future(self._run())
+    
+    async def predict(self,X):
+        """Return the predictions for the rows of X, once its batch is done."""
+        future = asyncio.get_event_loop().create_future()
+        await self._queue.put((X,future,time.monotonic()))
+        return await future
+    
+    async def _next_batch(self):
+        """Wait for a request, then gather more until the batch is full or 
+        max_wait has passed since the first one."""
+        batch = [await self._queue.get()]
+        rows = batch[0][0].shape[0]
+        deadline = time.monotonic()+self.max_wait
+        while rows < self.max_batch:
+            timeout = deadline-time.monotonic()
+            if timeout <= 0 and self._queue.empty():
+                break
+            try:
+                item = (self._queue.get_nowait() if timeout <= 0 else
+                        await asyncio.wait_for(self._queue.get(),timeout))
+            except (asyncio.TimeoutError,asyncio.QueueEmpty):
+                break
+            batch.append(item)
+            rows += item[0].shape[0]
+        return batch,rows
+    
+    async def _run(self):
+        loop = asyncio.get_event_loop()
+        while True:
+            batch,rows = await self._next_batch()
+            try:
+                X = np.vstack([b[0] for b in batch])
+                Y = await loop.run_in_executor(self.executor,self.model.predict,X)
+                done = time.monotonic()
+                start = 0
+                for Xb,future,received in batch:
+                    if not future.done():
+                        future.set_result(Y[start:start+Xb.shape[0]])
+                    start += Xb.shape[0]
+                self.stats.add_batch([done-b[2] for b in batch],rows)
+            except Exception as e: #fails the batch, not the batcher
+                self.stats.errors += len(batch)
+                for _,future,_ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+    
+    def close(self):
+        self._task.cancel()
+
+class InferenceServer(object):
+    """Serves the micro-batched predictions of a set of saved models.
+    
+    Mandatory arguments:
+    models -- dictionary of model name to the path of a model file saved by
+              RLSRegressor.save or RLSClassifier.save.
+    
+    Optional arguments:
+    max_batch -- maximum number of rows of a batch (default 64).
+    max_wait -- maximum time in seconds a request waits for its batch to 
+                fill (default 0.002).
+    threads -- worker threads running the predictions (default: one per 
+               model).
+    max_request -- maximum length in bytes of a request line (default 
+                   16 MB), which bounds the memory a connection can take.
+    """
+    
+    def __init__(self,models,max_batch=64,max_wait=0.002,threads=None,
+                 max_request=2**24):
+        self.models = dict((name,pygurls.load_estimator(path)) 
+                           for name,path in models.items())
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.max_request = max_request
+        self.executor = concurrent.futures.ThreadPoolExecutor(
+                                    threads or max(len(self.models),1))
+        self._batchers = None
+        self._server = None
+    
+    def _start_batchers(self):
+        if self._batchers is None:
+            self._batchers = dict((name,ModelBatcher(model,self.executor,
+                                                     self.max_batch,self.max_wait))
+                                  for name,model in self.models.items())
+    
+    async def start_unix(self,path):
+        """Start listening on the Unix socket path."""
+        self._start_batchers()
+        if os.path.exists(path):
+            os.remove(path)
+        self._server = await asyncio.start_unix_server(self._handle,path,
+                                                       limit=self.max_request)
+        return self._server
+    
+    async def start_tcp(self,host='127.0.0.1',port=0):
+        """Start listening on host:port (an ephemeral port if 0), and 
+        return the server, whose sockets give the actual port."""
+        self._start_batchers()
+        self._server = await asyncio.start_server(self._handle,host,port,
+                                                  limit=self.max_request)
+        return self._server
+    
+    async def close(self):
+        """Stop listening and cancel the batchers."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        for batcher in (self._batchers or {}).values():
+            batcher.close()
+        self.executor.shutdown(wait=False)
+    
+    def stats(self):
+        """Counters and latencies of each model (see LatencyStats.summary)."""
+        return dict((name,b.stats.summary()) 
+                    for name,b in (self._batchers or {}).items())
+    
+    async def _handle(self,reader,writer):
+        """Serve the requests of a connection, concurrently."""
+        lock = asyncio.Lock()
+        pending = set()
+        try:
+            while True:
+                try:
+                    line = await reader.readuntil(b'\n')
+                except asyncio.IncompleteReadError as e: #last line, or EOF
+                    line = e.partial
+                except asyncio.LimitOverrunError:
+                    await self._skip_line(reader)
+                    await self._write({'id':None,'error':'ValueError: request '
+                                       'longer than %d bytes.'%(self.max_request)},
+                                      writer,lock)
+                    continue
+                if not line:
+                    break
+                task = asyncio.ensure_future(self._respond(line,writer,lock))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+            if pending:
+                await asyncio.wait(pending)
+        finally:
+            writer.close()
+    
+    async def _skip_line(self,reader):
+        """Discard the rest of a line that is longer than the buffer limit."""
+        while True:
+            try:
+                await reader.readuntil(b'\n')
+                return
+            except asyncio.IncompleteReadError:
+                return
+            except asyncio.LimitOverrunError as e:
+                await reader.readexactly(e.consumed)
+    
+    async def _write(self,resp,writer,lock):
+        async with lock:
+            writer.write((json.dumps(resp)+'\n').encode('utf-8'))
+            await writer.drain()
+    
+    async def _respond(self,line,writer,lock):
+        req_id = None
+        try:
+            req = json.loads(line.decode('utf-8'))
+            req_id = req.get('id')
+            if req.get('stats'):
+                resp = {'id':req_id,'stats':self.stats()}
+            else:
+                batcher = self._batchers.get(req.get('model'))
+                if batcher is None:
+                    raise KeyError('unknown model %r'%(req.get('model')))
+                X = np.atleast_2d(np.asarray(req['x'],dtype=np.float64))
+                if X.ndim != 2 or X.shape[1] != batcher.model.n_features_:
+                    raise ValueError('Expected rows of %d features, got shape %s.'
+                                     %(batcher.model.n_features_,X.shape))
+                Y = await batcher.predict(X)
+                resp = {'id':req_id,'y':np.asarray(Y).tolist()}
+        except Exception as e:
+            resp = {'id':req_id,'error':'%s: %s'%(type(e).__name__,e)}
+        await self._write(resp,writer,lock)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[1])
+    parser.add_argument('-m','--model',action='append',required=True,
+                        metavar='NAME=PATH',help='model to serve')
+    parser.add_argument('-u','--unix',help='Unix socket path')
+    parser.add_argument('-p','--port',type=int,help='TCP port on localhost')
+    parser.add_argument('--host',default='127.0.0.1')
+    parser.add_argument('--max-batch',type=int,default=64)
+    parser.add_argument('--max-wait-ms',type=float,default=2.0)
+    parser.add_argument('--threads',type=int,default=None)
+    parser.add_argument('--max-request-mb',type=float,default=16,
+                        help='maximum length of a request line in MB')
+    parser.add_argument('--stats-interval',type=float,default=0,
+                        help='seconds between stats lines (0 for none)')
+    args = parser.parse_args()
+    if (args.unix is None) == (args.port is None):
+        parser.error('give exactly one of --unix and --port')
+    
+    models = dict(m.split('=',1) for m in args.model)
+    
+    async def serve():
+        server = InferenceServer(models,args.max_batch,args.max_wait_ms/1e3,
+                                 args.threads,int(args.max_request_mb*2**20))
+        if args.unix is not None:
+            await server.start_unix(args.unix)
+        else:
+            await server.start_tcp(args.host,args.port)
+        print('Serving %s'%(', '.join(sorted(models))),flush=True)
+        try:
+            while True:
+                await asyncio.sleep(args.stats_interval or 3600)
+                if args.stats_interval:
+                    print(json.dumps(server.stats()))
+        finally:
+            await server.close()
+    
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == '__main__':
+    main()
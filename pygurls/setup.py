@@ -44,6 +44,10 @@ Setup file for compiling the project with Cython.
 @author: Pedro Santana (psantana@mit.edu).
 """ 
 import os
+import glob
+import shlex
+import subprocess
+import sys
 from setuptools import setup, Extension
 from Cython.Build import cythonize
 
@@ -53,6 +57,8 @@ GURLS_ROOT = os.path.split(CWD)[0]
 PYGURLS_SRC = os.path.join(CWD,'src')
 GURLSPP_INCLUDE = os.path.join(GURLS_ROOT,'gurls++/include')
 GURLSPP_LIB = os.path.join(GURLS_ROOT,'build/lib')
+PYBGURLS_SRC = os.path.join(PYGURLS_SRC,'big')
+BGURLSPP_INCLUDE = os.path.join(GURLS_ROOT,'bgurls++/include')
 
 
 def read(fname):
@@ -66,15 +72,55 @@ def file_list(folder,file_ext):
                     if os.path.isfile(os.path.join(folder,f)) 
                                 and f.endswith(exts)]
 
+def mpi_flags():
+    """Compile and link flags of the MPI C++ compiler wrapper (Open MPI or
+    MPICH), or two empty lists if it is not found."""
+    mpicxx = os.environ.get('MPICXX','mpicxx')
+    for compile_opt,link_opt in [('--showme:compile','--showme:link'),
+                                 ('-compile_info','-link_info')]:
+        try:
+            compile_flags = subprocess.check_output([mpicxx,compile_opt]).decode()
+            link_flags = subprocess.check_output([mpicxx,link_opt]).decode()
+        except (OSError,subprocess.CalledProcessError):
+            continue
+        if compile_opt == '-compile_info': #the first word is the compiler
+            compile_flags = compile_flags.split(None,1)[-1]
+            link_flags = link_flags.split(None,1)[-1]
+        return shlex.split(compile_flags),shlex.split(link_flags)
+    return [],[]
+
 #TODO: Do some sanity checking here to ensure that all files are in place.
 
+#The kernel parameter grids are evaluated in parallel with OpenMP, as in 
+#GURLS++ (set PYGURLS_NO_OPENMP to build without it)
+openmp_flags = [] if os.environ.get('PYGURLS_NO_OPENMP') else ['-fopenmp']
+
 ext_modules = [Extension("pygurls", 
                         file_list(folder='extension',file_ext='.pyx')+file_list(folder='src',file_ext='.cpp'),                        
                         include_dirs = [PYGURLS_SRC,GURLSPP_INCLUDE],                       
                         library_dirs = [GURLSPP_LIB],
                         libraries=["gurls++"],
+                        extra_compile_args = openmp_flags,
+                        extra_link_args = openmp_flags,
                         language = "c++")]
 
+#Out-of-core training with BGURLS++ (module pybgurls) needs libbgurls++, MPI
+#and a parallel HDF5, whose location can be given by HDF5_INCLUDE_DIR, 
+#HDF5_LIB_DIR and HDF5_LIB
+if glob.glob(os.path.join(GURLSPP_LIB,'libbgurls++*')):
+    mpi_compile,mpi_link = mpi_flags()
+    hdf5_include = os.environ.get('HDF5_INCLUDE_DIR')
+    hdf5_lib_dir = os.environ.get('HDF5_LIB_DIR')
+    ext_modules.append(Extension("pybgurls",
+                        file_list(folder='extension/big',file_ext='.pyx')+file_list(folder='src/big',file_ext='.cpp'),
+                        include_dirs = [PYBGURLS_SRC,GURLSPP_INCLUDE,BGURLSPP_INCLUDE]+([hdf5_include] if hdf5_include else []),
+                        library_dirs = [GURLSPP_LIB]+([hdf5_lib_dir] if hdf5_lib_dir else []),
+                        libraries=["bgurls++","gurls++",os.environ.get('HDF5_LIB','hdf5')],
+                        define_macros = [('_BGURLS',None)]+([('USE_MPIIO',None)] if os.environ.get('BGURLSPP_USE_MPI_IO') else []),
+                        extra_compile_args = mpi_compile,
+                        extra_link_args = mpi_link,
+                        language = "c++"))
+
 setup(
     name="PyGURLS++",
     version="0.0.1",
@@ -83,6 +129,13 @@ setup(
     description="A Python wrapper for the GURLS++ libraries.",
     long_description=read("README"), #Reads from README in the same folder
     install_requires=['cython','numpy','scipy'],
+    #the inference server is built on asyncio
+    py_modules=['pygurls_server'] if sys.version_info >= (3,7) else [],
+    #str arguments are passed to the char* parameters of the wrappers as 
+    #ASCII on Python 3 (and as is on Python 2)
     ext_modules = cythonize(ext_modules,                           
-                            include_path=[PYGURLS_SRC,GURLSPP_INCLUDE]))
+                            include_path=[PYGURLS_SRC,GURLSPP_INCLUDE],
+                            compiler_directives={'language_level':2,
+                                                 'c_string_type':'str',
+                                                 'c_string_encoding':'ascii'}))
 
@@ -0,0 +1,392 @@
+/*
+#  A Python wrapper for GURLS++.
+#
+#  Copyright (c) 2014 MIT. All rights reserved.
+#
+#   author: Pedro Santana
+#   e-mail: psantana@mit.edu
+#   website: people.csail.mit.edu/psantana
+#
+#  Redistribution and use in source and binary forms, with or without
+#  modification, are permitted provided that the following conditions
+#  are met:
+#
+#  1. Redistributions of source code must retain the above copyright
+#     notice, this list of conditions and the following disclaimer.
+#  2. Redistributions in binary form must reproduce the above copyright
+#     notice, this list of conditions and the following disclaimer in
+#     the documentation and/or other materials provided with the
+#     distribution.
+#  3. Neither the name(s) of the copyright holders nor the names of its 
+#     contributors or of the Massachusetts Institute of Technology may be 
+#     used to endorse or promote products derived from this software
+#     without specific prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+#  "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+#  LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+#  FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+#  COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+#  INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+#  BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS
+#  OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED
+#  AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+#  LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+#  ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+#  POSSIBILITY OF SUCH DAMAGE.
+*/
+
+
+#include "pybgurls_wrapper.h"
+
+using namespace std;
+using namespace gurls;
+
+static bool mpi_owner = false; // MPI was initialized by bgurls_init
+
+void gurls::bgurls_init()
+{
+    int initialized;
+    MPI_Initialized(&initialized);
+    if (!initialized)
+    {
+        // A process that was not started by mpiexec is a world of its own
+        MPI_Init(NULL,NULL);
+        mpi_owner = true;
+    }
+}
+
+void gurls::bgurls_finalize()
+{
+    int finalized;
+    MPI_Finalized(&finalized);
+    if (!mpi_owner || finalized)
+        return;
+
+    BigArray<double>::releaseMPIData();
+    MPI_Finalize();
+    mpi_owner = false;
+}
+
+int gurls::bgurls_rank()
+{
+    int rank;
+    MPI_Comm_rank(MPI_COMM_WORLD,&rank);
+    return rank;
+}
+
+int gurls::bgurls_size()
+{
+    int size;
+    MPI_Comm_size(MPI_COMM_WORLD,&size);
+    return size;
+}
+
+/**
+Reads rows [start, start+n) of the source dataset into M, a column-major n x d
+buffer. buf holds n*d elements of scratch space.
+*/
+static void read_src_rows(hid_t dset_id, unsigned long start, unsigned long n,
+                          unsigned long d, bool transposed, double* M, double* buf)
+{
+    hsize_t count[2], offset[2];
+    if (transposed)
+    {
+        count[0] = d; count[1] = n;
+        offset[0] = 0; offset[1] = start;
+    }
+    else
+    {
+        count[0] = n; count[1] = d;
+        offset[0] = start; offset[1] = 0;
+    }
+
+    hid_t memspace = H5Screate_simple(2,count,NULL);
+    hid_t filespace = H5Dget_space(dset_id);
+    herr_t status = H5Sselect_hyperslab(filespace,H5S_SELECT_SET,offset,NULL,count,NULL);
+    if (status >= 0)
+        // a transposed dataset already is a column-major n x d buffer
+        status = H5Dread(dset_id,H5T_NATIVE_DOUBLE,memspace,filespace,H5P_DEFAULT,
+                         transposed? M : buf);
+    H5Sclose(memspace);
+    H5Sclose(filespace);
+    if (status < 0)
+        throw std::runtime_error("Error reading the rows of the source dataset.");
+
+    // a row-major n x d buffer is a column-major d x n one
+    if (!transposed)
+        transpose(buf,(int)d,(int)n,M);
+}
+
+void gurls::import_hdf5(char* src_file, char* dataset, char* dst_file,
+                        unsigned long block_rows, bool transposed)
+{
+    if (block_rows == 0)
+        throw std::runtime_error("block_rows must be positive.");
+
+    hid_t file_id = H5Fopen(src_file,H5F_ACC_RDONLY,H5P_DEFAULT);
+    if (file_id < 0)
+        throw std::runtime_error(std::string("Cannot open HDF5 file ")+src_file);
+
+    hid_t dset_id = H5Dopen(file_id,dataset,H5P_DEFAULT);
+    if (dset_id < 0)
+    {
+        H5Fclose(file_id);
+        throw std::runtime_error(std::string("Cannot open dataset ")+dataset+" in "+src_file);
+    }
+
+    hid_t space_id = H5Dget_space(dset_id);
+    hsize_t dims[2] = {1, 1};
+    const int ndims = H5Sget_simple_extent_ndims(space_id);
+    if (ndims == 1 || ndims == 2)
+        H5Sget_simple_extent_dims(space_id,dims,NULL);
+    H5Sclose(space_id);
+    if (ndims != 1 && ndims != 2)
+    {
+        H5Dclose(dset_id);
+        H5Fclose(file_id);
+        throw std::runtime_error("Only 1D and 2D datasets can be imported.");
+    }
+
+    // a 1D dataset is a column of n samples
+    const bool cols_first = transposed && ndims == 2;
+    const unsigned long n = cols_first? dims[1] : dims[0];
+    const unsigned long d = (ndims == 1)? 1 : (cols_first? dims[0] : dims[1]);
+
+    std::string dst_name(dst_file);
+    BigArray<double> dst(dst_name,n,d);
+
+    // each process copies its own slice of the rows
+    const int rank = bgurls_rank();
+    const int size = bgurls_size();
+    unsigned long first = rank*(n/size);
+    unsigned long last = (rank == size-1)? n : first+n/size;
+
+    const unsigned long chunk = std::min(block_rows,std::max(last-first,1UL));
+    double* M = new double[chunk*d];
+    double* buf = new double[chunk*d];
+    try
+    {
+        for (unsigned long start = first; start < last; start += chunk)
+        {
+            const unsigned long rows = std::min(chunk,last-start);
+            read_src_rows(dset_id,start,rows,d,cols_first,M,buf);
+            dst.setMatrix(start,0,M,rows,d);
+        }
+    }
+    catch(...)
+    {
+        delete[] M;
+        delete[] buf;
+        H5Dclose(dset_id);
+        H5Fclose(file_id);
+        throw;
+    }
+
+    delete[] M;
+    delete[] buf;
+    H5Dclose(dset_id);
+    H5Fclose(file_id);
+
+    dst.flush();
+    MPI_Barrier(MPI_COMM_WORLD);
+}
+
+
+PyBigArray::PyBigArray(char* file_name)
+{
+    this->array = new BigArray<double>(std::string(file_name));
+}
+
+PyBigArray::PyBigArray(char* file_name, unsigned long rows, unsigned long cols)
+{
+    this->array = new BigArray<double>(std::string(file_name),rows,cols);
+}
+
+PyBigArray::~PyBigArray()
+{
+    delete this->array;
+}
+
+unsigned long PyBigArray::rows()
+{
+    return this->array->rows();
+}
+
+unsigned long PyBigArray::cols()
+{
+    return this->array->cols();
+}
+
+/**
+Writes M, a column-major n x cols buffer, to rows [start, start+n).
+*/
+void PyBigArray::set_rows(unsigned long start, void* M, unsigned long n,
+                          unsigned long cols)
+{
+    if (cols != this->array->cols())
+        throw std::runtime_error("The number of columns does not match the BigArray.");
+    this->array->setMatrix(start,0,(double*)M,n,cols);
+}
+
+/**
+Reads rows [start, start+n) into M, a column-major buffer of n*cols() elements.
+*/
+void PyBigArray::get_rows(unsigned long start, unsigned long n, void* M)
+{
+    gMat2D<double> block((double*)M,n,this->array->cols(),false);
+    this->array->getMatrix(start,0,block);
+}
+
+void PyBigArray::flush()
+{
+    this->array->flush();
+}
+
+const BigArray<double>& PyBigArray::get() const
+{
+    return *(this->array);
+}
+
+
+PyBGURLSWrapper::PyBGURLSWrapper(char* name, char* shared_dir)
+{
+    this->opt = new BGurlsOptionsList(name,std::string(shared_dir),true);
+    this->seq = NULL;
+    this->processes = NULL;
+
+    // keep the option structure next to the other files shared by the processes
+    boost::filesystem::path save_path(shared_dir);
+    this->opt->removeOpt("savefile");
+    this->opt->addOpt("savefile",(save_path / (std::string(name)+".bin")).native());
+}
+
+PyBGURLSWrapper::~PyBGURLSWrapper()
+{
+    // the options own the task sequence and the processes
+    delete this->opt;
+}
+
+void PyBGURLSWrapper::set_number(char* field, double value)
+{
+    this->opt->removeOpt(field);
+    this->opt->addOpt(field,new OptNumber(value));
+}
+
+void PyBGURLSWrapper::set_string(char* field, char* value)
+{
+    this->opt->removeOpt(field);
+    this->opt->addOpt(field,new OptString(value));
+}
+
+double PyBGURLSWrapper::get_number(char* field)
+{
+    return this->opt->getOptAsNumber(field);
+}
+
+std::string PyBGURLSWrapper::get_string(char* field)
+{
+    return this->opt->getOptAsString(field);
+}
+
+void PyBGURLSWrapper::set_task_sequence(char* seq_str)
+{
+    std::istringstream seq_stream(seq_str);
+    std::string token;
+
+    this->opt->removeOpt("seq");
+    this->seq = new OptTaskSequence();
+    this->opt->addOpt("seq",this->seq);
+
+    while (std::getline(seq_stream,token))
+    {
+        if (!token.empty())
+            *(this->seq) << token;
+    }
+}
+
+void PyBGURLSWrapper::add_process(char* p_name, char* opt_str)
+{
+    std::istringstream opt_stream(opt_str);
+    std::string token;
+
+    if (this->processes == NULL)
+    {
+        this->opt->removeOpt("processes");
+        this->processes = new GurlsOptionsList("processes",false);
+        this->opt->addOpt("processes",this->processes);
+    }
+
+    OptProcess* opt_process = new OptProcess();
+
+    while (std::getline(opt_stream,token))
+    {
+        if (token.empty())
+            continue;
+        else if (token == "computeNsave")
+            *opt_process << GURLS::computeNsave;
+        else if (token == "ignore")
+            *opt_process << GURLS::ignore;
+        else if (token == "load")
+            *opt_process << GURLS::load;
+        else if (token == "compute")
+            *opt_process << GURLS::compute;
+        else if (token == "remove")
+            *opt_process << GURLS::remove;
+        else
+        {
+            delete opt_process;
+            throw std::runtime_error(token+": unsupported action.");
+        }
+    }
+
+    this->processes->removeOpt(p_name);
+    this->processes->addOpt(p_name,opt_process);
+}
+
+/**
+Returns an in-memory matrix option such as "perf.acc" or "paramsel.lambdas".
+Matrices kept in BigArrays (e.g. "optimizer.W") are read through the file named
+by the matching "files.*_filename" option.
+*/
+void* PyBGURLSWrapper::get_field(char* field, unsigned long& rows, unsigned long& cols)
+{
+    GurlsOption* mat_opt = this->opt->getOpt(field);
+    if (mat_opt->getType() == NumberOption)
+    {
+        rows = cols = 1;
+        return NULL;
+    }
+    if (mat_opt->getType() != MatrixOption)
+        throw std::runtime_error("Option is neither a matrix nor a number.");
+    if (static_cast<OptMatrixBase*>(mat_opt)->hasBigArray())
+        throw std::runtime_error("Option is a BigArray, open its file instead.");
+
+    gMat2D<double>& mat = OptMatrix<gMat2D<double> >::dynacast(mat_opt)->getValue();
+    rows = mat.rows();
+    cols = mat.cols();
+    return mat.getData();
+}
+
+/**
+Replaces the options with the ones saved in file_name, e.g. by processes that
+ran the task sequence on their own.
+*/
+void PyBGURLSWrapper::load(char* file_name)
+{
+    this->opt->load(file_name);
+    this->seq = OptTaskSequence::dynacast(this->opt->getOpt("seq"));
+    this->processes = GurlsOptionsList::dynacast(this->opt->getOpt("processes"));
+}
+
+int PyBGURLSWrapper::run(PyBigArray& X, PyBigArray& y, char* job_id)
+{
+    try{
+        this->G.run(X.get(),y.get(),*(this->opt),job_id);
+        return EXIT_SUCCESS;
+    }
+    catch(gException& e){
+        cout << e.getMessage() << endl;
+        return EXIT_FAILURE;
+    }
+}
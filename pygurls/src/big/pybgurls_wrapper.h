@@ -0,0 +1,132 @@
+/*
+#  A Python wrapper for GURLS++.
+#
+#  Copyright (c) 2014 MIT. All rights reserved.
+#
+#   author: Pedro Santana
+#   e-mail: psantana@mit.edu
+#   website: people.csail.mit.edu/psantana
+#
+#  Redistribution and use in source and binary forms, with or without
+#  modification, are permitted provided that the following conditions
+#  are met:
+#
+#  1. Redistributions of source code must retain the above copyright
+#     notice, this list of conditions and the following disclaimer.
+#  2. Redistributions in binary form must reproduce the above copyright
+#     notice, this list of conditions and the following disclaimer in
+#     the documentation and/or other materials provided with the
+#     distribution.
+#  3. Neither the name(s) of the copyright holders nor the names of its 
+#     contributors or of the Massachusetts Institute of Technology may be 
+#     used to endorse or promote products derived from this software
+#     without specific prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+#  "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+#  LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+#  FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+#  COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+#  INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+#  BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS
+#  OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED
+#  AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+#  LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+#  ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+#  POSSIBILITY OF SUCH DAMAGE.
+*/
+
+#ifndef PYBGURLS_WRAPPER_H
+#define PYBGURLS_WRAPPER_H
+
+#include <algorithm>
+#include <sstream>
+#include <stdexcept>
+#include <string>
+#include <string.h>
+
+#include <mpi.h>
+#include <hdf5.h>
+
+#include "bgurls++/bgurls.h"
+#include "bgurls++/bigarray.h"
+#include "bgurls++/bigoptlist.h"
+
+/**
+Wrapper around the big data classes of BGURLS++: BigArray, the HDF5-backed
+matrix that is read and written by blocks, and BGURLS, the driver of the
+bigsplit, bigparamsel, bigoptimizer, bigpred and bigperf tasks.
+
+BGURLS++ runs in double precision over MPI. Every process of MPI_COMM_WORLD
+must make the same calls in the same order; a plain Python interpreter is a
+world of one process, so the same code runs unchanged on a single node.
+Matrices are column-major buffers owned by the caller.
+*/
+namespace gurls {
+
+    /**
+    Initializes MPI unless it already is, e.g. by mpi4py.
+    */
+    void bgurls_init();
+
+    /**
+    Closes the open BigArrays and finalizes MPI, if bgurls_init initialized it.
+    */
+    void bgurls_finalize();
+
+    int bgurls_rank();
+    int bgurls_size();
+
+    /**
+    Copies dataset from the HDF5 file src_file into a new BigArray file
+    dst_file, block_rows rows at a time, so that the matrix is never held in
+    memory. Each MPI process copies a contiguous slice of the rows.
+
+    By default the dataset is read as NumPy and h5py write it, i.e. with the
+    samples along the first HDF5 dimension. If transposed is true the samples
+    run along the second dimension, which is the layout of BigArray itself and
+    of the HDF5 files written by MATLAB.
+    */
+    void import_hdf5(char* src_file, char* dataset, char* dst_file,
+                     unsigned long block_rows, bool transposed);
+
+    class PyBigArray {
+    private:
+        BigArray<double>* array;
+
+    public:
+        PyBigArray(char* file_name);
+        PyBigArray(char* file_name, unsigned long rows, unsigned long cols);
+        ~PyBigArray();
+        unsigned long rows();
+        unsigned long cols();
+        void set_rows(unsigned long start, void* M, unsigned long n,
+                      unsigned long cols);
+        void get_rows(unsigned long start, unsigned long n, void* M);
+        void flush();
+        const BigArray<double>& get() const;
+    };
+
+    class PyBGURLSWrapper {
+    private:
+        BGurlsOptionsList* opt;
+        OptTaskSequence* seq;
+        GurlsOptionsList* processes;
+        BGURLS G;
+
+    public:
+        PyBGURLSWrapper(char* name, char* shared_dir);
+        ~PyBGURLSWrapper();
+        void set_number(char* field, double value);
+        void set_string(char* field, char* value);
+        double get_number(char* field);
+        std::string get_string(char* field);
+        void set_task_sequence(char* seq_str);
+        void add_process(char* p_name, char* opt_str);
+        void* get_field(char* field, unsigned long& rows, unsigned long& cols);
+        void load(char* file_name);
+        int run(PyBigArray& X, PyBigArray& y, char* job_id);
+    };
+}
+
+#endif
@@ -48,8 +48,7 @@ PyGURLSWrapper::PyGURLSWrapper()
     this->processes = NULL;    
     this->opt = NULL;
 
-    this->pt_run = &gurls::PyGURLSWrapper::run_double;
-    this->pt_load_data = &gurls::PyGURLSWrapper::load_data_double;
+    this->set_data_type("double");
 }
 
 PyGURLSWrapper::PyGURLSWrapper(char* data_type)
@@ -58,30 +57,104 @@ PyGURLSWrapper::PyGURLSWrapper(char* data_type)
     this->processes = NULL;    
     this->opt = NULL;    
 
+    this->set_data_type(data_type);
+}
+ 
+PyGURLSWrapper::~PyGURLSWrapper()
+{
+    this->clear_pipeline();    
+    this->clear_data();
+}
+
+void PyGURLSWrapper::set_data_type(const char* data_type)
+{
+    //The task factories register themselves lazily on first use. Doing it
+    //here, while the caller still holds the Python GIL, guarantees that runs
+    //of different instances in concurrent threads never race on it.
+    delete TaskFactory<double>::factory("kernel:linear");
+    delete TaskFactory<float>::factory("kernel:linear");
+
     if (strcmp(data_type,"double") == 0)
     {
         this->pt_run = &gurls::PyGURLSWrapper::run_double;
         this->pt_load_data = &gurls::PyGURLSWrapper::load_data_double;
+        this->pt_add_data = &gurls::PyGURLSWrapper::add_data_impl<double>;
+        this->pt_erase_data = &gurls::PyGURLSWrapper::erase_data_impl<double>;
+        this->pt_get_data = &gurls::PyGURLSWrapper::get_data_impl<double>;
+        this->pt_run_tasks = &gurls::PyGURLSWrapper::run_tasks_impl<double>;
+        this->pt_predict = &gurls::PyGURLSWrapper::predict_impl<double>;
+        this->pt_factorize = &gurls::PyGURLSWrapper::factorize_impl<double>;
+        this->pt_stream_init = &gurls::PyGURLSWrapper::stream_init_impl<double>;
+        this->pt_stream_add = &gurls::PyGURLSWrapper::stream_add_impl<double>;
+        this->pt_stream_solve = &gurls::PyGURLSWrapper::stream_solve_impl<double>;
+        this->pt_detach_data = &gurls::PyGURLSWrapper::detach_data_impl<double>;
     }
     else if (strcmp(data_type,"float") == 0)
     {
         this->pt_run = &gurls::PyGURLSWrapper::run_float;
         this->pt_load_data = &gurls::PyGURLSWrapper::load_data_float;
+        this->pt_add_data = &gurls::PyGURLSWrapper::add_data_impl<float>;
+        this->pt_erase_data = &gurls::PyGURLSWrapper::erase_data_impl<float>;
+        this->pt_get_data = &gurls::PyGURLSWrapper::get_data_impl<float>;
+        this->pt_run_tasks = &gurls::PyGURLSWrapper::run_tasks_impl<float>;
+        this->pt_predict = &gurls::PyGURLSWrapper::predict_impl<float>;
+        this->pt_factorize = &gurls::PyGURLSWrapper::factorize_impl<float>;
+        this->pt_stream_init = &gurls::PyGURLSWrapper::stream_init_impl<float>;
+        this->pt_stream_add = &gurls::PyGURLSWrapper::stream_add_impl<float>;
+        this->pt_stream_solve = &gurls::PyGURLSWrapper::stream_solve_impl<float>;
+        this->pt_detach_data = &gurls::PyGURLSWrapper::detach_data_impl<float>;
     }
     else
         throw std::runtime_error("Type "+std::string(data_type)+" not currently supported.");
 }
  
-PyGURLSWrapper::~PyGURLSWrapper()
-{
-    this->clear_pipeline();    
-}
- 
-const std::vector<double> PyGURLSWrapper::export_gmat(const gMat2D<double>& mat)
+/**
+Returns a pointer to the column-major buffer of a matrix option, without
+copying it, its shape in rows and cols, and its element type in cell_type 
+(one of OptMatrixBase::MatrixType). Matrices computed by the tasks have the
+same element type as the data the pipeline runs on. Numeric options (e.g., 
+the sigma chosen by paramsel) are not matrices: for those, NULL is returned, 
+rows and cols are set to 1, and the value should be read with get_number.
+*/
+void* PyGURLSWrapper::export_gmat(GurlsOption* mat_opt, unsigned long& rows, 
+                                  unsigned long& cols, int& cell_type)
 {
-    this->num_mat_rows = mat.rows();       
-    this->num_mat_cols = mat.cols();
-    return std::vector<double>(mat.begin(),mat.end());
+    if (mat_opt->getType() == NumberOption)
+    {
+        rows = cols = 1;
+        return NULL;
+    }
+    if (mat_opt->getType() != MatrixOption)
+        throw std::runtime_error("Option is neither a matrix nor a number.");
+
+    cell_type = static_cast<OptMatrixBase*>(mat_opt)->getMatrixType();
+    switch(cell_type)
+    {
+    case OptMatrixBase::FLOAT:
+    {
+        gMat2D<float>& mat = OptMatrix<gMat2D<float> >::dynacast(mat_opt)->getValue();
+        rows = mat.rows();       
+        cols = mat.cols();
+        return mat.getData();
+    }
+    case OptMatrixBase::DOUBLE:
+    {
+        gMat2D<double>& mat = OptMatrix<gMat2D<double> >::dynacast(mat_opt)->getValue();
+        rows = mat.rows();       
+        cols = mat.cols();
+        return mat.getData();
+    }
+    case OptMatrixBase::ULONG:
+    {
+        gMat2D<unsigned long>& mat 
+            = OptMatrix<gMat2D<unsigned long> >::dynacast(mat_opt)->getValue();
+        rows = mat.rows();       
+        cols = mat.cols();
+        return mat.getData();
+    }
+    default:
+        throw std::runtime_error("Unsupported matrix element type.");
+    }
 }
  
 void PyGURLSWrapper::load_data(char* data_file, char* data_id)
@@ -93,6 +166,7 @@ void PyGURLSWrapper::load_data_double(char* data_file, char* data_id)
 {
     gMat2D<double> *pdata = new gMat2D<double>();             
     pdata->readCSV(data_file); //loads data from file    
+    this->erase_data(data_id); //releases any matrix with the same id
     this->data_map[data_id] = pdata; //stores the reference
 }
 
@@ -100,67 +174,390 @@ void PyGURLSWrapper::load_data_float(char* data_file, char* data_id)
 {
     gMat2D<float> *pdata = new gMat2D<float>();             
     pdata->readCSV(data_file); //loads data from file    
+    this->erase_data(data_id); //releases any matrix with the same id
     this->data_map[data_id] = pdata; //stores the reference
 }
  
-void PyGURLSWrapper::add_data(std::vector<double>& vec_dat, unsigned long rows, 
+void PyGURLSWrapper::add_data(void* buf, unsigned long rows, 
                                 unsigned long cols,char* data_id)
 {
-    gMat2D<double> *pdata = new gMat2D<double>(vec_dat.data(),rows,cols,true);                 
+    (*this.*pt_add_data)(buf,rows,cols,data_id);
+}
+
+/**
+The matrix is a non-owning view over buf, which must be a column-major 
+(Fortran-ordered) buffer of rows*cols elements of type T. The caller is 
+responsible for keeping buf alive until the data is erased or replaced.
+*/
+template <typename T>
+void PyGURLSWrapper::add_data_impl(void* buf, unsigned long rows, 
+                                    unsigned long cols, char* data_id)
+{
+    gMat2D<T> *pdata = new gMat2D<T>((T*)buf,rows,cols,false);                 
+    this->erase_data(data_id); //releases any matrix with the same id
     this->data_map[data_id] = pdata; //stores the reference
 }
 
-std::vector<double> PyGURLSWrapper::get_data_vec(char* data_id)
+void* PyGURLSWrapper::find_data(char* data_id)
+{
+    std::map< std::string, void* >::iterator it = this->data_map.find(data_id);
+    if (it == this->data_map.end())
+        throw std::runtime_error("Data "+std::string(data_id)+" not found.");
+    return it->second;
+}
+
+void* PyGURLSWrapper::get_data(char* data_id, unsigned long& rows, 
+                                unsigned long& cols)
 {
-    gMat2D<double> *pdata = (gMat2D<double>*) this->data_map[data_id];
-    return export_gmat(*pdata);    
+    return (*this.*pt_get_data)(data_id,rows,cols);
+}
+
+template <typename T>
+void* PyGURLSWrapper::get_data_impl(char* data_id, unsigned long& rows, 
+                                     unsigned long& cols)
+{
+    gMat2D<T> *pdata = (gMat2D<T>*) this->find_data(data_id);
+    rows = pdata->rows();
+    cols = pdata->cols();
+    return pdata->getData();    
 }
 
 void PyGURLSWrapper::erase_data(char* data_id)
 {    
-    delete this->data_map[data_id]; //deallocates the data
-    this->data_map.erase(data_id); 
+    (*this.*pt_erase_data)(data_id);
+}
+
+template <typename T>
+void PyGURLSWrapper::erase_data_impl(char* data_id)
+{    
+    std::map< std::string, void* >::iterator it = this->data_map.find(data_id);
+    if (it != this->data_map.end())
+    {
+        delete (gMat2D<T>*) it->second; //deallocates the data (if owned)
+        this->data_map.erase(it); 
+    }
+}
+
+void PyGURLSWrapper::clear_data()
+{
+    while (!this->data_map.empty())
+    {
+        std::string data_id = this->data_map.begin()->first;
+        this->erase_data(&data_id[0]);
+    }
 }
 
-const std::vector<double> PyGURLSWrapper::get_field(char* field)
+void* PyGURLSWrapper::get_field(char* field, unsigned long& rows, 
+                                 unsigned long& cols, int& cell_type)
 {
-    const gMat2D<double>& mat 
-        = OptMatrix<gMat2D<double> >::dynacast(this->opt->getOpt(field))->getValue();
-    return export_gmat(mat);        
+    if (this->opt == NULL)
+        throw std::runtime_error("Build the pipeline before reading its fields.");
+    return export_gmat(this->opt->getOpt(field),rows,cols,cell_type);        
 }
 
-const std::vector<double> PyGURLSWrapper::get_opt_field(char* option,char* field)
+void* PyGURLSWrapper::get_opt_field(char* option, char* field, 
+                                     unsigned long& rows, unsigned long& cols,
+                                     int& cell_type)
 {    
-    GurlsOptionsList* perf = GurlsOptionsList::dynacast(this->opt->getOpt(option));
-    GurlsOption *perf_field = perf->getOpt(field);  
-    
-    //Hack to deal with the fact that sigma is stored as a double, rather
-    //than a gMat2D.
-    if((strcmp(option,"paramsel")==0)&&(strcmp(field,"sigma")==0))
+    if (this->opt == NULL)
+        throw std::runtime_error("Build the pipeline before reading its fields.");
+    GurlsOptionsList* opt_list = GurlsOptionsList::dynacast(this->opt->getOpt(option));
+    return export_gmat(opt_list->getOpt(field),rows,cols,cell_type);        
+}
+
+double PyGURLSWrapper::get_number(char* field)
+{
+    if (this->opt == NULL)
+        throw std::runtime_error("Build the pipeline before reading its fields.");
+    return this->opt->getOptAsNumber(field);
+}
+
+/**
+Returns the options list that contains field, a dot-separated path such as 
+"paramsel.sigma", and sets key to the last component of the path. If create 
+is true, missing intermediate options lists are added.
+*/
+GurlsOptionsList* PyGURLSWrapper::parent_opt(const std::string& field, 
+                                             std::string& key, bool create)
+{
+    if (this->opt == NULL)
+        throw std::runtime_error("Build the pipeline before setting its fields.");
+
+    GurlsOptionsList* parent = this->opt;
+    std::istringstream path_stream(field);
+    std::getline(path_stream,key,'.');
+    std::string next;
+    while (std::getline(path_stream,next,'.'))
     {
-        double sigma = this->opt->getOptValue<OptNumber>("paramsel.sigma");
-        gMat2D<double> *pmat = new gMat2D<double>(&sigma,1,1,true);                 
-        return export_gmat(*pmat);        
+        if (create && !parent->hasOpt(key))
+            parent->addOpt(key,new GurlsOptionsList(key));
+        parent = GurlsOptionsList::dynacast(parent->getOpt(key));
+        key = next;
     }
-    else
+    return parent;
+}
+
+void PyGURLSWrapper::set_number(char* field, double value)
+{
+    std::string key;
+    GurlsOptionsList* parent = this->parent_opt(field,key,true);
+    parent->removeOpt(key);
+    parent->addOpt(key,new OptNumber(value));
+}
+
+void PyGURLSWrapper::set_string(char* field, char* value)
+{
+    std::string key;
+    GurlsOptionsList* parent = this->parent_opt(field,key,true);
+    parent->removeOpt(key);
+    parent->addOpt(key,new OptString(value));
+}
+
+void PyGURLSWrapper::erase_field(char* field)
+{
+    std::string key;
+    this->parent_opt(field,key)->removeOpt(key);
+}
+
+/**
+Stores buf as a matrix option whose elements are of type cell_type (one of 
+OptMatrixBase::MatrixType), which need not be the data type of the pipeline:
+trained models also hold index matrices (e.g., the Nystrom landmarks).
+*/
+void PyGURLSWrapper::set_matrix(char* field, void* buf, unsigned long rows,
+                                unsigned long cols, int cell_type)
+{
+    switch(cell_type)
+    {
+    case OptMatrixBase::FLOAT:
+        this->set_matrix_impl<float>(field,buf,rows,cols);
+        break;
+    case OptMatrixBase::DOUBLE:
+        this->set_matrix_impl<double>(field,buf,rows,cols);
+        break;
+    case OptMatrixBase::ULONG:
+        this->set_matrix_impl<unsigned long>(field,buf,rows,cols);
+        break;
+    default:
+        throw std::runtime_error("Unsupported matrix element type.");
+    }
+}
+
+/**
+Stores a non-owning view over buf, a column-major buffer of rows*cols elements 
+of type T, as a matrix option. As with add_data, the caller keeps buf alive.
+*/
+template <typename T>
+void PyGURLSWrapper::set_matrix_impl(char* field, void* buf, unsigned long rows,
+                                     unsigned long cols)
+{
+    std::string key;
+    GurlsOptionsList* parent = this->parent_opt(field,key,true);
+    parent->removeOpt(key);
+    parent->addOpt(key,new OptMatrix<gMat2D<T> >(*(new gMat2D<T>((T*)buf,rows,cols,false))));
+}
+
+namespace {
+
+/**
+Reads the flag of a gMat2D telling whether it deletes its buffer, which 
+BaseArray keeps protected.
+*/
+template <typename T>
+struct BufferOwnership: public gMat2D<T>
+{
+    static bool owner(const gMat2D<T>& mat)
+    {
+        return mat.*(&BufferOwnership<T>::isowner);
+    }
+};
+
+}
+
+/**
+Hands the matrix option at field (a dot-separated path) over to the caller, 
+so that its buffer can outlive the option: the option is replaced by a 
+matrix that reads the same buffer without owning it, and the matrix that owns
+it is returned, to be deleted with free_matrix once neither the options nor 
+the caller use the buffer (see get_field_buffers). Returns NULL, and leaves 
+the option untouched, if the matrix does not own its buffer, which then 
+belongs to whoever provided it (add_data, set_matrix).
+*/
+void* PyGURLSWrapper::detach_field(char* field)
+{
+    std::string key;
+    GurlsOptionsList* parent = this->parent_opt(field,key);
+    GurlsOption* mat_opt = parent->getOpt(key);
+    if (mat_opt->getType() != MatrixOption)
+        throw std::runtime_error("Option "+std::string(field)+" is not a matrix.");
+
+    switch(static_cast<OptMatrixBase*>(mat_opt)->getMatrixType())
+    {
+    case OptMatrixBase::FLOAT:
+        return detach_option<float>(parent,key);
+    case OptMatrixBase::DOUBLE:
+        return detach_option<double>(parent,key);
+    case OptMatrixBase::ULONG:
+        return detach_option<unsigned long>(parent,key);
+    default:
+        throw std::runtime_error("Unsupported matrix element type.");
+    }
+}
+
+template <typename T>
+void* PyGURLSWrapper::detach_option(GurlsOptionsList* parent, const std::string& key)
+{
+    OptMatrix<gMat2D<T> >* mat_opt = OptMatrix<gMat2D<T> >::dynacast(parent->getOpt(key));
+    gMat2D<T>* mat = &mat_opt->getValue();
+    if (!BufferOwnership<T>::owner(*mat))
+        return NULL;
+
+    mat_opt->detachValue();
+    parent->removeOpt(key);
+    parent->addOpt(key,new OptMatrix<gMat2D<T> >(*(new gMat2D<T>(mat->getData(),
+                                                     mat->rows(),mat->cols(),false))));
+    return mat;
+}
+
+/**
+Hands the matrix of data_id over to the caller, as detach_field does for the
+options.
+*/
+void* PyGURLSWrapper::detach_data(char* data_id)
+{
+    return (*this.*pt_detach_data)(data_id);
+}
+
+template <typename T>
+void* PyGURLSWrapper::detach_data_impl(char* data_id)
+{
+    gMat2D<T>* mat = (gMat2D<T>*) this->find_data(data_id);
+    if (!BufferOwnership<T>::owner(*mat))
+        return NULL;
+
+    this->data_map[data_id] = new gMat2D<T>(mat->getData(),mat->rows(),mat->cols(),false);
+    return mat;
+}
+
+/**
+Returns the buffers of all the matrices in the options structure.
+*/
+std::vector<void*> PyGURLSWrapper::get_field_buffers()
+{
+    std::vector<void*> buffers;
+    if (this->opt != NULL)
+        this->collect_buffers(this->opt,buffers);
+    return buffers;
+}
+
+void PyGURLSWrapper::collect_buffers(GurlsOption* option, std::vector<void*>& buffers)
+{
+    unsigned long rows, cols;
+    int cell_type;
+    switch(option->getType())
+    {
+    case MatrixOption:
+        buffers.push_back(this->export_gmat(option,rows,cols,cell_type));
+        break;
+    case OptListOption:
     {
-        const gMat2D<double>& mat = OptMatrix<gMat2D<double> >::dynacast(perf_field)->getValue();          
-        return export_gmat(mat);        
+        const GurlsOptionsList::ValueType& table = GurlsOptionsList::dynacast(option)->getValue();
+        for(GurlsOptionsList::ValueType::const_iterator it = table.begin(); it != table.end(); ++it)
+            this->collect_buffers(it->second,buffers);
+        break;
     }
+    case OptArrayOption:
+    {
+        OptArray* array = OptArray::dynacast(option);
+        for(unsigned long i = 0; i < array->size(); ++i)
+            this->collect_buffers((*array)[i],buffers);
+        break;
+    }
+    default:
+        break;
+    }
+}
+
+void gurls::free_matrix(void* mat, int cell_type)
+{
+    switch(cell_type)
+    {
+    case OptMatrixBase::FLOAT:
+        delete (gMat2D<float>*) mat;
+        break;
+    case OptMatrixBase::DOUBLE:
+        delete (gMat2D<double>*) mat;
+        break;
+    case OptMatrixBase::ULONG:
+        delete (gMat2D<unsigned long>*) mat;
+        break;
+    }
+}
+
+int PyGURLSWrapper::get_field_type(char* field)
+{
+    if (this->opt == NULL)
+        throw std::runtime_error("Build the pipeline before reading its fields.");
+    return this->opt->getOpt(field)->getType();
+}
+
+std::string PyGURLSWrapper::get_string(char* field)
+{
+    if (this->opt == NULL)
+        throw std::runtime_error("Build the pipeline before reading its fields.");
+    return this->opt->getOptAsString(field);
+}
+
+/**
+Returns the names of the options in the options list at field, or in the 
+whole options structure if field is empty.
+*/
+std::vector<std::string> PyGURLSWrapper::get_field_names(char* field)
+{
+    if (this->opt == NULL)
+        throw std::runtime_error("Build the pipeline before reading its fields.");
+
+    const GurlsOptionsList* opt_list = (strlen(field) == 0)? this->opt :
+                                        GurlsOptionsList::dynacast(this->opt->getOpt(field));
+    std::vector<std::string> names;
+    for(GurlsOptionsList::ValueType::const_iterator it = opt_list->getValue().begin(); 
+            it != opt_list->getValue().end(); ++it)
+        names.push_back(it->first);
+    return names;
+}
+
+/**
+Returns the tasks of the sequence as "field:task" strings.
+*/
+std::vector<std::string> PyGURLSWrapper::get_task_sequence()
+{
+    if (this->opt == NULL)
+        throw std::runtime_error("Build the pipeline before reading its fields.");
+
+    OptTaskSequence* task_seq = OptTaskSequence::dynacast(this->opt->getOpt("seq"));
+    std::vector<std::string> tasks;
+    for(OptTaskSequence::iterator it = task_seq->begin(), end = task_seq->end(); 
+            it != end; ++it)
+    {
+        OptTask& task_option = *it;
+        tasks.push_back(task_option.getString());
+    }
+    return tasks;
 }
 
 void PyGURLSWrapper::set_task_sequence(char* seq_str)
 {
-    char *token;
+    std::istringstream seq_stream(seq_str);
+    std::string token;
 
     this->clear_task_sequence();    
     this->seq = new OptTaskSequence();
         
-    token = strtok (seq_str,"\n");
-    while (token != NULL)
+    //std::getline rather than strtok, which is not reentrant
+    while (std::getline(seq_stream,token))
     {   
-        *(this->seq) << string(token);
-        token = strtok (NULL,"\n");
+        if (!token.empty())
+            *(this->seq) << token;
     }
 }
 
@@ -177,30 +574,33 @@ void PyGURLSWrapper::clear_task_sequence()
  
 void PyGURLSWrapper::add_process(char* p_name, char* opt_str)
 {
-    char *token; //Tokens from the option string
+    std::istringstream opt_stream(opt_str);
+    std::string token; //Tokens from the option string
     
     if (this->processes == NULL)
         throw std::runtime_error("Initialize before adding processes.");
 
     OptProcess* opt_process = new OptProcess(); //new optimization process
 
-    token = strtok (opt_str,"\n");
-    while (token != NULL)
+    while (std::getline(opt_stream,token))
     {   
-        if (strcmp(token,"computeNsave") == 0)
+        if (token.empty())
+            continue;
+        else if (token == "computeNsave")
             *opt_process << GURLS::computeNsave;
-        else if (strcmp(token,"ignore") == 0)
+        else if (token == "ignore")
             *opt_process << GURLS::ignore;
-        else if (strcmp(token,"load") == 0)
+        else if (token == "load")
             *opt_process << GURLS::load;   
-        else if (strcmp(token,"compute") == 0)
+        else if (token == "compute")
             *opt_process << GURLS::compute;
-        else if (strcmp(token,"remove") == 0)
+        else if (token == "remove")
             *opt_process << GURLS::remove;         
         else
-            throw std::runtime_error(std::string(token)+": unsupported action.");
-
-        token = strtok (NULL,"\n"); //Next token
+        {
+            delete opt_process;
+            throw std::runtime_error(token+": unsupported action.");
+        }
     }        
     this->processes->addOpt(p_name,opt_process);//Adds to current process list
 }
@@ -241,8 +641,11 @@ void PyGURLSWrapper::clear_pipeline()
 {       
     if (this->opt != NULL)
     {
+        //the pipeline owns the task sequence and the processes
         delete this->opt;
         this->opt = NULL;
+        this->seq = NULL;
+        this->processes = NULL;
     }
 }
 
@@ -252,11 +655,22 @@ int PyGURLSWrapper::run(char* in_data, char* out_data, char* job_id)
     return (*this.*pt_run)(in_data,out_data,job_id);
 }
 
+const std::vector<TaskProfile>& PyGURLSWrapper::last_run_profile() const
+{
+    return this->G.lastRunProfile();
+}
+
+void PyGURLSWrapper::set_task_callback(task_event_fn fn, void* user)
+{
+    this->task_callback.set(fn,user);
+    this->G.setObserver(fn != NULL ? &this->task_callback : NULL);
+}
+
 int PyGURLSWrapper::run_double(char* in_data, char* out_data, char* job_id)
 {
     try{        
-        this->G.run(*((gMat2D<double>*)this->data_map[in_data]),
-                    *((gMat2D<double>*)this->data_map[out_data]),
+        this->G.run(*((gMat2D<double>*)this->find_data(in_data)),
+                    *((gMat2D<double>*)this->find_data(out_data)),
                     *(this->opt), 
                     job_id);
         return EXIT_SUCCESS;
@@ -270,8 +684,8 @@ int PyGURLSWrapper::run_double(char* in_data, char* out_data, char* job_id)
 int PyGURLSWrapper::run_float(char* in_data, char* out_data, char* job_id)
 {
     try{        
-        this->G.run(*((gMat2D<float>*)this->data_map[in_data]),
-                    *((gMat2D<float>*)this->data_map[out_data]),
+        this->G.run(*((gMat2D<float>*)this->find_data(in_data)),
+                    *((gMat2D<float>*)this->find_data(out_data)),
                     *(this->opt), 
                     job_id);
         return EXIT_SUCCESS;
@@ -282,5 +696,588 @@ int PyGURLSWrapper::run_float(char* in_data, char* out_data, char* job_id)
     }
 }
 
+int PyGURLSWrapper::run_tasks(char* in_data, char* out_data, char* fields)
+{
+    return (*this.*pt_run_tasks)(in_data,out_data,fields);
+}
 
+/**
+Executes, in memory, the tasks listed in fields, one per line and in that 
+order. A line is either the field name of a task of the sequence (e.g., 
+"predkernel" and "pred"), or a task description such as "paramsel:loocvdual",
+which runs that task even if it is not part of the sequence. The tasks read 
+the results of previous runs from the options structure and store their 
+own results there, exactly as the compute action of GURLS::run, but nothing
+is loaded from or saved to disk. The tasks receive the labels out_data or, if
+out_data is empty, an empty Y matrix.
+*/
+template <typename T>
+int PyGURLSWrapper::run_tasks_impl(char* in_data, char* out_data, char* fields)
+{
+    if (this->opt == NULL)
+        throw std::runtime_error("Empty pipeline!");
+
+    const gMat2D<T>& X = *((gMat2D<T>*)this->find_data(in_data));
+    const gMat2D<T> no_labels;
+    const gMat2D<T>& Y = (out_data != NULL && out_data[0] != '\0')?
+                         *((gMat2D<T>*)this->find_data(out_data)) : no_labels;
+
+    try{
+        this->run_entries<T>(split_lines(fields),X,Y);
+        return EXIT_SUCCESS;
+    }
+    catch(gException& e){
+        cout << e.getMessage() << endl;
+        return EXIT_FAILURE;
+    }
+}
+
+/**
+Splits a string into its lines.
+*/
+std::vector<std::string> PyGURLSWrapper::split_lines(const char* str)
+{
+    std::istringstream stream(str);
+    std::vector<std::string> lines;
+    std::string token;
+    while (std::getline(stream,token))
+        lines.push_back(token);
+    return lines;
+}
+
+/**
+Executes the tasks entries (see run_tasks) on X and Y, storing their results 
+in the options structure. Returns the field of the last task executed, empty
+if none was. Throws gException if a task fails.
+*/
+template <typename T>
+std::string PyGURLSWrapper::run_entries(const std::vector<std::string>& entries,
+                                        const gMat2D<T>& X, const gMat2D<T>& Y)
+{
+    OptTaskSequence* task_seq = OptTaskSequence::dynacast(this->opt->getOpt("seq"));
+    std::string field_name, task_name, last;
+
+    for(std::vector<std::string>::const_iterator e = entries.begin(); e != entries.end(); ++e)
+    {
+        Task<T>* task = NULL;
+        if (OptTaskSequence::isValid(*e,field_name,task_name))
+            task = OptTask(*e).getValue<T>();
+        else
+        {
+            for(OptTaskSequence::iterator it = task_seq->begin(), end = task_seq->end(); 
+                    it != end && task == NULL; ++it)
+            {
+                OptTask& task_option = *it;
+                OptTaskSequence::isValid(task_option.getString(),field_name,task_name);
+                if (field_name == *e)
+                    task = task_option.getValue<T>();
+            }
+            if (task == NULL)
+                continue;
+        }
+
+        GurlsOption* result = NULL;
+        try{
+            result = task->execute(X,Y,*(this->opt));
+        }
+        catch(gException&){
+            delete task;
+            throw;
+        }
+        delete task;
+
+        this->opt->removeOpt(field_name);
+        this->opt->addOpt(field_name,result);
+        last = field_name;
+    }
+    return last;
+}
+
+void PyGURLSWrapper::predict(char* in_data, char* fields, void* out, 
+                             unsigned long rows, unsigned long cols,
+                             unsigned long block_rows, double max_memory)
+{
+    (*this.*pt_predict)(in_data,fields,out,rows,cols,block_rows,max_memory);
+}
+
+/**
+Runs the prediction tasks listed in fields (see run_tasks, e.g. "predkernel"
+and "pred") on blocks of consecutive rows of in_data, and writes the result 
+of the last task for each block into the column-major rows x cols buffer out,
+where rows is the number of samples of in_data. Only the block, its test 
+kernel (and distances, for the rbf kernel) and its predictions are held in 
+memory at once: a block has block_rows rows or, if block_rows is 0, as many 
+rows as fit in max_memory bytes (at least one). With neither, in_data is 
+processed in one block. The fields computed on the last block are removed 
+from the options.
+*/
+template <typename T>
+void PyGURLSWrapper::predict_impl(char* in_data, char* fields, void* out, 
+                                  unsigned long rows, unsigned long cols,
+                                  unsigned long block_rows, double max_memory)
+{
+    if (this->opt == NULL)
+        throw std::runtime_error("Empty pipeline!");
+
+    const gMat2D<T>& X = *((gMat2D<T>*)this->find_data(in_data));
+    const unsigned long n = X.rows();
+    const unsigned long d = X.cols();
+    if (rows != n)
+        throw std::runtime_error("The output buffer does not have a row per sample.");
+
+    if (block_rows == 0 && max_memory > 0)
+    {
+        //a row of the block, its kernel and distances against the training 
+        //samples, and its predictions
+        unsigned long n_train = 0;
+        if (this->opt->hasOpt("optimizer.X"))
+            n_train = this->opt->getOptValue<OptMatrix<gMat2D<T> > >("optimizer.X").rows();
+        const double row_bytes = (double)sizeof(T)*(d + 2*n_train + cols);
+        block_rows = static_cast<unsigned long>(std::max(1.0, std::floor(max_memory/row_bytes)));
+    }
+    if (block_rows == 0 || block_rows > n)
+        block_rows = n;
+
+    const std::vector<std::string> entries = split_lines(fields);
+    const gMat2D<T> no_labels;
+    T* out_buf = static_cast<T*>(out);
+    std::string field;
+
+    try{
+        for(unsigned long start = 0; start < n; start += block_rows)
+        {
+            const unsigned long b = std::min(block_rows, n-start);
+            if (b == n)
+                field = this->run_entries<T>(entries,X,no_labels);
+            else
+            {
+                gMat2D<T> X_block(b,d);
+                for(unsigned long j = 0; j < d; ++j)
+                    copy(X_block.getData()+j*b, X.getData()+j*n+start, b);
+                field = this->run_entries<T>(entries,X_block,no_labels);
+            }
 
+            if (field.empty())
+                throw std::runtime_error("None of the prediction tasks is in the sequence.");
+            const gMat2D<T>& Z = this->opt->getOptValue<OptMatrix<gMat2D<T> > >(field);
+            if (Z.rows() != b || Z.cols() != cols)
+                throw std::runtime_error("The predictions do not match the shape of the output buffer.");
+
+            for(unsigned long j = 0; j < cols; ++j)
+                copy(out_buf+j*n+start, Z.getData()+j*b, b);
+        }
+    }
+    catch(gException& e){
+        throw std::runtime_error(e.getMessage());
+    }
+
+    for(std::vector<std::string>::const_iterator e = entries.begin(); e != entries.end(); ++e)
+        this->opt->removeOpt(e->substr(0, e->find(':')));
+}
+
+void PyGURLSWrapper::factorize(char* in_data)
+{
+    (*this.*pt_factorize)(in_data);
+}
+
+/**
+Stores in the kernel field the eigendecomposition of kernel.K or, if there is
+no kernel matrix (primal formulation), of X'*X for the input data in_data 
+(see addKernelEig). loocvdual, rlsdual, loocvprimal and rlsprimal then reuse 
+it, so that new labels for the same inputs are learned without factorizing 
+again. A linear kernel field is created if there is none.
+*/
+template <typename T>
+void PyGURLSWrapper::factorize_impl(char* in_data)
+{
+    if (this->opt == NULL)
+        throw std::runtime_error("Empty pipeline!");
+
+    const gMat2D<T>& X = *((gMat2D<T>*)this->find_data(in_data));
+
+    if (!this->opt->hasOpt("kernel"))
+    {
+        GurlsOptionsList* kernel = new GurlsOptionsList("kernel");
+        kernel->addOpt("type","linear");
+        this->opt->addOpt("kernel",kernel);
+    }
+
+    try{
+        addKernelEig(X,*(this->opt->getOptAs<GurlsOptionsList>("kernel")));
+    }
+    catch(gException& e){
+        throw std::runtime_error(e.getMessage());
+    }
+}
+
+
+/*
+Streaming primal RLS.
+
+A linear RLS model only depends on the data through X'X and X'Y. The stream_*
+methods accumulate these statistics block by block in the "kernel" field of 
+the options structure, separately for the training rows and for the rows held
+out to select lambda, so that arbitrarily many samples are learned with O(d^2)
+memory. The accumulated statistics are:
+    XtX, Xty, Xmu, ymu, yty, n                             (training rows)
+    XvatXva, Xvatyva, Xvamu, yvamu, yvatyva, nva            (held-out rows)
+where Xmu and ymu are the column means of the rows, and XtX, Xty and yty the
+cross-products (column sums of squares for yty) of the rows centered around 
+those means. Each block is centered around its own means and merged with the
+pairwise update of Chan, Golub and LeVeque, so that no large uncentered sums 
+are ever subtracted. Only the upper triangle of XtX and XvatXva is kept up to
+date.
+*/
+
+void PyGURLSWrapper::stream_init(unsigned long d, unsigned long t)
+{
+    (*this.*pt_stream_init)(d,t);
+}
+
+void PyGURLSWrapper::stream_add(void* X, void* Y, unsigned long n, 
+                                unsigned long d, unsigned long t, bool validation)
+{
+    (*this.*pt_stream_add)(X,Y,n,d,t,validation);
+}
+
+void PyGURLSWrapper::stream_solve(double lambda, bool center)
+{
+    (*this.*pt_stream_solve)(lambda,center);
+}
+
+/**
+Replaces the kernel, paramsel and optimizer fields of the pipeline with empty
+statistics for d input and t output variables.
+*/
+template <typename T>
+void PyGURLSWrapper::stream_init_impl(unsigned long d, unsigned long t)
+{
+    if (this->opt == NULL)
+        throw std::runtime_error("Build the pipeline before streaming data.");
+
+    this->opt->removeOpt("kernel");
+    this->opt->removeOpt("paramsel");
+    this->opt->removeOpt("optimizer");
+
+    const char* prefixes[] = {"", "va"};
+    GurlsOptionsList* kernel = new GurlsOptionsList("kernel");
+    for(int i = 0; i < 2; ++i)
+    {
+        const std::string x = std::string("X")+prefixes[i];
+        const std::string y = std::string("y")+prefixes[i];
+
+        gMat2D<T>* stats[] = {new gMat2D<T>(d,d), new gMat2D<T>(d,t),
+                              new gMat2D<T>(1,d), new gMat2D<T>(1,t), 
+                              new gMat2D<T>(1,t)};
+        const std::string names[] = {x+"t"+x, x+"t"+y, x+"mu", y+"mu", y+"t"+y};
+        for(int j = 0; j < 5; ++j)
+        {
+            set(stats[j]->getData(), (T)0.0, stats[j]->getSize());
+            kernel->addOpt(names[j], new OptMatrix<gMat2D<T> >(*stats[j]));
+        }
+        kernel->addOpt(std::string("n")+prefixes[i], new OptNumber(0.0));
+    }
+    this->opt->addOpt("kernel", kernel);
+}
+
+/**
+Adds the n x d block X and the n x t block Y, both column-major, to the 
+training (or, if validation is true, to the held-out) statistics.
+*/
+template <typename T>
+void PyGURLSWrapper::stream_add_impl(void* X, void* Y, unsigned long n, 
+                                     unsigned long d, unsigned long t, 
+                                     bool validation)
+{
+    if (this->opt == NULL || !this->opt->hasOpt("kernel.XtX"))
+        throw std::runtime_error("Initialize the stream before adding data.");
+
+    GurlsOptionsList* kernel = this->opt->getOptAs<GurlsOptionsList>("kernel");
+    const std::string x = validation? "Xva" : "X";
+    const std::string y = validation? "yva" : "y";
+
+    gMat2D<T>& XtX = kernel->getOptValue<OptMatrix<gMat2D<T> > >(x+"t"+x);
+    gMat2D<T>& Xty = kernel->getOptValue<OptMatrix<gMat2D<T> > >(x+"t"+y);
+    T* Xmu = kernel->getOptValue<OptMatrix<gMat2D<T> > >(x+"mu").getData();
+    T* ymu = kernel->getOptValue<OptMatrix<gMat2D<T> > >(y+"mu").getData();
+    T* yty = kernel->getOptValue<OptMatrix<gMat2D<T> > >(y+"t"+y).getData();
+    double& count = kernel->getOptValue<OptNumber>(std::string("n")+(validation? "va" : ""));
+
+    if (XtX.rows() != d || Xty.cols() != t)
+        throw std::runtime_error("All blocks of the stream must have the same number of columns.");
+    if (n == 0)
+        return;
+
+    const T* X_data = (const T*)X;
+    const T* Y_data = (const T*)Y;
+
+    //block means bx, by and the block centered around them
+    T* bx = new T[d];
+    T* by = new T[t];
+    T* Xc = new T[n*d];
+    T* Yc = new T[n*t];
+    for(unsigned long j = 0; j < d; ++j)
+    {
+        bx[j] = sumv(X_data+j*n, n)/n;
+        for(unsigned long i = 0; i < n; ++i)
+            Xc[i+j*n] = X_data[i+j*n]-bx[j];
+    }
+    for(unsigned long j = 0; j < t; ++j)
+    {
+        by[j] = sumv(Y_data+j*n, n)/n;
+        for(unsigned long i = 0; i < n; ++i)
+            Yc[i+j*n] = Y_data[i+j*n]-by[j];
+    }
+
+    //XtX += Xc'*Xc (upper triangle), Xty += Xc'*Yc
+    syrk(CblasUpper, CblasTrans, d, n, (T)1.0, Xc, n, (T)1.0, XtX.getData(), d);
+    gemm(CblasTrans, CblasNoTrans, d, t, n, (T)1.0, Xc, n, Yc, n, (T)1.0, Xty.getData(), d);
+
+    //merge: C += w*delta'*delta with delta = block mean - running mean and
+    //w = na*nb/(na+nb), then move the running means by delta*nb/(na+nb)
+    const T na = (T)count;
+    const T nb = (T)n;
+    const T w = na*nb/(na+nb);
+    const T step = nb/(na+nb);
+    for(unsigned long j = 0; j < d; ++j)
+        bx[j] -= Xmu[j];
+    for(unsigned long j = 0; j < t; ++j)
+        by[j] -= ymu[j];
+
+    T* C = XtX.getData();
+    for(unsigned long j = 0; j < d; ++j)
+        for(unsigned long i = 0; i <= j; ++i)
+            C[i+j*d] += w*bx[i]*bx[j];
+    C = Xty.getData();
+    for(unsigned long j = 0; j < t; ++j)
+    {
+        for(unsigned long i = 0; i < d; ++i)
+            C[i+j*d] += w*bx[i]*by[j];
+        yty[j] += dot(n, Yc+j*n, 1, Yc+j*n, 1) + w*by[j]*by[j];
+        ymu[j] += step*by[j];
+    }
+    for(unsigned long j = 0; j < d; ++j)
+        Xmu[j] += step*bx[j];
+
+    count += n;
+
+    delete [] Yc;
+    delete [] Xc;
+    delete [] by;
+    delete [] bx;
+}
+
+/**
+Copies the upper triangle of the d x d matrix A to its lower triangle.
+*/
+template <typename T>
+static void symmetrize(T* A, unsigned long d)
+{
+    for(unsigned long j = 0; j < d; ++j)
+        for(unsigned long i = j+1; i < d; ++i)
+            A[i+j*d] = A[j+i*d];
+}
+
+/**
+Moves the statistics of n samples, centered around their means mx (1 x d) and
+my (1 x t), to the center cx, cy (the origin if NULL); XtX is d x d and full,
+yty may be NULL:
+    XtX += n*(mx-cx)'*(mx-cx)
+    Xty += n*(mx-cx)'*(my-cy)
+    yty += n*(my-cy).^2
+*/
+template <typename T>
+static void shift_stats(T* XtX, T* Xty, T* yty, const T* mx, const T* my, 
+                        const T* cx, const T* cy, T n, unsigned long d, 
+                        unsigned long t)
+{
+    T* dx = new T[d];
+    T* dy = new T[t];
+    for(unsigned long j = 0; j < d; ++j)
+        dx[j] = mx[j] - (cx != NULL? cx[j] : (T)0.0);
+    for(unsigned long j = 0; j < t; ++j)
+        dy[j] = my[j] - (cy != NULL? cy[j] : (T)0.0);
+
+    for(unsigned long j = 0; j < d; ++j)
+        for(unsigned long i = 0; i < d; ++i)
+            XtX[i+j*d] += n*dx[i]*dx[j];
+    for(unsigned long j = 0; j < t; ++j)
+    {
+        for(unsigned long i = 0; i < d; ++i)
+            Xty[i+j*d] += n*dx[i]*dy[j];
+        if (yty != NULL)
+            yty[j] += n*dy[j]*dy[j];
+    }
+
+    delete [] dy;
+    delete [] dx;
+}
+
+/**
+Selects lambda and computes the primal RLS estimator from the accumulated 
+statistics, as paramsel:hoprimal followed by optimizer:rlsprimal would on the
+data. Lambda is chosen, for each output, among nlambda guesses by the mean 
+squared error on the held-out rows of the solution on the training rows,
+    yvaty - 2*w'*Xvaty + w'*XvatXva*w,
+unless a positive lambda is given. The final estimator is then trained on all 
+rows. If center is true, inputs and outputs are centered around the means of
+all rows, which are stored in kernel.Xmean and kernel.ymean. Fills paramsel
+(guesses, lambdas, perf) and optimizer (W, C, X) as those tasks do.
+*/
+template <typename T>
+void PyGURLSWrapper::stream_solve_impl(double lambda, bool center)
+{
+    if (this->opt == NULL || !this->opt->hasOpt("kernel.XtX"))
+        throw std::runtime_error("Initialize the stream before solving.");
+
+    GurlsOptionsList* kernel = this->opt->getOptAs<GurlsOptionsList>("kernel");
+    const gMat2D<T>& XtX_tr = kernel->getOptValue<OptMatrix<gMat2D<T> > >("XtX");
+    const gMat2D<T>& Xty_tr = kernel->getOptValue<OptMatrix<gMat2D<T> > >("Xty");
+    const gMat2D<T>& XtX_va = kernel->getOptValue<OptMatrix<gMat2D<T> > >("XvatXva");
+    const gMat2D<T>& Xty_va = kernel->getOptValue<OptMatrix<gMat2D<T> > >("Xvatyva");
+    const T* Xmu_tr = kernel->getOptValue<OptMatrix<gMat2D<T> > >("Xmu").getData();
+    const T* ymu_tr = kernel->getOptValue<OptMatrix<gMat2D<T> > >("ymu").getData();
+    const T* Xmu_va = kernel->getOptValue<OptMatrix<gMat2D<T> > >("Xvamu").getData();
+    const T* ymu_va = kernel->getOptValue<OptMatrix<gMat2D<T> > >("yvamu").getData();
+    const T* yty_va_acc = kernel->getOptValue<OptMatrix<gMat2D<T> > >("yvatyva").getData();
+    const unsigned long n_tr = (unsigned long)kernel->getOptAsNumber("n");
+    const unsigned long n_va = (unsigned long)kernel->getOptAsNumber("nva");
+    const unsigned long n = n_tr+n_va;
+    const unsigned long d = XtX_tr.rows();
+    const unsigned long t = Xty_tr.cols();
+
+    if (lambda <= 0 && (n_tr == 0 || n_va == 0))
+        throw std::runtime_error("Selecting lambda needs both training and held-out samples.");
+    if (n == 0)
+        throw std::runtime_error("No samples have been streamed.");
+
+    //working copies, so that more blocks can still be added afterwards
+    T* K_tr = new T[d*d];
+    T* K_va = new T[d*d];
+    T* B_tr = new T[d*t];
+    T* B_va = new T[d*t];
+    T* yty_va = new T[t];
+    copy(K_tr, XtX_tr.getData(), d*d);
+    copy(K_va, XtX_va.getData(), d*d);
+    copy(B_tr, Xty_tr.getData(), d*t);
+    copy(B_va, Xty_va.getData(), d*t);
+    copy(yty_va, yty_va_acc, t);
+    symmetrize(K_tr, d);
+    symmetrize(K_va, d);
+
+    //the statistics are centered around the means of their own rows: move
+    //them to the means of all rows, or back to the origin
+    kernel->removeOpt("Xmean");
+    kernel->removeOpt("ymean");
+    if (center)
+    {
+        gMat2D<T>* Xmean = new gMat2D<T>(1,d);
+        gMat2D<T>* ymean = new gMat2D<T>(1,t);
+        T* mx = Xmean->getData();
+        T* my = ymean->getData();
+        for(unsigned long j = 0; j < d; ++j)
+            mx[j] = ((T)n_tr*Xmu_tr[j] + (T)n_va*Xmu_va[j])/n;
+        for(unsigned long j = 0; j < t; ++j)
+            my[j] = ((T)n_tr*ymu_tr[j] + (T)n_va*ymu_va[j])/n;
+
+        shift_stats(K_tr, B_tr, (T*)NULL, Xmu_tr, ymu_tr, mx, my, (T)n_tr, d, t);
+        shift_stats(K_va, B_va, yty_va, Xmu_va, ymu_va, mx, my, (T)n_va, d, t);
+
+        kernel->addOpt("Xmean", new OptMatrix<gMat2D<T> >(*Xmean));
+        kernel->addOpt("ymean", new OptMatrix<gMat2D<T> >(*ymean));
+    }
+    else
+    {
+        shift_stats(K_tr, B_tr, (T*)NULL, Xmu_tr, ymu_tr, (T*)NULL, (T*)NULL, (T)n_tr, d, t);
+        shift_stats(K_va, B_va, yty_va, Xmu_va, ymu_va, (T*)NULL, (T*)NULL, (T)n_va, d, t);
+    }
+
+    gMat2D<T>* guesses_mat;
+    gMat2D<T>* perf_mat;
+    gMat2D<T>* LAMBDA = new gMat2D<T>(1,t);
+
+    if (lambda > 0)
+    {
+        guesses_mat = new gMat2D<T>(1,1);
+        guesses_mat->getData()[0] = (T)lambda;
+        perf_mat = new gMat2D<T>();
+        set(LAMBDA->getData(), (T)lambda, t);
+    }
+    else
+    {
+        const int tot = static_cast<int>(std::ceil(this->opt->getOptAsNumber("nlambda")));
+
+        //[Q,L] = eig(XtX_tr)
+        T* Q = new T[d*d];
+        T* L = new T[d];
+        copy(Q, K_tr, d*d);
+        eig_sm(Q, L, d);
+
+        T* guesses = lambdaguesses(L, d, std::min(d,n_tr), n_tr, tot, 
+                                   (T)(this->opt->getOptAsNumber("smallnumber")));
+        guesses_mat = new gMat2D<T>(guesses, 1, tot, true);
+
+        T* QtXty = new T[d*t];
+        dot(Q, B_tr, QtXty, d, d, d, t, d, t, CblasTrans, CblasNoTrans, CblasColMajor);
+
+        perf_mat = new gMat2D<T>(tot,t);
+        T* ap = perf_mat->getData();
+        T* W = new T[d*t];
+        T* KW = new T[d*t];
+        T* work = new T[d*(d+1)];
+
+        for(int i = 0; i < tot; ++i)
+        {
+            rls_eigen(Q, L, QtXty, W, guesses[i], n_tr, d, d, d, d, t, work);
+
+            dot(K_va, W, KW, d, d, d, t, d, t, CblasNoTrans, CblasNoTrans, CblasColMajor);
+            for(unsigned long j = 0; j < t; ++j)
+            {
+                const T sqe = yty_va[j] - 2*dot(d, W+j*d, 1, B_va+j*d, 1)
+                                        + dot(d, W+j*d, 1, KW+j*d, 1);
+                ap[i+j*tot] = -sqe/n_va;
+            }
+        }
+
+        //[dummy,idx] = max(ap,[],1);
+        unsigned long* idx = new unsigned long[t];
+        T* max_work = NULL;
+        indicesOfMax(ap, tot, t, idx, max_work, 1);
+        copyLocations(idx, guesses, t, tot, LAMBDA->getData());
+
+        delete [] idx;
+        delete [] work;
+        delete [] KW;
+        delete [] W;
+        delete [] QtXty;
+        delete [] guesses;
+        delete [] L;
+        delete [] Q;
+    }
+
+    GurlsOptionsList* paramsel = new GurlsOptionsList("paramsel");
+    paramsel->addOpt("guesses", new OptMatrix<gMat2D<T> >(*guesses_mat));
+    paramsel->addOpt("lambdas", new OptMatrix<gMat2D<T> >(*LAMBDA));
+    paramsel->addOpt("perf", new OptMatrix<gMat2D<T> >(*perf_mat));
+    this->opt->removeOpt("paramsel");
+    this->opt->addOpt("paramsel", paramsel);
+
+    //as optimizer:rlsprimal, on all the rows
+    T lambda_all = this->opt->getOptAs<OptFunction>("singlelambda")->getValue(LAMBDA->getData(), t);
+    axpy(d*d, (T)1.0, K_va, 1, K_tr, 1);
+    axpy(d*t, (T)1.0, B_va, 1, B_tr, 1);
+    gMat2D<T>* W = rls_primal_driver(K_tr, B_tr, n, d, t, lambda_all);
+
+    delete [] yty_va;
+    delete [] B_va;
+    delete [] B_tr;
+    delete [] K_va;
+    delete [] K_tr;
+
+    GurlsOptionsList* optimizer = new GurlsOptionsList("optimizer");
+    optimizer->addOpt("W", new OptMatrix<gMat2D<T> >(*W));
+    optimizer->addOpt("C", new OptMatrix<gMat2D<T> >(*(new gMat2D<T>())));
+    optimizer->addOpt("X", new OptMatrix<gMat2D<T> >(*(new gMat2D<T>())));
+    this->opt->removeOpt("optimizer");
+    this->opt->addOpt("optimizer", optimizer);
+}
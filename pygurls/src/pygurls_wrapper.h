@@ -36,7 +36,12 @@
 #  POSSIBILITY OF SUCH DAMAGE.
 */
 
+#include <algorithm>
+#include <cmath>
 #include <iostream> 
+#include <sstream>
+#include <set>
+#include <vector>
 #include <stdexcept>
 #include <string>
 #include <string.h>
@@ -65,41 +70,128 @@ implement everything using void pointers and function pointers that would
 route the execution to a correct set of private function in the wrapper class
 
 I implemented double and float, which are the only types supported in gmath.cpp
+
+Thread safety: different PyGURLSWrapper instances share no state and can run
+concurrently. A single instance is not thread-safe; the Python PyGURLS class
+serializes calls on the same instance with a lock.
 */
 namespace gurls {     
     
+    /**
+     * Function called by a TaskCallback when a task starts (end = false) 
+     * and ends (end = true), with the user pointer given to it
+     */
+    typedef void (*task_event_fn)(void* user, bool end, const TaskProfile& profile);
+
+    /**
+     * TaskObserver forwarding the events to a plain function
+     */
+    class TaskCallback: public TaskObserver {
+    public:
+        TaskCallback(): fn(NULL), user(NULL) {}
+        void set(task_event_fn f, void* u) { fn = f; user = u; }
+        void taskStarted(const TaskProfile& profile) { if(fn) fn(user, false, profile); }
+        void taskEnded(const TaskProfile& profile) { if(fn) fn(user, true, profile); }
+    private:
+        task_event_fn fn;
+        void* user;
+    };
+
     class PyGURLSWrapper {
     private:
         GURLS G;               
+        TaskCallback task_callback; // observer of the tasks of G
         // void pointer to support multiple data input types
-        std::map< char*, void* > data_map;
+        std::map< std::string, void* > data_map;
         OptTaskSequence *seq; // task sequence        
         GurlsOptionsList *processes; //GURLS processes
         GurlsOptionsList *opt; // options structure
-    
-        unsigned long num_mat_rows; //# of rows from last conversion
-        unsigned long num_mat_cols; //# of cols from last conversion
 
         int  (gurls::PyGURLSWrapper::*pt_run)(char*,char*,char*);    
         void (gurls::PyGURLSWrapper::*pt_load_data)(char*,char*);
+        void (gurls::PyGURLSWrapper::*pt_add_data)(void*,unsigned long,unsigned long,char*);
+        void (gurls::PyGURLSWrapper::*pt_erase_data)(char*);
+        void* (gurls::PyGURLSWrapper::*pt_get_data)(char*,unsigned long&,unsigned long&);
+        int  (gurls::PyGURLSWrapper::*pt_run_tasks)(char*,char*,char*);
+        void (gurls::PyGURLSWrapper::*pt_predict)(char*,char*,void*,unsigned long,unsigned long,unsigned long,double);
+        void (gurls::PyGURLSWrapper::*pt_factorize)(char*);
+        void (gurls::PyGURLSWrapper::*pt_stream_init)(unsigned long,unsigned long);
+        void (gurls::PyGURLSWrapper::*pt_stream_add)(void*,void*,unsigned long,unsigned long,unsigned long,bool);
+        void (gurls::PyGURLSWrapper::*pt_stream_solve)(double,bool);
+        void* (gurls::PyGURLSWrapper::*pt_detach_data)(char*);
 
         void load_data_double (char* data_file, char* data_id); 
         void load_data_float  (char* data_file, char* data_id);
         int  run_double      (char* in_data, char* out_data, char* job_id);      
         int  run_float       (char* in_data, char* out_data, char* job_id); 
 
-        const std::vector<double> export_gmat(const gMat2D<double>& mat);
+        template <typename T>
+        void add_data_impl(void* buf, unsigned long rows, unsigned long cols,
+                           char* data_id);
+        template <typename T>
+        void erase_data_impl(char* data_id);
+        template <typename T>
+        void* get_data_impl(char* data_id, unsigned long& rows, 
+                            unsigned long& cols);
+        template <typename T>
+        int run_tasks_impl(char* in_data, char* out_data, char* fields);
+        template <typename T>
+        std::string run_entries(const std::vector<std::string>& entries,
+                                const gMat2D<T>& X, const gMat2D<T>& Y);
+        template <typename T>
+        void predict_impl(char* in_data, char* fields, void* out, 
+                          unsigned long rows, unsigned long cols,
+                          unsigned long block_rows, double max_memory);
+        template <typename T>
+        void factorize_impl(char* in_data);
+        template <typename T>
+        void set_matrix_impl(char* field, void* buf, unsigned long rows, 
+                             unsigned long cols);
+        template <typename T>
+        void stream_init_impl(unsigned long d, unsigned long t);
+        template <typename T>
+        void stream_add_impl(void* X, void* Y, unsigned long n, unsigned long d,
+                             unsigned long t, bool validation);
+        template <typename T>
+        void stream_solve_impl(double lambda, bool center);
+        template <typename T>
+        void* detach_data_impl(char* data_id);
+        template <typename T>
+        static void* detach_option(GurlsOptionsList* parent, const std::string& key);
+        void collect_buffers(GurlsOption* option, std::vector<void*>& buffers);
+
+        void* find_data(char* data_id);
+        void  set_data_type(const char* data_type);
+        void  clear_data();
+        static std::vector<std::string> split_lines(const char* str);
+
+        void* export_gmat(GurlsOption* mat_opt, unsigned long& rows, 
+                          unsigned long& cols, int& cell_type);
+        GurlsOptionsList* parent_opt(const std::string& field, std::string& key,
+                                     bool create = false);
     public:
         PyGURLSWrapper();
         PyGURLSWrapper(char* data_type);
         ~PyGURLSWrapper();             
-        const std::vector<double> get_field(char* field);
-        const std::vector<double> get_opt_field(char* option,char* field);                                            
-        void add_data(std::vector<double>& vec_dat, unsigned long rows, 
-                        unsigned long cols, char* data_id);        
+        void* get_field(char* field, unsigned long& rows, unsigned long& cols,
+                        int& cell_type);
+        void* get_opt_field(char* option, char* field, unsigned long& rows,
+                            unsigned long& cols, int& cell_type);
+        double get_number(char* field);
+        void set_number(char* field, double value);
+        void set_string(char* field, char* value);
+        void erase_field(char* field);
+        void set_matrix(char* field, void* buf, unsigned long rows, 
+                        unsigned long cols, int cell_type);
+        int get_field_type(char* field);
+        std::string get_string(char* field);
+        std::vector<std::string> get_field_names(char* field);
+        std::vector<std::string> get_task_sequence();
+        void add_data(void* buf, unsigned long rows, unsigned long cols,
+                        char* data_id);
         void load_data(char* data_file, char* data_id);    
         void erase_data(char* data_id);    
-        std::vector<double> get_data_vec(char* data_id);
+        void* get_data(char* data_id, unsigned long& rows, unsigned long& cols);
         void set_task_sequence(char* seq_str);
         void clear_task_sequence();
         void init_processes(char* p_name, bool use_default);
@@ -108,10 +200,27 @@ namespace gurls {
         void build_pipeline(char* p_name, bool use_default);
         void clear_pipeline();        
         int run(char* in_data, char* out_data, char* job_id);      
-
-        unsigned long get_num_rows(){return this->num_mat_rows;}
-        unsigned long get_num_cols(){return this->num_mat_cols;}
+        const std::vector<TaskProfile>& last_run_profile() const;
+        void set_task_callback(task_event_fn fn, void* user);
+        int run_tasks(char* in_data, char* out_data, char* fields);
+        void predict(char* in_data, char* fields, void* out, unsigned long rows,
+                     unsigned long cols, unsigned long block_rows, 
+                     double max_memory);
+        void factorize(char* in_data);
+        void stream_init(unsigned long d, unsigned long t);
+        void stream_add(void* X, void* Y, unsigned long n, unsigned long d,
+                        unsigned long t, bool validation);
+        void stream_solve(double lambda, bool center);
+        void* detach_field(char* field);
+        void* detach_data(char* data_id);
+        std::vector<void*> get_field_buffers();
     };
+
+    /**
+     * Deletes a matrix returned by detach_field or detach_data, whose 
+     * elements are of type cell_type (one of OptMatrixBase::MatrixType)
+     */
+    void free_matrix(void* mat, int cell_type);
 }
 
 
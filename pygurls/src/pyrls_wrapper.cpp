@@ -0,0 +1,334 @@
+/*
+#  A Python wrapper for GURLS++.
+#
+#  Copyright (c) 2014 MIT. All rights reserved.
+#
+#   author: Pedro Santana
+#   e-mail: psantana@mit.edu
+#   website: people.csail.mit.edu/psantana
+#
+#  Redistribution and use in source and binary forms, with or without
+#  modification, are permitted provided that the following conditions
+#  are met:
+#
+#  1. Redistributions of source code must retain the above copyright
+#     notice, this list of conditions and the following disclaimer.
+#  2. Redistributions in binary form must reproduce the above copyright
+#     notice, this list of conditions and the following disclaimer in
+#     the documentation and/or other materials provided with the
+#     distribution.
+#  3. Neither the name(s) of the copyright holders nor the names of its 
+#     contributors or of the Massachusetts Institute of Technology may be 
+#     used to endorse or promote products derived from this software
+#     without specific prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+#  "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+#  LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+#  FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+#  COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+#  INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+#  BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS
+#  OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED
+#  AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+#  LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+#  ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+#  POSSIBILITY OF SUCH DAMAGE.
+*/
+
+
+#include "pyrls_wrapper.h"
+
+using namespace std;
+using namespace gurls;
+
+PyRLSWrapper::PyRLSWrapper(char* kind, char* data_type, char* name)
+{
+    this->wrapper = NULL;
+    this->pred = NULL;
+    this->largescale = false;
+
+    if (strcmp(data_type,"double") == 0)
+    {
+        this->pt_create = &gurls::PyRLSWrapper::create_impl<double>;
+        this->pt_destroy = &gurls::PyRLSWrapper::destroy_impl<double>;
+        this->pt_train = &gurls::PyRLSWrapper::train_impl<double>;
+        this->pt_update = &gurls::PyRLSWrapper::update_impl<double>;
+        this->pt_downdate = &gurls::PyRLSWrapper::downdate_impl<double>;
+        this->pt_eval = &gurls::PyRLSWrapper::eval_impl<double>;
+        this->pt_retrain = &gurls::PyRLSWrapper::retrain_impl<double>;
+        this->pt_set_option = &gurls::PyRLSWrapper::set_option_impl<double>;
+        this->pt_get_opt = &gurls::PyRLSWrapper::get_opt_impl<double>;
+        this->pt_get_field = &gurls::PyRLSWrapper::get_field_impl<double>;
+    }
+    else if (strcmp(data_type,"float") == 0)
+    {
+        this->pt_create = &gurls::PyRLSWrapper::create_impl<float>;
+        this->pt_destroy = &gurls::PyRLSWrapper::destroy_impl<float>;
+        this->pt_train = &gurls::PyRLSWrapper::train_impl<float>;
+        this->pt_update = &gurls::PyRLSWrapper::update_impl<float>;
+        this->pt_downdate = &gurls::PyRLSWrapper::downdate_impl<float>;
+        this->pt_eval = &gurls::PyRLSWrapper::eval_impl<float>;
+        this->pt_retrain = &gurls::PyRLSWrapper::retrain_impl<float>;
+        this->pt_set_option = &gurls::PyRLSWrapper::set_option_impl<float>;
+        this->pt_get_opt = &gurls::PyRLSWrapper::get_opt_impl<float>;
+        this->pt_get_field = &gurls::PyRLSWrapper::get_field_impl<float>;
+    }
+    else
+        throw std::runtime_error("Unsupported data type (use 'double' or 'float').");
+
+    (*this.*pt_create)(kind,name);
+}
+
+PyRLSWrapper::~PyRLSWrapper()
+{
+    (*this.*pt_destroy)();
+}
+
+template <typename T>
+void PyRLSWrapper::create_impl(const std::string& kind, const std::string& name)
+{
+    if (kind == "recursive")
+        this->wrapper = new RecursiveRLSWrapper<T>(name);
+    else if (kind == "recursivechol")
+        this->wrapper = new RecursiveRLSCholUpdateWrapper<T>(name);
+    else if (kind == "nystrom")
+        this->wrapper = new NystromWrapper<T>(name);
+    else if (kind == "randfeats")
+        this->wrapper = new RandomFeaturesWrapper<T>(name);
+    else
+        throw std::runtime_error("Unknown GURLS++ wrapper: "+kind);
+}
+
+template <typename T>
+void PyRLSWrapper::destroy_impl()
+{
+    delete (GurlsWrapper<T>*)this->wrapper;
+    delete (gMat2D<T>*)this->pred;
+    this->wrapper = NULL;
+    this->pred = NULL;
+}
+
+/**
+Returns the wrapper as a RecursiveRLSWrapper, or throws if it is of another kind.
+*/
+template <typename T>
+RecursiveRLSWrapper<T>* PyRLSWrapper::recursive()
+{
+    RecursiveRLSWrapper<T>* rec = dynamic_cast<RecursiveRLSWrapper<T>*>((GurlsWrapper<T>*)this->wrapper);
+    if (rec == NULL)
+        throw std::runtime_error("The model does not support recursive updates.");
+    return rec;
+}
+
+/**
+Returns the wrapper as a RecursiveRLSCholUpdateWrapper, or throws if it is of
+another kind.
+*/
+template <typename T>
+RecursiveRLSCholUpdateWrapper<T>* PyRLSWrapper::recursive_chol()
+{
+    RecursiveRLSCholUpdateWrapper<T>* chol = dynamic_cast<RecursiveRLSCholUpdateWrapper<T>*>((GurlsWrapper<T>*)this->wrapper);
+    if (chol == NULL)
+        throw std::runtime_error("The model does not support Cholesky downdates.");
+    return chol;
+}
+
+/**
+Returns the wrapper as a NystromWrapper, or throws if it is of another kind.
+*/
+template <typename T>
+NystromWrapper<T>* PyRLSWrapper::nystrom()
+{
+    NystromWrapper<T>* nys = dynamic_cast<NystromWrapper<T>*>((GurlsWrapper<T>*)this->wrapper);
+    if (nys == NULL)
+        throw std::runtime_error("The model is not a Nystrom model.");
+    return nys;
+}
+
+/**
+Returns the wrapper as a RandomFeaturesWrapper, or throws if it is of another
+kind.
+*/
+template <typename T>
+RandomFeaturesWrapper<T>* PyRLSWrapper::random_features()
+{
+    RandomFeaturesWrapper<T>* rf = dynamic_cast<RandomFeaturesWrapper<T>*>((GurlsWrapper<T>*)this->wrapper);
+    if (rf == NULL)
+        throw std::runtime_error("The model is not a random features model.");
+    return rf;
+}
+
+void PyRLSWrapper::train(void* X, void* Y, unsigned long n, unsigned long d,
+                         unsigned long t)
+{
+    (*this.*pt_train)(X,Y,n,d,t);
+}
+
+void PyRLSWrapper::update(void* X, void* Y, unsigned long n, unsigned long d, 
+                          unsigned long t)
+{
+    (*this.*pt_update)(X,Y,n,d,t);
+}
+
+void PyRLSWrapper::downdate(void* X, void* Y, unsigned long n, unsigned long d,
+                            unsigned long t)
+{
+    (*this.*pt_downdate)(X,Y,n,d,t);
+}
+
+void* PyRLSWrapper::eval(void* X, unsigned long n, unsigned long d,
+                         unsigned long& rows, unsigned long& cols)
+{
+    return (*this.*pt_eval)(X,n,d,rows,cols);
+}
+
+void PyRLSWrapper::retrain()
+{
+    (*this.*pt_retrain)();
+}
+
+void PyRLSWrapper::set_option(char* field, double value)
+{
+    (*this.*pt_set_option)(field,value);
+}
+
+double PyRLSWrapper::get_number(char* field)
+{
+    return (*this.*pt_get_opt)().getOptAsNumber(field);
+}
+
+void* PyRLSWrapper::get_field(char* field, unsigned long& rows, 
+                              unsigned long& cols)
+{
+    return (*this.*pt_get_field)(field,rows,cols);
+}
+
+template <typename T>
+void PyRLSWrapper::train_impl(void* X, void* Y, unsigned long n, 
+                              unsigned long d, unsigned long t)
+{
+    const gMat2D<T> X_mat((T*)X,n,d,false);
+    const gMat2D<T> Y_mat((T*)Y,n,t,false);
+    if (this->largescale)
+        this->nystrom<T>()->train_largescale(X_mat,Y_mat);
+    else
+        ((GurlsWrapper<T>*)this->wrapper)->train(X_mat,Y_mat);
+}
+
+template <typename T>
+void PyRLSWrapper::update_impl(void* X, void* Y, unsigned long n, 
+                               unsigned long d, unsigned long t)
+{
+    const gMat2D<T> X_mat((T*)X,n,d,false);
+    const gMat2D<T> Y_mat((T*)Y,n,t,false);
+    if (dynamic_cast<RecursiveRLSCholUpdateWrapper<T>*>((GurlsWrapper<T>*)this->wrapper) != NULL)
+        this->recursive_chol<T>()->update(X_mat,Y_mat);
+    else
+        this->recursive<T>()->update(X_mat,Y_mat);
+}
+
+/**
+Removes the n rows of X, previously added with update, from the model.
+*/
+template <typename T>
+void PyRLSWrapper::downdate_impl(void* X, void* Y, unsigned long n,
+                                 unsigned long d, unsigned long t)
+{
+    const gMat2D<T> X_mat((T*)X,n,d,false);
+    const gMat2D<T> Y_mat((T*)Y,n,t,false);
+    this->recursive_chol<T>()->downdate(X_mat,Y_mat);
+}
+
+/**
+Returns the predictions for the n x d matrix X, which remain valid until the 
+next call to eval.
+*/
+template <typename T>
+void* PyRLSWrapper::eval_impl(void* X, unsigned long n, unsigned long d,
+                              unsigned long& rows, unsigned long& cols)
+{
+    const gMat2D<T> X_mat((T*)X,n,d,false);
+    gMat2D<T>* result = ((GurlsWrapper<T>*)this->wrapper)->eval(X_mat);
+
+    delete (gMat2D<T>*)this->pred;
+    this->pred = result;
+    rows = result->rows();
+    cols = result->cols();
+    return result->getData();
+}
+
+template <typename T>
+void PyRLSWrapper::retrain_impl()
+{
+    if (dynamic_cast<RecursiveRLSCholUpdateWrapper<T>*>((GurlsWrapper<T>*)this->wrapper) != NULL)
+        throw std::runtime_error("Retraining is not available for the Cholesky update.");
+    this->recursive<T>()->retrain();
+}
+
+/**
+Sets one of the parameters of the wrapper: nlambda (number of regularization
+parameters tried), lambda (fixes the regularization parameter), hoproportion
+(fraction of samples held out to select it), regression (1 for regression,
+0 for classification, which changes the performance measure), forgetting
+(exponential forgetting factor of the Cholesky update, in (0, 1]), sigma 
+(width of the Gaussian kernel of the Nystrom and random features models),
+landmarks (maximum number of Nystrom landmarks), largescale (1 to train the
+Nystrom model with train_largescale, by blocks of nlambda landmarks) or 
+features (number of random features).
+*/
+template <typename T>
+void PyRLSWrapper::set_option_impl(char* field, double value)
+{
+    GurlsWrapper<T>* w = (GurlsWrapper<T>*)this->wrapper;
+
+    if (strcmp(field,"nlambda") == 0)
+        w->setNparams((unsigned long)value);
+    else if (strcmp(field,"lambda") == 0)
+        w->setParam(value);
+    else if (strcmp(field,"hoproportion") == 0)
+        w->setSplitProportion(value);
+    else if (strcmp(field,"regression") == 0)
+        w->setProblemType(value? GurlsWrapper<T>::REGRESSION : GurlsWrapper<T>::CLASSIFICATION);
+    else if (strcmp(field,"forgetting") == 0)
+        this->recursive_chol<T>()->setForgettingFactor(value);
+    else if (strcmp(field,"sigma") == 0)
+    {
+        if (dynamic_cast<RandomFeaturesWrapper<T>*>(w) != NULL)
+            this->random_features<T>()->setSigma(value);
+        else
+            this->nystrom<T>()->setSigma(value);
+    }
+    else if (strcmp(field,"landmarks") == 0)
+    {
+        // NystromWrapper::setParam also sets nlambda to 1
+        unsigned long nparams = (unsigned long)w->getOpt().getOptAsNumber("nlambda");
+        this->nystrom<T>()->setParam(value);
+        w->setNparams(nparams);
+    }
+    else if (strcmp(field,"largescale") == 0)
+    {
+        this->nystrom<T>();
+        this->largescale = (value != 0);
+    }
+    else if (strcmp(field,"features") == 0)
+        this->random_features<T>()->setNRandFeats((unsigned long)value);
+    else
+        throw std::runtime_error(std::string("Unknown wrapper option: ")+field);
+}
+
+template <typename T>
+const GurlsOptionsList& PyRLSWrapper::get_opt_impl()
+{
+    return ((GurlsWrapper<T>*)this->wrapper)->getOpt();
+}
+
+template <typename T>
+void* PyRLSWrapper::get_field_impl(char* field, unsigned long& rows, 
+                                   unsigned long& cols)
+{
+    const gMat2D<T>& mat = this->get_opt_impl<T>().template getOptValue<OptMatrix<gMat2D<T> > >(field);
+    rows = mat.rows();
+    cols = mat.cols();
+    return const_cast<T*>(mat.getData());
+}
@@ -0,0 +1,135 @@
+/*
+#  A Python wrapper for GURLS++.
+#
+#  Copyright (c) 2014 MIT. All rights reserved.
+#
+#   author: Pedro Santana
+#   e-mail: psantana@mit.edu
+#   website: people.csail.mit.edu/psantana
+#
+#  Redistribution and use in source and binary forms, with or without
+#  modification, are permitted provided that the following conditions
+#  are met:
+#
+#  1. Redistributions of source code must retain the above copyright
+#     notice, this list of conditions and the following disclaimer.
+#  2. Redistributions in binary form must reproduce the above copyright
+#     notice, this list of conditions and the following disclaimer in
+#     the documentation and/or other materials provided with the
+#     distribution.
+#  3. Neither the name(s) of the copyright holders nor the names of its 
+#     contributors or of the Massachusetts Institute of Technology may be 
+#     used to endorse or promote products derived from this software
+#     without specific prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+#  "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+#  LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+#  FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+#  COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+#  INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+#  BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS
+#  OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED
+#  AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+#  LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+#  ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+#  POSSIBILITY OF SUCH DAMAGE.
+*/
+
+
+#ifndef PYRLS_WRAPPER_H
+#define PYRLS_WRAPPER_H
+
+#include <stdexcept>
+#include <string>
+#include <string.h>
+
+#include "gurls++/gmat2d.h"
+#include "gurls++/optlist.h"
+#include "gurls++/wrapper.h"
+#include "gurls++/recrlswrapper.h"
+#include "gurls++/recrlswrapperchol.h"
+#include "gurls++/nystromwrapper.h"
+#include "gurls++/randfeatswrapper.h"
+
+/**
+Wrapper around the GurlsWrapper classes of GURLS++ (RecursiveRLSWrapper,
+RecursiveRLSCholUpdateWrapper, NystromWrapper and RandomFeaturesWrapper),
+which train and evaluate a model without an explicit task pipeline.
+
+As in PyGURLSWrapper, the data type is chosen at construction and the calls are
+routed through member function pointers to the typed implementations. Matrices
+are column-major buffers owned by the caller.
+*/
+namespace gurls {
+
+    class PyRLSWrapper {
+    private:
+        void* wrapper; // GurlsWrapper<T>*
+        void* pred;    // gMat2D<T>* returned by the last call to eval
+        bool largescale; // train NystromWrapper with train_largescale
+
+        void  (gurls::PyRLSWrapper::*pt_create)(const std::string&, const std::string&);
+        void  (gurls::PyRLSWrapper::*pt_destroy)();
+        void  (gurls::PyRLSWrapper::*pt_train)(void*,void*,unsigned long,unsigned long,unsigned long);
+        void  (gurls::PyRLSWrapper::*pt_update)(void*,void*,unsigned long,unsigned long,unsigned long);
+        void  (gurls::PyRLSWrapper::*pt_downdate)(void*,void*,unsigned long,unsigned long,unsigned long);
+        void* (gurls::PyRLSWrapper::*pt_eval)(void*,unsigned long,unsigned long,unsigned long&,unsigned long&);
+        void  (gurls::PyRLSWrapper::*pt_retrain)();
+        void  (gurls::PyRLSWrapper::*pt_set_option)(char*,double);
+        const GurlsOptionsList& (gurls::PyRLSWrapper::*pt_get_opt)();
+        void* (gurls::PyRLSWrapper::*pt_get_field)(char*,unsigned long&,unsigned long&);
+
+        template <typename T>
+        void create_impl(const std::string& kind, const std::string& name);
+        template <typename T>
+        void destroy_impl();
+        template <typename T>
+        void train_impl(void* X, void* Y, unsigned long n, unsigned long d,
+                        unsigned long t);
+        template <typename T>
+        void update_impl(void* X, void* Y, unsigned long n, unsigned long d,
+                         unsigned long t);
+        template <typename T>
+        void downdate_impl(void* X, void* Y, unsigned long n, unsigned long d,
+                           unsigned long t);
+        template <typename T>
+        void* eval_impl(void* X, unsigned long n, unsigned long d,
+                        unsigned long& rows, unsigned long& cols);
+        template <typename T>
+        void retrain_impl();
+        template <typename T>
+        void set_option_impl(char* field, double value);
+        template <typename T>
+        const GurlsOptionsList& get_opt_impl();
+        template <typename T>
+        void* get_field_impl(char* field, unsigned long& rows, unsigned long& cols);
+
+        template <typename T>
+        RecursiveRLSWrapper<T>* recursive();
+        template <typename T>
+        RecursiveRLSCholUpdateWrapper<T>* recursive_chol();
+        template <typename T>
+        NystromWrapper<T>* nystrom();
+        template <typename T>
+        RandomFeaturesWrapper<T>* random_features();
+
+    public:
+        PyRLSWrapper(char* kind, char* data_type, char* name);
+        ~PyRLSWrapper();
+        void train(void* X, void* Y, unsigned long n, unsigned long d, 
+                   unsigned long t);
+        void update(void* X, void* Y, unsigned long n, unsigned long d, 
+                    unsigned long t);
+        void downdate(void* X, void* Y, unsigned long n, unsigned long d,
+                      unsigned long t);
+        void* eval(void* X, unsigned long n, unsigned long d, 
+                   unsigned long& rows, unsigned long& cols);
+        void retrain();
+        void set_option(char* field, double value);
+        double get_number(char* field);
+        void* get_field(char* field, unsigned long& rows, unsigned long& cols);
+    };
+}
+
+#endif
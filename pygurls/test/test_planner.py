@@ -0,0 +1,45 @@
+"""
+Tests of the automatic choice of the solver (plan_solver, AutoRLSRegressor).
+"""
+
+import unittest
+
+import numpy as np
+
+import pygurls
+from test_estimators import ScratchDirTestCase, rmse
+
+
+def rbf_problem(n,d=6,noise=0.05,seed=1):
+    """Inputs in [0,1]^d and a smooth nonlinear target of two of them, with 
+    Gaussian noise of standard deviation noise on the training targets."""
+    
+    rng = np.random.RandomState(seed)
+    f = lambda X: np.sin(3*X[:,0])+X[:,1]**2
+    Xtrain, Xtest = rng.rand(n,d), rng.rand(n,d)
+    Ytrain = f(Xtrain)+noise*rng.randn(n)
+    return Xtrain, Ytrain, Xtest, f(Xtest)
+
+
+class AutoRLSRegressorTest(ScratchDirTestCase):
+    
+    def test_exact_error(self):
+        #The exact route is an RLSRegressor, whose parameters are selected 
+        #on the regression error: the test error stays below the noise
+        Xtrain, Ytrain, Xtest, Ytest = rbf_problem(300)
+        for paramsel in ['loocv','ho']:
+            reg = pygurls.AutoRLSRegressor(kernel='rbf',paramsel=paramsel)
+            reg.fit(Xtrain,Ytrain)
+            self.assertEqual(reg.plan_.route.name,'dual')
+            self.assertLess(rmse(reg.predict(Xtest),Ytest),0.05)
+    
+    def test_approximation_error(self):
+        Xtrain, Ytrain, Xtest, Ytest = rbf_problem(300)
+        reg = pygurls.AutoRLSRegressor(kernel='rbf',max_time=0)
+        reg.fit(Xtrain,Ytrain)
+        self.assertFalse(reg.plan_.route.exact)
+        self.assertLess(rmse(reg.predict(Xtest),Ytest),0.1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,141 @@
+"""
+Tests of the PyGURLS pipeline interface.
+"""
+
+import gc
+import os
+import shutil
+import unittest
+
+import numpy as np
+
+import pygurls
+from test_estimators import ScratchDirTestCase
+
+
+_TASKS = [['kernel','linear'],['paramsel','loocvdual'],['optimizer','rlsdual'],
+          ['pred','dual']]
+
+
+def trained_pipeline(n=50,d=4,seed=0):
+    """PyGURLS object trained in memory on a random linear problem, with the
+    training inputs in 'X' and targets in 'Y'."""
+    
+    rng = np.random.RandomState(seed)
+    X = rng.randn(n,d)
+    Y = X.dot(rng.randn(d,1))+0.1*rng.randn(n,1)
+    pg = pygurls.PyGURLS()
+    pg.set_task_sequence(_TASKS)
+    pg.init_processes('processes',False)
+    pg.add_process('train',['computeNsave']*3+['ignore'])
+    pg.build_pipeline('pygurls_test_%x'%(id(pg)),True)
+    pg.set_option('todisk',0)
+    pg.add_data(X,'X')
+    pg.add_data(Y,'Y')
+    if pg.run('X','Y','train') != 0:
+        raise RuntimeError('GURLS++ training failed.')
+    return pg
+
+
+class FieldViewTest(ScratchDirTestCase):
+    
+    def test_views_outlive_their_field(self):
+        #The views keep their matrices alive when GURLS++ replaces or frees
+        #the fields they were taken from
+        pg = trained_pipeline()
+        K = pg.get_field('kernel.K')
+        W = pg.get_option_field('optimizer','W')
+        K_copy, W_copy = pg.get_field('kernel.K',copy=True), W.copy()
+        self.assertFalse(K.flags.writeable)
+        self.assertTrue(K_copy.flags.writeable)
+        self.assertIs(pg.get_field('kernel.K').base,K.base)
+        
+        pg.add_data(2*pg.get_data('X',copy=True),'X')
+        pg.run('X','Y','train')
+        pg.erase_field('optimizer')
+        pg.clear_pipeline()
+        del pg
+        gc.collect()
+        np.testing.assert_array_equal(K,K_copy)
+        np.testing.assert_array_equal(W,W_copy)
+    
+    def test_fields_after_view(self):
+        #GURLS++ keeps using the viewed matrices of a field
+        pg = trained_pipeline()
+        W = pg.get_field('optimizer.W')
+        pg.run_tasks('X',['pred'])
+        pred = pg.get_field('pred',copy=True)
+        del W
+        gc.collect()
+        pg.run_tasks('X',['pred'])
+        np.testing.assert_array_equal(pg.get_field('pred'),pred)
+    
+    def test_data_views(self):
+        pg = pygurls.PyGURLS()
+        X = np.asfortranarray(np.random.RandomState(0).randn(10,3))
+        pg.add_data(X,'X')
+        self.assertIs(pg.get_data('X').base,X)
+        
+        np.savetxt('X.txt',X)
+        pg.load_data('X.txt','L')
+        L = pg.get_data('L')
+        pg.erase_data('L')
+        del pg
+        gc.collect()
+        np.testing.assert_allclose(L,X)
+    
+    def test_model_views(self):
+        pg = trained_pipeline()
+        W = pg.get_field('optimizer.W',copy=True)
+        pg.save_model('model.pgm')
+        loaded = pygurls.PyGURLS()
+        loaded.load_model('model.pgm',mmap=True)
+        view = loaded.get_field('optimizer.W')
+        self.assertIsInstance(view.base,np.ndarray) #the mapped file
+        loaded.clear_pipeline()
+        np.testing.assert_array_equal(view,W)
+    
+    def test_model_matrix_types(self):
+        #Matrices whose element type differs from the pipeline's, such as 
+        #index matrices, are saved and restored with their own type
+        trained_pipeline().save_model('model.pgm')
+        header,matrices = pygurls._read_model_file('model.pgm',mmap=False)
+        extra = {'paramsel.indices':np.arange(6,dtype=np.uint64).reshape(3,2),
+                 'paramsel.scale':np.ones((2,2),dtype=np.float32)}
+        pygurls._write_model_file('mixed.pgm',header,
+                                  list(matrices.items())+list(extra.items()))
+        
+        for path,resave in [('mixed.pgm','resaved.pgm'),('resaved.pgm',None)]:
+            pg = pygurls.PyGURLS()
+            pg.load_model(path)
+            for field,mat in extra.items():
+                loaded = pg.get_field(field,copy=True)
+                self.assertEqual(loaded.dtype.kind,mat.dtype.kind)
+                self.assertEqual(loaded.itemsize,mat.itemsize)
+                np.testing.assert_array_equal(loaded,mat)
+            if resave:
+                pg.save_model(resave)
+
+
+
+class WorkerOptionsTest(ScratchDirTestCase):
+    
+    def test_changes_apply_to_the_next_run(self):
+        pg = trained_pipeline()
+        self.assertEqual(pg.get_field('njobs')[0],1)
+        pg.n_jobs = 3
+        pg.max_memory = 2**30
+        pg.cache_dir = os.path.abspath('cache')
+        pg.run('X','Y','train')
+        self.assertEqual(pg.get_field('njobs')[0],3)
+        self.assertEqual(pg.get_field('maxmemory')[0],2**30)
+        self.assertTrue(os.listdir('cache'))
+        
+        shutil.rmtree('cache')
+        pg.cache_dir = None
+        pg.run('X','Y','train')
+        self.assertFalse(os.path.exists('cache'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+"""
+Tests of the micro-batching inference server (pygurls_server.py).
+"""
+
+import asyncio
+import json
+import os
+import sys
+import unittest
+
+import numpy as np
+
+import pygurls
+from test_estimators import ScratchDirTestCase
+
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),'..'))
+from pygurls_server import InferenceServer
+
+
+class InferenceServerTest(ScratchDirTestCase):
+    
+    def setUp(self):
+        ScratchDirTestCase.setUp(self)
+        rng = np.random.RandomState(0)
+        X = rng.randn(300,50)
+        self.reg = pygurls.RLSRegressor().fit(X,X.dot(rng.randn(50)))
+        self.reg.save('model.pgm')
+        self.X = rng.randn(200,50)
+    
+    def _exchange(self,requests,**kwargs):
+        """Send the request lines on one connection and return the responses,
+        by id."""
+        
+        async def exchange():
+            server = InferenceServer({'reg':'model.pgm'},**kwargs)
+            tcp = await server.start_tcp()
+            try:
+                port = tcp.sockets[0].getsockname()[1]
+                reader,writer = await asyncio.open_connection('127.0.0.1',port)
+                for req in requests:
+                    writer.write(req)
+                await writer.drain()
+                responses = [json.loads(await reader.readline())
+                             for req in requests]
+                writer.close()
+            finally:
+                await server.close()
+            return dict((r['id'],r) for r in responses)
+        
+        return asyncio.run(exchange())
+    
+    def _request(self,req_id,X):
+        return (json.dumps({'id':req_id,'model':'reg','x':X.tolist()})+'\n').encode()
+    
+    def test_large_request(self):
+        #200 rows of 50 features are larger than the 64 KiB default limit of
+        #asyncio streams; the pipelined request after them is served too
+        big = self._request(1,self.X)
+        self.assertGreater(len(big),2**16)
+        responses = self._exchange([big,self._request(2,self.X[:1])])
+        np.testing.assert_allclose(responses[1]['y'],self.reg.predict(self.X))
+        np.testing.assert_allclose(responses[2]['y'],self.reg.predict(self.X[:1]))
+    
+    def test_request_over_limit(self):
+        responses = self._exchange([self._request(1,self.X),
+                                    self._request(2,self.X[:1])],
+                                   max_request=2**16)
+        self.assertIn('longer than',responses[None]['error'])
+        np.testing.assert_allclose(responses[2]['y'],self.reg.predict(self.X[:1]))
+
+
+if __name__ == '__main__':
+    unittest.main()